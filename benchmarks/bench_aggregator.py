@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Aggregator Throughput Benchmark
+===============================
+
+Measures how many forwarded events a central aggregator can take.
+
+1. parse: pre-built DATA datagrams from many nodes are fed straight into
+   Aggregator.handle_datagram() (sequence tracking, fusion, routing,
+   debouncing, ACK building) - the aggregator's CPU ceiling
+2. loopback: simulated nodes (EventForwarder instances, each with its own
+   UDP socket) send over 127.0.0.1 to a running aggregator, dropping a
+   share of their datagrams, until every event is acknowledged - what a
+   real deployment sees, including retransmits
+
+Usage:
+    python3 benchmarks/bench_aggregator.py --nodes 500 --events 50 --loss 0.05
+"""
+
+import argparse
+import os
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from aggregator import Aggregator
+from event_forwarder import MAX_BATCH, EventForwarder, pack_data, pack_event
+from notification_scheduler import Button
+from rf_event import RFEvent
+
+
+class CountingNotifier:
+    def __init__(self):
+        self.sent = 0
+
+    def notify_doorbell(self, button=None):
+        self.sent += 1
+
+
+class LossySocket:
+    def __init__(self, loss, seed):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.rng = random.Random(seed)
+        self.loss = loss
+
+    def sendto(self, datagram, address):
+        if self.rng.random() >= self.loss:
+            self.sock.sendto(datagram, address)
+
+    def recv(self, size):
+        return self.sock.recv(size)
+
+    def close(self):
+        self.sock.close()
+
+
+def buttons_for(nodes):
+    return {1000 + node_id: Button(1000 + node_id) for node_id in range(nodes)}
+
+
+def bench_parse(nodes, events_per_node):
+    """Feed pre-built datagrams to handle_datagram; returns (events/s, datagrams/s)."""
+    wall = time.time()
+    datagrams = []
+    for node_id in range(nodes):
+        records = [pack_event(RFEvent(1000 + node_id, 0.0, protocol=1, pulselength=350,
+                                      receiver=27), wall + i * 0.05)
+                   for i in range(events_per_node)]
+        for first in range(0, events_per_node, MAX_BATCH):
+            datagrams.append(pack_data(node_id, 1, first, 0, records[first:first + MAX_BATCH]))
+    aggregator = Aggregator(CountingNotifier(), buttons_for(nodes))
+    started = time.perf_counter()
+    for datagram in datagrams:
+        aggregator.handle_datagram(datagram, None)
+    elapsed = time.perf_counter() - started
+    return aggregator.events / elapsed, len(datagrams) / elapsed
+
+
+def bench_loopback(nodes, events_per_node, loss):
+    """Run forwarders against a live aggregator; returns (events/s, stats, resent)."""
+    aggregator = Aggregator(CountingNotifier(), buttons_for(nodes))
+    address = aggregator.start('127.0.0.1', 0)
+    forwarders = [EventForwarder(address, node_id, flush_interval=0.0, heartbeat_interval=0.05,
+                                 retransmit_interval=0.02, sock=LossySocket(loss, node_id))
+                  for node_id in range(nodes)]
+    started = time.perf_counter()
+    now = time.monotonic()
+    for i in range(events_per_node):
+        for node_id, forwarder in enumerate(forwarders):
+            forwarder.submit(RFEvent(1000 + node_id, now + i * 0.05, receiver=27))
+    while any(forwarder.pending() for forwarder in forwarders):
+        for forwarder in forwarders:
+            forwarder.poll()
+        time.sleep(0.002)
+    elapsed = time.perf_counter() - started
+    aggregator.stop()
+    resent = sum(forwarder.events_resent for forwarder in forwarders)
+    for forwarder in forwarders:
+        forwarder.close()
+    return aggregator.events / elapsed, aggregator.stats(), resent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Central aggregator throughput")
+    parser.add_argument('--nodes', type=int, default=500)
+    parser.add_argument('--events', type=int, default=50, help="Events per node")
+    parser.add_argument('--loss', type=float, default=0.05,
+                        help="Share of node datagrams dropped in the loopback run")
+    args = parser.parse_args()
+
+    events_rate, datagram_rate = bench_parse(args.nodes, args.events)
+    print(f"parse:    {events_rate:>9.0f} events/s, {datagram_rate:>7.0f} datagrams/s "
+          f"({args.nodes} nodes x {args.events} events)")
+
+    events_rate, stats, resent = bench_loopback(args.nodes, args.events, args.loss)
+    print(f"loopback: {events_rate:>9.0f} events/s with {args.loss:.0%} loss "
+          f"(nodes and aggregator on this host)")
+    print(f"          {stats['events']} delivered, {stats['lost']} lost, {resent} resent, "
+          f"{stats['duplicates']} duplicates, {stats['datagrams']} datagrams")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Async Runtime Benchmark
+=======================
+
+Compares the threaded design (DoorbellService + NotificationScheduler +
+TelegramNotifier over requests) with the asyncio runtime
+(AsyncDoorbellService + AsyncTelegramNotifier) on memory, CPU and
+context switches.
+
+Each worker is a fresh interpreter that receives button presses at a fixed
+rate, sends every one to the local fake Bot API, and runs N auxiliary jobs
+that wake up once a second (standing in for metrics, command polling and
+watchdog pings). The threaded design runs each job on its own thread; the
+asyncio runtime runs them as coroutines.
+
+Usage:
+    python3 benchmarks/bench_async_runtime.py --jobs 0 4 16 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+from fake_bot_api import FakeBotAPI
+
+BUTTON_CODE = 4273816
+
+
+class TimedPressMonitor:
+    def __init__(self, rate):
+        """RF monitor stand-in that reports one button press every 1/rate seconds."""
+        self.interval = 1.0 / rate
+        self.next_press = None
+        self.peak_threads = 0
+
+    def start(self):
+        self.next_press = time.monotonic()
+
+    def check_for_event(self):
+        from rf_event import RFEvent
+        self.peak_threads = max(self.peak_threads, threading.active_count())
+        now = time.monotonic()
+        if now < self.next_press:
+            return None
+        self.next_press += self.interval
+        return RFEvent(BUTTON_CODE, now)
+
+    def cleanup(self):
+        pass
+
+
+def worker(runtime, base_url, jobs, rate, seconds):
+    """Run one doorbell process and print its resource usage as JSON."""
+    import asyncio
+    from notification_scheduler import Button
+
+    class Config:
+        buttons = {BUTTON_CODE: Button(BUTTON_CODE)}
+
+    ticks = [0]
+    rf_monitor = TimedPressMonitor(rate)
+    if runtime == 'async':
+        from async_doorbell_service import AsyncDoorbellService
+        from async_telegram_notifier import AsyncTelegramNotifier
+
+        async def job(service):
+            while True:
+                await asyncio.sleep(1.0)
+                service.metrics()
+                ticks[0] += 1
+
+        notifier = AsyncTelegramNotifier('0:bench', '1', base_url=base_url)
+        service = AsyncDoorbellService(Config(), notifier, rf_monitor, debounce_time=0.0)
+        for _ in range(jobs):
+            service.add_task(job)
+        service.start()
+        service.run(duration=seconds)
+        sent = service.sent
+    else:
+        from doorbell_service import DoorbellService
+        from notification_scheduler import NotificationScheduler
+        from telegram_notifier import TelegramNotifier
+
+        stop = threading.Event()
+
+        def job():
+            while not stop.wait(1.0):
+                scheduler.pending()
+                ticks[0] += 1
+
+        notifier = TelegramNotifier('0:bench', '1', base_url=base_url)
+        scheduler = NotificationScheduler(notifier).start()
+        service = DoorbellService(Config(), scheduler, rf_monitor, debounce_time=0.0)
+        for _ in range(jobs):
+            threading.Thread(target=job, daemon=True).start()
+        service.start()
+        service.run(duration=seconds)
+        stop.set()
+        scheduler.stop()
+        sent = scheduler.sent
+    service.stop()
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    print(json.dumps({
+        'cpu': usage.ru_utime + usage.ru_stime,
+        'rss_kb': usage.ru_maxrss,
+        'voluntary': usage.ru_nvcsw,
+        'involuntary': usage.ru_nivcsw,
+        'threads': rf_monitor.peak_threads,
+        'sent': sent,
+        'ticks': ticks[0],
+    }))
+
+
+def run_worker(runtime, base_url, jobs, rate, seconds):
+    output = subprocess.run(
+        [sys.executable, __file__, '--worker', runtime, '--base-url', base_url,
+         '--jobs', str(jobs), '--rate', str(rate), '--seconds', str(seconds)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threaded vs asyncio runtime overhead")
+    parser.add_argument('--jobs', type=int, nargs='+', default=[0, 4, 16],
+                        help="Auxiliary once-a-second jobs per worker")
+    parser.add_argument('--rate', type=float, default=5.0, help="Button presses per second")
+    parser.add_argument('--seconds', type=float, default=5.0, help="Wall time per worker")
+    parser.add_argument('--latency', type=float, default=0.02, help="Fake API latency in seconds")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.base_url, args.jobs[0], args.rate, args.seconds)
+        return
+
+    api = FakeBotAPI(latency=args.latency).start()
+    try:
+        print(f"{'jobs':>5}  {'runtime':<8}{'threads':>8}{'CPU s':>8}{'RSS MiB':>9}"
+              f"{'vol csw':>9}{'invol csw':>10}{'sent':>6}")
+        for jobs in args.jobs:
+            for runtime in ('thread', 'async'):
+                result = run_worker(runtime, api.base_url, jobs, args.rate, args.seconds)
+                print(f"{jobs:>5}  {runtime:<8}{result['threads']:>8}{result['cpu']:>8.2f}"
+                      f"{result['rss_kb'] / 1024:>9.1f}{result['voluntary']:>9}"
+                      f"{result['involuntary']:>10}{result['sent']:>6}")
+    finally:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
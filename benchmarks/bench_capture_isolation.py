@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Capture Isolation Benchmark
+===========================
+
+Measures RF frame error rate with capture running in-process (sharing the GIL
+with notification work) versus in a dedicated child process.
+
+How edges are simulated:
+- A capture loop sleeps until each scheduled edge time, the way rpi_rf's
+  callback thread is woken by a GPIO interrupt, then timestamps the edge.
+- The kernel wakes the thread on time; any extra delay is the time spent
+  waiting for the GIL (or the CPU), which is what corrupts pulse timing.
+- A frame is an error if any measured edge interval differs from the
+  transmitted interval by more than rpi_rf's tolerance (80% of the pulse length).
+
+"HTTP load" is simulated with threads doing the pure-Python work a
+notification involves (JSON encoding, string building, header parsing).
+
+Usage:
+    python3 benchmarks/bench_capture_isolation.py --frames 200 --load-threads 2
+"""
+
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+
+# Protocol 1 timing (microseconds), as in rpi_rf
+PULSE_LENGTH = 350
+SYNC_LOW = 31
+TOLERANCE = PULSE_LENGTH * 80 / 100
+BITS_PER_FRAME = 24
+
+
+def frame_intervals(code):
+    """
+    Build the edge intervals (in microseconds) for one protocol 1 frame.
+
+    Args:
+        code (int): 24-bit code to encode
+
+    Returns:
+        list: Durations between consecutive edges
+    """
+    intervals = []
+    for bit in range(BITS_PER_FRAME - 1, -1, -1):
+        if (code >> bit) & 1:
+            intervals += [3 * PULSE_LENGTH, PULSE_LENGTH]
+        else:
+            intervals += [PULSE_LENGTH, 3 * PULSE_LENGTH]
+    intervals += [PULSE_LENGTH, SYNC_LOW * PULSE_LENGTH]
+    return intervals
+
+
+def capture_frames(frame_count, code=0x413698):
+    """
+    Capture frames by waking up at each scheduled edge.
+
+    Args:
+        frame_count (int): Number of frames to capture
+        code (int): Code carried by every frame
+
+    Returns:
+        tuple: (error frames, list of worst per-frame interval errors in microseconds)
+    """
+    intervals = frame_intervals(code)
+    errors = 0
+    worst = []
+    perf_counter = time.perf_counter
+    sleep = time.sleep
+
+    for _ in range(frame_count):
+        target = perf_counter()
+        last_seen = target
+        frame_worst = 0.0
+        for interval in intervals:
+            target += interval / 1_000_000
+            delay = target - perf_counter()
+            if delay > 0:
+                sleep(delay)
+            seen = perf_counter()
+            error = abs((seen - last_seen) * 1_000_000 - interval)
+            if error > frame_worst:
+                frame_worst = error
+            last_seen = seen
+        if frame_worst > TOLERANCE:
+            errors += 1
+        worst.append(frame_worst)
+    return errors, worst
+
+
+def notification_load(stop_event):
+    """
+    Pure-Python work resembling building and parsing notification requests.
+
+    Args:
+        stop_event (threading.Event): Set to stop the load
+    """
+    payload = {"chat_id": "123456789", "text": "🔔 DOORBELL PRESSED! 🔔\nTime: 12:00:00" * 20}
+    headers = "\r\n".join(f"X-Header-{i}: value-{i}" for i in range(40))
+    while not stop_event.is_set():
+        body = json.dumps(payload)
+        json.loads(body)
+        dict(line.split(": ", 1) for line in headers.split("\r\n"))
+        "&".join(f"{key}={value}" for key, value in payload.items())
+
+
+def _child_capture(conn, frame_count):
+    conn.send(capture_frames(frame_count))
+    conn.close()
+
+
+def run_mode(mode, frame_count, load_threads):
+    """
+    Run one benchmark configuration.
+
+    Args:
+        mode (str): 'thread' (capture in this process) or 'process' (child process)
+        frame_count (int): Frames to capture
+        load_threads (int): Number of simulated notification threads
+
+    Returns:
+        tuple: (error frames, worst interval errors)
+    """
+    stop_event = threading.Event()
+    workers = [threading.Thread(target=notification_load, args=(stop_event,), daemon=True)
+               for _ in range(load_threads)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        if mode == 'process':
+            context = multiprocessing.get_context('fork')
+            reader, writer = context.Pipe(duplex=False)
+            process = context.Process(target=_child_capture, args=(writer, frame_count))
+            process.start()
+            writer.close()
+            result = reader.recv()
+            process.join()
+        else:
+            result = []
+            capture = threading.Thread(target=lambda: result.extend(capture_frames(frame_count)))
+            capture.start()
+            capture.join()
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+    return result[0], result[1]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame error rate: in-process vs child-process capture")
+    parser.add_argument('--frames', type=int, default=200, help="Frames per configuration")
+    parser.add_argument('--load-threads', type=int, default=2, help="Simulated notification threads")
+    args = parser.parse_args()
+
+    print(f"Frames per run: {args.frames}, tolerance: ±{TOLERANCE:.0f} µs")
+    print(f"{'configuration':<28}{'frame errors':>14}{'FER':>8}{'p50 err µs':>12}{'p99 err µs':>12}")
+    configurations = [
+        ('thread, idle', 'thread', 0),
+        ('thread, HTTP load', 'thread', args.load_threads),
+        ('process, HTTP load', 'process', args.load_threads),
+    ]
+    for label, mode, load in configurations:
+        errors, worst = run_mode(mode, args.frames, load)
+        print(f"{label:<28}{errors:>14}{errors / args.frames:>8.1%}"
+              f"{percentile(worst, 0.5):>12.0f}{percentile(worst, 0.99):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Batched Edge Reader Benchmark
+=============================
+
+Compares decoding a capture one edge per read (like one Python wake-up per
+GPIO callback) with reading edge events in batches via BatchedRFMonitor.
+
+The capture is written to a temporary file in the kernel's gpio_v2_line_event
+record format, so this runs on any Linux box.
+
+Usage:
+    python3 benchmarks/bench_edge_reader.py --presses 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from edge_reader import EVENT_SIZE, BatchedRFMonitor, FileEdgeSource, pack_events
+from rf_decoder import encode_transmission
+
+
+def build_capture(path, presses):
+    timestamps_ns = []
+    for press in range(presses):
+        start_us = 1_000_000 + press * 2_000_000
+        timestamps_ns += [t * 1000 for t in encode_transmission(4273816, start_us=start_us)]
+    with open(path, 'wb') as f:
+        f.write(pack_events(timestamps_ns))
+    return len(timestamps_ns)
+
+
+def decode_all(path, batch_size):
+    monitor = BatchedRFMonitor(FileEdgeSource(path), batch_size=batch_size)
+    monitor.start()
+    frames = 0
+    start = time.perf_counter()
+    size = os.path.getsize(path)
+    # Keep polling until every record has been read and decoded
+    while True:
+        event = monitor.check_for_event()
+        if event is not None:
+            frames += 1
+        elif os.lseek(monitor.edge_source.fd, 0, os.SEEK_CUR) >= size:
+            break
+    elapsed = time.perf_counter() - start
+    reads = monitor.batches_read
+    monitor.cleanup()
+    return elapsed, frames, reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-edge vs batched edge event decoding")
+    parser.add_argument('--presses', type=int, default=200, help="Button presses in the capture")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'edges.bin')
+        edges = build_capture(path, args.presses)
+        print(f"Capture: {edges} edges ({edges * EVENT_SIZE // 1024} KiB), {args.presses} presses")
+        print(f"{'batch size':>10}{'reads':>10}{'frames':>10}{'edges/s':>14}{'µs/edge':>10}")
+        for batch_size in (1, 16, 64, 256, 1024):
+            elapsed, frames, reads = decode_all(path, batch_size)
+            print(f"{batch_size:>10}{reads:>10}{frames:>10}{edges / elapsed:>14,.0f}"
+                  f"{elapsed / edges * 1_000_000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Capture Jitter Benchmark
+========================
+
+Prints a wake-up lateness histogram for a periodic capture loop with and
+without low-jitter mode (CPU pinning, SCHED_FIFO when permitted, gc.freeze()
+and raised GC thresholds).
+
+The process holds a large long-lived object graph (like the modules, config
+and buffers a real service keeps) and the loop allocates a few small
+containers per tick, so the garbage collector runs the way it does in the
+service. Each configuration runs in a fresh forked child so tuning from one
+run cannot leak into the next.
+
+Usage:
+    python3 benchmarks/bench_jitter.py --ticks 20000 --period-us 500
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from low_jitter import apply_low_jitter, freeze_startup_objects
+
+# Histogram bucket upper bounds in microseconds (last bucket is open-ended)
+BUCKETS = (50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def build_startup_state(size):
+    """Long-lived object graph standing in for service state after startup."""
+    return [{'id': i, 'tags': [i, str(i)]} for i in range(size)]
+
+
+def periodic_loop(ticks, period):
+    """
+    Wake up every period seconds and record how late each wake-up was.
+
+    Args:
+        ticks (int): Number of wake-ups
+        period (float): Seconds between scheduled wake-ups
+
+    Returns:
+        list: Lateness of each wake-up in microseconds
+    """
+    lateness = [0.0] * ticks
+    recent = deque(maxlen=256)
+    perf_counter = time.perf_counter
+    sleep = time.sleep
+    target = perf_counter()
+    for i in range(ticks):
+        target += period
+        delay = target - perf_counter()
+        if delay > 0:
+            sleep(delay)
+        lateness[i] = (perf_counter() - target) * 1_000_000
+        # Per-event work that allocates, like building an event record
+        recent.append({'code': i, 'edges': [i, i + 1]})
+    return lateness
+
+
+def _run(conn, low_jitter, ticks, period, state_size):
+    state = build_startup_state(state_size)
+    applied = None
+    if low_jitter:
+        applied = apply_low_jitter()
+        freeze_startup_objects()
+    conn.send((applied, periodic_loop(ticks, period)))
+    conn.close()
+    del state
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS) + 1)
+    for value in values:
+        for index, bound in enumerate(BUCKETS):
+            if value < bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wake-up jitter with and without low-jitter mode")
+    parser.add_argument('--ticks', type=int, default=20000, help="Wake-ups per configuration")
+    parser.add_argument('--period-us', type=int, default=500, help="Wake-up period in microseconds")
+    parser.add_argument('--state-size', type=int, default=200000, help="Long-lived objects to hold")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('fork')
+    results = {}
+    for label, low_jitter in (('default', False), ('low-jitter', True)):
+        reader, writer = context.Pipe(duplex=False)
+        process = context.Process(target=_run, args=(writer, low_jitter, args.ticks,
+                                                      args.period_us / 1_000_000, args.state_size))
+        process.start()
+        writer.close()
+        applied, lateness = reader.recv()
+        process.join()
+        results[label] = lateness
+        if applied is not None:
+            print(f"low-jitter applied: CPU {applied['cpu']}, SCHED_FIFO {applied['realtime']}")
+
+    labels = [f"<{bound}µs" for bound in BUCKETS] + [f">={BUCKETS[-1]}µs"]
+    print(f"{'lateness':<12}" + "".join(f"{label:>14}" for label in results))
+    counts = {label: histogram(values) for label, values in results.items()}
+    for index, bucket in enumerate(labels):
+        print(f"{bucket:<12}" + "".join(f"{counts[label][index]:>14}" for label in results))
+    for label, values in results.items():
+        ordered = sorted(values)
+        print(f"{label}: p50 {ordered[len(ordered) // 2]:.0f}µs, "
+              f"p99 {ordered[int(len(ordered) * 0.99)]:.0f}µs, max {ordered[-1]:.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Memory Footprint Benchmark
+==========================
+
+Measures the resident memory (RSS) of the doorbell process over hours of
+simulated traffic, in the low-memory profile a Pi Zero runs (LOW_MEMORY=1,
+see config.py) or with requests for comparison.
+
+A worker process imports what main.py imports for the threaded runtime and
+builds the same stack - TelegramNotifier, JamDetector, LinkQuality and
+DoorbellService - driven by the soak harness's replayed RF traffic on a
+SimulatedClock. Every debounced press is a real POST to a fake Bot API
+served from this (parent) process, so the server doesn't count towards
+the worker's RSS. The worker reads VmRSS from /proc/self/status after the
+first simulated hour (warm-up) and at the end.
+
+Usage:
+    python3 benchmarks/bench_memory.py --hours 6
+    python3 benchmarks/bench_memory.py --hours 6 --transport requests
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+SECONDS_PER_HOUR = 3600
+# Modules the low-memory profile should never load
+HEAVY_MODULES = ('requests', 'urllib3', 'dotenv', 'rpi_rf', 'RPi', 'asyncio', 'multiprocessing')
+
+
+def read_rss_kb():
+    """
+    Get this process's resident set size.
+
+    Returns:
+        int: VmRSS in KiB (Linux only)
+    """
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    raise OSError("VmRSS not found in /proc/self/status")
+
+
+def run_worker(api_url, hours, transport, press_interval, noise_interval, seed):
+    """
+    Run the service stack against simulated traffic (in a fresh interpreter).
+
+    Returns:
+        dict: RSS samples, notification counts and heavy modules loaded
+    """
+    started_rss = read_rss_kb()
+    # What main.py imports for RUNTIME=thread with the default features
+    from circuit_breaker import CircuitBreaker
+    from clock import SimulatedClock
+    from config import DoorbellConfig  # noqa: F401
+    from control_server import ControlServer  # noqa: F401
+    from doorbell_service import DoorbellService
+    from jam_detector import JamDetector
+    from link_quality import LinkQuality
+    from profiler import SamplingProfiler  # noqa: F401
+    from rf_monitor import RFMonitor  # noqa: F401
+    from structured_log import setup_logging  # noqa: F401
+    from telegram_notifier import TelegramNotifier
+    from soak_harness import ReplayRFMonitor, SoakConfig, expected_notifications, synthetic_frames
+
+    if transport == 'stdlib':
+        from http_client import HTTPSession
+        session = HTTPSession()
+    else:
+        session = None
+
+    duration = hours * SECONDS_PER_HOUR
+    clock = SimulatedClock(start_time=1_700_000_000.0)
+    config = SoakConfig(4273816)
+    frames, presses = synthetic_frames(clock.time(), duration, config.button_code,
+                                       press_interval, noise_interval, frames_per_press=6,
+                                       min_press_gap=3.0, seed=seed)
+    notifier = TelegramNotifier('123:bench', '42', clock=clock, base_url=api_url,
+                                breaker=CircuitBreaker(clock=clock), session=session)
+    service = DoorbellService(config, notifier, ReplayRFMonitor(frames, clock), clock=clock,
+                              jam_detector=JamDetector(),
+                              link_quality=LinkQuality(config.buttons))
+    service.start()
+    # The first hour is warm-up (connection pool, caches, recent_events filling up)
+    service.run(duration=min(SECONDS_PER_HOUR, duration))
+    warm_rss = read_rss_kb()
+    service.run(duration=max(0.0, duration - SECONDS_PER_HOUR))
+    end_rss = read_rss_kb()
+    service.stop()
+    notifier.close()
+
+    return {
+        'transport': transport,
+        'simulated_hours': hours,
+        'presses': len(presses),
+        'expected_notifications': expected_notifications(presses, service.debounce_time),
+        'frames_seen': service.events_seen,
+        'breaker_state': notifier.breaker.state,
+        'rss_start_kb': started_rss,
+        'rss_warm_kb': warm_rss,
+        'rss_end_kb': end_rss,
+        'rss_growth_kb': end_rss - warm_rss,
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def measure(hours=6.0, transport='stdlib', press_interval=120.0, noise_interval=20.0, seed=0):
+    """
+    Serve a fake Bot API here and run the worker in a fresh interpreter.
+
+    Args:
+        hours (float): Simulated hours of traffic
+        transport (str): 'stdlib' (low-memory profile) or 'requests'
+        press_interval (float): Mean seconds between button presses
+        noise_interval (float): Mean seconds between noise bursts
+        seed (int): Random seed for the traffic
+
+    Returns:
+        dict: Worker results plus 'messages', the notifications the API received
+    """
+    from fake_bot_api import FakeBotAPI
+
+    api = FakeBotAPI().start()
+    try:
+        env = dict(os.environ, LOW_MEMORY='1' if transport == 'stdlib' else '0')
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', '--api-url', api.base_url,
+             '--hours', str(hours), '--transport', transport,
+             '--press-interval', str(press_interval), '--noise-interval', str(noise_interval),
+             '--seed', str(seed)],
+            env=env, check=True, capture_output=True, text=True).stdout
+    finally:
+        api.stop()
+    results = json.loads(output.strip().splitlines()[-1])
+    results['messages'] = len(api.messages)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident memory over simulated hours of traffic")
+    parser.add_argument('--hours', type=float, default=6.0, help="Simulated hours to run")
+    parser.add_argument('--transport', choices=('stdlib', 'requests'), default='stdlib',
+                        help="HTTP transport: stdlib (LOW_MEMORY=1) or requests")
+    parser.add_argument('--press-interval', type=float, default=120.0,
+                        help="Mean seconds between button presses")
+    parser.add_argument('--noise-interval', type=float, default=20.0,
+                        help="Mean seconds between noise bursts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--api-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.api_url, args.hours, args.transport,
+                                    args.press_interval, args.noise_interval, args.seed)))
+        return
+
+    results = measure(args.hours, args.transport, args.press_interval, args.noise_interval,
+                      args.seed)
+    print(f"transport: {results['transport']}, {results['simulated_hours']:g} simulated hours, "
+          f"{results['presses']} presses, {results['messages']}/"
+          f"{results['expected_notifications']} notifications delivered")
+    print(f"RSS: {results['rss_start_kb']} KiB at start, {results['rss_warm_kb']} KiB after "
+          f"warm-up, {results['rss_end_kb']} KiB at the end ({results['rss_growth_kb']:+d} KiB)")
+    print(f"heavy modules loaded: {', '.join(results['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
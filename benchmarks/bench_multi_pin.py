@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Multi-Pin Benchmark
+===================
+
+Compares CPU time and memory (RSS) of one service process watching N
+receivers against N separate service processes with one receiver each.
+
+Every worker is a fresh interpreter that imports the same modules as
+main.py, builds a TelegramNotifier (no messages are sent) and runs the
+DoorbellService loop for a fixed wall-clock time. Edges are replayed from
+capture files in the kernel event format through BatchedRFMonitor, so no
+GPIO hardware is needed.
+
+Usage:
+    python3 benchmarks/bench_multi_pin.py --receivers 1 2 4 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from edge_reader import pack_events
+from rf_decoder import encode_transmission
+
+FIRST_PIN = 17
+PRESSES_PER_PIN = 20
+
+
+def write_capture(path, pins):
+    """Write interleaved edge events for every pin in pins."""
+    edges = []
+    for index, pin in enumerate(pins):
+        for press in range(PRESSES_PER_PIN):
+            start_us = 1_000_000 + press * 1_000_000 + index * 7_000
+            code = 1_000_000 + pin
+            edges += [(t * 1000, pin) for t in encode_transmission(code, start_us=start_us)]
+    edges.sort()
+    with open(path, 'wb') as f:
+        for timestamp, pin in edges:
+            f.write(pack_events([timestamp], offset=pin))
+
+
+def worker(capture, pins, seconds):
+    """Run one service process and print its resource usage as JSON."""
+    from clock import SystemClock
+    from doorbell_service import DoorbellService
+    from edge_reader import BatchedRFMonitor, FileEdgeSource
+    from event_fusion import EventFusion
+    from notification_scheduler import Button
+    from telegram_notifier import TelegramNotifier
+
+    class Config:
+        button_code = 1_000_000 + pins[0]
+        buttons = {button_code: Button(button_code)}
+
+    class CountingNotifier(TelegramNotifier):
+        def notify_doorbell(self, button=None):
+            self.count = getattr(self, 'count', 0) + 1
+
+    notifier = CountingNotifier('0:benchmark', '0')
+    rf_monitor = BatchedRFMonitor(FileEdgeSource(capture))
+    fusion = EventFusion() if len(pins) > 1 else None
+    service = DoorbellService(Config(), notifier, rf_monitor, clock=SystemClock(), fusion=fusion)
+    service.start()
+    service.run(duration=seconds)
+    metrics = rf_monitor.metrics()
+    service.stop()
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    print(json.dumps({
+        'cpu': usage.ru_utime + usage.ru_stime,
+        'rss_kb': usage.ru_maxrss,
+        'frames': sum(pin_metrics['frames'] for pin_metrics in metrics.values()),
+    }))
+
+
+def run_worker(capture, pins, seconds):
+    output = subprocess.run(
+        [sys.executable, __file__, '--worker', capture, '--pins', ','.join(map(str, pins)),
+         '--seconds', str(seconds)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="One process with N pins vs N processes")
+    parser.add_argument('--receivers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--seconds', type=float, default=5.0, help="Wall time per worker")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--pins', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, [int(pin) for pin in args.pins.split(',')], args.seconds)
+        return
+
+    print(f"{'receivers':>9}  {'layout':<16}{'CPU s':>8}{'RSS MiB':>10}{'frames':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.receivers:
+            pins = list(range(FIRST_PIN, FIRST_PIN + count))
+
+            shared = os.path.join(tmp, f'shared-{count}.bin')
+            write_capture(shared, pins)
+            single = run_worker(shared, pins, args.seconds)
+
+            separate = []
+            for pin in pins:
+                capture = os.path.join(tmp, f'pin-{pin}.bin')
+                write_capture(capture, [pin])
+                separate.append(run_worker(capture, [pin], args.seconds))
+
+            print(f"{count:>9}  {'1 process':<16}{single['cpu']:>8.2f}"
+                  f"{single['rss_kb'] / 1024:>10.1f}{single['frames']:>8}")
+            print(f"{count:>9}  {f'{count} processes':<16}{sum(r['cpu'] for r in separate):>8.2f}"
+                  f"{sum(r['rss_kb'] for r in separate) / 1024:>10.1f}"
+                  f"{sum(r['frames'] for r in separate):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Notification Path Benchmark
+===========================
+
+Drives TelegramNotifier end to end against the local fake Bot API.
+
+Phase 1 (load): send notifications at increasing event rates and report
+throughput and p50/p99 delivery latency (time from the event being due to
+Telegram accepting it, so queueing behind slow requests counts).
+
+Phase 2 (outage): at a fixed rate, take the API down for a while and report
+how long it takes until a notification gets through after it comes back.
+The notifier's circuit breaker fails presses fast during the outage, so the
+recovery time depends on its probe delay (--breaker-delay).
+
+Usage:
+    python3 benchmarks/bench_notification_path.py --latency 0.05 --rates 1 5 10 20 50
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+from circuit_breaker import CircuitBreaker
+from fake_bot_api import FakeBotAPI
+from telegram_notifier import TelegramNotifier
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def drive(notifier, rate, seconds, on_tick=None):
+    """
+    Send notifications at a fixed event rate from one sender (like the service loop).
+
+    Args:
+        notifier (TelegramNotifier): Notifier under test
+        rate (float): Events per second
+        seconds (float): How long events keep arriving
+        on_tick: Optional callable(elapsed) run before each event (used to inject outages)
+
+    Returns:
+        list: (due offset, completion offset, delivered) per event
+    """
+    results = []
+    start = time.monotonic()
+    count = int(rate * seconds)
+    for i in range(count):
+        due = start + i / rate
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if on_tick is not None:
+            on_tick(time.monotonic() - start)
+        delivered = notifier.notify_doorbell()
+        results.append((due - start, time.monotonic() - start, delivered))
+    return results
+
+
+def load_phase(api, rates, seconds, timeout):
+    print(f"{'rate/s':>8}{'sent':>7}{'ok':>6}{'thru/s':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for rate in rates:
+        notifier = TelegramNotifier('0:bench', '1', timeout=timeout, base_url=api.base_url)
+        results = drive(notifier, rate, seconds)
+        notifier.close()
+        elapsed = max(done for _due, done, _ok in results)
+        latencies = [(done - due) * 1000 for due, done, ok in results if ok]
+        delivered = len(latencies)
+        print(f"{rate:>8g}{len(results):>7}{delivered:>6}{delivered / elapsed:>9.1f}"
+              f"{percentile(latencies, 0.5):>10.1f}{percentile(latencies, 0.99):>10.1f}")
+
+
+def outage_phase(api, rate, outage_start, outage_length, seconds, timeout, breaker_delay):
+    breaker = CircuitBreaker(base_delay=breaker_delay)
+    notifier = TelegramNotifier('0:bench', '1', timeout=timeout, base_url=api.base_url,
+                                breaker=breaker)
+    outage_end = outage_start + outage_length
+    lock = threading.Lock()
+
+    def on_tick(elapsed):
+        with lock:
+            api.outage = outage_start <= elapsed < outage_end
+
+    requests_before = api.requests_seen
+    results = drive(notifier, rate, seconds, on_tick=on_tick)
+    api.outage = False
+    notifier.close()
+
+    failed = sum(1 for _due, _done, ok in results if not ok)
+    attempts = api.requests_seen - requests_before
+    recovered = [done for _due, done, ok in results if ok and done >= outage_end]
+    print(f"\nOutage of {outage_length:g}s at {rate:g} events/s: {failed} failed notifications, "
+          f"{attempts} requests for {len(results)} events")
+    print("Breaker transitions: " + ", ".join(f"{old}->{new}" for _t, old, new in breaker.transitions))
+    if recovered:
+        print(f"Recovery time after the API came back: {(recovered[0] - outage_end) * 1000:.0f} ms")
+    else:
+        print("No notification got through after the outage ended")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end notification path benchmark")
+    parser.add_argument('--latency', type=float, default=0.05, help="Fake API latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--reset-rate', type=float, default=0.0)
+    parser.add_argument('--rates', type=float, nargs='+', default=[1, 5, 10, 20, 50])
+    parser.add_argument('--seconds', type=float, default=3.0, help="Seconds per load step")
+    parser.add_argument('--timeout', type=float, default=5.0, help="Notifier request timeout")
+    parser.add_argument('--outage', type=float, default=2.0, help="Outage length in seconds")
+    parser.add_argument('--breaker-delay', type=float, default=0.5,
+                        help="Circuit breaker delay before the first probe")
+    args = parser.parse_args()
+    # Per-notification warnings during the outage would drown the report
+    logging.disable(logging.CRITICAL)
+
+    api = FakeBotAPI(latency=args.latency, error_rate=args.error_rate,
+                     rate_limit_rate=args.rate_limit_rate, reset_rate=args.reset_rate,
+                     seed=0).start()
+    try:
+        load_phase(api, args.rates, args.seconds, args.timeout)
+        outage_phase(api, rate=5, outage_start=1.0, outage_length=args.outage,
+                     seconds=args.outage + 3.0, timeout=args.timeout,
+                     breaker_delay=args.breaker_delay)
+    finally:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Priority Scheduler Benchmark
+============================
+
+Floods the notification path with routine (low priority) presses faster
+than Telegram can take them, while a critical button fires every so often,
+and reports the critical notifications' queue-to-sent latency over time.
+
+Runs twice against the local fake Bot API: once in plain FIFO order
+(class_step=0, what a single queue would do) and once with priority
+classes. With FIFO, critical latency grows with the routine backlog; with
+priorities it should stay flat at roughly one send time.
+
+Usage:
+    python3 benchmarks/bench_priority_scheduler.py --latency 0.05 --routine-rate 30 --seconds 6
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+from fake_bot_api import FakeBotAPI
+from notification_scheduler import Button, NotificationScheduler
+from telegram_notifier import TelegramNotifier
+
+CRITICAL = Button(1, 'Panic button', 'critical')
+ROUTINE = Button(2, 'Mailbox', 'low')
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(api, class_step, routine_rate, critical_interval, seconds):
+    """
+    Drive one scheduler and return per-window critical latencies.
+
+    Returns:
+        tuple: (list of (window start, queue depth, critical latencies ms),
+                routine latencies ms)
+    """
+    notifier = TelegramNotifier('0:bench', '1', base_url=api.base_url)
+    scheduler = NotificationScheduler(notifier, class_step=class_step, max_queue=100000)
+    windows = []
+    scheduler.start()
+    start = time.monotonic()
+    next_routine = next_critical = start
+    window_start = start
+    seen_critical = 0
+    while time.monotonic() - start < seconds:
+        now = time.monotonic()
+        if now >= next_routine:
+            scheduler.notify_doorbell(ROUTINE)
+            next_routine += 1.0 / routine_rate
+        if now >= next_critical:
+            scheduler.notify_doorbell(CRITICAL)
+            next_critical += critical_interval
+        if now - window_start >= 1.0:
+            critical = list(scheduler.latencies['critical'])[seen_critical:]
+            seen_critical += len(critical)
+            windows.append((window_start - start, scheduler.pending(),
+                            [latency * 1000 for latency in critical]))
+            window_start = now
+        time.sleep(max(0.0, min(next_routine, next_critical) - time.monotonic()))
+    scheduler.stop()
+    notifier.close()
+    routine = [latency * 1000 for latency in scheduler.latencies['low']]
+    return windows, routine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Critical-event latency under routine saturation")
+    parser.add_argument('--latency', type=float, default=0.05, help="Fake API latency in seconds")
+    parser.add_argument('--routine-rate', type=float, default=30.0, help="Routine presses per second")
+    parser.add_argument('--critical-interval', type=float, default=0.5,
+                        help="Seconds between critical presses")
+    parser.add_argument('--seconds', type=float, default=6.0)
+    args = parser.parse_args()
+
+    api = FakeBotAPI(latency=args.latency, seed=0).start()
+    try:
+        for label, class_step in (('FIFO', 0.0), ('priority', 30.0)):
+            windows, routine = run(api, class_step, args.routine_rate,
+                                   args.critical_interval, args.seconds)
+            print(f"\n{label} (class_step={class_step:g})")
+            print(f"{'t/s':>5}{'queued':>8}{'crit p50 ms':>13}{'crit max ms':>13}")
+            for offset, depth, critical in windows:
+                print(f"{offset:>5.0f}{depth:>8}{percentile(critical, 0.5):>13.1f}"
+                      f"{max(critical, default=float('nan')):>13.1f}")
+            print(f"routine sent: {len(routine)}, p50 {percentile(routine, 0.5):.0f} ms")
+    finally:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Profiler Overhead Benchmark
+===========================
+
+Measures what profiling costs the detection loop: DoorbellService is fed
+an endless stream of button frames (no sleeping between polls) and the
+frames handled per second are compared with profiling off, with stage
+timers only, and with stack sampling at several rates.
+
+The flood is far denser than any real RF traffic (hundreds of thousands
+of frames per second vs. a few dozen), so the added cost per frame is the
+number to look at: real load is frames/s times that.
+
+Usage:
+    python3 benchmarks/bench_profiler_overhead.py --seconds 3 --rates 100 1000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from doorbell_service import DoorbellService
+from notification_scheduler import Button
+from profiler import SamplingProfiler, StageTimers
+from rf_event import RFEvent
+
+BUTTON_CODE = 4273816
+
+
+class Config:
+    buttons = {BUTTON_CODE: Button(BUTTON_CODE)}
+
+
+class FloodMonitor:
+    """Reports a button frame on every poll."""
+
+    def start(self):
+        pass
+
+    def check_for_event(self):
+        return RFEvent(BUTTON_CODE, time.monotonic())
+
+    def cleanup(self):
+        pass
+
+
+class NullNotifier:
+    def notify_doorbell(self, button=None):
+        pass
+
+
+def measure(seconds, output_dir, stage_timers=False, sample_rate=None, sampled_service=True):
+    """Return frames handled per second under one profiling setup."""
+    service = DoorbellService(Config(), NullNotifier(), FloodMonitor(), debounce_time=0.0,
+                              poll_interval=0.0, max_events_per_poll=1000)
+    if stage_timers:
+        service.stage_timers = StageTimers()
+    profiler = None
+    if sample_rate is not None:
+        profiler = SamplingProfiler(rate=sample_rate, duration=seconds * 2, output_dir=output_dir,
+                                    service=service if sampled_service else None)
+    service.start()
+    if profiler is not None:
+        profiler.start()
+    started = time.perf_counter()
+    service.run(duration=seconds)
+    elapsed = time.perf_counter() - started
+    if profiler is not None:
+        profiler.stop()
+    service.stop()
+    return service.events_seen / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of profiling on the detection loop")
+    parser.add_argument('--seconds', type=float, default=3.0, help="Seconds per measurement")
+    parser.add_argument('--rates', type=float, nargs='+', default=[100, 1000],
+                        help="Stack sampling rates (Hz) to try")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        baseline = measure(args.seconds, output_dir)
+        rows = [('off', baseline), ('stage timers', measure(args.seconds, output_dir, stage_timers=True))]
+        for rate in args.rates:
+            rows.append((f'stacks {rate:g} Hz', measure(args.seconds, output_dir, sample_rate=rate,
+                                                        sampled_service=False)))
+            # What a SIGUSR1 profile does in production: stacks plus stage timers
+            rows.append((f'full {rate:g} Hz', measure(args.seconds, output_dir, sample_rate=rate)))
+
+    print(f"{'mode':<18}{'frames/s':>12}{'us/frame':>10}{'added us':>10}")
+    for label, rate in rows:
+        print(f"{label:<18}{rate:>12,.0f}{1e6 / rate:>10.2f}{1e6 / rate - 1e6 / baseline:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
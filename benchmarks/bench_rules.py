@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Rules Engine Benchmark
+======================
+
+Measures what compiled notification rules (see rules.py) add per press.
+
+1. evaluate: RuleSet.evaluate() alone, across many buttons and times
+   spread over the week, plus the memory allocated per call
+2. service: DoorbellService._handle_event() for debounced presses of
+   configured buttons, without rules and with a realistic rule set -
+   the latency the rules add to the hot path
+
+Usage:
+    python3 benchmarks/bench_rules.py --buttons 20 --events 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from clock import SimulatedClock
+from doorbell_service import DoorbellService
+from notification_scheduler import Button
+from rf_event import RFEvent
+from rules import RuleSet
+
+WEEK = 7 * 24 * 3600
+
+
+class Config:
+    def __init__(self, buttons, rules):
+        self.buttons = buttons
+        self.rules = rules
+
+
+class NullNotifier:
+    def notify_doorbell(self, button=None):
+        pass
+
+
+def make_rules(codes):
+    return [
+        {'NAME': 'Panic always', 'BUTTONS': codes[:1], 'ACTION': 'notify'},
+        {'NAME': 'Quiet hours', 'FROM': '22:30', 'TO': '07:00', 'ACTION': 'suppress'},
+        {'NAME': 'Away only', 'BUTTONS': codes[1:3], 'WHEN': 'home', 'ACTION': 'suppress'},
+        {'NAME': 'Weekend', 'DAYS': ['sat', 'sun'], 'FROM': '07:00', 'TO': '10:00',
+         'ACTION': 'priority', 'PRIORITY': 'low'},
+        {'NAME': 'Maintenance', 'DAYS': ['wed'], 'FROM': '13:15', 'TO': '14:45',
+         'ACTION': 'suppress'},
+        {'NAME': 'Insistent', 'ACTION': 'escalate', 'PRESSES': 3, 'WITHIN': 60},
+    ]
+
+
+def bench_evaluate(buttons, events):
+    """Time evaluate() and count bytes allocated per call; returns (ns/call, bytes/call, slots)."""
+    codes = list(buttons)
+    ruleset = RuleSet(make_rules(codes), buttons)
+    # Spread presses over the week and buttons
+    start = 1_700_000_000.0
+    step = WEEK / events
+    presses = [(codes[i % len(codes)], start + i * step) for i in range(events)]
+    evaluate = ruleset.evaluate
+    for code, now in presses[:1000]:
+        evaluate(code, now)
+
+    began = time.perf_counter()
+    for code, now in presses:
+        evaluate(code, now)
+    elapsed = time.perf_counter() - began
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for code, now in presses[:10000]:
+        evaluate(code, now)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed / events * 1e9, (after - before) / 10000, ruleset.slot_minutes
+
+
+def bench_service(buttons, events, rules):
+    """Time _handle_event() for presses that pass the debouncer; returns µs/event."""
+    clock = SimulatedClock(start_time=1_700_000_000.0)
+    ruleset = RuleSet(make_rules(list(buttons)), buttons) if rules else None
+    service = DoorbellService(Config(buttons, ruleset), NullNotifier(), rf_monitor=None,
+                              debounce_time=0.0, clock=clock, recent_events=50, rules=ruleset)
+    codes = list(buttons)
+    frames = [RFEvent(codes[i % len(codes)], 0.0, receiver=27) for i in range(events)]
+    handle = service._handle_event
+    step = WEEK / events
+    began = time.perf_counter()
+    for frame in frames:
+        clock.now += step
+        handle(frame)
+    return (time.perf_counter() - began) / events * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled notification rules overhead")
+    parser.add_argument('--buttons', type=int, default=20)
+    parser.add_argument('--events', type=int, default=200000)
+    args = parser.parse_args()
+
+    buttons = {1000 + i: Button(1000 + i, f'Button {i}') for i in range(args.buttons)}
+    ns_per_call, bytes_per_call, slot_minutes = bench_evaluate(buttons, args.events)
+    print(f"evaluate: {ns_per_call:7.0f} ns/press, {bytes_per_call:.2f} bytes allocated/press "
+          f"({args.buttons} buttons, {slot_minutes}-minute slots)")
+
+    plain = bench_service(buttons, args.events, rules=False)
+    ruled = bench_service(buttons, args.events, rules=True)
+    print(f"service:  {plain:7.2f} µs/press without rules, {ruled:.2f} µs with "
+          f"(+{(ruled - plain) * 1000:.0f} ns)")
+
+
+if __name__ == "__main__":
+    main()
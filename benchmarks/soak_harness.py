@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Soak Test Harness
+=================
+
+Replays days of synthetic (or recorded) RF traffic through the full
+DoorbellService in minutes by driving it with a SimulatedClock.
+
+At the end of the run the harness checks:
+- Memory growth (tracemalloc) between the warm-up checkpoint and the end
+- Queue depths (how many frames piled up between two polls)
+- Notification counts against the number of expected doorbell presses
+
+Usage:
+    python3 benchmarks/soak_harness.py --days 1
+    python3 benchmarks/soak_harness.py --recording capture.txt --days 3
+
+Recording format: one frame per line, "<seconds offset> <code>".
+Blank lines and lines starting with '#' are ignored.
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Make the service modules in src/ importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from clock import SimulatedClock
+from doorbell_service import DoorbellService
+from notification_scheduler import Button
+from rf_event import RFEvent
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Timing of repeated frames within one press (rpi_rf decodes each repeat)
+FRAME_GAP = 0.04
+
+
+class SoakConfig:
+    def __init__(self, button_code):
+        """
+        Minimal stand-in for DoorbellConfig (no .env or JSON file needed).
+
+        Args:
+            button_code (int): RF code treated as the doorbell button
+        """
+        self.button_code = button_code
+        self.buttons = {button_code: Button(button_code)}
+
+
+class CountingNotifier:
+    def __init__(self, clock):
+        """
+        Notifier stand-in that records notifications instead of sending them.
+
+        Args:
+            clock: Clock used to timestamp each notification
+        """
+        self.clock = clock
+        self.count = 0
+        self.last_time = None
+
+    def notify_doorbell(self, button=None):
+        """Record a doorbell notification."""
+        self.count += 1
+        self.last_time = self.clock.time()
+
+
+class ReplayRFMonitor:
+    def __init__(self, frames, clock):
+        """
+        RFMonitor stand-in that replays timestamped frames against a clock.
+
+        Mirrors rpi_rf semantics: only the most recently decoded frame is
+        visible, so frames that arrive between two polls overwrite each other.
+
+        Args:
+            frames: Iterable of (time, code) tuples sorted by time
+            clock: Clock whose time() decides which frames have arrived
+        """
+        self.clock = clock
+        self._frames = iter(frames)
+        self._next = next(self._frames, None)
+        self.frames_delivered = 0
+        self.frames_overwritten = 0
+        self.max_queue_depth = 0
+
+    def start(self):
+        """No device to initialize."""
+
+    def check_for_event(self):
+        """
+        Return the latest frame that has arrived since the last poll.
+
+        Returns:
+            RFEvent or None: Detected frame, or None if no new frame arrived
+        """
+        code = self.check_for_code()
+        if code is None:
+            return None
+        return RFEvent(code, self.clock.time(), protocol=1, pulselength=350)
+
+    def check_for_code(self):
+        """
+        Return the code of the latest frame that has arrived since the last poll.
+
+        Returns:
+            int or None: Detected RF code, or None if no new frame arrived
+        """
+        now = self.clock.time()
+        code = None
+        depth = 0
+        while self._next is not None and self._next[0] <= now:
+            code = self._next[1]
+            depth += 1
+            self._next = next(self._frames, None)
+
+        if depth:
+            self.frames_delivered += 1
+            self.frames_overwritten += depth - 1
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+        return code
+
+    def cleanup(self):
+        """Nothing to release."""
+
+
+def synthetic_frames(start, duration, button_code, press_interval, noise_interval,
+                     frames_per_press, min_press_gap, seed=0):
+    """
+    Generate synthetic RF traffic as a time-ordered stream of frames.
+
+    Presses of the doorbell button and bursts from unrelated noise codes
+    arrive as Poisson processes. Every press produces several repeated frames.
+
+    Args:
+        start (float): Simulated epoch time of the first possible frame
+        duration (float): Seconds of traffic to generate
+        button_code (int): Code of the configured button
+        press_interval (float): Mean seconds between button presses
+        noise_interval (float): Mean seconds between noise bursts (0 disables noise)
+        frames_per_press (int): Repeated frames transmitted per press
+        min_press_gap (float): Minimum seconds between two button presses
+        seed (int): Random seed for reproducible runs
+
+    Returns:
+        tuple: (frame generator, list of press start times)
+    """
+    rng = random.Random(seed)
+    end = start + duration
+
+    presses = []
+    t = start
+    while True:
+        t += max(min_press_gap, rng.expovariate(1.0 / press_interval))
+        if t >= end:
+            break
+        presses.append(t)
+
+    def bursts():
+        for press in presses:
+            yield press, button_code
+        if noise_interval:
+            t = start
+            while True:
+                t += rng.expovariate(1.0 / noise_interval)
+                if t >= end:
+                    break
+                # Noise codes are odd, so they never match an even button code
+                yield t, rng.randrange(1, 1 << 24) | 1
+
+    def frames():
+        # Expand each burst into repeated frames, merged in time order
+        burst_list = sorted(bursts())
+        heap = []
+        for burst_time, code in burst_list:
+            while heap and heap[0][0] <= burst_time:
+                yield heapq.heappop(heap)
+            for i in range(frames_per_press):
+                heapq.heappush(heap, (burst_time + i * FRAME_GAP, code))
+        while heap:
+            yield heapq.heappop(heap)
+
+    return frames(), presses
+
+
+def recorded_frames(path, start, duration):
+    """
+    Replay a recorded capture, looping it until the duration is covered.
+
+    Args:
+        path (str): Recording file with "<seconds offset> <code>" lines
+        start (float): Simulated epoch time to start replaying at
+        duration (float): Seconds of traffic to produce
+
+    Returns:
+        generator: (time, code) tuples in time order
+    """
+    records = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            offset, code = line.split()[:2]
+            records.append((float(offset), int(code)))
+    records.sort()
+    if not records:
+        return iter(())
+
+    # Loop period leaves a one-second pause between repetitions
+    period = records[-1][0] + 1.0
+
+    def frames():
+        base = start
+        while base < start + duration:
+            for offset, code in records:
+                t = base + offset
+                if t >= start + duration:
+                    return
+                yield t, code
+            base += period
+
+    return frames()
+
+
+def expected_notifications(presses, debounce_time):
+    """
+    Count presses that the debouncer should let through.
+
+    Args:
+        presses: Sorted press start times
+        debounce_time (float): Service debounce time in seconds
+
+    Returns:
+        int: Expected number of notifications
+    """
+    count = 0
+    last = None
+    for press in presses:
+        if last is None or press - last >= debounce_time:
+            count += 1
+            last = press
+    return count
+
+
+def run_soak(days=1.0, button_code=4273816, press_interval=600.0, noise_interval=30.0,
+             frames_per_press=6, debounce_time=2.0, recording=None, checkpoints=10,
+             seed=0):
+    """
+    Run the full DoorbellService against simulated traffic.
+
+    Args:
+        days (float): Simulated days to run
+        button_code (int): Configured button code
+        press_interval (float): Mean seconds between synthetic button presses
+        noise_interval (float): Mean seconds between synthetic noise bursts
+        frames_per_press (int): Repeated frames per press
+        debounce_time (float): Service debounce time in seconds
+        recording (str): Optional recording file to replay instead of synthetic traffic
+        checkpoints (int): Number of run slices used for memory sampling
+        seed (int): Random seed for synthetic traffic
+
+    Returns:
+        dict: Run statistics (see keys below)
+    """
+    duration = days * SECONDS_PER_DAY
+    # Start at a fixed, realistic epoch so strftime() output is meaningful
+    clock = SimulatedClock(start_time=1_700_000_000.0)
+
+    if recording:
+        frames = recorded_frames(recording, clock.time(), duration)
+        presses = None
+    else:
+        frames, presses = synthetic_frames(
+            clock.time(), duration, button_code, press_interval, noise_interval,
+            frames_per_press, min_press_gap=debounce_time + 1.0, seed=seed,
+        )
+
+    notifier = CountingNotifier(clock)
+    rf_monitor = ReplayRFMonitor(frames, clock)
+    service = DoorbellService(SoakConfig(button_code), notifier, rf_monitor,
+                              debounce_time=debounce_time, clock=clock)
+
+    tracemalloc.start()
+    wall_start = time.perf_counter()
+    service.start()
+
+    # Run in slices; the first slice is warm-up and sets the memory baseline
+    slice_duration = duration / checkpoints
+    samples = []
+    for _ in range(checkpoints):
+        service.run(duration=slice_duration)
+        current, _peak = tracemalloc.get_traced_memory()
+        samples.append(current)
+
+    service.stop()
+    wall_time = time.perf_counter() - wall_start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'simulated_seconds': duration,
+        'wall_seconds': wall_time,
+        'speedup': duration / wall_time if wall_time else float('inf'),
+        'notifications': notifier.count,
+        'expected_notifications': (
+            expected_notifications(presses, debounce_time) if presses is not None else None
+        ),
+        'frames_delivered': rf_monitor.frames_delivered,
+        'frames_overwritten': rf_monitor.frames_overwritten,
+        'max_queue_depth': rf_monitor.max_queue_depth,
+        'memory_baseline': samples[0],
+        'memory_end': samples[-1],
+        'memory_growth': samples[-1] - samples[0],
+        'memory_peak': peak,
+    }
+
+
+def check_results(results, max_memory_growth=64 * 1024, max_queue_depth=16):
+    """
+    Check soak results against limits.
+
+    Args:
+        results (dict): Output of run_soak()
+        max_memory_growth (int): Allowed bytes of growth after warm-up
+        max_queue_depth (int): Allowed frames piled up between two polls
+
+    Returns:
+        list: Human readable failure descriptions (empty when all checks pass)
+    """
+    failures = []
+    if results['memory_growth'] > max_memory_growth:
+        failures.append(f"memory grew by {results['memory_growth']} bytes after warm-up")
+    if results['max_queue_depth'] > max_queue_depth:
+        failures.append(f"queue depth reached {results['max_queue_depth']} frames")
+    expected = results['expected_notifications']
+    if expected is not None and results['notifications'] != expected:
+        failures.append(
+            f"sent {results['notifications']} notifications, expected {expected}"
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accelerated soak test for DoorbellService")
+    parser.add_argument('--days', type=float, default=1.0, help="Simulated days to run")
+    parser.add_argument('--press-interval', type=float, default=600.0,
+                        help="Mean seconds between button presses")
+    parser.add_argument('--noise-interval', type=float, default=30.0,
+                        help="Mean seconds between noise bursts (0 disables noise)")
+    parser.add_argument('--recording', help="Replay a recorded capture instead of synthetic traffic")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--max-memory-growth', type=int, default=64 * 1024,
+                        help="Allowed bytes of memory growth after warm-up")
+    args = parser.parse_args()
+
+    results = run_soak(days=args.days, press_interval=args.press_interval,
+                       noise_interval=args.noise_interval, recording=args.recording,
+                       seed=args.seed)
+
+    print("=== Soak Results ===")
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        print(f"{key}: {value}")
+
+    failures = check_results(results, max_memory_growth=args.max_memory_growth)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Soak test passed")
+
+
+if __name__ == "__main__":
+    main()
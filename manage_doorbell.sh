@@ -4,6 +4,8 @@
 
 SERVICE_NAME="doorbell.service"
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# Client for the running doorbell's control socket (answers in milliseconds)
+DOORBELLCTL="python3 $SCRIPT_DIR/src/doorbellctl.py"
 
 # Colors for output
 RED='\033[0;31m'
@@ -34,6 +36,11 @@ check_service_exists() {
 
 # Function to show service status
 show_status() {
+    # Ask the running doorbell directly; fall back to systemd if it isn't answering
+    if sudo $DOORBELLCTL status; then
+        return
+    fi
+    echo
     print_status "info" "Checking doorbell service status..."
     echo
     sudo systemctl status "$SERVICE_NAME" --no-pager
@@ -42,6 +49,14 @@ show_status() {
     sudo journalctl -u "$SERVICE_NAME" -n 10 --no-pager
 }
 
+# Function to send a control command (pause/resume/reload/events) to the running doorbell
+control_command() {
+    if ! sudo $DOORBELLCTL "$@"; then
+        print_status "error" "Command failed - is the doorbell running? Try: $0 status"
+        exit 1
+    fi
+}
+
 # Function to start service
 start_service() {
     print_status "info" "Starting doorbell service..."
@@ -114,7 +129,15 @@ show_help() {
     echo "  start     - Start the doorbell service"
     echo "  stop      - Stop the doorbell service"
     echo "  restart   - Restart the doorbell service"
-    echo "  status    - Show service status and recent logs"
+    echo "  status    - Show live status (uptime, last code, queue, Telegram)"
+    echo "  pause     - Stop sending notifications (presses are still recorded)"
+    echo "  resume    - Start sending notifications again"
+    echo "  reload    - Reload button_config.json without restarting"
+    echo "  events    - Show recent RF codes received (optionally: events 50)"
+    echo "  profile   - Record a stack-sampling profile (flame graph input) in /tmp"
+    echo "  links     - Show signal quality per button (weak batteries, bad antenna placement)"
+    echo "  home      - Presence mode home (for notification RULES with WHEN)"
+    echo "  away      - Presence mode away"
     echo "  enable    - Enable service to start on boot"
     echo "  disable   - Disable service from starting on boot"
     echo "  logs      - Show real-time logs (Ctrl+C to exit)"
@@ -123,6 +146,7 @@ show_help() {
     echo "Examples:"
     echo "  $0 start"
     echo "  $0 status"
+    echo "  $0 events 20"
     echo "  $0 logs"
 }
 
@@ -144,6 +168,12 @@ case "${1:-help}" in
         check_service_exists
         show_status
         ;;
+    "pause"|"resume"|"reload"|"profile"|"links"|"home"|"away")
+        control_command "$1"
+        ;;
+    "events")
+        control_command events ${2:-20}
+        ;;
     "enable")
         check_service_exists
         enable_service
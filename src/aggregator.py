@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Event Aggregator
+================
+
+Central receiver for doorbell nodes running with FORWARD_TO (see
+event_forwarder.py for the wire format).
+
+Nodes only capture and decode; the aggregator does everything else once,
+for all sites:
+
+- reliability: tracks each node's sequence numbers, drops duplicates and
+  answers every datagram with an ACK listing the gaps to resend. Gaps a
+  node can no longer fill (its buffer overflowed) or that grow beyond
+  max_gap are counted as lost and skipped.
+- deduplication: one press heard by receivers at several nodes is fused
+  into one event (EventFusion keyed by node), then debounced per button
+- routing: codes are looked up in the central button table; SITES in
+  button_config.json maps node ids to site names shown in notifications
+- notification: through the usual TelegramNotifier and priority scheduler,
+  plus MQTT when MQTT_HOST is set
+
+Datagrams are authenticated with AGGREGATOR_KEY when it is set (see
+event_forwarder.py). Without one, keep the default localhost binding or a
+firewall in front: anyone reaching the port could inject presses.
+
+Usage:
+    python3 src/aggregator.py        # listens on AGGREGATOR_BIND (default 127.0.0.1:5005)
+"""
+
+import logging
+import signal
+import socket
+import sys
+import threading
+
+from circuit_breaker import CircuitBreaker
+from clock import SYSTEM_CLOCK
+from config import DoorbellConfig
+from debouncer import Debouncer
+from event_fusion import EventFusion
+from event_forwarder import (DATA, DATA_INFO, pack_ack, parse_header, sign, unpack_events,
+                             verify)
+from mqtt_publisher import MQTTPublisher
+from notification_scheduler import Button, NotificationScheduler
+from rf_event import RFEvent
+from structured_log import fields, setup_logging
+from telegram_notifier import TelegramNotifier
+from transport import FanoutTransport
+
+log = logging.getLogger('doorbell.aggregator')
+
+
+class _Node:
+    __slots__ = ('node_id', 'epoch', 'address', 'next_expected', 'ahead', 'highest',
+                 'events', 'duplicates', 'lost')
+
+    def __init__(self, node_id, epoch, address):
+        self.node_id = node_id
+        self.epoch = epoch
+        self.address = address
+        # Every seq below next_expected has been received (or given up)
+        self.next_expected = 0
+        # Received seqs at or above next_expected
+        self.ahead = set()
+        self.highest = -1
+        self.events = 0
+        self.duplicates = 0
+        self.lost = 0
+
+
+class Aggregator:
+    def __init__(self, notifier, buttons, sites=None, window=0.5, debounce_time=2.0, clock=None,
+                 max_gap=4096, key=None):
+        """
+        Initialize the aggregator.
+
+        Args:
+            notifier: NotificationScheduler or TelegramNotifier (notify_doorbell(button))
+            buttons (dict): Central button table, RF code -> Button
+            sites (dict): Node id -> site name used in notifications (default: none)
+            window (float): Presses of one code within this many seconds, from
+                any nodes, are one press (default: 0.5)
+            debounce_time (float): Minimum seconds between notifications for the
+                same button (default: 2.0)
+            clock: Clock used for debouncing (default: system clock)
+            max_gap (int): Most missing events tracked per node before the oldest
+                are given up as lost (default: 4096)
+            key (bytes): Shared key datagrams must be signed with (default: None,
+                accept unsigned datagrams)
+        """
+        self.notifier = notifier
+        self.sites = sites or {}
+        self.clock = clock or SYSTEM_CLOCK
+        self.debounce_time = debounce_time
+        self.fusion = EventFusion(window=window)
+        self.max_gap = max_gap
+        self.key = key
+        self.nodes = {}
+        self.datagrams = 0
+        self.invalid = 0
+        self.events = 0
+        self.notified = 0
+        self._sock = None
+        self._thread = None
+        self._running = False
+        self.debouncers = {}
+        self.set_buttons(buttons)
+
+    def set_buttons(self, buttons):
+        """Switch to a new central button table (keeps debounce state)."""
+        self.buttons = buttons
+        self.debouncers = {code: self.debouncers.get(code) or
+                           Debouncer(debounce_time=self.debounce_time, clock=self.clock)
+                           for code in buttons}
+        # (node id, code) -> Button named for the node's site
+        self._routes = {}
+
+    def handle_datagram(self, datagram, address):
+        """
+        Process one datagram from a node.
+
+        Args:
+            datagram (bytes): Received datagram
+            address: Sender address, where the ACK goes
+
+        Returns:
+            bytes or None: ACK datagram to send back, or None for invalid input
+        """
+        self.datagrams += 1
+        try:
+            if self.key is not None:
+                datagram = verify(datagram, self.key)
+            kind, node_id, epoch, body = parse_header(datagram)
+            if kind != DATA or len(body) < DATA_INFO.size:
+                raise ValueError("expected a DATA datagram")
+            first_seq, oldest, count = DATA_INFO.unpack_from(body)
+            events = unpack_events(body[DATA_INFO.size:], count)
+        except ValueError:
+            self.invalid += 1
+            return None
+
+        node = self.nodes.get(node_id)
+        if node is not None and epoch != node.epoch:
+            log.info("Node %s restarted", node_id, extra=fields(node=node_id))
+            node = None
+        if node is None:
+            node = self.nodes[node_id] = _Node(node_id, epoch, address)
+            # Start wherever the node's retained history starts
+            node.next_expected = oldest
+        node.address = address
+
+        for offset, event in enumerate(events):
+            self._accept(node, first_seq + offset, event)
+        # Heartbeats and batches tell us how far the node has got
+        node.highest = max(node.highest, first_seq + count - 1)
+        self._give_up(node, oldest)
+        ack = pack_ack(node_id, epoch, node.next_expected, self._missing(node))
+        return ack if self.key is None else sign(ack, self.key)
+
+    def _accept(self, node, seq, event):
+        if seq < node.next_expected or seq in node.ahead:
+            node.duplicates += 1
+            return
+        if seq == node.next_expected:
+            node.next_expected += 1
+            ahead = node.ahead
+            while node.next_expected in ahead:
+                ahead.remove(node.next_expected)
+                node.next_expected += 1
+        else:
+            node.ahead.add(seq)
+        node.events += 1
+        self.events += 1
+        self._deliver(node, event)
+
+    def _give_up(self, node, oldest):
+        """Skip gaps the node can no longer resend, or that have grown too long."""
+        floor = max(oldest, node.highest + 1 - self.max_gap)
+        if node.next_expected >= floor:
+            return
+        ahead = node.ahead
+        received = sum(1 for seq in ahead if seq < floor)
+        node.lost += floor - node.next_expected - received
+        node.ahead = {seq for seq in ahead if seq >= floor}
+        node.next_expected = floor
+        while node.next_expected in node.ahead:
+            node.ahead.remove(node.next_expected)
+            node.next_expected += 1
+
+    def _missing(self, node):
+        """List missing (first seq, length) ranges, oldest first."""
+        if node.highest < node.next_expected:
+            return []
+        ranges = []
+        start = node.next_expected
+        for seq in sorted(node.ahead):
+            if seq > start:
+                ranges.append((start, min(seq - start, 0xFFFF)))
+            start = seq + 1
+        if start <= node.highest:
+            ranges.append((start, min(node.highest + 1 - start, 0xFFFF)))
+        return ranges
+
+    def _deliver(self, node, record):
+        code, wall_time, receiver, pulselength, protocol = record
+        fused = self.fusion.observe(RFEvent(code, wall_time, protocol, pulselength, receiver),
+                                    node.node_id)
+        if fused is None:
+            return
+        button = self.route(node.node_id, code)
+        if button is None:
+            return
+        if self.debouncers[code].should_allow():
+            self.notified += 1
+            self.notifier.notify_doorbell(button)
+
+    def route(self, node_id, code):
+        """
+        Find the button to notify for a code heard at a node.
+
+        Args:
+            node_id (int): Node that heard the press first
+            code (int): RF code
+
+        Returns:
+            Button or None: Button (named with the node's site, if known), or
+            None if the code isn't configured
+        """
+        key = (node_id, code)
+        button = self._routes.get(key)
+        if button is None:
+            base = self.buttons.get(code)
+            if base is None:
+                return None
+            site = self.sites.get(node_id)
+            button = base
+            if site is not None:
+                button = Button(code, f"{site}: {base.name or 'Doorbell'}", base.priority,
+                                message=base.message, frames=base.frames)
+            self._routes[key] = button
+        return button
+
+    def stats(self):
+        """
+        Get aggregate counters.
+
+        Returns:
+            dict: Datagrams, events, duplicates, lost events and notifications
+        """
+        nodes = list(self.nodes.values())
+        return {
+            'nodes': len(nodes),
+            'datagrams': self.datagrams,
+            'invalid': self.invalid,
+            'events': self.events,
+            'duplicates': sum(node.duplicates for node in nodes),
+            'lost': sum(node.lost for node in nodes),
+            'missing': sum(len(self._missing(node)) for node in nodes),
+            'notified': self.notified,
+        }
+
+    def start(self, host='127.0.0.1', port=5005):
+        """
+        Listen for nodes from a background thread.
+
+        Returns:
+            tuple: The bound (host, port)
+        """
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.2)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name='aggregator', daemon=True)
+        self._thread.start()
+        return self._sock.getsockname()
+
+    def _serve(self):
+        sock = self._sock
+        while self._running:
+            try:
+                datagram, address = sock.recvfrom(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                if not self._running:
+                    return
+                continue
+            reply = self.handle_datagram(datagram, address)
+            if reply is not None:
+                try:
+                    sock.sendto(reply, address)
+                except OSError:
+                    pass
+
+    def stop(self):
+        """Stop listening."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def main():
+    config = DoorbellConfig()
+    logs = setup_logging(config.log_format, config.log_level)
+
+    breaker = CircuitBreaker(failure_threshold=config.breaker_failures,
+                             max_delay=config.breaker_max_delay)
+    session = None
+    if config.low_memory:
+        from http_client import HTTPSession
+        session = HTTPSession()
+    notifier = TelegramNotifier(config.bot_token, config.chat_id, base_url=config.telegram_api_url,
+                                breaker=breaker, session=session)
+    mqtt = None
+    if config.mqtt_host:
+        mqtt = MQTTPublisher(config.mqtt_host, config.mqtt_port, topic=config.mqtt_topic,
+                             username=config.mqtt_username, password=config.mqtt_password)
+        notifier = FanoutTransport([mqtt, notifier])
+    scheduler = NotificationScheduler(notifier)
+    aggregator = Aggregator(scheduler, config.buttons, sites=config.sites, key=config.aggregator_key)
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+
+    scheduler.start()
+    if mqtt is not None:
+        mqtt.start()
+    host, port = config.aggregator_bind
+    aggregator.start(host, port)
+    log.info("📡 Aggregator listening on %s:%d for %d buttons", host, port, len(config.buttons),
+             extra=fields(host=host, port=port))
+    if config.aggregator_key is None and host not in ('127.0.0.1', 'localhost', '::1'):
+        log.warning("⚠️ AGGREGATOR_KEY is not set: anyone who can reach %s:%d can inject presses",
+                    host, port, extra=fields(host=host, port=port))
+    try:
+        while not stopped.wait(60):
+            log.info("Aggregator stats", extra=fields(**aggregator.stats()))
+    except KeyboardInterrupt:
+        pass
+    aggregator.stop()
+    scheduler.stop()
+    if mqtt is not None:
+        mqtt.close()
+    log.info("Aggregator stopped.")
+    logs.stop()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
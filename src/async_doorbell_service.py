@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Async Doorbell Service
+======================
+
+Optional asyncio runtime for the doorbell (RUNTIME=async).
+
+DoorbellService polls in a loop and hands notifications to a sender
+thread, and every extra job (metrics, command polling, watchdog pings)
+would need yet another thread. Here everything except RF capture runs as
+coroutines on one event loop thread:
+
+- RF capture: a small bridge thread polls the RF monitor and passes each
+  frame into the loop with call_soon_threadsafe (rpi_rf and the capture
+  backends are blocking/polled, so this is the one thread we keep)
+- events: frames are fused and debounced exactly like DoorbellService
+- notifications: sent by a coroutine in priority order (same heap keys as
+  NotificationScheduler) through AsyncTelegramNotifier
+- metrics: optionally served as JSON over HTTP by asyncio.start_server
+- anything else: add_task() registers more coroutines (e.g. control or
+  watchdog tasks) that run alongside and are cancelled on stop
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import threading
+import time
+
+from doorbell_service import DoorbellService
+from notification_scheduler import schedule_key
+
+
+class AsyncDoorbellService(DoorbellService):
+    def __init__(self, config, notifier, rf_monitor, debounce_time=2.0, clock=None,
+                 poll_interval=0.01, fusion=None, max_events_per_poll=64,
+                 class_step=30.0, metrics_port=None, jam_detector=None, jam_alert=None,
+                 link_quality=None, forwarder=None, rules=None, max_queue=1000,
+                 capture_setup=None):
+        """
+        Initialize the asyncio doorbell service.
+
+        Args:
+            config: DoorbellConfig instance with buttons (RF code -> Button)
+            notifier: AsyncTelegramNotifier (anything with async notify_doorbell(button))
+            rf_monitor: RF monitor polled by the capture bridge thread
+            debounce_time (float): Minimum seconds between notifications for the
+                same button (default: 2.0)
+            clock: Clock used for debouncing (default: system clock)
+            poll_interval (float): Seconds the bridge thread sleeps between RF polls
+                (default: 0.01)
+            fusion: Optional EventFusion stage (see DoorbellService)
+            max_events_per_poll (int): Most frames bridged per poll (default: 64)
+            class_step (float): Priority aging step, see NotificationScheduler
+                (default: 30.0)
+            metrics_port (int): Serve metrics() as JSON on this localhost port
+                (default: None, not served)
+            jam_detector: Optional JamDetector (see DoorbellService)
+            jam_alert (Button): Notification sent when jamming starts (default: None)
+            link_quality: Optional LinkQuality estimator (see DoorbellService)
+            forwarder: Optional EventForwarder (see DoorbellService); register
+                its serve_async with add_task so it gets polled
+            rules: Optional compiled RuleSet (see DoorbellService)
+            max_queue (int): Most queued notifications; when full, the one that
+                would be sent last is dropped, as in NotificationScheduler
+                (default: 1000)
+            capture_setup: Optional callable run on the bridge thread before
+                its first poll (see DoorbellService)
+        """
+        super().__init__(config, notifier, rf_monitor, debounce_time=debounce_time, clock=clock,
+                         poll_interval=poll_interval, fusion=fusion,
+                         max_events_per_poll=max_events_per_poll,
+                         jam_detector=jam_detector, jam_alert=jam_alert,
+                         link_quality=link_quality, forwarder=forwarder, rules=rules,
+                         capture_setup=capture_setup)
+        self.class_step = class_step
+        self.metrics_port = metrics_port
+        self.max_queue = max_queue
+        self.events_received = 0
+        self.sent = 0
+        self.dropped = 0
+        self.loop = None
+        self._outbox = []
+        self._sequence = itertools.count()
+        self._task_factories = []
+        self._wakeup = None
+        self._stopped = None
+        self._bridge = None
+
+    def add_task(self, coroutine_function):
+        """
+        Run an extra coroutine alongside the service.
+
+        Args:
+            coroutine_function: Called with the service once the loop is running;
+                must return a coroutine. It is cancelled when the service stops.
+        """
+        self._task_factories.append(coroutine_function)
+
+    def start(self):
+        """Start the RF monitor (the loop and bridge thread start in run())."""
+        self.rf_monitor.start()
+        self.started_at = self.clock.monotonic()
+        self.running = True
+
+    def run(self, duration=None):
+        """
+        Run the event loop on this thread until stop() or the duration elapses.
+
+        Args:
+            duration (float): Seconds to run for, or None to run indefinitely
+        """
+        asyncio.run(self.serve(duration))
+
+    async def serve(self, duration=None):
+        """
+        Coroutine form of run(), for callers that already own an event loop.
+
+        Args:
+            duration (float): Seconds to run for, or None to run indefinitely
+        """
+        self.loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        if not self.running:
+            self._stopped.set()
+
+        tasks = [asyncio.create_task(self._send_notifications(), name='notifications')]
+        if self.metrics_port is not None:
+            tasks.append(asyncio.create_task(self._serve_metrics(), name='metrics'))
+        for factory in self._task_factories:
+            tasks.append(asyncio.create_task(factory(self)))
+
+        self._bridge = threading.Thread(target=self._bridge_rf_events, name='rf-bridge',
+                                        daemon=True)
+        self._bridge.start()
+        try:
+            await asyncio.wait_for(self._stopped.wait(), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.running = False
+            self._bridge.join()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            close = getattr(self.notifier, 'close', None)
+            if close is not None:
+                await close()
+
+    def _bridge_rf_events(self):
+        """Poll the RF monitor (bridge thread) and hand frames to the loop."""
+        loop = self.loop
+        rf_monitor = self.rf_monitor
+        sleep = self.clock.sleep
+        if self.capture_setup is not None:
+            self.capture_setup()
+        while self.running:
+            handled = 0
+            timers = self.stage_timers
+            while handled < self.max_events_per_poll:
+                if timers is None:
+                    event = rf_monitor.check_for_event()
+                else:
+                    started = time.perf_counter()
+                    event = rf_monitor.check_for_event()
+                    timers.record('rf_poll', started)
+                if event is None:
+                    break
+                loop.call_soon_threadsafe(self._on_rf_event, event)
+                handled += 1
+            if not handled and (self.jammed or self.link_quality is not None):
+                # On the loop thread, which owns the detector and link state
+                loop.call_soon_threadsafe(self._on_idle, self.clock.monotonic())
+            sleep(self.poll_interval)
+
+    def _on_rf_event(self, event):
+        """Handle one frame on the loop thread."""
+        self.events_received += 1
+        self._handle_event(event)
+
+    def _dispatch(self, button):
+        """Queue a debounced press for the notification coroutine."""
+        enqueued = self.loop.time()
+        entry = (schedule_key(button, enqueued, self.class_step), next(self._sequence),
+                 enqueued, button)
+        outbox = self._outbox
+        if len(outbox) >= self.max_queue:
+            # Drop whichever notification would be sent last
+            worst = max(outbox)
+            self.dropped += 1
+            if entry > worst:
+                return
+            outbox.remove(worst)
+            heapq.heapify(outbox)
+        heapq.heappush(outbox, entry)
+        self._wakeup.set()
+
+    async def _send_notifications(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._outbox:
+                _key, _sequence, _enqueued, button = heapq.heappop(self._outbox)
+                await self.notifier.notify_doorbell(button)
+                self.sent += 1
+
+    def pending_notifications(self):
+        """
+        Get the number of notifications waiting to be sent.
+
+        Returns:
+            int: Queued notifications (or unacknowledged events when forwarding)
+        """
+        if self.forwarder is not None:
+            return self.forwarder.pending()
+        return len(self._outbox)
+
+    def metrics(self):
+        """
+        Get runtime counters for monitoring.
+
+        Returns:
+            dict: Frames received, notifications queued, sent and dropped, loop
+            task count
+        """
+        return {
+            'events_received': self.events_received,
+            'notifications_pending': self.pending_notifications(),
+            'notifications_sent': self.sent,
+            'notifications_dropped': self.dropped,
+            'tasks': len(asyncio.all_tasks(self.loop)) if self.loop is not None else 0,
+        }
+
+    async def _serve_metrics(self):
+        async def handle(reader, writer):
+            try:
+                await reader.readuntil(b'\r\n\r\n')
+                body = json.dumps(self.metrics()).encode('utf-8')
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\nConnection: close\r\n\r\n%s"
+                             % (len(body), body))
+                await writer.drain()
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', self.metrics_port)
+        async with server:
+            await server.serve_forever()
+
+    def stop(self):
+        """
+        Stop the service and cleanup resources (safe to call from any thread).
+
+        Releases RF monitor and GPIO resources.
+        """
+        self.running = False
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._stopped.set)
+            except RuntimeError:
+                # Loop already finished
+                pass
+        if self._bridge is not None and self._bridge is not threading.current_thread():
+            self._bridge.join()
+        self.rf_monitor.cleanup()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Async Telegram Notifier
+=======================
+
+Coroutine counterpart of TelegramNotifier for the asyncio runtime
+(see async_doorbell_service.py).
+
+Requests are sent over one kept-alive HTTP/1.1 connection opened with
+asyncio streams, so waiting on Telegram never blocks the event loop and no
+extra thread is needed. The same circuit breaker rules apply: connection
+errors, timeouts and 5xx responses count as transport failures.
+
+Snapshots (see snapshot.py) are streamed chunk by chunk after the text
+alert, as in TelegramNotifier: from their own task, over a second
+connection with its own breaker, so an upload never holds the alert
+connection and a failed one never makes alerts fail fast.
+"""
+
+import asyncio
+import json
+import logging
+import ssl
+from collections import deque
+from urllib.parse import urlencode, urlsplit
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from clock import SYSTEM_CLOCK
+from snapshot import MultipartFile, latest_snapshot
+from structured_log import fields
+from telegram_notifier import (DEFAULT_API_BASE_URL, SNAPSHOT_QUEUE, doorbell_message,
+                                snapshot_caption)
+from transport import Transport
+
+log = logging.getLogger('doorbell.telegram')
+
+
+class HTTPStatusError(Exception):
+    """Raised when the Bot API answers with an HTTP error status."""
+
+    def __init__(self, status, payload):
+        description = payload.get('description', '') if isinstance(payload, dict) else ''
+        super().__init__(f"HTTP {status}: {description}".rstrip(': '))
+        self.status = status
+        self.payload = payload
+
+
+class AsyncTelegramNotifier(Transport):
+    def __init__(self, bot_token, chat_id, timeout=5, clock=None, base_url=None, breaker=None,
+                 snapshot_dir=None, snapshot_max_age=60, photo_timeout=30):
+        """
+        Initialize the async Telegram notifier (no connection is opened yet).
+
+        Args:
+            bot_token: Telegram bot token from BotFather
+            chat_id: Telegram chat ID to send notifications to
+            timeout: Request timeout in seconds (default: 5)
+            clock: Clock used to timestamp messages (default: system clock)
+            base_url: Bot API base URL (default: https://api.telegram.org)
+            breaker: CircuitBreaker guarding the transport (default: a new breaker
+                with default settings)
+            snapshot_dir: Directory the camera writes JPEGs into; the newest is
+                sent after each alert (default: None, text only)
+            snapshot_max_age: Skip snapshots older than this many seconds (default: 60)
+            photo_timeout: Timeout for snapshot uploads in seconds (default: 30)
+        """
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.timeout = timeout
+        self.clock = clock or SYSTEM_CLOCK
+        self.base_url = (base_url or DEFAULT_API_BASE_URL).rstrip('/')
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_max_age = snapshot_max_age
+        self.photo_timeout = photo_timeout
+        self.breaker = breaker or CircuitBreaker(clock=self.clock)
+        self.connections_opened = 0
+        url = urlsplit(self.base_url)
+        self._host = url.hostname
+        self._tls = url.scheme == 'https'
+        self._port = url.port or (443 if self._tls else 80)
+        self._path_prefix = url.path
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+        self._snapshots = deque(maxlen=SNAPSHOT_QUEUE)
+        self._snapshot_task = None
+        self.photo_breaker = CircuitBreaker(clock=self.clock)
+        # sendPhoto goes over its own connection, through photo_breaker
+        self._photos = None
+        if snapshot_dir:
+            self._photos = AsyncTelegramNotifier(bot_token, chat_id, timeout=photo_timeout,
+                                                 clock=self.clock, base_url=self.base_url,
+                                                 breaker=self.photo_breaker)
+
+    async def _connect(self):
+        context = ssl.create_default_context() if self._tls else None
+        self._reader, self._writer = await asyncio.open_connection(self._host, self._port,
+                                                                   ssl=context)
+        self.connections_opened += 1
+
+    def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _write_request(self, method, body):
+        """
+        Send one request on the open connection.
+
+        body is either form-encoded bytes or a MultipartFile, which is
+        written chunk by chunk as the connection drains.
+        """
+        streamed = isinstance(body, MultipartFile)
+        content_type = body.content_type if streamed else 'application/x-www-form-urlencoded'
+        request = (f"POST {self._path_prefix}/bot{self.bot_token}/{method} HTTP/1.1\r\n"
+                   f"Host: {self._host}\r\n"
+                   f"Content-Type: {content_type}\r\n"
+                   f"Content-Length: {len(body)}\r\n"
+                   "Connection: keep-alive\r\n\r\n").encode('ascii')
+        if streamed:
+            self._writer.write(request)
+            for chunk in body:
+                self._writer.write(chunk)
+                await self._writer.drain()
+        else:
+            self._writer.write(request + body)
+            await self._writer.drain()
+
+    async def _read_response(self):
+        """Read the response to the request just written."""
+        status_line = await self._reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = b''
+            while True:
+                size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                data += chunk[:-2]
+        else:
+            data = await self._reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            self._disconnect()
+        return status, json.loads(data) if data else {}
+
+    async def _post(self, method, form, upload=None, timeout=None):
+        """
+        POST form fields to a Bot API method through the circuit breaker.
+
+        A kept-alive connection the server has closed is replaced before the
+        request is sent. A request whose write fails on a reused connection is
+        retried once on a fresh one; once it has been sent, it never is, as
+        sendMessage isn't idempotent and a lost answer doesn't mean a lost
+        message.
+
+        Args:
+            method (str): Bot API method name
+            form (dict): Form fields
+            upload: Function returning a fresh MultipartFile to send instead of
+                form (called once per attempt, since a stream can't be replayed)
+            timeout (float): Request timeout in seconds (default: self.timeout)
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            CircuitOpenError: If the breaker is open and the request was not attempted
+            HTTPStatusError: If the API answered with an error status
+            OSError, asyncio.TimeoutError: If the request failed
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Telegram unreachable - circuit breaker open")
+        if upload is None:
+            encoded = urlencode(form).encode('utf-8')
+            upload = lambda: encoded
+        async with self._lock:
+            try:
+                status, payload = await asyncio.wait_for(self._send(method, upload),
+                                                         timeout or self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                self._disconnect()
+                self.breaker.record_failure()
+                raise
+            except Exception:
+                # Not a transport failure; release a half-open probe slot
+                self._disconnect()
+                self.breaker.record_success()
+                raise
+        if status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if status >= 400:
+            raise HTTPStatusError(status, payload)
+        return payload
+
+    async def _send(self, method, make_body):
+        if self._writer is not None and (self._reader.at_eof() or self._writer.is_closing()):
+            # Closed by the server while idle
+            self._disconnect()
+        reused = self._writer is not None
+        if not reused:
+            await self._connect()
+        body = make_body()
+        try:
+            try:
+                await self._write_request(method, body)
+            except ConnectionError:
+                if not reused:
+                    raise
+                # The server never got the whole request, so it can't have
+                # acted on it: send it again on a fresh connection
+                self._disconnect()
+                await self._connect()
+                if isinstance(body, MultipartFile):
+                    body.close()
+                body = make_body()
+                await self._write_request(method, body)
+            return await self._read_response()
+        finally:
+            if isinstance(body, MultipartFile):
+                body.close()
+
+    async def notify_doorbell(self, button=None):
+        """
+        Send doorbell notification to Telegram.
+
+        Handles errors gracefully - logs warnings but doesn't crash the application
+        if the notification fails to send.
+
+        Args:
+            button (Button): Button that was pressed (default: None, the plain
+                doorbell message)
+
+        Returns:
+            bool: True if Telegram accepted the message, False otherwise
+        """
+        code = button.code if button is not None else None
+        started = self.clock.monotonic()
+        try:
+            message = doorbell_message(button, self.clock)
+            await self._post('sendMessage', {"chat_id": self.chat_id, "text": message})
+            log.info("✅ Notification sent!", extra=fields(
+                code=code, latency_ms=round((self.clock.monotonic() - started) * 1000, 1)))
+            if self.snapshot_dir:
+                self._queue_snapshot(button)
+            return True
+        except CircuitOpenError as e:
+            log.warning("⚠️ Warning: Notification skipped: %s", e, extra=fields(code=code))
+            return False
+        except Exception as e:
+            log.warning("⚠️ Warning: Failed to send notification: %r", e, extra=fields(
+                code=code, latency_ms=round((self.clock.monotonic() - started) * 1000, 1)))
+            # Don't crash - just log the error and continue running
+            return False
+
+    def _queue_snapshot(self, button):
+        """Hand a photo to the upload task, starting it if idle."""
+        self._snapshots.append(button)
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.ensure_future(self._run_snapshots())
+
+    async def _run_snapshots(self):
+        while self._snapshots:
+            await self.send_snapshot(self._snapshots.popleft())
+
+    async def send_snapshot(self, button=None):
+        """
+        Send the newest camera snapshot, streamed from disk.
+
+        Goes over the photo connection and photo_breaker, not the alerts'.
+        Failures are logged, never raised: the text alert has already gone out.
+
+        Args:
+            button (Button): Button that was pressed, used for the caption
+
+        Returns:
+            bool: True if Telegram accepted the photo, False otherwise (including
+            when there is no recent snapshot)
+        """
+        code = button.code if button is not None else None
+        path = latest_snapshot(self.snapshot_dir, self.snapshot_max_age, now=self.clock.time())
+        if path is None:
+            log.info("📷 No recent snapshot in %s", self.snapshot_dir, extra=fields(code=code))
+            return False
+        started = self.clock.monotonic()
+        form = {"chat_id": self.chat_id, "caption": snapshot_caption(button, self.clock)}
+        try:
+            await self._photos._post('sendPhoto', form,
+                                     upload=lambda: MultipartFile(form, 'photo', path))
+            log.info("📷 Snapshot sent", extra=fields(
+                code=code, latency_ms=round((self.clock.monotonic() - started) * 1000, 1)))
+            return True
+        except Exception as e:
+            log.warning("⚠️ Warning: Failed to send snapshot: %r", e, extra=fields(code=code))
+            return False
+
+    async def close(self, timeout=5.0):
+        """
+        Finish queued photo uploads, then close the kept-alive connections.
+
+        Args:
+            timeout (float): Seconds to wait for the uploads (default: 5.0)
+        """
+        task = self._snapshot_task
+        if task is not None:
+            _done, pending = await asyncio.wait([task], timeout=timeout)
+            for task in pending:
+                task.cancel()
+        if self._photos is not None:
+            await self._photos.close()
+        async with self._lock:
+            writer = self._writer
+            self._disconnect()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
@@ -17,28 +17,56 @@ Usage:
 2. Press your RF button several times
 3. Tool identifies your button code and updates configuration
 4. Main app will then monitor only your button
+
+Batch mode (many buttons in one session): python3 src/button_discovery_tool.py --batch
+1. Press nothing for a few seconds while the tool learns background noise codes
+2. Press each button in turn and type a label for it ("Front door" or
+   "Panic, critical"); press Enter to skip a code or type "noise" to ignore it
+3. Press Ctrl+C when done - all buttons are merged into button_config.json
 """
 
 # Standard library imports
+import argparse
 import time
 import json
+import logging
 import os
 import signal
 import sys
 from collections import Counter
 from rpi_rf import RFDevice
 
+from enrollment import BurstSegmenter, Enrollment, merge_button_config, parse_label
+from notification_scheduler import Button
+from structured_log import fields, setup_logging
+
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_dir = os.path.dirname(script_dir)
 
 # GPIO pin configuration (default to GPIO 27 as used in rf-receiver)
 GPIO_PIN = int(os.getenv('GPIO_DATA_PIN', '27'))
+CONFIG_PATH = os.path.join(project_dir, 'button_config.json')
+
+parser = argparse.ArgumentParser(description="Discover RF button codes")
+parser.add_argument('--batch', action='store_true',
+                    help="enroll many buttons in one session, with a label for each")
+parser.add_argument('--noise-seconds', type=float, default=10.0,
+                    help="batch mode: seconds spent learning background noise codes (default: 10)")
+args = parser.parse_args()
+
+# Console lines by default; LOG_FORMAT=json/logfmt for machine-readable output
+logs = setup_logging(os.getenv('LOG_FORMAT', 'console'), os.getenv('LOG_LEVEL', 'INFO'),
+                     rate_limit=None)
+log = logging.getLogger('doorbell.discovery')
 
-print("=== Button Discovery Tool ===")
-print("Press your RF button several times...")
-print("Tool will identify your button code and update configuration.")
-print("Press Ctrl+C when done.\n")
+log.info("=== Button Discovery Tool ===")
+if args.batch:
+    log.info("Batch enrollment: press each button in turn and label it.")
+else:
+    log.info("Press your RF button several times...")
+    log.info("Tool will identify your button code and update configuration.")
+log.info("Press Ctrl+C when done.\n")
 
 # Initialize RF device
 rfdevice = None
@@ -48,13 +76,116 @@ def cleanup():
     global rfdevice
     if rfdevice:
         rfdevice.cleanup()
-    print("Discovery stopped.")
+    log.info("Discovery stopped.")
+    logs.stop()
 
 def signal_handler(signum, frame):
     """Handle SIGTERM signal - ensures cleanup runs before exit"""
     cleanup()
     sys.exit(0)
 
+def load_existing_config():
+    """Read the configured buttons and noise codes, if there is a config yet."""
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}, []
+    buttons = {entry['CODE']: entry for entry in data.get('BUTTONS', [])}
+    if 'BUTTON_CODE' in data:
+        buttons.setdefault(data['BUTTON_CODE'], {'CODE': data['BUTTON_CODE']})
+    return buttons, data.get('NOISE_CODES', [])
+
+def frames(device):
+    """Yield (code, timestamp, protocol, pulselength) for each new frame, or None when idle."""
+    timestamp = device.rx_code_timestamp
+    while True:
+        if device.rx_code_timestamp != timestamp:
+            timestamp = device.rx_code_timestamp
+            yield device.rx_code, time.monotonic(), device.rx_proto, device.rx_pulselength
+        else:
+            yield None
+        time.sleep(0.01)
+
+def learn_noise(device, enrollment, seconds):
+    """Record every code heard while nothing is being pressed as noise."""
+    log.info("Learning background noise for %gs - don't press anything...", seconds)
+    deadline = time.monotonic() + seconds
+    for frame in frames(device):
+        if time.monotonic() >= deadline:
+            break
+        # Configured buttons stay configured, even if someone presses one now
+        if frame is not None and enrollment.classify(frame[0]) == Enrollment.NEW:
+            enrollment.mark_noise(frame[0])
+            log.info("Noise code: %s", frame[0], extra=fields(code=frame[0]))
+    log.info("Ignoring %d noise codes. Start pressing buttons.\n", len(enrollment.noise_codes))
+
+def ask_label(burst):
+    """Prompt for a new code's label; returns (name, priority), 'noise' or None to skip."""
+    while True:
+        text = input(f"New code {burst.code} ({burst.frames} frames) - label "
+                     f"[Name or 'Name, priority'; Enter skips; 'noise' ignores]: ").strip()
+        if not text:
+            return None
+        if text.lower() == 'noise':
+            return 'noise'
+        name, priority = parse_label(text)
+        if name:
+            return name, priority
+
+def enroll_batch(device, enrollment):
+    """Segment the frame stream into presses and label each new code."""
+    segmenter = BurstSegmenter()
+    for frame in frames(device):
+        if frame is None:
+            burst = segmenter.flush(time.monotonic())
+        else:
+            burst = segmenter.feed(*frame)
+        if burst is None:
+            continue
+        kind = enrollment.classify(burst.code)
+        if kind != Enrollment.NEW:
+            log.info("Press of %s code %s (%d frames)", kind, burst.code, burst.frames,
+                     extra=fields(code=burst.code, kind=kind))
+            continue
+
+        answer = ask_label(burst)
+        if answer == 'noise':
+            enrollment.mark_noise(burst.code)
+            log.info("Ignoring code %s from now on", burst.code, extra=fields(code=burst.code))
+        elif answer is not None:
+            try:
+                button = enrollment.add(burst.code, *answer)
+            except ValueError as e:
+                log.warning("⚠️ %s - press the button again to retry", e)
+            else:
+                log.info("✅ Enrolled %s as %s (%s) - %d buttons so far", button.code, button.name,
+                         button.priority, len(enrollment.enrolled),
+                         extra=fields(code=button.code, priority=button.priority))
+        # Frames that arrived while typing belong to the press just handled
+        segmenter.reset()
+
+def save_batch(enrollment):
+    """Merge the enrolled buttons into button_config.json."""
+    log.info("\n=== Enrollment Results ===")
+    if not enrollment.enrolled and not enrollment.noise_codes:
+        log.warning("No buttons enrolled - configuration left unchanged.")
+        return
+    try:
+        config = merge_button_config(CONFIG_PATH, enrollment.enrolled.values(), enrollment.noise_codes)
+    except ValueError as e:
+        log.error("❌ Configuration not saved: %s", e)
+        for button in enrollment.enrolled.values():
+            log.info("   Enrolled %s: %s (%s)", button.code, button.name, button.priority,
+                     extra=fields(code=button.code))
+        return
+    for entry in config['BUTTONS']:
+        log.info("   %s: %s (%s)", entry['CODE'], entry.get('NAME', 'Doorbell'),
+                 entry.get('PRIORITY', 'normal'), extra=fields(code=entry['CODE']))
+    log.info("Configuration saved to %s (%d buttons, %d enrolled now)", CONFIG_PATH,
+             len(config['BUTTONS']), len(enrollment.enrolled))
+    log.info("Apply without restarting: ./manage_doorbell.sh reload")
+
 # Register signal handler so cleanup runs if process is stopped externally
 signal.signal(signal.SIGTERM, signal_handler)
 
@@ -62,7 +193,21 @@ try:
     # Initialize RF device
     rfdevice = RFDevice(GPIO_PIN)
     rfdevice.enable_rx()
-    print("RF device ready! Listening for signals...\n")
+    log.info("RF device ready! Listening for signals...\n")
+    
+    if args.batch:
+        configured, noise_codes = load_existing_config()
+        enrollment = Enrollment(configured, noise_codes)
+        if configured:
+            log.info("Already configured: %s", ', '.join(map(str, configured)))
+        try:
+            learn_noise(rfdevice, enrollment, args.noise_seconds)
+            enroll_batch(rfdevice, enrollment)
+        except (KeyboardInterrupt, EOFError):
+            # Ctrl+C (or end of input) - save everything enrolled so far
+            save_batch(enrollment)
+        cleanup()
+        sys.exit(0)
     
     codes_counter = Counter()  # Counts how many times each code appears
     timestamp = None
@@ -78,40 +223,47 @@ try:
             
             # Count this code (helps identify which is YOUR button)
             codes_counter[code] += 1
-            print(f"Detected code: {code} [protocol: {protocol}, pulselength: {pulselength}] (seen {codes_counter[code]} times)")
+            log.info("Detected code: %s [protocol: %s, pulselength: %s] (seen %d times)",
+                     code, protocol, pulselength, codes_counter[code],
+                     extra=fields(code=code, protocol=protocol, pulselength=pulselength))
         
         time.sleep(0.01)
 
 except KeyboardInterrupt:
     # Ctrl+C pressed - show results and cleanup GPIO
-    print("\n=== Discovery Results ===")
+    log.info("\n=== Discovery Results ===")
     
     if not codes_counter:
-        print("No button codes detected. Make sure your RF button is working.")
+        log.warning("No button codes detected. Make sure your RF button is working.")
     else:
         # Find the most frequently detected code (likely your button)
         most_common = codes_counter.most_common(1)[0]
         button_code = most_common[0]
         count = most_common[1]
         
-        print(f"Most frequent code: {button_code} (detected {count} times)")
-        print(f"This is likely your button code!")
-        
-        # Save configuration for main application
-        config = {"BUTTON_CODE": button_code}
-        with open("button_config.json", "w") as f:
-            json.dump(config, f, indent=2)
+        log.info("Most frequent code: %s (detected %d times)", button_code, count,
+                 extra=fields(code=button_code, count=count))
+        log.info("This is likely your button code!")
         
-        print(f"Configuration saved to button_config.json")
-        print(f"Your main app will now monitor for code: {button_code}")
+        # Add it to the configuration, keeping the buttons already there
+        configured, _ = load_existing_config()
+        if button_code in configured:
+            log.info("Code %s is already configured - configuration left unchanged.", button_code)
+        else:
+            try:
+                merge_button_config(CONFIG_PATH, [Button(button_code)])
+            except ValueError as e:
+                log.error("❌ Configuration not saved: %s", e)
+            else:
+                log.info("Configuration saved to %s", CONFIG_PATH)
+                log.info("Your main app will now monitor for code: %s", button_code)
     
     cleanup()
 
 except Exception as e:
-    print(f"\n❌ Error: {e}")
-    import traceback
-    traceback.print_exc()  # Print full traceback for debugging
+    # exc_info includes the full traceback for debugging
+    log.error("\n❌ Error: %s", e, exc_info=True)
     if "GPIO busy" in str(e):
-        print("\n💡 Tip: GPIO is busy. Run: sudo python3 cleanup-gpio.py")
+        log.info("\n💡 Tip: GPIO is busy. Run: sudo python3 cleanup-gpio.py")
     cleanup()
     sys.exit(1)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Capture Process
+===============
+
+Runs RF capture and decoding in a dedicated child process.
+
+Edge timing in rpi_rf's callback shares the GIL with everything else in the
+process (HTTP/TLS in the notifier, JSON, logging). A slow notification can
+delay the callback and corrupt pulse timing. Moving capture into its own
+process gives it its own interpreter and GIL; decoded frames are passed to
+the service process over a pipe.
+
+The child's RFMonitor queues each frame from the edge callback as rpi_rf
+decodes it (queue_frames=True), so frames decoded between two of its polls
+don't overwrite each other, and the pipe holds them until the service
+reads them.
+
+CaptureProcessMonitor has the same interface as RFMonitor
+(start/check_for_code/check_for_event/cleanup), so DoorbellService can use
+either one.
+"""
+
+import multiprocessing
+import signal
+
+from low_jitter import apply_low_jitter, freeze_startup_objects
+from rf_event import RFEvent
+
+
+def create_rf_monitor(gpio_pin):
+    """
+    Default monitor factory used inside the child process.
+
+    Args:
+        gpio_pin (int): GPIO pin number for RF receiver
+
+    Returns:
+        RFMonitor: Monitor for the given pin
+    """
+    # Imported here so only the child process touches RPi.GPIO
+    from rf_monitor import RFMonitor
+    return RFMonitor(gpio_pin, queue_frames=True)
+
+
+def _capture_main(conn, stop_event, monitor_factory, factory_args, poll_interval,
+                  low_jitter):
+    """
+    Child process entry point: poll the monitor and forward decoded frames.
+
+    Args:
+        conn: Write end of the pipe to the service process
+        stop_event: multiprocessing.Event that asks the child to exit
+        monitor_factory: Callable returning an RFMonitor-like object
+        factory_args (tuple): Arguments for monitor_factory
+        poll_interval (float): Seconds to wait between polls
+        low_jitter (dict): apply_low_jitter() arguments, or None to leave tuning off
+    """
+    # Ctrl+C is handled by the service process, which stops us via stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # Only the capture process gets real-time priority, not the notifier
+    if low_jitter is not None:
+        apply_low_jitter(**low_jitter)
+
+    monitor = monitor_factory(*factory_args)
+    try:
+        monitor.start()
+        if low_jitter is not None:
+            freeze_startup_objects()
+        while True:
+            # Drain everything decoded since the last poll
+            event = monitor.check_for_event()
+            while event is not None:
+                conn.send(event.as_tuple())
+                event = monitor.check_for_event()
+            # Event.wait() doubles as the poll sleep and the stop check
+            if stop_event.wait(poll_interval):
+                break
+    finally:
+        monitor.cleanup()
+        conn.close()
+
+
+class CaptureProcessMonitor:
+    def __init__(self, gpio_pin=None, monitor_factory=None, factory_args=None,
+                 poll_interval=0.005, low_jitter=None):
+        """
+        Initialize the process-isolated capture monitor.
+
+        Args:
+            gpio_pin (int): GPIO pin number for RF receiver (used by the default factory)
+            monitor_factory: Picklable callable returning an RFMonitor-like object
+                inside the child (default: create_rf_monitor)
+            factory_args (tuple): Arguments for monitor_factory (default: (gpio_pin,))
+            poll_interval (float): Seconds between polls in the child (default: 0.005)
+            low_jitter (dict): apply_low_jitter() arguments (cpu, priority) to apply in
+                the child, or None to leave scheduling and GC untouched
+        """
+        self.gpio_pin = gpio_pin
+        self.monitor_factory = monitor_factory or create_rf_monitor
+        self.factory_args = factory_args if factory_args is not None else (gpio_pin,)
+        self.poll_interval = poll_interval
+        self.low_jitter = low_jitter
+        self._process = None
+        self._conn = None
+        self._stop_event = None
+
+    def start(self):
+        """
+        Start the capture child process.
+
+        Uses the fork start method so the child inherits sys.path and does
+        not re-import main.py. Must be called before check_for_code().
+        """
+        context = multiprocessing.get_context('fork')
+        reader, writer = context.Pipe(duplex=False)
+        self._stop_event = context.Event()
+        self._process = context.Process(
+            target=_capture_main,
+            args=(writer, self._stop_event, self.monitor_factory,
+                  self.factory_args, self.poll_interval, self.low_jitter),
+            name='rf-capture',
+            daemon=True,
+        )
+        self._process.start()
+        # The child owns the write end now
+        writer.close()
+        self._conn = reader
+
+    def check_for_event(self):
+        """
+        Return the next decoded frame sent by the capture process.
+
+        Frames are queued in the pipe, so none are lost between polls.
+
+        Returns:
+            RFEvent or None: Next frame, or None if nothing is waiting
+
+        Raises:
+            RuntimeError: If the capture process died unexpectedly
+        """
+        if not self._conn:
+            return None
+
+        try:
+            if self._conn.poll():
+                return RFEvent.from_tuple(self._conn.recv())
+        except EOFError:
+            pass
+        else:
+            return None
+
+        # Pipe closed: the child exited without being asked to
+        exitcode = None
+        if self._process is not None:
+            self._process.join(timeout=1.0)
+            exitcode = self._process.exitcode
+        self.cleanup()
+        raise RuntimeError(f"RF capture process exited unexpectedly (exit code {exitcode})")
+
+    def check_for_code(self):
+        """
+        Return the code of the next decoded frame.
+
+        Returns:
+            int or None: Detected RF code, or None if no new code
+        """
+        event = self.check_for_event()
+        return event.code if event is not None else None
+
+    def cleanup(self):
+        """
+        Stop the capture process and release the pipe.
+
+        Safe to call multiple times.
+        """
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._process is not None:
+            self._process.join(timeout=2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout=1.0)
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._stop_event = None
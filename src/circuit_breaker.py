@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker
+===============
+
+Stops a failing transport from stalling the caller on every attempt.
+
+States:
+- closed: requests flow normally; consecutive failures are counted
+- open: requests fail fast without touching the network
+- half_open: after a backoff delay, a single probe request is let through;
+  success closes the breaker, failure re-opens it with a longer delay
+
+The backoff doubles each time a probe fails (capped at max_delay). State
+transitions are kept in a short history and passed to listeners, so they
+can be logged or exposed for monitoring.
+"""
+
+import threading
+from collections import deque
+
+from clock import SYSTEM_CLOCK
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because the breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, base_delay=5.0, max_delay=300.0, clock=None):
+        """
+        Initialize a closed circuit breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker (default: 3)
+            base_delay (float): Seconds before the first half-open probe (default: 5.0)
+            max_delay (float): Longest delay between probes (default: 300.0)
+            clock: Clock providing monotonic() (default: system clock)
+        """
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock or SYSTEM_CLOCK
+        self.state = CLOSED
+        self.failures = 0
+        self.retry_at = None
+        self.transitions = deque(maxlen=50)
+        self._open_count = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """
+        Register a callback for state transitions.
+
+        Args:
+            callback: Callable(old_state, new_state), called outside the breaker lock
+        """
+        self._listeners.append(callback)
+
+    def allow_request(self):
+        """
+        Check whether a request may be attempted now.
+
+        In the open state, the first caller after the backoff delay becomes
+        the half-open probe; everyone else keeps failing fast until it reports back.
+
+        Returns:
+            bool: True if the request should be attempted
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock.monotonic() >= self.retry_at:
+                transition = self._transition(HALF_OPEN)
+            else:
+                return False
+        self._notify(transition)
+        return True
+
+    def record_success(self):
+        """Report a successful request (closes the breaker)."""
+        with self._lock:
+            self.failures = 0
+            self._open_count = 0
+            if self.state == CLOSED:
+                return
+            transition = self._transition(CLOSED)
+        self._notify(transition)
+
+    def record_failure(self):
+        """Report a failed request (may open or re-open the breaker)."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and
+                                           self.failures >= self.failure_threshold):
+                self._open_count += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** (self._open_count - 1))
+                self.retry_at = self.clock.monotonic() + delay
+                transition = self._transition(OPEN)
+            else:
+                return
+        self._notify(transition)
+
+    def status(self):
+        """
+        Get a snapshot of the breaker for monitoring.
+
+        Returns:
+            dict: state, consecutive failures and seconds until the next probe
+        """
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.retry_at - self.clock.monotonic())
+            return {'state': self.state, 'failures': self.failures, 'retry_in': retry_in}
+
+    def _transition(self, new_state):
+        """Change state (lock held) and return the transition to announce."""
+        old_state = self.state
+        self.state = new_state
+        self.transitions.append((self.clock.time(), old_state, new_state))
+        return old_state, new_state
+
+    def _notify(self, transition):
+        for callback in self._listeners:
+            callback(*transition)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Clock
+=====
+
+Small clock abstraction so time-dependent classes can be driven by either
+real wall-clock time or a simulated clock.
+
+- SystemClock: thin wrapper around the time module (used in production)
+- SimulatedClock: manually advanced clock for tests and soak runs, where
+  sleeping simply moves simulated time forward instead of blocking
+"""
+
+import time
+
+
+class SystemClock:
+    def time(self):
+        """
+        Get the current wall-clock time.
+
+        Returns:
+            float: Seconds since the epoch (same as time.time())
+        """
+        return time.time()
+
+    def monotonic(self):
+        """
+        Get a monotonic timestamp for measuring intervals.
+
+        Returns:
+            float: Seconds from an arbitrary fixed point (same as time.monotonic())
+        """
+        return time.monotonic()
+
+    def strftime(self, fmt):
+        """
+        Format the current local time.
+
+        Args:
+            fmt (str): strftime format string (e.g., '%H:%M:%S')
+
+        Returns:
+            str: Formatted time string
+        """
+        return time.strftime(fmt)
+
+    def sleep(self, seconds):
+        """
+        Block the calling thread for the given number of seconds.
+
+        Args:
+            seconds (float): Time to sleep
+        """
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    def __init__(self, start_time=0.0):
+        """
+        Initialize a simulated clock.
+
+        Args:
+            start_time (float): Initial epoch time in seconds (default: 0.0)
+        """
+        self.now = float(start_time)
+        self._start_time = self.now
+
+    def time(self):
+        """
+        Get the current simulated time.
+
+        Returns:
+            float: Simulated seconds since the epoch
+        """
+        return self.now
+
+    def monotonic(self):
+        """
+        Get the simulated time elapsed since the clock was created.
+
+        Returns:
+            float: Simulated seconds since start
+        """
+        return self.now - self._start_time
+
+    def strftime(self, fmt):
+        """
+        Format the current simulated time as local time.
+
+        Args:
+            fmt (str): strftime format string
+
+        Returns:
+            str: Formatted time string
+        """
+        return time.strftime(fmt, time.localtime(self.now))
+
+    def sleep(self, seconds):
+        """
+        Advance simulated time instead of blocking.
+
+        Args:
+            seconds (float): Time to advance
+        """
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        """
+        Move simulated time forward.
+
+        Args:
+            seconds (float): Time to advance (negative values are ignored)
+        """
+        if seconds > 0:
+            self.now += seconds
+
+
+# Shared default clock instance used when no clock is injected
+SYSTEM_CLOCK = SystemClock()
@@ -6,16 +6,65 @@ Configuration Management
 Handles loading and validating all configuration for the doorbell system.
 
 Configuration Sources:
-1. Environment variables (.env file): BOT_TOKEN, CHAT_ID, GPIO_DATA_PIN
-2. JSON file (button_config.json): BUTTON_CODE
+1. Environment variables (.env file): BOT_TOKEN, CHAT_ID, GPIO_DATA_PIN, plus
+   optional tuning settings (see _load_env_variables)
+2. JSON file (button_config.json): BUTTON_CODE, or a BUTTONS list with a
+   name and priority per button
 """
 
 import json
 import os
-from dotenv import load_dotenv
+import sys
+
+from notification_scheduler import Button
+from rules import RuleSet
+
+
+def read_env_file(env_file):
+    """
+    Parse a .env file without python-dotenv.
+
+    Understands KEY=VALUE lines, an optional 'export ' prefix, single or
+    double quotes and # comments, but not ${VAR} expansion.
+
+    Args:
+        env_file (str): Path of the .env file; a missing file is ignored
+
+    Returns:
+        dict: Variable name -> value, in file order
+    """
+    values = {}
+    if not os.path.isfile(env_file):
+        return values
+    with open(env_file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('export '):
+                line = line[len('export '):].lstrip()
+            key, separator, value = line.partition('=')
+            key = key.strip()
+            if not separator or not key or key.startswith('#'):
+                continue
+            value = value.strip()
+            if value[:1] in ('"', "'") and value.find(value[0], 1) > 0:
+                value = value[1:value.find(value[0], 1)]
+            else:
+                value = value.split(' #', 1)[0].rstrip()
+            values[key] = value
+    return values
 
 
 class DoorbellConfig:
+    __slots__ = ('project_root', 'bot_token', 'chat_id', 'telegram_api_url', 'breaker_failures',
+                 'breaker_max_delay', 'gpio_pins', 'gpio_pin', 'fusion_window', 'capture_mode',
+                 'gpio_chip', 'runtime', 'metrics_port', 'control_socket', 'profile_at_start',
+                 'profile_rate', 'profile_duration', 'profile_dir', 'jam_detection', 'jam_alert',
+                 'jam_code_rate', 'jam_frame_rate', 'link_quality', 'forward_to', 'node_id',
+                 'aggregator_bind', 'aggregator_key', 'telegram_commands', 'snapshot_dir',
+                 'snapshot_max_age', 'mqtt_host', 'mqtt_port', 'mqtt_topic', 'mqtt_username',
+                 'mqtt_password', 'log_format', 'log_level', 'low_jitter', 'low_jitter_cpu',
+                 'low_jitter_priority', 'low_memory', 'buttons', 'rules', 'sites', 'button_code')
+    
     def __init__(self):
         """
         Initialize configuration by loading from all sources.
@@ -51,22 +100,190 @@ class DoorbellConfig:
         Loads:
         - BOT_TOKEN: Telegram bot token from BotFather (required)
         - CHAT_ID: Telegram chat ID to send notifications to (required)
-        - GPIO_DATA_PIN: GPIO pin number for RF receiver (optional, defaults to 27)
+        - TELEGRAM_API_URL: Bot API base URL, e.g. a local fake server for testing
+          (optional, defaults to https://api.telegram.org)
+        - BREAKER_FAILURES: Consecutive Telegram failures before notifications
+          fail fast (optional, defaults to 3)
+        - BREAKER_MAX_DELAY: Longest wait in seconds between reconnect probes
+          (optional, defaults to 300)
+        - GPIO_DATA_PIN: GPIO pin number for RF receiver, or a comma-separated
+          list of pins to monitor several receivers (optional, defaults to 27)
+        - FUSION_WINDOW: Seconds within which detections of the same code by
+          different receivers count as one press (optional, defaults to 0.5)
+        - CAPTURE_MODE: 'thread' to decode in this process, 'process' to decode
+          in a dedicated child process, or 'chardev' to read batched edge events
+          from the kernel GPIO character device (optional, defaults to 'thread')
+        - GPIO_CHIP: GPIO character device for 'chardev' mode (optional,
+          defaults to /dev/gpiochip0)
+        - RUNTIME: 'thread' for the polling loop plus sender thread, or 'async'
+          to run notifications and other tasks as asyncio coroutines on one
+          thread (optional, defaults to 'thread')
+        - METRICS_PORT: With RUNTIME=async, serve runtime counters as JSON on
+          this localhost port (optional, defaults to off)
+        - CONTROL_SOCKET: Path of the local control socket used by
+          doorbellctl.py and manage_doorbell.sh, or 'off' (optional, defaults
+          to doorbell.sock in the project root)
+        - PROFILE_AT_START: '1' to take a stack-sampling profile right after
+          startup; send SIGUSR1 to take one at any time (optional, defaults to off)
+        - PROFILE_RATE: Stack samples per second (optional, defaults to 100)
+        - PROFILE_DURATION: Seconds per profile (optional, defaults to 30)
+        - PROFILE_DIR: Where profiles are written (optional, defaults to /tmp)
+        - JAM_DETECTION: '0' to handle every RF frame, even from stuck
+          transmitters or during jamming (optional, defaults to on)
+        - JAM_ALERT: '1' to send a Telegram alert when jamming starts
+          (optional, defaults to off)
+        - JAM_CODE_RATE: Frames/s above which a code is quarantined once it
+          keeps it up for 10 s (optional, defaults to 5)
+        - JAM_FRAME_RATE: Total frames/s above which the band counts as jammed
+          (optional, defaults to 50)
+        - LINK_QUALITY: '0' to stop tracking per-button signal quality
+          (optional, defaults to on)
+        - FORWARD_TO: host:port of a central aggregator; when set, decoded
+          events are forwarded there instead of notifying from this node, and
+          BOT_TOKEN/CHAT_ID aren't needed (optional, defaults to off)
+        - NODE_ID: This node's id for the aggregator, 0-4294967295
+          (optional, defaults to 0)
+        - AGGREGATOR_BIND: host:port the aggregator listens on (optional,
+          defaults to 127.0.0.1:5005; use 0.0.0.0:5005 for remote nodes)
+        - AGGREGATOR_KEY: Shared secret signing datagrams between nodes and
+          the aggregator; set the same value on both ends (optional, defaults
+          to unsigned)
+        - MQTT_HOST: MQTT broker to also publish presses to (optional,
+          defaults to off)
+        - MQTT_PORT: MQTT broker port (optional, defaults to 1883)
+        - MQTT_TOPIC: Topic prefix; presses go to <prefix>/<code> (optional,
+          defaults to 'doorbell')
+        - MQTT_USERNAME / MQTT_PASSWORD: Broker credentials (optional)
+        - TELEGRAM_COMMANDS: '1' to accept /status, /mute, /last, ... from
+          CHAT_ID (see telegram_commands.py; optional, defaults to off)
+        - SNAPSHOT_DIR: Directory a camera writes JPEGs into; the newest is sent
+          after each Telegram alert (optional, defaults to text only)
+        - SNAPSHOT_MAX_AGE: Skip snapshots older than this many seconds
+          (optional, defaults to 60)
+        - LOG_FORMAT: 'logfmt', 'json' or 'console' (optional, defaults to
+          'console' on a terminal and 'logfmt' otherwise, e.g. under systemd)
+        - LOG_LEVEL: Lowest level logged, e.g. DEBUG (optional, defaults to INFO)
+        - LOW_JITTER: '1' to pin capture to a core, request SCHED_FIFO and tune GC
+          (optional, defaults to off)
+        - LOW_JITTER_CPU: Core to pin capture to (optional, defaults to the last core)
+        - LOW_JITTER_PRIORITY: SCHED_FIFO priority 1-99 (optional, defaults to 10)
+        - LOW_MEMORY: '1' for the Pi Zero profile: notifications go through the
+          standard library HTTP client (see http_client.py) instead of requests,
+          and .env is read without python-dotenv when LOW_MEMORY is already set
+          in the process environment, e.g. Environment=LOW_MEMORY=1 in
+          doorbell.service (optional, defaults to off)
         """
         # Find .env file in project root
         env_file = os.path.join(self.project_root, '.env')
         # Load environment variables from .env file
-        load_dotenv(env_file)
+        if os.getenv('LOW_MEMORY', '0').strip().lower() in ('1', 'true', 'yes', 'on'):
+            self._read_env_file(env_file)
+        else:
+            from dotenv import load_dotenv
+            load_dotenv(env_file)
         
         # Load configuration values
         # Note: os.getenv() returns None if the variable is not set
         self.bot_token = os.getenv('BOT_TOKEN')
         self.chat_id = os.getenv('CHAT_ID')
+        self.telegram_api_url = os.getenv('TELEGRAM_API_URL') or None
+        self.breaker_failures = int(os.getenv('BREAKER_FAILURES', '3'))
+        self.breaker_max_delay = float(os.getenv('BREAKER_MAX_DELAY', '300'))
         
         # GPIO pin defaults to 27 if not specified
         # int() converts string to integer (e.g., '27' -> 27)
+        # Several receivers can be listed: '27,22' -> [27, 22]
         gpio_pin_str = os.getenv('GPIO_DATA_PIN', '27')
-        self.gpio_pin = int(gpio_pin_str)
+        self.gpio_pins = [int(pin) for pin in gpio_pin_str.split(',') if pin.strip()]
+        self.gpio_pin = self.gpio_pins[0] if self.gpio_pins else None
+        self.fusion_window = float(os.getenv('FUSION_WINDOW', '0.5'))
+        
+        # Where RF capture/decoding runs (see capture_process.py)
+        self.capture_mode = os.getenv('CAPTURE_MODE', 'thread').strip().lower()
+        self.gpio_chip = os.getenv('GPIO_CHIP', '/dev/gpiochip0')
+        
+        # Threaded or asyncio runtime (see async_doorbell_service.py)
+        self.runtime = os.getenv('RUNTIME', 'thread').strip().lower()
+        metrics_port = os.getenv('METRICS_PORT')
+        self.metrics_port = int(metrics_port) if metrics_port else None
+        
+        # Local control socket (see control_server.py)
+        control_socket = os.getenv('CONTROL_SOCKET', os.path.join(self.project_root, 'doorbell.sock'))
+        self.control_socket = None if control_socket.strip().lower() in ('', 'off') else control_socket
+        
+        # On-demand sampling profiler (see profiler.py)
+        self.profile_at_start = os.getenv('PROFILE_AT_START', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+        self.profile_rate = float(os.getenv('PROFILE_RATE', '100'))
+        self.profile_duration = float(os.getenv('PROFILE_DURATION', '30'))
+        self.profile_dir = os.getenv('PROFILE_DIR', '/tmp')
+        
+        # Stuck-transmitter and jamming detection (see jam_detector.py)
+        self.jam_detection = os.getenv('JAM_DETECTION', '1').strip().lower() in ('1', 'true', 'yes', 'on')
+        self.jam_alert = os.getenv('JAM_ALERT', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+        self.jam_code_rate = float(os.getenv('JAM_CODE_RATE', '5'))
+        self.jam_frame_rate = float(os.getenv('JAM_FRAME_RATE', '50'))
+        
+        # Per-button link-quality estimation (see link_quality.py)
+        self.link_quality = os.getenv('LINK_QUALITY', '1').strip().lower() in ('1', 'true', 'yes', 'on')
+        
+        # Multi-site forwarding (see event_forwarder.py and aggregator.py)
+        forward_to = os.getenv('FORWARD_TO', '').strip()
+        self.forward_to = self._parse_address(forward_to) if forward_to else None
+        self.node_id = int(os.getenv('NODE_ID', '0'))
+        self.aggregator_bind = self._parse_address(os.getenv('AGGREGATOR_BIND', '127.0.0.1:5005'))
+        self.aggregator_key = os.getenv('AGGREGATOR_KEY', '').strip().encode('utf-8') or None
+        
+        # Bot commands from the chat (see telegram_commands.py)
+        self.telegram_commands = os.getenv('TELEGRAM_COMMANDS', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+        
+        # Camera snapshot sent after each alert (see snapshot.py)
+        self.snapshot_dir = os.getenv('SNAPSHOT_DIR', '').strip() or None
+        self.snapshot_max_age = float(os.getenv('SNAPSHOT_MAX_AGE', '60'))
+        
+        # MQTT transport (see mqtt_publisher.py)
+        self.mqtt_host = os.getenv('MQTT_HOST', '').strip() or None
+        self.mqtt_port = int(os.getenv('MQTT_PORT', '1883'))
+        self.mqtt_topic = os.getenv('MQTT_TOPIC', 'doorbell').strip()
+        self.mqtt_username = os.getenv('MQTT_USERNAME') or None
+        self.mqtt_password = os.getenv('MQTT_PASSWORD') or None
+        
+        # Structured logging (see structured_log.py)
+        default_format = 'console' if sys.stdout.isatty() else 'logfmt'
+        self.log_format = os.getenv('LOG_FORMAT', default_format).strip().lower()
+        self.log_level = os.getenv('LOG_LEVEL', 'INFO').strip().upper()
+        
+        # Low-jitter capture mode (see low_jitter.py)
+        self.low_jitter = os.getenv('LOW_JITTER', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+        low_jitter_cpu = os.getenv('LOW_JITTER_CPU')
+        self.low_jitter_cpu = int(low_jitter_cpu) if low_jitter_cpu else None
+        self.low_jitter_priority = int(os.getenv('LOW_JITTER_PRIORITY', '10'))
+        
+        # Pi Zero profile (see http_client.py)
+        self.low_memory = os.getenv('LOW_MEMORY', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+    
+    def _read_env_file(self, env_file):
+        """
+        Load a .env file without python-dotenv (low-memory profile).
+        
+        As with load_dotenv(), variables already set in the environment win.
+        
+        Args:
+            env_file (str): Path of the .env file; a missing file is ignored
+        """
+        for key, value in read_env_file(env_file).items():
+            os.environ.setdefault(key, value)
+    
+    def _parse_address(self, value):
+        """
+        Parse a 'host:port' setting.
+        
+        Raises:
+            ValueError: If the port is missing or not a number
+        """
+        host, _, port = value.rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f"Expected host:port, got {value!r}")
+        return host, int(port)
     
     def _load_button_config(self):
         """
@@ -77,6 +294,17 @@ class DoorbellConfig:
         
         Loads:
         - BUTTON_CODE: The RF code that identifies our specific button
+        - BUTTONS (optional): List of buttons to watch, each with CODE and
+          optional NAME, PRIORITY (critical, high, normal or low) and FRAMES
+          (repeats sent per press, see link_quality.py), e.g.
+          {"CODE": 1234, "NAME": "Panic button", "PRIORITY": "critical"}.
+          BUTTON_CODE may be omitted when BUTTONS is given.
+        - SITES (optional): Node id -> site name, used by the aggregator in
+          notifications, e.g. {"1": "Warehouse"}
+        - NOISE_CODES (optional): Background codes for button_discovery_tool.py
+          --batch to skip; not used by the service
+        - RULES (optional): Notification rules (quiet hours, presence,
+          suppression, escalation), compiled here into a RuleSet; see rules.py
         """
         # Find button_config.json in project root
         config_file = os.path.join(self.project_root, 'button_config.json')
@@ -85,8 +313,26 @@ class DoorbellConfig:
         with open(config_file, 'r') as f:
             config_data = json.load(f)
         
-        # Extract the button code
-        self.button_code = config_data['BUTTON_CODE']
+        # Build the table of watched buttons, keyed by RF code
+        self.buttons = {}
+        for entry in config_data.get('BUTTONS', []):
+            button = Button(entry['CODE'], entry.get('NAME'), entry.get('PRIORITY', 'normal'),
+                            frames=entry.get('FRAMES'))
+            self.buttons[button.code] = button
+        if 'BUTTON_CODE' in config_data and config_data['BUTTON_CODE'] not in self.buttons:
+            self.buttons[config_data['BUTTON_CODE']] = Button(config_data['BUTTON_CODE'])
+        
+        # Compiled once here; evaluated for every debounced press
+        rules = config_data.get('RULES')
+        self.rules = RuleSet(rules, self.buttons) if rules else None
+        
+        # JSON keys are strings; node ids are numbers
+        self.sites = {int(node_id): name for node_id, name in config_data.get('SITES', {}).items()}
+        
+        # Extract the button code (first configured button)
+        self.button_code = config_data.get('BUTTON_CODE')
+        if self.button_code is None and self.buttons:
+            self.button_code = next(iter(self.buttons))
     
     def _validate(self):
         """
@@ -99,13 +345,56 @@ class DoorbellConfig:
         Raises:
             ValueError: If any required configuration is missing
         """
-        # Check if required Telegram credentials are set
-        if not self.bot_token:
+        # Check if required Telegram credentials are set (the aggregator
+        # notifies for forwarding nodes)
+        if not self.bot_token and not self.forward_to:
             raise ValueError("BOT_TOKEN must be set in .env file")
         
-        if not self.chat_id:
+        if not self.chat_id and not self.forward_to:
             raise ValueError("CHAT_ID must be set in .env file")
         
+        if not 0 <= self.node_id <= 0xFFFFFFFF:
+            raise ValueError("NODE_ID must be between 0 and 4294967295")
+        
+        if self.snapshot_dir and not os.path.isdir(self.snapshot_dir):
+            raise ValueError(f"SNAPSHOT_DIR {self.snapshot_dir} is not a directory")
+        
+        if not 0 < self.mqtt_port <= 65535:
+            raise ValueError("MQTT_PORT must be between 1 and 65535")
+        
+        if self.mqtt_host and not self.mqtt_topic:
+            raise ValueError("MQTT_TOPIC must not be empty")
+        
+        if not self.buttons:
+            raise ValueError("button_config.json must set BUTTON_CODE or BUTTONS")
+        
+        if not self.gpio_pins:
+            raise ValueError("GPIO_DATA_PIN must list at least one pin")
+        
+        if len(set(self.gpio_pins)) != len(self.gpio_pins):
+            raise ValueError("GPIO_DATA_PIN must not list the same pin twice")
+        
+        if self.capture_mode not in ('thread', 'process', 'chardev'):
+            raise ValueError("CAPTURE_MODE must be 'thread', 'process' or 'chardev'")
+        
+        if self.runtime not in ('thread', 'async'):
+            raise ValueError("RUNTIME must be 'thread' or 'async'")
+        
+        if self.log_format not in ('logfmt', 'json', 'console'):
+            raise ValueError("LOG_FORMAT must be 'logfmt', 'json' or 'console'")
+        
+        if self.log_level not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+            raise ValueError("LOG_LEVEL must be DEBUG, INFO, WARNING, ERROR or CRITICAL")
+        
+        if self.profile_rate <= 0 or self.profile_duration <= 0:
+            raise ValueError("PROFILE_RATE and PROFILE_DURATION must be positive")
+        
+        if self.jam_code_rate <= 0 or self.jam_frame_rate <= 0:
+            raise ValueError("JAM_CODE_RATE and JAM_FRAME_RATE must be positive")
+        
+        if not 1 <= self.low_jitter_priority <= 99:
+            raise ValueError("LOW_JITTER_PRIORITY must be between 1 and 99")
+        
         # Note: button_code validation would happen in _load_button_config()
         # if the JSON file is missing or malformed, that will raise an error there
 
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Control Socket
+==============
+
+Unix-domain socket for asking the running doorbell what it is doing,
+answered straight from memory in a few milliseconds (no systemctl or
+journalctl involved). Used by doorbellctl.py and manage_doorbell.sh.
+
+Protocol: the client sends one command line, the server answers with one
+JSON line and closes the connection.
+
+Commands:
+- status: uptime, last code seen, queue depth, circuit breaker state,
+  jamming and quarantined codes
+- pause / resume: stop / restart sending notifications (presses are still
+  recorded)
+- reload: re-read button_config.json and .env (buttons take effect live)
+- events [N]: the N most recent RF frames and what happened to each
+- profile: start a stack-sampling profile (see profiler.py)
+- links: per-button signal quality, weakest first (see link_quality.py)
+- home / away: switch the presence mode notification rules match on
+  (see rules.py)
+
+Works with both runtimes: ControlServer.start() serves from a thread for
+DoorbellService; serve_async() is a coroutine for AsyncDoorbellService
+(register it with service.add_task).
+"""
+
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+
+from structured_log import fields
+
+log = logging.getLogger('doorbell.control')
+
+COMMANDS = ('status', 'pause', 'resume', 'reload', 'events', 'profile', 'links', 'home', 'away')
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(1024)
+        self.wfile.write(self.server.control.reply(line))
+
+
+class ControlServer:
+    def __init__(self, service, path, breaker=None, reload_config=None, profiler=None):
+        """
+        Initialize the control socket (call start() or serve_async() to listen).
+
+        Args:
+            service: DoorbellService or AsyncDoorbellService to control
+            path (str): Filesystem path of the Unix socket
+            breaker: CircuitBreaker whose state is reported (default: None)
+            reload_config: Callable returning a freshly loaded DoorbellConfig,
+                used by the reload command (default: None, reload unsupported)
+            profiler: SamplingProfiler started by the profile command
+                (default: None, profiling unsupported)
+        """
+        self.service = service
+        self.path = path
+        self.breaker = breaker
+        self.reload_config = reload_config
+        self.profiler = profiler
+        self._server = None
+        self._thread = None
+
+    def handle_command(self, line):
+        """
+        Run one control command.
+
+        Args:
+            line (str): Command line, e.g. 'status' or 'events 10'
+
+        Returns:
+            dict: JSON-serializable reply; always has 'ok'
+        """
+        parts = line.split()
+        if not parts or parts[0] not in COMMANDS:
+            return {'ok': False, 'error': f"unknown command (expected one of {', '.join(COMMANDS)})"}
+        command, args = parts[0], parts[1:]
+        try:
+            return getattr(self, f'_command_{command}')(*args)
+        except Exception as e:
+            log.warning("Control command %s failed: %s", command, e, extra=fields(command=command))
+            return {'ok': False, 'error': str(e)}
+
+    def reply(self, raw_line):
+        """Encode the reply to one raw command line."""
+        reply = self.handle_command(raw_line.decode('utf-8', 'replace'))
+        return (json.dumps(reply, ensure_ascii=False) + '\n').encode('utf-8')
+
+    def _command_status(self):
+        service = self.service
+        last = service.last_event
+        now = service.clock.monotonic()
+        status = {
+            'ok': True,
+            'running': service.running,
+            'paused': service.paused,
+            'muted': service.muted,
+            'uptime': round(now - service.started_at, 1) if service.started_at is not None else None,
+            'events_seen': service.events_seen,
+            'last_code': last.code if last is not None else None,
+            'last_seen_ago': round(now - last.timestamp, 1) if last is not None else None,
+            'queue_depth': service.pending_notifications(),
+            'buttons': len(service.config.buttons),
+        }
+        if self.breaker is not None:
+            status['breaker'] = self.breaker.status()
+        if self.profiler is not None:
+            status['profiling'] = self.profiler.running
+        if service.jam_detector is not None:
+            status['rf'] = service.jam_detector.status(now)
+        if service.rules is not None:
+            status['rules'] = service.rules.describe(service.clock.time())
+        timers = service.stage_timers
+        if timers is not None:
+            status['stages'] = timers.summary()
+        return status
+
+    def _command_pause(self):
+        self.service.paused = True
+        log.info("⏸️ Notifications paused")
+        return {'ok': True, 'paused': True}
+
+    def _command_resume(self):
+        self.service.paused = False
+        log.info("▶️ Notifications resumed")
+        return {'ok': True, 'paused': False}
+
+    def _command_reload(self):
+        if self.reload_config is None:
+            return {'ok': False, 'error': 'reload not supported'}
+        config = self.reload_config()
+        self.service.reload_config(config)
+        log.info("🔄 Configuration reloaded: %d buttons", len(config.buttons))
+        return {'ok': True, 'buttons': sorted(config.buttons),
+                'note': 'GPIO and capture settings apply after a restart'}
+
+    def _command_events(self, count='20'):
+        if not count.isdigit() or int(count) < 1:
+            return {'ok': False, 'error': 'events count must be a positive number'}
+        recent = list(self.service.recent_events)[-int(count):]
+        return {'ok': True, 'events': [
+            {'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(when)),
+             'code': code, 'receiver': receiver, 'outcome': outcome}
+            for when, code, receiver, outcome in recent
+        ]}
+
+    def _command_profile(self):
+        if self.profiler is None:
+            return {'ok': False, 'error': 'profiling not supported'}
+        started = self.profiler.start()
+        return {'ok': True, 'started': started, 'duration': self.profiler.duration,
+                'output_dir': self.profiler.output_dir}
+
+    def _command_links(self):
+        link_quality = self.service.link_quality
+        if link_quality is None:
+            return {'ok': False, 'error': 'link quality not enabled'}
+        return {'ok': True, 'links': link_quality.report()}
+
+    def _command_home(self):
+        return self._set_presence(away=False)
+
+    def _command_away(self):
+        return self._set_presence(away=True)
+
+    def _set_presence(self, away):
+        rules = self.service.rules
+        if rules is None:
+            return {'ok': False, 'error': 'no notification rules configured'}
+        rules.away = away
+        log.info("🏠 Presence: %s", rules.mode, extra=fields(mode=rules.mode))
+        return {'ok': True, 'mode': rules.mode}
+
+    def _remove_stale_socket(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def start(self):
+        """Listen on the socket from a background thread."""
+        self._remove_stale_socket()
+        self._server = socketserver.ThreadingUnixStreamServer(self.path, _ControlHandler)
+        self._server.daemon_threads = True
+        self._server.control = self
+        os.chmod(self.path, 0o660)
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.2,),
+                                        name='control-socket', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening and remove the socket file."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = self._thread = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def serve_async(self, service=None):
+        """
+        Serve the socket on the running event loop until cancelled.
+
+        Args:
+            service: Ignored; accepted so this can be passed to service.add_task
+        """
+        # Imported here so the threaded runtime never loads asyncio
+        import asyncio
+
+        async def handle(reader, writer):
+            try:
+                line = await reader.readline()
+                writer.write(self.reply(line))
+                await writer.drain()
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                writer.close()
+
+        self._remove_stale_socket()
+        server = await asyncio.start_unix_server(handle, self.path)
+        os.chmod(self.path, 0o660)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
@@ -11,17 +11,21 @@ Useful for preventing notification spam from rapidly repeated button presses
 or other events that should be throttled.
 """
 
-import time
+from clock import SYSTEM_CLOCK
 
 class Debouncer:
-    def __init__(self, debounce_time=2.0):
+    __slots__ = ('debounce_time', 'clock', 'last_allowed_time')
+
+    def __init__(self, debounce_time=2.0, clock=None):
         """
         Initialize debouncer with specified debounce time.
         
         Args:
             debounce_time (float): Minimum seconds between allowed events (default: 2.0)
+            clock: Clock providing time() (default: system clock)
         """
         self.debounce_time = debounce_time
+        self.clock = clock or SYSTEM_CLOCK
         self.last_allowed_time = 0
     
     def should_allow(self):
@@ -35,7 +39,7 @@ class Debouncer:
         Returns:
             bool: True if event should be allowed, False if still in debounce period
         """
-        now = time.time()
+        now = self.clock.time()
         if (now - self.last_allowed_time) >= self.debounce_time:
             self.last_allowed_time = now
             return True
@@ -7,66 +7,367 @@ Main service class that encapsulates the doorbell monitoring loop and lifecycle.
 
 This class centralizes the application logic for:
 - Monitoring RF signals for button presses
-- Debouncing notifications to prevent spam
+- Debouncing notifications to prevent spam (separately for each button)
 - Managing the service lifecycle (start/run/stop)
+- Keeping live state (last code seen, recent events, pause) for the
+  control socket (see control_server.py)
+- Dropping stuck-transmitter and jamming floods before they cost anything
+  (see jam_detector.py)
+- Feeding every repeat of a configured button to the link-quality
+  estimator (see link_quality.py)
+- Optionally forwarding events to a central aggregator instead of
+  notifying locally (see event_forwarder.py)
+- Applying notification rules (quiet hours, presence, escalation) to
+  debounced presses (see rules.py)
 """
 
+import logging
 import time
+from collections import deque
 
+from clock import SYSTEM_CLOCK
 from debouncer import Debouncer
+from structured_log import fields
+
+log = logging.getLogger('doorbell.service')
 
 
 class DoorbellService:
-    def __init__(self, config, notifier, rf_monitor, debounce_time=2.0):
+    __slots__ = ('_live', 'notifier', 'rf_monitor', 'clock', 'poll_interval', 'debounce_time',
+                 'fusion', 'max_events_per_poll', 'running', 'paused', 'muted', 'started_at',
+                 'events_seen', 'last_event', 'recent_events', 'stage_timers', 'jam_detector',
+                 'jam_alert', 'jammed', 'link_quality', 'forwarder', 'capture_setup')
+
+    def __init__(self, config, notifier, rf_monitor, debounce_time=2.0,
+                 clock=None, poll_interval=0.01, fusion=None, max_events_per_poll=64,
+                 recent_events=50, stage_timers=None, jam_detector=None, jam_alert=None,
+                 link_quality=None, forwarder=None, rules=None, capture_setup=None):
         """
         Initialize doorbell service with dependencies.
-        
+
         Args:
-            config: DoorbellConfig instance with button_code
-            notifier: TelegramNotifier instance for sending notifications
+            config: DoorbellConfig instance with buttons (RF code -> Button)
+            notifier: TelegramNotifier or NotificationScheduler for sending notifications
             rf_monitor: RFMonitor instance for detecting RF signals
-            debounce_time (float): Minimum seconds between notifications (default: 2.0)
+            debounce_time (float): Minimum seconds between notifications for the
+                same button (default: 2.0)
+            clock: Clock used for sleeping and debouncing (default: system clock)
+            poll_interval (float): Seconds to sleep between RF polls (default: 0.01)
+            fusion: Optional EventFusion stage that merges detections of one press
+                by several receivers into a single event
+            max_events_per_poll (int): Most frames handled before sleeping again,
+                so a flood of frames can't stall the loop (default: 64)
+            recent_events (int): How many recent frames to keep for the control
+                socket's events command (default: 50)
+            stage_timers: Optional StageTimers that times the RF poll, debounce
+                and notify dispatch stages (see profiler.py; default: None)
+            jam_detector: Optional JamDetector that quarantines flooding codes and
+                sheds unknown codes while the band is jammed (default: None)
+            jam_alert (Button): Notification sent when jamming starts
+                (default: None, only logged)
+            link_quality: Optional LinkQuality estimator fed every frame of a
+                configured button, before fusion merges the repeats (default: None)
+            forwarder: Optional EventForwarder; when set, every event is sent to
+                the aggregator, which routes, debounces and notifies centrally,
+                and notifier may be None (default: None)
+            rules: Optional compiled RuleSet deciding what each debounced press
+                sends (default: None, every press notifies as configured)
+            capture_setup: Optional callable run on the thread that polls
+                rf_monitor before its first poll, for monitors that capture as
+                they are polled (e.g. low-jitter tuning for BatchedRFMonitor;
+                default: None)
         """
-        self.config = config
         self.notifier = notifier
         self.rf_monitor = rf_monitor
-        self.debouncer = Debouncer(debounce_time=debounce_time)
-    
+        self.clock = clock or SYSTEM_CLOCK
+        self.poll_interval = poll_interval
+        self.debounce_time = debounce_time
+        # (config, debouncers, rules), replaced as a whole by reload_config()
+        # so the RF thread always sees one consistent set
+        self._live = (config, {code: Debouncer(debounce_time=debounce_time, clock=self.clock)
+                               for code in config.buttons}, rules)
+        self.fusion = fusion
+        self.max_events_per_poll = max_events_per_poll
+        self.running = False
+        self.paused = False
+        # Set by Telegram's /mute, apart from the control socket's pause so
+        # a mute running out can't cancel a pause (or the other way round)
+        self.muted = False
+        self.started_at = None
+        self.events_seen = 0
+        self.last_event = None
+        # (wall time, code, receiver, outcome) for the most recent frames
+        self.recent_events = deque(maxlen=recent_events)
+        # May be swapped in and out while running (e.g. by the profiler)
+        self.stage_timers = stage_timers
+        self.jam_detector = jam_detector
+        self.jam_alert = jam_alert
+        # Last jamming state reported (the monitor may also change it via edges)
+        self.jammed = False
+        self.link_quality = link_quality
+        self.forwarder = forwarder
+        self.capture_setup = capture_setup
+
+    @property
+    def config(self):
+        """Current configuration (see reload_config())."""
+        return self._live[0]
+
+    @property
+    def debouncers(self):
+        """RF code -> Debouncer for the current button table."""
+        return self._live[1]
+
+    @property
+    def rules(self):
+        """Current compiled RuleSet, or None."""
+        return self._live[2]
+
     def start(self):
         """
         Initialize and start the RF monitor.
-        
+
         This sets up the RF device and enables reception mode.
         """
         self.rf_monitor.start()
-    
-    def run(self):
+        self.started_at = self.clock.monotonic()
+        self.running = True
+
+    def run(self, duration=None):
         """
         Main monitoring loop.
-        
+
         Continuously polls the RF monitor for new button presses and sends
-        notifications when the configured button is detected, subject to debouncing.
-        
-        This method runs indefinitely until interrupted.
+        notifications when a configured button is detected, subject to debouncing.
+
+        This method runs until stop() is called, or until the optional
+        duration has elapsed on the service clock.
+
+        Args:
+            duration (float): Seconds to run for, or None to run indefinitely
         """
+        clock = self.clock
+        rf_monitor = self.rf_monitor
+        deadline = None if duration is None else clock.monotonic() + duration
+        if self.capture_setup is not None:
+            self.capture_setup()
+
         # Main detection loop
-        while True:
-            # Check if a new RF code was received
-            code = self.rf_monitor.check_for_code()
-            
-            # Only send notification for our configured button code
-            if code == self.config.button_code:
-                # Check debouncer to prevent spam
-                if self.debouncer.should_allow():
-                    self.notifier.notify_doorbell()
-            
-            time.sleep(0.01)
-    
+        while self.running:
+            # Handle every RF frame received since the last poll
+            handled = 0
+            timers = self.stage_timers
+            while handled < self.max_events_per_poll:
+                if timers is None:
+                    event = rf_monitor.check_for_event()
+                else:
+                    started = time.perf_counter()
+                    event = rf_monitor.check_for_event()
+                    timers.record('rf_poll', started)
+                if event is None:
+                    break
+                self._handle_event(event)
+                handled += 1
+
+            if not handled and (self.jammed or self.link_quality is not None):
+                self._on_idle(clock.monotonic())
+            if self.forwarder is not None:
+                self.forwarder.poll()
+            clock.sleep(self.poll_interval)
+
+            if deadline is not None and clock.monotonic() >= deadline:
+                break
+
+    def _handle_event(self, event):
+        """
+        Decide whether one received frame should trigger a notification.
+
+        Args:
+            event (RFEvent): Frame returned by the RF monitor
+        """
+        # Formatting is skipped entirely unless debug logging is on
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("RF frame", extra=fields(code=event.code, protocol=event.protocol,
+                                               pulselength=event.pulselength,
+                                               receiver=event.receiver))
+
+        # One snapshot per frame: a reload from another thread swaps the whole set
+        config, debouncers, rules = self._live
+        buttons = config.buttons
+
+        # Drop floods (stuck transmitters, jamming) before any further work
+        jam_detector = self.jam_detector
+        if jam_detector is not None:
+            admitted = jam_detector.observe(event, event.code in buttons)
+            if jam_detector.jammed != self.jammed:
+                self.jammed = jam_detector.jammed
+                self._jamming_changed(self.jammed)
+            if not admitted:
+                return
+
+        # Repeats of a press are what link quality is measured from
+        if self.link_quality is not None and event.code in buttons:
+            self.link_quality.observe(event)
+
+        # Drop repeat detections of a press already heard by another receiver
+        if self.fusion is not None:
+            event = self.fusion.observe(event, event.receiver)
+            if event is None:
+                return
+
+        self.events_seen += 1
+        self.last_event = event
+
+        # Only send notifications for our configured buttons
+        button = buttons.get(event.code)
+        if self.forwarder is not None:
+            # Routing and debouncing happen at the aggregator
+            self.forwarder.submit(event)
+            outcome = 'forwarded'
+        elif button is None:
+            outcome = 'ignored'
+        elif self.paused:
+            outcome = 'paused'
+        elif self.muted:
+            outcome = 'muted'
+        # Check this button's debouncer to prevent spam
+        elif self.stage_timers is None:
+            if not debouncers[event.code].should_allow():
+                outcome = 'debounced'
+            elif rules is None:
+                outcome = 'notified'
+                self._dispatch(button)
+            else:
+                outcome = self._apply_rules(rules, button)
+        else:
+            outcome = self._timed_debounce_and_dispatch(debouncers[event.code], rules, button)
+        self.recent_events.append((self.clock.time(), event.code, event.receiver, outcome))
+
+    def _on_idle(self, now):
+        """
+        Housekeeping for a poll that found no frames.
+
+        Runs on the thread that handles frames, which owns the jam detector
+        and link-quality state.
+
+        Args:
+            now (float): Current monotonic time
+        """
+        # A jam that stops outright sends no frame to notice that by
+        if self.jammed:
+            self._check_jamming(now)
+        link_quality = self.link_quality
+        if link_quality is not None:
+            # Picked up here, not in reload_config(), which runs on another thread
+            buttons = self.config.buttons
+            if link_quality.buttons is not buttons:
+                link_quality.set_buttons(buttons)
+            # Bursts end in silence: close them now, not at the next press
+            link_quality.flush(now)
+
+    def _check_jamming(self, now):
+        """Notice the end of jamming while no frames are arriving."""
+        jam_detector = self.jam_detector
+        if jam_detector is not None and jam_detector.refresh(now) != self.jammed:
+            self.jammed = jam_detector.jammed
+            self._jamming_changed(self.jammed)
+
+    def _jamming_changed(self, jammed):
+        """Log (and optionally notify) when jamming starts or ends."""
+        status = self.jam_detector.status(self.clock.monotonic())
+        if not jammed:
+            log.info("📶 RF band quiet again", extra=fields(shed=status['shed']))
+            return
+        log.warning("📡 RF jamming detected (%.0f frames/s); ignoring unknown codes",
+                    status['frame_rate'], extra=fields(frame_rate=status['frame_rate'],
+                                                       edge_rate=status['edge_rate']))
+        if self.jam_alert is not None and not (self.paused or self.muted):
+            self._dispatch(self.jam_alert)
+
+    def _timed_debounce_and_dispatch(self, debouncer, rules, button):
+        """Debounce and dispatch one press, recording both stages' timings."""
+        timers = self.stage_timers
+        started = time.perf_counter()
+        allowed = debouncer.should_allow()
+        timers.record('debounce', started)
+        if not allowed:
+            return 'debounced'
+        started = time.perf_counter()
+        if rules is None:
+            outcome = 'notified'
+            self._dispatch(button)
+        else:
+            outcome = self._apply_rules(rules, button)
+        timers.record('dispatch', started)
+        return outcome
+
+    def _apply_rules(self, rules, button):
+        """
+        Let the rules decide what a debounced press sends, and send it.
+
+        Args:
+            rules (RuleSet): Rules in effect for this press
+            button (Button): Button that was pressed
+
+        Returns:
+            str: Outcome - 'notified', 'suppressed' or 'escalated'
+        """
+        decision = rules.evaluate(button.code, self.clock.time())
+        if decision.button is not None:
+            self._dispatch(decision.button)
+        return decision.outcome
+
+    def _dispatch(self, button):
+        """
+        Hand a debounced press to the notifier.
+
+        Args:
+            button (Button): Button that was pressed
+        """
+        self.notifier.notify_doorbell(button)
+
+    def pending_notifications(self):
+        """
+        Get the number of notifications waiting to be sent.
+
+        Returns:
+            int: Queue depth (0 if the notifier sends synchronously), or events
+            not yet acknowledged by the aggregator when forwarding
+        """
+        if self.forwarder is not None:
+            return self.forwarder.pending()
+        pending = getattr(self.notifier, 'pending', None)
+        return pending() if pending is not None else 0
+
+    def reload_config(self, config):
+        """
+        Switch to a freshly loaded configuration without restarting.
+
+        Only the button table and rules take effect live; GPIO pins and
+        capture settings need a restart. Debounce state is kept for buttons
+        that are still configured, and the presence mode carries over.
+
+        Called from the control socket thread: the new set is swapped in with
+        one assignment, and link quality picks up the new buttons on the
+        service thread (see _on_idle()).
+
+        Args:
+            config: New DoorbellConfig instance
+        """
+        _old_config, old_debouncers, old_rules = self._live
+        debouncers = {code: old_debouncers.get(code) or
+                      Debouncer(debounce_time=self.debounce_time, clock=self.clock)
+                      for code in config.buttons}
+        rules = config.rules
+        if rules is not None and old_rules is not None:
+            rules.away = old_rules.away
+        self._live = (config, debouncers, rules)
+
     def stop(self):
         """
         Stop the service and cleanup resources.
-        
+
         Releases RF monitor and GPIO resources.
         """
+        self.running = False
         self.rf_monitor.cleanup()
-
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Doorbell Control Client
+=======================
+
+Talks to the running doorbell over its control socket (see control_server.py).
+
+Usage:
+    python3 src/doorbellctl.py status
+    python3 src/doorbellctl.py events 10
+    python3 src/doorbellctl.py pause|resume|reload|profile|links|home|away
+    python3 src/doorbellctl.py --json status
+
+Exit status: 0 on success, 1 if the command failed, 2 if the doorbell
+isn't running (no socket to connect to).
+"""
+
+import json
+import os
+import socket
+import sys
+
+from config import read_env_file
+
+# Only the .env parser is shared with the service; button_config.json
+# isn't loaded, so it starts quickly
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOCKET = os.path.join(PROJECT_ROOT, 'doorbell.sock')
+
+
+def control_socket_path(env_file=os.path.join(PROJECT_ROOT, '.env')):
+    """
+    Find the socket the service listens on, the way config.py does:
+    CONTROL_SOCKET from the environment, then from .env, then the default.
+
+    Returns:
+        str or None: Socket path, or None if CONTROL_SOCKET is 'off'
+    """
+    value = os.getenv('CONTROL_SOCKET')
+    if value is None:
+        value = read_env_file(env_file).get('CONTROL_SOCKET')
+    if value is None:
+        return DEFAULT_SOCKET
+    return None if value.strip().lower() in ('', 'off') else value
+
+
+def send_command(command, path=DEFAULT_SOCKET, timeout=2.0):
+    """
+    Send one command and return the decoded reply.
+
+    Args:
+        command (str): Command line, e.g. 'status' or 'events 10'
+        path (str): Control socket path (default: doorbell.sock in the project root)
+        timeout (float): Seconds to wait for the reply (default: 2.0)
+
+    Returns:
+        dict: Reply from the doorbell
+
+    Raises:
+        OSError: If the socket can't be reached
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(command.encode('utf-8') + b'\n')
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return 'never'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours}h {minutes}m"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m {seconds}s" if minutes else f"{seconds}s"
+
+
+def print_reply(command, reply):
+    if command == 'status':
+        state = '⏸️ paused' if reply['paused'] else '🔕 muted' if reply.get('muted') else '▶️ running'
+        print(f"State:       {state}")
+        print(f"Uptime:      {format_duration(reply['uptime'])}")
+        last = reply['last_code']
+        if last is None:
+            print("Last code:   none yet")
+        else:
+            print(f"Last code:   {last} ({format_duration(reply['last_seen_ago'])} ago)")
+        print(f"RF frames:   {reply['events_seen']}")
+        print(f"Queue depth: {reply['queue_depth']}")
+        rf = reply.get('rf')
+        if rf is not None:
+            state = '📡 JAMMED' if rf['jammed'] else 'ok'
+            print(f"RF band:     {state} ({rf['frame_rate']:g} frames/s, {rf['shed']} shed)")
+            for entry in rf['quarantined']:
+                print(f"Quarantined: {entry['code']} ({entry['dropped']} frames dropped, "
+                      f"{format_duration(entry['seconds_left'])} left)")
+        rules = reply.get('rules')
+        if rules is not None:
+            active = ', '.join(rules['active']) or 'none'
+            print(f"Rules:       {rules['mode']}, active: {active}")
+        if reply.get('profiling'):
+            print("Profiler:    running")
+        breaker = reply.get('breaker')
+        if breaker is not None:
+            retry = f", next probe in {breaker['retry_in']:.0f}s" if breaker['retry_in'] else ''
+            print(f"Telegram:    circuit {breaker['state']} "
+                  f"({breaker['failures']} consecutive failures{retry})")
+    elif command == 'events':
+        if not reply['events']:
+            print("No RF frames received yet")
+        for event in reply['events']:
+            receiver = f" pin {event['receiver']}" if event['receiver'] is not None else ''
+            print(f"{event['time']}  {event['code']:>10}{receiver}  {event['outcome']}")
+    elif command == 'profile':
+        if reply['started']:
+            print(f"🔬 Profiling for {reply['duration']:g}s; output in {reply['output_dir']}")
+        else:
+            print("🔬 A profile is already running")
+    elif command == 'links':
+        if not reply['links']:
+            print("No button presses received yet")
+        for link in reply['links']:
+            receiver = f" pin {link['receiver']}" if link['receiver'] is not None else ''
+            delivery = f"{link['delivery']:.0%}" if link['delivery'] is not None else '?'
+            drift = f"{link['drift']:+.1%}" if link['drift'] is not None else '?'
+            warnings = f"  ⚠️ {', '.join(link['warnings'])}" if link['warnings'] else ''
+            print(f"{link['code']:>10}{receiver}  {link['frames_per_burst']:g}/"
+                  f"{link['expected_frames']} frames ({delivery}), "
+                  f"gap {link['gap_ms']:g}±{link['gap_jitter_ms']:g} ms, "
+                  f"drift {drift}, {link['bursts']} presses{warnings}")
+    elif command in ('home', 'away'):
+        print(f"🏠 Presence set to {reply['mode']}")
+    elif command == 'reload':
+        print(f"✅ Reloaded: watching codes {', '.join(map(str, reply['buttons']))}")
+        print(f"   ({reply['note']})")
+    else:
+        print(f"✅ Notifications {'paused' if reply['paused'] else 'resumed'}")
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    as_json = '--json' in args
+    if as_json:
+        args.remove('--json')
+    if not args:
+        print(__doc__.strip())
+        return 1
+    path = control_socket_path()
+    if path is None:
+        print("❌ The control socket is turned off (CONTROL_SOCKET=off)", file=sys.stderr)
+        return 2
+
+    try:
+        reply = send_command(' '.join(args), path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"❌ Doorbell not running (no control socket at {path})", file=sys.stderr)
+        return 2
+    except OSError as e:
+        print(f"❌ Control socket error: {e}", file=sys.stderr)
+        return 1
+
+    if as_json:
+        print(json.dumps(reply, indent=2, ensure_ascii=False))
+    elif not reply.get('ok'):
+        print(f"❌ {reply.get('error')}", file=sys.stderr)
+    else:
+        print_reply(args[0], reply)
+    return 0 if reply.get('ok') else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
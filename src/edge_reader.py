@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Batched Edge Reader
+===================
+
+Alternative RF capture path that reads GPIO edge events in batches instead of
+waking Python once per edge (as RPi.GPIO callbacks do).
+
+Edge sources:
+- GpioChardevEdgeSource: requests a line from the kernel GPIO character device
+  (/dev/gpiochipN, uAPI v2) and reads many timestamped edge events per read()
+- FileEdgeSource: reads the same event records from a regular file or pipe,
+  so the batched path can be tested and benchmarked on any Linux box
+
+BatchedRFMonitor decodes the batches with EdgeDecoder and has the same
+interface as RFMonitor (start/check_for_code/check_for_event/cleanup).
+Several pins can share one line request: their edges arrive interleaved in
+the same reads and a single decode scheduler dispatches each edge to the
+decoder for its pin (keyed by the record's line offset).
+
+Record format (struct gpio_v2_line_event, 48 bytes, native little-endian):
+    u64 timestamp_ns, u32 id, u32 offset, u32 seqno, u32 line_seqno, u32 padding[6]
+"""
+
+import fcntl
+import os
+import struct
+from array import array
+from collections import deque
+
+from rf_decoder import EdgeDecoder
+
+EVENT_RECORD = struct.Struct('<QIIII24x')
+EVENT_SIZE = EVENT_RECORD.size
+# Each 48 byte record is six u64 words; the timestamp is the first one
+WORDS_PER_EVENT = EVENT_SIZE // 8
+
+EDGE_RISING = 1
+EDGE_FALLING = 2
+
+# Kernel GPIO uAPI v2 (linux/gpio.h)
+GPIO_V2_LINE_FLAG_INPUT = 1 << 2
+GPIO_V2_LINE_FLAG_EDGE_RISING = 1 << 4
+GPIO_V2_LINE_FLAG_EDGE_FALLING = 1 << 5
+# struct gpio_v2_line_config: flags, num_attrs, padding[5], attrs[10] (272 bytes)
+LINE_CONFIG = struct.Struct('<QI5I240x')
+# struct gpio_v2_line_request: offsets[64], consumer[32], config, num_lines,
+# event_buffer_size, padding[5], fd (592 bytes)
+LINE_REQUEST = struct.Struct(f'<64I32s{LINE_CONFIG.size}sII5Ii')
+GPIO_V2_GET_LINE_IOCTL = 0xC0000000 | (LINE_REQUEST.size << 16) | (0xB4 << 8) | 0x07
+
+
+def pack_events(timestamps_ns, offset=0):
+    """
+    Encode edge timestamps as kernel line event records.
+
+    Edges alternate rising/falling, starting with rising.
+
+    Args:
+        timestamps_ns: Edge times in nanoseconds
+        offset (int): GPIO line offset stored in each record
+
+    Returns:
+        bytes: Concatenated 48 byte records
+    """
+    records = []
+    for seqno, timestamp in enumerate(timestamps_ns, start=1):
+        edge = EDGE_RISING if seqno % 2 else EDGE_FALLING
+        records.append(EVENT_RECORD.pack(timestamp, edge, offset, seqno, seqno))
+    return b''.join(records)
+
+
+class FileEdgeSource:
+    def __init__(self, path):
+        """
+        Edge source that reads event records from a regular file or named pipe.
+
+        Args:
+            path (str): File containing gpio_v2_line_event records
+        """
+        self.path = path
+        self.fd = None
+
+    def open(self):
+        """Open the file (non-blocking, so an empty pipe doesn't stall polling)."""
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+
+    def read(self, size):
+        """
+        Read up to size bytes of records.
+
+        Args:
+            size (int): Maximum bytes to read
+
+        Returns:
+            bytes: Data read (empty if nothing is available right now)
+        """
+        try:
+            return os.read(self.fd, size)
+        except BlockingIOError:
+            return b''
+
+    def close(self):
+        """Close the file. Safe to call multiple times."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class GpioChardevEdgeSource(FileEdgeSource):
+    def __init__(self, gpio_pin, chip_path='/dev/gpiochip0', kernel_buffer=1024):
+        """
+        Edge source backed by the kernel GPIO character device.
+
+        Args:
+            gpio_pin (int or list): Line offset(s) on the chip (BCM GPIO numbers on a Pi)
+            chip_path (str): GPIO chip device (default: /dev/gpiochip0)
+            kernel_buffer (int): Events the kernel may queue between reads
+        """
+        super().__init__(chip_path)
+        if isinstance(gpio_pin, (list, tuple)):
+            self.gpio_pins = list(gpio_pin)
+        else:
+            self.gpio_pins = [gpio_pin]
+        self.kernel_buffer = kernel_buffer
+
+    def open(self):
+        """
+        Request the line(s) for both-edge input events.
+
+        Raises:
+            OSError: If the chip can't be opened or a line is busy
+        """
+        offsets = self.gpio_pins + [0] * (64 - len(self.gpio_pins))
+        flags = GPIO_V2_LINE_FLAG_INPUT | GPIO_V2_LINE_FLAG_EDGE_RISING | GPIO_V2_LINE_FLAG_EDGE_FALLING
+        line_config = LINE_CONFIG.pack(flags, 0, 0, 0, 0, 0, 0)
+        request = bytearray(LINE_REQUEST.pack(
+            *offsets, b'ping-my-phone', line_config, len(self.gpio_pins),
+            self.kernel_buffer, 0, 0, 0, 0, 0, 0,
+        ))
+
+        chip_fd = os.open(self.path, os.O_RDONLY)
+        try:
+            fcntl.ioctl(chip_fd, GPIO_V2_GET_LINE_IOCTL, request)
+        finally:
+            os.close(chip_fd)
+
+        line_fd = LINE_REQUEST.unpack(request)[-1]
+        os.set_blocking(line_fd, False)
+        self.fd = line_fd
+
+
+class BatchedRFMonitor:
+    def __init__(self, edge_source, batch_size=256, jam_detector=None):
+        """
+        RF monitor that decodes batches of edge events.
+
+        Args:
+            edge_source: FileEdgeSource or GpioChardevEdgeSource
+            batch_size (int): Maximum edge events read per poll (default: 256)
+            jam_detector: Optional JamDetector fed the raw edge rate, so noise
+                that never decodes into frames still counts as jamming
+                (default: None)
+        """
+        self.edge_source = edge_source
+        self.batch_size = batch_size
+        self.jam_detector = jam_detector
+        self.decoders = None
+        self._pending = deque()
+        self._partial = b''
+        self.batches_read = 0
+
+    def start(self):
+        """
+        Open the edge source and reset decoder state.
+
+        Must be called before check_for_code().
+        """
+        self.edge_source.open()
+        # One decoder per line offset, created as edges for each pin arrive
+        self.decoders = {}
+        self._pending.clear()
+        self._partial = b''
+
+    def _read_batch(self):
+        """Read one batch of records and queue any frames decoded from it."""
+        data = self.edge_source.read(self.batch_size * EVENT_SIZE)
+        if not data:
+            return
+        self.batches_read += 1
+
+        # Pipes may split records across reads - keep the remainder for next time
+        if self._partial:
+            data = self._partial + data
+        usable = len(data) - len(data) % EVENT_SIZE
+        self._partial = data[usable:]
+        if not usable:
+            return
+
+        words = array('Q')
+        words.frombytes(data[:usable])
+        timestamps_ns = words[::WORDS_PER_EVENT]
+        if self.jam_detector is not None:
+            self.jam_detector.observe_edges(len(timestamps_ns), timestamps_ns[-1] / 1e9)
+        # Second word holds id (low 32 bits) and line offset (high 32 bits)
+        id_words = words[1::WORDS_PER_EVENT]
+
+        # Shared decode scheduler: split the batch by pin, keeping edge order
+        per_pin = {}
+        for timestamp, id_word in zip(timestamps_ns, id_words):
+            pin = id_word >> 32
+            edges = per_pin.get(pin)
+            if edges is None:
+                edges = per_pin[pin] = []
+            edges.append(timestamp // 1000)
+
+        decoded = []
+        for pin, edges in per_pin.items():
+            decoder = self.decoders.get(pin)
+            if decoder is None:
+                decoder = self.decoders[pin] = EdgeDecoder(receiver=pin)
+            decoder.feed(edges, decoded)
+        if len(per_pin) > 1:
+            decoded.sort(key=lambda event: event.timestamp)
+        self._pending.extend(decoded)
+
+    def check_for_event(self):
+        """
+        Return the next decoded frame.
+
+        Returns:
+            RFEvent or None: Next frame, or None if no new frame
+        """
+        if self.decoders is None:
+            return None
+        if not self._pending:
+            self._read_batch()
+        if self._pending:
+            return self._pending.popleft()
+        return None
+
+    def check_for_code(self):
+        """
+        Return the code of the next decoded frame.
+
+        Returns:
+            int or None: Detected RF code, or None if no new code
+        """
+        event = self.check_for_event()
+        return event.code if event is not None else None
+
+    def metrics(self):
+        """
+        Get per-pin reception metrics.
+
+        Returns:
+            dict: GPIO pin -> {'edges': edges decoded, 'frames': frames decoded}
+        """
+        return {
+            pin: {'edges': decoder.edges_seen, 'frames': decoder.frames_decoded}
+            for pin, decoder in (self.decoders or {}).items()
+        }
+
+    def cleanup(self):
+        """
+        Close the edge source.
+
+        Safe to call multiple times.
+        """
+        self.edge_source.close()
+        self.decoders = None
+        self._pending.clear()
+        self._partial = b''
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Button Enrollment
+=================
+
+Building blocks for enrolling many buttons in one discovery session (see
+button_discovery_tool.py --batch).
+
+- BurstSegmenter: one press transmits the same code several times in quick
+  succession. Frames of one code closer together than `gap` seconds form a
+  burst; a burst ends at a longer silence or when another code is heard.
+  Bursts with fewer than `min_frames` frames are treated as stray decodes.
+- Enrollment: sorts bursts into known (already configured or enrolled),
+  noise (heard while nothing was being pressed, or marked as noise) and new
+  codes that still need a label.
+- merge_button_config: merges the enrolled buttons into button_config.json
+  and replaces the file atomically, so the running doorbell (or a reload)
+  never sees a half-written table.
+"""
+
+import json
+import os
+import tempfile
+
+from notification_scheduler import Button
+
+
+class Burst:
+    def __init__(self, code, start, protocol=None, pulselength=None):
+        """
+        Frames of one code received in quick succession (one press).
+
+        Args:
+            code (int): RF code
+            start (float): Timestamp of the first frame (seconds)
+            protocol (int): rpi_rf protocol number, if known
+            pulselength (int): Pulse length of the first frame, if known
+        """
+        self.code = code
+        self.start = start
+        self.end = start
+        self.frames = 1
+        self.protocol = protocol
+        self.pulselength = pulselength
+
+    def __repr__(self):
+        return f"Burst({self.code}, frames={self.frames}, start={self.start}, end={self.end})"
+
+
+class BurstSegmenter:
+    def __init__(self, gap=0.5, min_frames=2):
+        """
+        Initialize the segmenter.
+
+        Args:
+            gap (float): Silence in seconds that ends a burst (default: 0.5)
+            min_frames (int): Fewest frames for a burst to count as a press
+                (default: 2)
+        """
+        self.gap = gap
+        self.min_frames = min_frames
+        self.current = None
+
+    def feed(self, code, timestamp, protocol=None, pulselength=None):
+        """
+        Add one received frame.
+
+        Args:
+            code (int): RF code
+            timestamp (float): Time the frame was received (seconds)
+            protocol (int): rpi_rf protocol number, if known
+            pulselength (int): Pulse length, if known
+
+        Returns:
+            Burst or None: The burst this frame completed, if any
+        """
+        current = self.current
+        if current is not None and current.code == code and timestamp - current.end < self.gap:
+            current.frames += 1
+            current.end = timestamp
+            return None
+        self.current = Burst(code, timestamp, protocol, pulselength)
+        return self._accept(current)
+
+    def flush(self, now):
+        """
+        End the current burst if it has been quiet for `gap` seconds.
+
+        Args:
+            now (float): Current time (same timebase as feed())
+
+        Returns:
+            Burst or None: The completed burst, if any
+        """
+        current = self.current
+        if current is None or now - current.end < self.gap:
+            return None
+        self.current = None
+        return self._accept(current)
+
+    def reset(self):
+        """Forget the burst in progress (e.g. frames heard while prompting)."""
+        self.current = None
+
+    def _accept(self, burst):
+        if burst is None or burst.frames < self.min_frames:
+            return None
+        return burst
+
+
+class Enrollment:
+    KNOWN = 'known'
+    NOISE = 'noise'
+    NEW = 'new'
+
+    def __init__(self, buttons=None, noise_codes=()):
+        """
+        Initialize an enrollment session.
+
+        Args:
+            buttons (dict): Already configured buttons, keyed by RF code
+                (default: none)
+            noise_codes: Codes to ignore, e.g. from a previous session
+        """
+        self.configured = dict(buttons or {})
+        self.enrolled = {}
+        self.noise_codes = set(noise_codes)
+
+    def classify(self, code):
+        """
+        Decide what to do with a burst's code.
+
+        Args:
+            code (int): RF code
+
+        Returns:
+            str: Enrollment.KNOWN, Enrollment.NOISE or Enrollment.NEW
+        """
+        if code in self.noise_codes:
+            return self.NOISE
+        if code in self.enrolled or code in self.configured:
+            return self.KNOWN
+        return self.NEW
+
+    def add(self, code, name, priority='normal'):
+        """
+        Enroll a button.
+
+        Args:
+            code (int): RF code
+            name (str): Label used in notifications
+            priority (str): Notification priority (default: 'normal')
+
+        Returns:
+            Button: The enrolled button
+
+        Raises:
+            ValueError: If priority is not a known class
+        """
+        button = self.enrolled[code] = Button(code, name, priority)
+        return button
+
+    def mark_noise(self, code):
+        """Ignore a code for the rest of this and future sessions."""
+        self.noise_codes.add(code)
+        self.enrolled.pop(code, None)
+
+
+def parse_label(text):
+    """
+    Parse a label typed during enrollment.
+
+    Args:
+        text (str): 'Name' or 'Name, priority'
+
+    Returns:
+        tuple: (name, priority)
+    """
+    name, _, priority = text.partition(',')
+    return name.strip(), priority.strip().lower() or 'normal'
+
+
+def merge_button_config(path, buttons, noise_codes=()):
+    """
+    Merge buttons into a button_config.json, replacing the file atomically.
+
+    Buttons already in the file keep their place; enrolled ones with the same
+    code replace them, new ones are appended. Other keys are kept.
+
+    Args:
+        path (str): Path of button_config.json (need not exist yet)
+        buttons: Buttons to merge (iterable of Button)
+        noise_codes: Codes to record as NOISE_CODES for future sessions
+
+    Returns:
+        dict: The configuration that was written
+
+    Raises:
+        ValueError: If a code is both a button and a noise code (nothing is
+            written; the file needs fixing by hand)
+    """
+    try:
+        with open(path, 'r') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {}
+
+    entries = {entry['CODE']: entry for entry in config.get('BUTTONS', [])}
+    # Keep a single-button config's code as a plain doorbell
+    legacy = config.get('BUTTON_CODE')
+    if legacy is not None and legacy not in entries:
+        entries = {legacy: {'CODE': legacy}, **entries}
+    for button in buttons:
+        entry = {'CODE': button.code}
+        if button.name:
+            entry['NAME'] = button.name
+        if button.priority != 'normal':
+            entry['PRIORITY'] = button.priority
+        entries[button.code] = entry
+
+    noise = set(config.get('NOISE_CODES', [])) | set(noise_codes)
+    conflicts = sorted(noise & set(entries))
+    if conflicts:
+        raise ValueError(f"codes {', '.join(map(str, conflicts))} are listed both as buttons and "
+                         f"as NOISE_CODES in {path}")
+
+    config['BUTTONS'] = list(entries.values())
+    if config.get('BUTTON_CODE') not in entries:
+        config.pop('BUTTON_CODE', None)
+        if entries:
+            config['BUTTON_CODE'] = next(iter(entries))
+    if noise:
+        config['NOISE_CODES'] = sorted(noise)
+
+    # Write next to the target and rename over it: readers see the old or
+    # the new file, never a partial one
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.button_config.', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; keep the permissions of the old file
+        mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    # The rename only survives a power cut once the directory is synced too
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+    return config
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Event Forwarder
+===============
+
+Forwards decoded RF events from a doorbell node to a central aggregator
+(see aggregator.py) over UDP, so many Pis across sites share one Telegram
+bot and one button table instead of each holding credentials.
+
+Wire format (network byte order, one message per datagram):
+
+    header  magic 'DB', version, type, node id (u32), epoch (u32)
+    DATA    first seq (u32), oldest retained seq (u32), event count (u16),
+            then per event: code (u32), wall time in microseconds (i64),
+            receiver pin (u16, 0xFFFF if unknown), pulselength (u16),
+            protocol (u8) - 17 bytes each
+    ACK     next expected seq (u32), range count (u8),
+            then per missing range: first seq (u32), length (u16)
+    tag     with a shared key (AGGREGATOR_KEY), every datagram ends with the
+            first 16 bytes of an HMAC-SHA256 over the rest of it
+
+Every event gets a sequence number. Events are batched (up to batch_size
+per datagram, or whatever arrived within flush_interval) and kept in a
+bounded retransmit buffer until the aggregator acknowledges them. The
+aggregator answers each DATA datagram with an ACK carrying its cumulative
+position and any gaps; gaps are resent from the buffer. An empty DATA
+datagram is sent as a heartbeat when idle, so a lost final batch is still
+noticed. The epoch is a random 32-bit number drawn at startup, so it
+changes whenever a node restarts (even twice in one second, or after the
+clock was set back), telling the aggregator its sequence numbers start
+again from zero. With a key set only the node itself can sign a new
+epoch.
+
+Without a key anyone who can reach the aggregator's port can inject
+presses, so it listens on localhost unless AGGREGATOR_BIND says otherwise.
+Set the same AGGREGATOR_KEY on the aggregator and every node before
+exposing it; unsigned or wrongly signed datagrams are then dropped.
+
+EventForwarder does no I/O of its own between calls: the service calls
+poll() from its loop (or runs serve_async() on the asyncio runtime).
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import socket
+import struct
+from collections import deque
+
+from clock import SYSTEM_CLOCK
+
+MAGIC = b'DB'
+VERSION = 1
+DATA = 1
+ACK = 2
+
+HEADER = struct.Struct('!2sBBII')     # magic, version, type, node id, epoch
+DATA_INFO = struct.Struct('!IIH')     # first seq, oldest retained seq, event count
+EVENT = struct.Struct('!IqHHB')       # code, wall time (us), receiver, pulselength, protocol
+ACK_INFO = struct.Struct('!IB')       # next expected seq, missing range count
+RANGE = struct.Struct('!IH')          # first missing seq, length
+
+NO_RECEIVER = 0xFFFF
+TAG_SIZE = 16
+# Keeps a full batch within a typical 1500-byte MTU
+MAX_BATCH = 64
+MAX_RANGES = 64
+
+
+def pack_event(event, wall_time):
+    """
+    Encode one event record.
+
+    Args:
+        event (RFEvent): Decoded frame (code must fit in 32 bits)
+        wall_time (float): Wall-clock time of the frame (seconds since the epoch)
+
+    Returns:
+        bytes: EVENT.size bytes
+    """
+    receiver = event.receiver if isinstance(event.receiver, int) else NO_RECEIVER
+    return EVENT.pack(event.code, int(wall_time * 1_000_000), receiver,
+                      min(event.pulselength or 0, 0xFFFF), event.protocol or 0)
+
+
+def unpack_events(payload, count):
+    """
+    Decode event records.
+
+    Args:
+        payload (bytes): Concatenated EVENT records
+        count (int): Number of records
+
+    Returns:
+        list: (code, wall time in seconds, receiver, pulselength, protocol) tuples
+
+    Raises:
+        ValueError: If the payload is shorter than count records
+    """
+    if len(payload) < count * EVENT.size:
+        raise ValueError("truncated DATA datagram")
+    events = []
+    for code, micros, receiver, pulselength, protocol in EVENT.iter_unpack(payload[:count * EVENT.size]):
+        events.append((code, micros / 1_000_000, None if receiver == NO_RECEIVER else receiver,
+                       pulselength or None, protocol or None))
+    return events
+
+
+def pack_data(node_id, epoch, first_seq, oldest, records):
+    """Build a DATA datagram from packed event records."""
+    return (HEADER.pack(MAGIC, VERSION, DATA, node_id, epoch) +
+            DATA_INFO.pack(first_seq, oldest, len(records)) + b''.join(records))
+
+
+def pack_ack(node_id, epoch, next_expected, ranges):
+    """Build an ACK datagram (at most MAX_RANGES missing ranges)."""
+    ranges = ranges[:MAX_RANGES]
+    return (HEADER.pack(MAGIC, VERSION, ACK, node_id, epoch) +
+            ACK_INFO.pack(next_expected, len(ranges)) +
+            b''.join(RANGE.pack(start, length) for start, length in ranges))
+
+
+def sign(datagram, key):
+    """
+    Append the HMAC tag to a datagram.
+
+    Args:
+        datagram (bytes): DATA or ACK datagram
+        key (bytes): Shared key
+
+    Returns:
+        bytes: datagram followed by TAG_SIZE tag bytes
+    """
+    return datagram + hmac.new(key, datagram, hashlib.sha256).digest()[:TAG_SIZE]
+
+
+def verify(datagram, key):
+    """
+    Check and strip the HMAC tag of a received datagram.
+
+    Args:
+        datagram (bytes): Received datagram
+        key (bytes): Shared key
+
+    Returns:
+        bytes: The datagram without its tag
+
+    Raises:
+        ValueError: If the tag is missing or doesn't match
+    """
+    message, tag = datagram[:-TAG_SIZE], datagram[-TAG_SIZE:]
+    expected = hmac.new(key, message, hashlib.sha256).digest()[:TAG_SIZE]
+    if len(datagram) <= TAG_SIZE or not hmac.compare_digest(tag, expected):
+        raise ValueError("bad datagram signature")
+    return message
+
+
+def parse_header(datagram):
+    """
+    Split a datagram into its header fields and body.
+
+    Args:
+        datagram (bytes): Received datagram
+
+    Returns:
+        tuple: (type, node id, epoch, body)
+
+    Raises:
+        ValueError: If it isn't a datagram of this protocol version
+    """
+    if len(datagram) < HEADER.size:
+        raise ValueError("datagram too short")
+    magic, version, kind, node_id, epoch = HEADER.unpack_from(datagram)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a doorbell datagram")
+    return kind, node_id, epoch, datagram[HEADER.size:]
+
+
+def parse_ack(body):
+    """
+    Decode an ACK body.
+
+    Returns:
+        tuple: (next expected seq, [(first missing seq, length), ...])
+
+    Raises:
+        ValueError: If the body is truncated
+    """
+    if len(body) < ACK_INFO.size:
+        raise ValueError("truncated ACK datagram")
+    next_expected, count = ACK_INFO.unpack_from(body)
+    ranges = body[ACK_INFO.size:ACK_INFO.size + count * RANGE.size]
+    if len(ranges) < count * RANGE.size:
+        raise ValueError("truncated ACK datagram")
+    return next_expected, list(RANGE.iter_unpack(ranges))
+
+
+class EventForwarder:
+    def __init__(self, address, node_id, clock=None, batch_size=MAX_BATCH, flush_interval=0.05,
+                 heartbeat_interval=1.0, retransmit_interval=0.2, buffer_size=4096, sock=None,
+                 key=None):
+        """
+        Initialize the forwarder.
+
+        Args:
+            address (tuple): Aggregator (host, port)
+            node_id (int): This node's id (u32), unique across sites
+            clock: Clock for batching timers and wall times (default: system clock)
+            batch_size (int): Most events per datagram (default: 64, the maximum)
+            flush_interval (float): Longest an event waits for its batch to fill,
+                seconds (default: 0.05)
+            heartbeat_interval (float): Idle seconds between heartbeats (default: 1.0)
+            retransmit_interval (float): Least seconds between resends of missing
+                events (default: 0.2)
+            buffer_size (int): Unacknowledged events kept for resending; older
+                ones are given up (default: 4096)
+            sock: UDP socket to use (default: a new non-blocking one)
+            key (bytes): Shared key signing every datagram; must match the
+                aggregator's (default: None, unsigned)
+        """
+        self.address = address
+        self.node_id = node_id
+        self.clock = clock or SYSTEM_CLOCK
+        self.batch_size = min(batch_size, MAX_BATCH)
+        self.flush_interval = flush_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.retransmit_interval = retransmit_interval
+        self.key = key
+        self.epoch = int.from_bytes(os.urandom(4), 'big')
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+        self.sock = sock
+        self.next_seq = 0
+        self.acked = 0
+        # (seq, packed record), contiguous in seq; the oldest fall off when full
+        self._unacked = deque(maxlen=buffer_size)
+        self._batch = []
+        self._batch_first = 0
+        self._batch_started = None
+        self._last_send = None
+        self._last_retransmit = None
+        self.datagrams_sent = 0
+        self.events_resent = 0
+
+    def submit(self, event):
+        """
+        Queue one event for the aggregator.
+
+        Args:
+            event (RFEvent): Decoded frame (timestamp on the monotonic clock)
+        """
+        clock = self.clock
+        now = clock.monotonic()
+        record = pack_event(event, clock.time() - (now - event.timestamp))
+        if not self._batch:
+            self._batch_first = self.next_seq
+            self._batch_started = now
+        self._batch.append(record)
+        self._unacked.append((self.next_seq, record))
+        self.next_seq += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush(now)
+
+    def poll(self):
+        """Read acknowledgements, resend gaps and send due batches or heartbeats."""
+        self._receive()
+        now = self.clock.monotonic()
+        if self._batch:
+            if now - self._batch_started >= self.flush_interval:
+                self._flush(now)
+        elif self._last_send is None or now - self._last_send >= self.heartbeat_interval:
+            self._send([], self.next_seq, now)
+
+    def _flush(self, now):
+        batch, self._batch = self._batch, []
+        self._send(batch, self._batch_first, now)
+
+    def _send(self, records, first_seq, now):
+        oldest = self._unacked[0][0] if self._unacked else self.next_seq
+        datagram = pack_data(self.node_id, self.epoch, first_seq, oldest, records)
+        if self.key is not None:
+            datagram = sign(datagram, self.key)
+        try:
+            self.sock.sendto(datagram, self.address)
+        except (BlockingIOError, OSError):
+            # Lost like any datagram; the aggregator asks for it again
+            pass
+        self.datagrams_sent += 1
+        self._last_send = now
+
+    def _receive(self):
+        while True:
+            try:
+                datagram = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # e.g. ECONNREFUSED reported for an earlier send
+                continue
+            try:
+                if self.key is not None:
+                    datagram = verify(datagram, self.key)
+                kind, node_id, epoch, body = parse_header(datagram)
+                if kind != ACK or node_id != self.node_id or epoch != self.epoch:
+                    continue
+                next_expected, ranges = parse_ack(body)
+            except ValueError:
+                continue
+            self._handle_ack(next_expected, ranges)
+
+    def _handle_ack(self, next_expected, ranges):
+        unacked = self._unacked
+        while unacked and unacked[0][0] < next_expected:
+            unacked.popleft()
+        self.acked = max(self.acked, next_expected)
+
+        now = self.clock.monotonic()
+        if not ranges or not unacked:
+            return
+        if self._last_retransmit is not None and now - self._last_retransmit < self.retransmit_interval:
+            return
+        self._last_retransmit = now
+        base = unacked[0][0]
+        for start, length in ranges:
+            # Events still waiting in the current batch go out with it
+            end = min(start + length, self._batch_first if self._batch else self.next_seq)
+            start = max(start, base)
+            for chunk in range(start, end, self.batch_size):
+                chunk_end = min(chunk + self.batch_size, end)
+                records = [unacked[seq - base][1] for seq in range(chunk, chunk_end)]
+                self._send(records, chunk, now)
+                self.events_resent += len(records)
+
+    def pending(self):
+        """
+        Get the number of events not yet acknowledged.
+
+        Returns:
+            int: Unacknowledged events (including the batch being filled)
+        """
+        return len(self._unacked)
+
+    async def serve_async(self, service=None):
+        """
+        Poll on the running event loop until cancelled (for AsyncDoorbellService).
+
+        Args:
+            service: Ignored; accepted so this can be passed to service.add_task
+        """
+        while True:
+            self.poll()
+            await asyncio.sleep(self.flush_interval / 2)
+
+    def close(self):
+        """Send whatever is batched and close the socket."""
+        if self._batch:
+            self._flush(self.clock.monotonic())
+        self.sock.close()
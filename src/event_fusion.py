@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Event Fusion
+============
+
+Merges detections of the same button press from several receivers.
+
+With multiple antennas covering a site, one press is often decoded by two or
+three receivers. EventFusion keys detections on (code, time window) so they
+collapse into a single FusedEvent that keeps the earliest timestamp and
+records which receivers heard it.
+
+Detections are stored in a time-bucketed hash (one dict per window-sized
+bucket). Buckets older than the merge horizon are evicted as new events
+arrive, so memory stays flat no matter how long the service runs.
+"""
+
+from collections import deque
+
+from rf_event import RFEvent
+
+
+class FusedEvent(RFEvent):
+    __slots__ = ('receivers', 'detections')
+
+    def __init__(self, event, receiver):
+        """
+        Initialize a fused event from its first detection.
+
+        Args:
+            event (RFEvent): First detection of the press
+            receiver: Name of the receiver that produced it
+        """
+        super().__init__(event.code, event.timestamp, event.protocol, event.pulselength,
+                         receiver=receiver)
+        self.receivers = [receiver]
+        self.detections = 1
+
+    def merge(self, event, receiver):
+        """
+        Add another detection of the same press.
+
+        Args:
+            event (RFEvent): Later (or out-of-order) detection
+            receiver: Name of the receiver that produced it
+        """
+        self.detections += 1
+        if receiver not in self.receivers:
+            self.receivers.append(receiver)
+        if event.timestamp < self.timestamp:
+            self.timestamp = event.timestamp
+            self.protocol = event.protocol
+            self.pulselength = event.pulselength
+
+
+class EventFusion:
+    def __init__(self, window=0.5):
+        """
+        Initialize the fusion stage.
+
+        Args:
+            window (float): Detections of the same code within this many seconds
+                are treated as one press (default: 0.5)
+        """
+        self.window = window
+        self._buckets = {}
+        self._bucket_order = deque()
+        self.events_fused = 0
+        self.detections_merged = 0
+
+    def observe(self, event, receiver):
+        """
+        Record one detection.
+
+        Args:
+            event (RFEvent): Decoded frame from one receiver
+            receiver: Name of the receiver that produced it
+
+        Returns:
+            FusedEvent or None: New fused event for a first detection, or None if the
+            detection was merged into an event that was already returned
+        """
+        bucket_id = int(event.timestamp // self.window)
+        self._evict(bucket_id)
+
+        # A matching detection can sit in this bucket or either neighbour
+        for candidate_id in (bucket_id, bucket_id - 1, bucket_id + 1):
+            bucket = self._buckets.get(candidate_id)
+            if bucket is None:
+                continue
+            fused = bucket.get(event.code)
+            if fused is not None and abs(fused.timestamp - event.timestamp) <= self.window:
+                fused.merge(event, receiver)
+                self.detections_merged += 1
+                return None
+
+        bucket = self._buckets.get(bucket_id)
+        if bucket is None:
+            bucket = self._buckets[bucket_id] = {}
+            self._bucket_order.append(bucket_id)
+        fused = bucket[event.code] = FusedEvent(event, receiver)
+        self.events_fused += 1
+        return fused
+
+    def _evict(self, bucket_id):
+        """Drop buckets too old to match anything at or after bucket_id."""
+        order = self._bucket_order
+        while order and order[0] < bucket_id - 2:
+            del self._buckets[order.popleft()]
+
+    def tracked_events(self):
+        """
+        Count fused events still held for merging.
+
+        Returns:
+            int: Number of (code, window) entries in memory
+        """
+        return sum(len(bucket) for bucket in self._buckets.values())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+HTTP Client
+===========
+
+Minimal standard-library stand-in for the part of requests.Session the
+Telegram notifier and command channel use: POST a form (or a streamed
+MultipartFile, see snapshot.py) and read back a JSON answer.
+
+It exists for the low-memory profile (LOW_MEMORY=1, see config.py):
+importing requests pulls in urllib3, idna, charset_normalizer and certifi,
+several megabytes of resident memory on a Pi Zero for what is always the
+same kind of POST. http.client, ssl and json are all this needs.
+
+Like requests.Session, connections are kept alive and pooled per host, so
+repeated notifications reuse one TLS connection, and several threads can
+post at once (a long poll doesn't hold up a notification). A pooled
+connection the server has closed is noticed before reuse and replaced, as
+urllib3 does. Proxies, redirects and cookies are not supported.
+"""
+
+import http.client
+import json
+import select
+import threading
+from urllib.parse import urlencode, urlsplit
+
+
+class HTTPError(Exception):
+    """Raised by Response.raise_for_status() for 4xx and 5xx answers."""
+
+    def __init__(self, response):
+        try:
+            description = response.json().get('description', '')
+        except (ValueError, AttributeError):
+            description = ''
+        super().__init__(f"HTTP {response.status_code}: {description}".rstrip(': '))
+        self.response = response
+
+
+class Response:
+    def __init__(self, status_code, headers, content):
+        """
+        Fully read HTTP response.
+
+        Args:
+            status_code (int): HTTP status
+            headers (dict): Response headers, lower-cased names
+            content (bytes): Response body
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        """Decode the body as JSON."""
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        """
+        Raises:
+            HTTPError: If the status is 400 or above
+        """
+        if self.status_code >= 400:
+            raise HTTPError(self)
+
+
+class HTTPSession:
+    # What _post() in telegram_notifier.py counts as transport failures
+    # (requests.ConnectionError and requests.Timeout for requests); socket
+    # timeouts and resets are OSErrors
+    transport_errors = (OSError, http.client.HTTPException)
+
+    def __init__(self, max_idle=2):
+        """
+        Initialize the session (connections are opened on first use).
+
+        Args:
+            max_idle (int): Idle connections kept per host (default: 2, one
+                for notifications and one for the command long poll)
+        """
+        self.max_idle = max_idle
+        self.connections_opened = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        """
+        POST a form or a streamed body and read the whole response.
+
+        Args:
+            url (str): http:// or https:// URL
+            data: dict to form-encode, bytes, or a sized file-like body such as
+                a MultipartFile (sent with a Content-Length, not chunked)
+            headers (dict): Extra request headers
+            timeout (float): Socket timeout in seconds (default: None, blocking)
+
+        Returns:
+            Response: Response, whatever its status
+
+        Raises:
+            OSError: If connecting, sending or receiving failed (including timeouts)
+            http.client.HTTPException: If the server's answer wasn't valid HTTP
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        request_headers = {'Connection': 'keep-alive'}
+        if isinstance(data, dict):
+            data = urlencode(data).encode('ascii')
+            request_headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if data is not None:
+            request_headers['Content-Length'] = str(len(data))
+        if headers:
+            request_headers.update(headers)
+
+        connection = self._checkout(key, timeout)
+        try:
+            connection.request('POST', path, body=data, headers=request_headers)
+            answer = connection.getresponse()
+            content = answer.read()
+        except BaseException:
+            connection.close()
+            raise
+        response = Response(answer.status,
+                            {name.lower(): value for name, value in answer.getheaders()}, content)
+        if answer.will_close:
+            connection.close()
+        else:
+            self._checkin(key, connection)
+        return response
+
+    def _checkout(self, key, timeout):
+        """Take an idle connection to the host that is still open, or open a new one."""
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                connection = idle.pop()
+                # Readable while idle means the server closed it (or sent junk)
+                if select.select([connection.sock], [], [], 0)[0]:
+                    connection.close()
+                    continue
+                connection.sock.settimeout(timeout)
+                return connection
+            self.connections_opened += 1
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _checkin(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """Close pooled connections."""
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for idle in pools.values():
+            for connection in idle:
+                connection.close()
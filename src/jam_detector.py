@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Jam Detector
+============
+
+Streaming detection of stuck transmitters and 433 MHz jamming.
+
+A neighbour's faulty sensor that transmits non-stop, or a jammer, makes the
+receiver decode a steady flood of frames: CPU goes to handling junk and
+real presses get lost in it. JamDetector sits at the front of the RF path
+and decides per frame whether it's worth handling:
+
+- per-code frame rates: a code that stays above code_rate frames/s for
+  sustain seconds is quarantined (dropped) for quarantine_time seconds,
+  extended for as long as it keeps flooding
+- overall frame rate (and edge rate, when the monitor reports edges): above
+  jam_rate the band is considered jammed, and frames that don't match a
+  configured button are shed without further work until it calms down
+
+Rates are exponentially decayed counters (time constant tau): each frame
+adds 1/tau and the value decays by exp(-dt/tau), which tracks frames/s
+without keeping any history. At most max_codes codes are tracked; when
+full, the quieter half is forgotten. Memory use is constant however long
+a flood lasts.
+
+Timestamps come from the frames themselves (monotonic seconds, see
+RFEvent), so recorded captures replay deterministically.
+"""
+
+import math
+
+
+class _CodeRate:
+    __slots__ = ('rate', 'last', 'over_since', 'quarantined_until', 'dropped')
+
+    def __init__(self, now):
+        self.rate = 0.0
+        self.last = now
+        self.over_since = None
+        self.quarantined_until = None
+        self.dropped = 0
+
+
+class JamDetector:
+    def __init__(self, code_rate=5.0, sustain=10.0, quarantine_time=300.0, jam_rate=50.0,
+                 edge_rate=20000.0, tau=5.0, max_codes=64):
+        """
+        Initialize the detector.
+
+        Args:
+            code_rate (float): Frames/s above which one code counts as flooding
+                (default: 5.0; a normal press decays to about 2)
+            sustain (float): Seconds a code must keep flooding before it is
+                quarantined (default: 10.0)
+            quarantine_time (float): Seconds a flooding code stays dropped
+                (default: 300.0)
+            jam_rate (float): Total frames/s above which the band counts as
+                jammed (default: 50.0)
+            edge_rate (float): Edges/s above which the band counts as jammed,
+                for monitors that report edges (default: 20000.0)
+            tau (float): Time constant of the decayed rates, seconds (default: 5.0)
+            max_codes (int): Most codes tracked at once (default: 64)
+        """
+        self.code_rate = code_rate
+        self.sustain = sustain
+        self.quarantine_time = quarantine_time
+        self.jam_rate = jam_rate
+        self.edge_rate_limit = edge_rate
+        self.tau = tau
+        self.max_codes = max_codes
+        self.jammed = False
+        self.frame_rate = 0.0
+        self.edge_rate = 0.0
+        self.shed = 0
+        self.quarantined = 0
+        self._codes = {}
+        self._frame_last = None
+        self._edge_last = None
+
+    def _decay(self, rate, last, now, amount):
+        """Decay rate from last to now, then add amount occurrences."""
+        if now > last:
+            rate *= math.exp((last - now) / self.tau)
+        return rate + amount / self.tau
+
+    def observe_edges(self, count, now):
+        """
+        Account for raw edges read from the receiver (e.g. by BatchedRFMonitor).
+
+        Args:
+            count (int): Edges in this batch
+            now (float): Timestamp of the last edge, monotonic seconds
+        """
+        last = self._edge_last if self._edge_last is not None else now
+        self.edge_rate = self._decay(self.edge_rate, last, now, count)
+        self._edge_last = now
+        self._update_jammed()
+
+    def observe(self, event, matched):
+        """
+        Update rates with one decoded frame and decide whether to handle it.
+
+        Args:
+            event (RFEvent): Decoded frame
+            matched (bool): Whether the code belongs to a configured button
+
+        Returns:
+            bool: True to handle the frame, False to drop it
+        """
+        now = event.timestamp
+        last = self._frame_last if self._frame_last is not None else now
+        self.frame_rate = self._decay(self.frame_rate, last, now, 1)
+        self._frame_last = now
+        self._update_jammed()
+
+        entry = self._codes.get(event.code)
+        if entry is None:
+            # Cheapest path for junk during a flood: no per-code bookkeeping
+            if self.jammed and not matched:
+                self.shed += 1
+                return False
+            if len(self._codes) >= self.max_codes:
+                self._forget_quietest(now)
+            entry = self._codes[event.code] = _CodeRate(now)
+        entry.rate = self._decay(entry.rate, entry.last, now, 1)
+        entry.last = now
+
+        if entry.rate > self.code_rate:
+            if entry.over_since is None:
+                entry.over_since = now
+            if now - entry.over_since >= self.sustain:
+                if entry.quarantined_until is None or entry.quarantined_until <= now:
+                    self.quarantined += 1
+                # Keep extending while it floods
+                entry.quarantined_until = now + self.quarantine_time
+        else:
+            entry.over_since = None
+
+        if entry.quarantined_until is not None:
+            if entry.quarantined_until > now:
+                entry.dropped += 1
+                return False
+            entry.quarantined_until = None
+
+        if self.jammed and not matched:
+            self.shed += 1
+            return False
+        return True
+
+    def _update_jammed(self):
+        self.jammed = self._jammed_at(self.frame_rate, self.edge_rate)
+
+    def _jammed_at(self, frame_rate, edge_rate):
+        # Hysteresis: clear only once well below the limits
+        if frame_rate > self.jam_rate or edge_rate > self.edge_rate_limit:
+            return True
+        if frame_rate < self.jam_rate / 2 and edge_rate < self.edge_rate_limit / 2:
+            return False
+        return self.jammed
+
+    def refresh(self, now):
+        """
+        Re-check the jammed state against the rates decayed to now.
+
+        A jam that simply stops leaves no frame behind to clear it, so the
+        service calls this while idle. Call it from the thread that calls
+        observe().
+
+        Args:
+            now (float): Current monotonic time
+
+        Returns:
+            bool: Whether the band is still jammed
+        """
+        self.jammed = self._jammed_at(self._decayed(self.frame_rate, self._frame_last, now),
+                                      self._decayed(self.edge_rate, self._edge_last, now))
+        return self.jammed
+
+    def _forget_quietest(self, now):
+        """Forget the quieter half of the tracked codes (quarantined codes last)."""
+        # Halving at once keeps eviction amortized O(log n) per new code
+        def current(item):
+            entry = item[1]
+            rate = entry.rate * math.exp(min(0.0, entry.last - now) / self.tau)
+            return (entry.quarantined_until is not None, rate)
+        ranked = sorted(self._codes.items(), key=current)
+        for code, _entry in ranked[:max(1, len(ranked) // 2)]:
+            del self._codes[code]
+
+    def quarantined_codes(self, now):
+        """
+        List codes currently being dropped.
+
+        Args:
+            now (float): Current monotonic time
+
+        Returns:
+            list: (code, seconds left, frames dropped) tuples
+        """
+        return [(code, round(entry.quarantined_until - now, 1), entry.dropped)
+                for code, entry in self._codes.items()
+                if entry.quarantined_until is not None and entry.quarantined_until > now]
+
+    def status(self, now):
+        """
+        Get a snapshot for monitoring.
+
+        Args:
+            now (float): Current monotonic time
+
+        Read-only, so it is safe from the control socket thread; the jammed
+        flag is worked out from the decayed rates rather than the last frame.
+
+        Returns:
+            dict: jammed flag, rates, shed count and quarantined codes
+        """
+        frame_rate = self._decayed(self.frame_rate, self._frame_last, now)
+        edge_rate = self._decayed(self.edge_rate, self._edge_last, now)
+        return {
+            'jammed': self._jammed_at(frame_rate, edge_rate),
+            'frame_rate': round(frame_rate, 2),
+            'edge_rate': round(edge_rate, 1),
+            'shed': self.shed,
+            'quarantined': [{'code': code, 'seconds_left': left, 'dropped': dropped}
+                            for code, left, dropped in self.quarantined_codes(now)],
+        }
+
+    def _decayed(self, rate, last, now):
+        if last is None or now <= last:
+            return rate
+        return rate * math.exp((last - now) / self.tau)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Link Quality
+============
+
+Per-button link-quality estimation from frame repetition statistics.
+
+Every press transmits the same frame several times (typically 4-20 repeats
+about 30-60 ms apart). Debouncing and fusion only need the first one, but
+how many of the repeats arrive, and how they arrive, says a lot about the
+radio link:
+
+- frames per burst against the remote's expected count (FRAMES in
+  button_config.json, or else the most common count seen so far by the
+  receiver that hears it best): falls as the signal gets weaker, long
+  before whole presses go missing
+- pulselength drift against the remote's long-term baseline: transmitter
+  timing drifts as a coin cell's voltage sags
+- inter-frame gap jitter: grows when repeats are lost or decoded late
+
+LinkQuality keeps these per (code, receiver) as exponentially weighted
+means and variances plus a small clamped histogram of burst sizes, so
+memory per entry is fixed and the number of entries is capped.
+
+observe() and flush() belong to the thread handling frames (the service
+loop flushes while idle, so bursts close and warnings fire without waiting
+for the next press); report() only reads and is safe from other threads.
+"""
+
+import math
+
+# Burst sizes above this share one histogram bin (holding a button down)
+MAX_BURST_BIN = 32
+
+
+class EWMAStats:
+    __slots__ = ('alpha', 'count', 'mean', 'var')
+
+    def __init__(self, alpha):
+        """
+        Exponentially weighted mean and variance (West's incremental form).
+
+        Args:
+            alpha (float): Weight of each new sample, 0-1
+        """
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def add(self, value):
+        """Fold one sample in."""
+        self.count += 1
+        if self.count == 1:
+            self.mean = float(value)
+            return
+        diff = value - self.mean
+        increment = self.alpha * diff
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + diff * increment)
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+
+class _Link:
+    __slots__ = ('code', 'receiver', 'expected', 'last', 'burst_frames', 'burst_pulse_total',
+                 'frames', 'gaps', 'pulse', 'pulse_baseline', 'sizes', 'bursts', 'warnings')
+
+    def __init__(self, code, receiver, expected, alpha, baseline_alpha):
+        self.code = code
+        self.receiver = receiver
+        self.expected = expected
+        self.last = None
+        self.burst_frames = 0
+        self.burst_pulse_total = 0
+        self.frames = EWMAStats(alpha)
+        self.gaps = EWMAStats(alpha)
+        self.pulse = EWMAStats(alpha)
+        self.pulse_baseline = EWMAStats(baseline_alpha)
+        self.sizes = [0] * (MAX_BURST_BIN + 1)
+        self.bursts = 0
+        self.warnings = []
+
+
+class LinkQuality:
+    def __init__(self, buttons=None, gap=0.5, alpha=0.2, baseline_alpha=0.01,
+                 min_delivery=0.6, max_drift=0.05, min_bursts=3, max_links=64):
+        """
+        Initialize the estimator.
+
+        Args:
+            buttons (dict): RF code -> Button, for expected frame counts (default: none)
+            gap (float): Silence in seconds that ends a burst (default: 0.5)
+            alpha (float): Weight of each new burst in the recent averages (default: 0.2)
+            baseline_alpha (float): Weight of each new burst in the long-term
+                pulselength baseline (default: 0.01)
+            min_delivery (float): Warn below this fraction of expected frames per
+                burst (default: 0.6)
+            max_drift (float): Warn when pulselength drifts by more than this
+                fraction of its baseline (default: 0.05)
+            min_bursts (int): Presses heard before a link can be warned about
+                (default: 3)
+            max_links (int): Most (code, receiver) pairs tracked (default: 64)
+        """
+        self.buttons = buttons or {}
+        self.gap = gap
+        self.alpha = alpha
+        self.baseline_alpha = baseline_alpha
+        self.min_delivery = min_delivery
+        self.max_drift = max_drift
+        self.min_bursts = min_bursts
+        self.max_links = max_links
+        self._links = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """
+        Register a callback for links whose warnings change.
+
+        Args:
+            listener: Called as listener(code, receiver, warnings, stats) after the
+                burst that changed them; warnings is [] once a link recovers
+        """
+        self._listeners.append(listener)
+
+    def observe(self, event):
+        """
+        Record one received frame (every repeat, before fusion or debouncing).
+
+        Args:
+            event (RFEvent): Decoded frame
+        """
+        key = (event.code, event.receiver)
+        link = self._links.get(key)
+        if link is None:
+            if len(self._links) >= self.max_links:
+                # Dicts keep insertion order and links are re-inserted as
+                # bursts close, so the first one is the least recently heard
+                del self._links[next(iter(self._links))]
+            button = self.buttons.get(event.code)
+            expected = getattr(button, 'frames', None)
+            link = self._links[key] = _Link(event.code, event.receiver, expected,
+                                            self.alpha, self.baseline_alpha)
+
+        now = event.timestamp
+        if link.last is not None and now - link.last < self.gap:
+            link.gaps.add(now - link.last)
+        else:
+            self._close_burst(key, link)
+        link.last = now
+        link.burst_frames += 1
+        if event.pulselength:
+            link.burst_pulse_total += event.pulselength
+
+    def _close_burst(self, key, link):
+        frames = link.burst_frames
+        if not frames:
+            return
+        link.bursts += 1
+        link.frames.add(frames)
+        link.sizes[min(frames, MAX_BURST_BIN)] += 1
+        if link.burst_pulse_total:
+            pulse = link.burst_pulse_total / frames
+            link.pulse.add(pulse)
+            link.pulse_baseline.add(pulse)
+        link.burst_frames = 0
+        link.burst_pulse_total = 0
+        # Move to the end: most recently heard
+        del self._links[key]
+        self._links[key] = link
+
+        stats = self._evaluate(link)
+        if stats['warnings'] != link.warnings:
+            link.warnings = stats['warnings']
+            for listener in self._listeners:
+                listener(link.code, link.receiver, link.warnings, stats)
+
+    def flush(self, now):
+        """
+        Close bursts that have been quiet for `gap` seconds.
+
+        Call from the thread that calls observe().
+
+        Args:
+            now (float): Current monotonic time (same timebase as the frames)
+        """
+        for key, link in list(self._links.items()):
+            if link.burst_frames and now - link.last >= self.gap:
+                self._close_burst(key, link)
+
+    def set_buttons(self, buttons):
+        """Use a reloaded button table for expected frame counts."""
+        self.buttons = buttons
+        for link in self._links.values():
+            link.expected = getattr(buttons.get(link.code), 'frames', None)
+
+    def _expected(self, link):
+        if link.expected:
+            return link.expected
+        # Repeats are a property of the remote, so take the best receiver's
+        # most common burst size (ties go to the larger count)
+        expected = None
+        for other in list(self._links.values()):
+            if other.code != link.code:
+                continue
+            sizes = other.sizes
+            mode = max(range(1, MAX_BURST_BIN + 1), key=lambda size: (sizes[size], size))
+            if sizes[mode] and (expected is None or mode > expected):
+                expected = mode
+        return expected
+
+    def report(self):
+        """
+        Get link statistics and warnings for every tracked (code, receiver).
+
+        Read-only, so it is safe from the control socket thread. Bursts still
+        in progress are left out until flush() closes them.
+
+        Returns:
+            list: One dict per link, weakest delivery first
+        """
+        # Copy first: the service thread adds, moves and evicts links
+        links = [self._evaluate(link) for link in list(self._links.values()) if link.bursts]
+        links.sort(key=lambda entry: entry['delivery'] if entry['delivery'] is not None else 1.0)
+        return links
+
+    def _evaluate(self, link):
+        """Compute one link's statistics and warnings."""
+        expected = self._expected(link)
+        delivery = min(1.0, link.frames.mean / expected) if expected else None
+        drift = None
+        if link.pulse.count and link.pulse_baseline.mean:
+            drift = (link.pulse.mean - link.pulse_baseline.mean) / link.pulse_baseline.mean
+        warnings = []
+        if link.bursts >= self.min_bursts:
+            if delivery is not None and delivery < self.min_delivery:
+                warnings.append('weak signal')
+            if drift is not None and abs(drift) > self.max_drift:
+                warnings.append('pulselength drift')
+        return {
+            'code': link.code,
+            'receiver': link.receiver,
+            'bursts': link.bursts,
+            'frames_per_burst': round(link.frames.mean, 2),
+            'expected_frames': expected,
+            'delivery': round(delivery, 3) if delivery is not None else None,
+            'gap_ms': round(link.gaps.mean * 1000, 2),
+            'gap_jitter_ms': round(link.gaps.std * 1000, 2),
+            'pulselength': round(link.pulse.mean, 1) if link.pulse.count else None,
+            'drift': round(drift, 4) if drift is not None else None,
+            'warnings': warnings,
+        }
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Low-Jitter Mode
+===============
+
+Opt-in process tuning for the RF receive path.
+
+On a single-core Pi, garbage-collection pauses and scheduler preemption show
+up directly as mis-timed pulses. This module can:
+- Pin the calling thread to one CPU core
+- Request SCHED_FIFO real-time scheduling (only works with permission, e.g. root)
+- Freeze startup objects out of the GC and raise GC thresholds so collections
+  are rarer and cheaper
+
+Affinity and scheduling policy are inherited by threads created afterwards,
+so call apply_low_jitter() just before the RF device starts its callback
+thread, then restore_scheduling() straight after, so the notifier, control
+socket and other workers started later keep normal scheduling on any core.
+Monitors that capture as they are polled (BatchedRFMonitor) have no thread
+of their own: apply it on the polling thread instead (DoorbellService's
+capture_setup). Call freeze_startup_objects() once startup has finished.
+"""
+
+import gc
+import os
+
+# Raised GC thresholds: far fewer young-generation collections in the hot loop
+DEFAULT_GC_THRESHOLDS = (50000, 20, 100)
+DEFAULT_RT_PRIORITY = 10
+
+
+def pin_to_cpu(cpu=None):
+    """
+    Pin the calling thread to a single CPU core.
+
+    Args:
+        cpu (int): Core to pin to (default: last core the process may use,
+            leaving core 0 for the kernel and interrupts)
+
+    Returns:
+        int or None: Core pinned to, or None if pinning is not supported
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    allowed = sorted(os.sched_getaffinity(0))
+    if cpu is None:
+        cpu = allowed[-1]
+    os.sched_setaffinity(0, {cpu})
+    return cpu
+
+
+def request_realtime_priority(priority=DEFAULT_RT_PRIORITY):
+    """
+    Request SCHED_FIFO scheduling for the calling thread.
+
+    Args:
+        priority (int): Real-time priority (1-99, default: 10)
+
+    Returns:
+        bool: True if SCHED_FIFO was granted, False if not permitted or unsupported
+    """
+    if not hasattr(os, 'sched_setscheduler'):
+        return False
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (PermissionError, OSError):
+        # Not root (or RT throttled by the system) - keep normal scheduling
+        return False
+    return True
+
+
+def save_scheduling():
+    """
+    Record the calling thread's CPU affinity and scheduling policy.
+
+    Returns:
+        dict: {'affinity': set or None, 'policy': int or None, 'priority': int}
+        for restore_scheduling() (None where unsupported)
+    """
+    saved = {'affinity': None, 'policy': None, 'priority': 0}
+    if hasattr(os, 'sched_getaffinity'):
+        saved['affinity'] = os.sched_getaffinity(0)
+    if hasattr(os, 'sched_getscheduler'):
+        saved['policy'] = os.sched_getscheduler(0)
+        saved['priority'] = os.sched_getparam(0).sched_priority
+    return saved
+
+
+def restore_scheduling(saved):
+    """
+    Put back the affinity and scheduling policy recorded by save_scheduling().
+
+    Threads already started keep what they inherited, so an RF callback
+    thread started in between stays pinned and real-time.
+
+    Args:
+        saved (dict): save_scheduling() result
+    """
+    if saved['affinity'] is not None:
+        os.sched_setaffinity(0, saved['affinity'])
+    if saved['policy'] is not None:
+        os.sched_setscheduler(0, saved['policy'], os.sched_param(saved['priority']))
+
+
+def freeze_startup_objects(thresholds=DEFAULT_GC_THRESHOLDS):
+    """
+    Move all current objects out of GC tracking and raise GC thresholds.
+
+    Objects created during startup (modules, config, devices) live for the
+    whole process, so there is no point re-scanning them on every collection.
+
+    Args:
+        thresholds (tuple): New gc.set_threshold() values
+    """
+    gc.collect()
+    gc.freeze()
+    gc.set_threshold(*thresholds)
+
+
+def apply_low_jitter(cpu=None, priority=DEFAULT_RT_PRIORITY):
+    """
+    Apply CPU pinning and real-time priority to the calling thread.
+
+    Args:
+        cpu (int): Core to pin to (default: see pin_to_cpu())
+        priority (int): SCHED_FIFO priority to request
+
+    Returns:
+        dict: What was applied: {'cpu': int or None, 'realtime': bool}
+    """
+    try:
+        pinned = pin_to_cpu(cpu)
+    except OSError:
+        pinned = None
+    return {'cpu': pinned, 'realtime': request_realtime_priority(priority)}
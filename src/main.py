@@ -13,55 +13,260 @@ Usage:
 """
 
 # Standard library imports
+import logging
 import signal
 import sys
 
-# Local imports
+# Local imports (optional features are imported where they are set up
+# below, so a deployment only loads the modules its configuration uses)
 from config import DoorbellConfig
-from telegram_notifier import TelegramNotifier
-from rf_monitor import RFMonitor
+from circuit_breaker import CircuitBreaker
+from notification_scheduler import Button, NotificationScheduler
 from doorbell_service import DoorbellService
+from structured_log import fields, setup_logging
+from control_server import ControlServer
+from profiler import SamplingProfiler, install_signal_trigger
 
 # Load all configuration from .env file and button_config.json
 config = DoorbellConfig()
 
-print(f"🔔 Doorbell System - Monitoring button code {config.button_code}")
-print("Press Ctrl+C to exit.")
+# Log through a queue and writer thread so a slow journald never stalls detection
+logs = setup_logging(config.log_format, config.log_level)
+log = logging.getLogger('doorbell')
+
+if len(config.buttons) == 1:
+    log.info("🔔 Doorbell System - Monitoring button code %s", config.button_code,
+             extra=fields(code=config.button_code))
+else:
+    log.info("🔔 Doorbell System - Monitoring %d buttons:", len(config.buttons))
+    for button in config.buttons.values():
+        log.info("   %s: %s (%s)", button.code, button.name or 'Doorbell', button.priority,
+                 extra=fields(code=button.code, priority=button.priority))
+log.info("Press Ctrl+C to exit.")
 
 # Initialize components
-notifier = TelegramNotifier(config.bot_token, config.chat_id)
-rf_monitor = RFMonitor(config.gpio_pin)
+breaker = CircuitBreaker(failure_threshold=config.breaker_failures,
+                         max_delay=config.breaker_max_delay)
+breaker.add_listener(lambda old, new: log.warning("🔌 Telegram circuit breaker: %s -> %s", old, new,
+                                                  extra=fields(old_state=old, new_state=new)))
+forwarder = None
+mqtt = None
+# Sync notifier whose pooled session the chat command channel polls on
+telegram = None
+# Pi Zero profile: stdlib HTTP instead of requests (see http_client.py)
+session = None
+if config.low_memory:
+    from http_client import HTTPSession
+    session = HTTPSession()
+    log.info("🪶 Low-memory profile")
+if config.mqtt_host and not config.forward_to:
+    # Also publish presses to the home-automation broker (queues; never blocks)
+    from mqtt_publisher import MQTTPublisher
+    mqtt = MQTTPublisher(config.mqtt_host, config.mqtt_port, topic=config.mqtt_topic,
+                         username=config.mqtt_username, password=config.mqtt_password)
+    log.info("📨 Publishing presses to MQTT %s:%d under %s/", config.mqtt_host, config.mqtt_port,
+             config.mqtt_topic, extra=fields(host=config.mqtt_host, topic=config.mqtt_topic))
+if config.forward_to:
+    # Central aggregator routes and notifies; this node only captures
+    from event_forwarder import EventForwarder
+    forwarder = EventForwarder(config.forward_to, config.node_id, key=config.aggregator_key)
+    notifier = scheduler = breaker = None
+    log.info("📡 Forwarding events to %s:%d as node %d", *config.forward_to, config.node_id,
+             extra=fields(node=config.node_id))
+elif config.runtime == 'async':
+    # Everything but RF capture runs as coroutines on one event loop
+    from async_telegram_notifier import AsyncTelegramNotifier
+    notifier = AsyncTelegramNotifier(config.bot_token, config.chat_id,
+                                     base_url=config.telegram_api_url, breaker=breaker,
+                                     snapshot_dir=config.snapshot_dir,
+                                     snapshot_max_age=config.snapshot_max_age)
+    if mqtt is not None:
+        from transport import AsyncFanoutTransport
+        notifier = AsyncFanoutTransport([mqtt, notifier])
+    scheduler = None
+    if config.telegram_commands:
+        # The command channel runs on a worker thread, off the event loop
+        from telegram_notifier import TelegramNotifier
+        telegram = TelegramNotifier(config.bot_token, config.chat_id,
+                                    base_url=config.telegram_api_url, breaker=breaker,
+                                    session=session)
+else:
+    from telegram_notifier import TelegramNotifier
+    notifier = TelegramNotifier(config.bot_token, config.chat_id, base_url=config.telegram_api_url,
+                                breaker=breaker, snapshot_dir=config.snapshot_dir,
+                                snapshot_max_age=config.snapshot_max_age, session=session)
+    telegram = notifier
+    if mqtt is not None:
+        from transport import FanoutTransport
+        notifier = FanoutTransport([mqtt, notifier])
+    # Send from a background queue, most urgent buttons first
+    scheduler = NotificationScheduler(notifier)
+# Quarantine stuck transmitters and shed unknown codes while the band is jammed
+jam_detector = None
+jam_alert = None
+if config.jam_detection:
+    from jam_detector import JamDetector
+    jam_detector = JamDetector(code_rate=config.jam_code_rate, jam_rate=config.jam_frame_rate)
+    if config.jam_alert and forwarder is None:
+        jam_alert = Button(None, 'RF jamming', 'high',
+                           message="📡 RF JAMMING DETECTED! Presses may be missed.")
+# Warn about weak remotes (fewer repeats per press, pulselength drift) early
+link_quality = None
+if config.link_quality:
+    from link_quality import LinkQuality
+    link_quality = LinkQuality(config.buttons)
+    def log_link_warning(code, receiver, warnings, stats):
+        if warnings:
+            log.warning("🔋 Button %s (pin %s): %s - check its battery or the antenna", code, receiver,
+                        ', '.join(warnings), extra=fields(code=code, receiver=receiver,
+                                                         delivery=stats['delivery'],
+                                                         drift=stats['drift']))
+        else:
+            log.info("🔋 Button %s (pin %s) signal back to normal", code, receiver,
+                     extra=fields(code=code, receiver=receiver))
+    link_quality.add_listener(log_link_warning)
+low_jitter = None
+if config.low_jitter:
+    from low_jitter import (apply_low_jitter, freeze_startup_objects, restore_scheduling,
+                            save_scheduling)
+    low_jitter = {'cpu': config.low_jitter_cpu, 'priority': config.low_jitter_priority}
+
+def tune_capture_thread():
+    """Pin the calling (capture) thread and raise its priority, and say so."""
+    applied = apply_low_jitter(**low_jitter)
+    realtime = "SCHED_FIFO" if applied['realtime'] else "normal scheduling (SCHED_FIFO not permitted)"
+    log.info("⚡ Low-jitter mode: CPU %s, %s", applied['cpu'], realtime,
+             extra=fields(cpu=applied['cpu'], realtime=applied['realtime']))
+
+# Low-jitter tuning goes to whichever thread captures: the rpi_rf callback
+# thread (CAPTURE_MODE=thread, see below), the child process (process), or
+# the thread polling the monitor, which reads and decodes edges (chardev)
+capture_setup = None
+if low_jitter is not None and config.capture_mode == 'chardev':
+    capture_setup = tune_capture_thread
+
+if config.capture_mode == 'process':
+    # Capture and decode in a child process, isolated from notification work
+    # (low-jitter tuning is applied inside the child only)
+    from capture_process import CaptureProcessMonitor
+    rf_monitor = CaptureProcessMonitor(config.gpio_pins, low_jitter=low_jitter)
+elif config.capture_mode == 'chardev':
+    # Read edge events in batches from the kernel instead of per-edge callbacks
+    from edge_reader import BatchedRFMonitor, GpioChardevEdgeSource
+    rf_monitor = BatchedRFMonitor(GpioChardevEdgeSource(config.gpio_pins, config.gpio_chip),
+                                  jam_detector=jam_detector)
+else:
+    from rf_monitor import RFMonitor
+    rf_monitor = RFMonitor(config.gpio_pins)
+
+# With several receivers, one press is usually heard by more than one of them
+fusion = None
+if len(config.gpio_pins) > 1:
+    from event_fusion import EventFusion
+    fusion = EventFusion(window=config.fusion_window)
 
 # Create doorbell service
-service = DoorbellService(config, notifier, rf_monitor)
+if config.runtime == 'async':
+    from async_doorbell_service import AsyncDoorbellService
+    service = AsyncDoorbellService(config, notifier, rf_monitor, fusion=fusion,
+                                   metrics_port=config.metrics_port,
+                                   jam_detector=jam_detector, jam_alert=jam_alert,
+                                   link_quality=link_quality, forwarder=forwarder,
+                                   rules=config.rules, capture_setup=capture_setup)
+    if forwarder is not None:
+        service.add_task(forwarder.serve_async)
+else:
+    service = DoorbellService(config, scheduler, rf_monitor, fusion=fusion,
+                              jam_detector=jam_detector, jam_alert=jam_alert,
+                              link_quality=link_quality, forwarder=forwarder,
+                              rules=config.rules, capture_setup=capture_setup)
+
+# Stack-sampling profiler, started by SIGUSR1, the control socket or PROFILE_AT_START
+profiler = SamplingProfiler(config.profile_rate, config.profile_duration, config.profile_dir,
+                            service=service)
+install_signal_trigger(profiler)
+
+# Local control socket for status, pause/resume, reload and recent events
+control = None
+if config.control_socket:
+    control = ControlServer(service, config.control_socket, breaker=breaker,
+                            reload_config=DoorbellConfig, profiler=profiler)
+    if config.runtime == 'async':
+        service.add_task(control.serve_async)
+
+# /status, /mute 1h, /last, ... from the Telegram chat
+commands = None
+if config.telegram_commands and telegram is not None:
+    from telegram_commands import TelegramCommands
+    commands = TelegramCommands(telegram, service, config.chat_id, breaker=breaker)
+
+def shutdown():
+    """Stop the service and the notification sender, then flush the log."""
+    profiler.stop()
+    service.stop()
+    if scheduler is not None:
+        scheduler.stop()
+    if forwarder is not None:
+        forwarder.close()
+    if mqtt is not None and config.runtime != 'async':
+        mqtt.close()
+    if commands is not None:
+        commands.stop()
+    if control is not None and config.runtime != 'async':
+        control.stop()
+    log.info("Doorbell stopped.")
+    logs.stop()
 
 def signal_handler(signum, frame):
     """Handle SIGTERM (sent by systemd) - ensures cleanup runs before exit"""
-    service.stop()
-    print("Doorbell stopped.")
+    shutdown()
     sys.exit(0)
 
 # Register signal handler so cleanup runs when systemd stops the service
 signal.signal(signal.SIGTERM, signal_handler)
 
 try:
-    # Start the service (initializes RF monitor)
+    # Start the notification sender and the service (initializes RF monitor)
+    if scheduler is not None:
+        scheduler.start()
+    if mqtt is not None:
+        mqtt.start()
+    saved_scheduling = None
+    if low_jitter is not None and config.capture_mode == 'thread':
+        # Must run before the RF device creates its callback thread,
+        # which inherits CPU affinity and scheduling policy
+        saved_scheduling = save_scheduling()
+        tune_capture_thread()
     service.start()
+    if saved_scheduling is not None:
+        # Only the RF callback thread keeps the tuning; workers started from
+        # here on (control socket, commands, profiler, snapshot uploads)
+        # mustn't inherit real-time priority or the pinned core
+        restore_scheduling(saved_scheduling)
+    if control is not None and config.runtime != 'async':
+        control.start()
+    if commands is not None:
+        commands.start()
+    
+    if config.profile_at_start:
+        profiler.start()
+    
+    if low_jitter is not None:
+        # Startup objects live forever - keep them out of GC passes
+        freeze_startup_objects()
     
     # Run the main monitoring loop
     service.run()
 
 except KeyboardInterrupt:
     # Ctrl+C pressed - cleanup GPIO before exiting
-    service.stop()
-    print("Doorbell stopped.")
+    shutdown()
 except Exception as e:
     # Error occurred - cleanup GPIO to prevent pins from getting stuck
-    print(f"\n❌ Error: {e}")
-    import traceback
-    traceback.print_exc()  # Print full traceback for debugging
+    # exc_info includes the full traceback for debugging
+    log.error("❌ Error: %s", e, exc_info=True)
     if "GPIO busy" in str(e) or "edge detection" in str(e):
-        print("💡 Tip: GPIO is still busy or edge detection failed. Try running: sudo python3 cleanup-gpio.py")
-    service.stop()
+        log.info("💡 Tip: GPIO is still busy or edge detection failed. Try running: sudo python3 cleanup-gpio.py")
+    shutdown()
     sys.exit(1)
 
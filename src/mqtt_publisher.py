@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+MQTT Publisher
+==============
+
+Publishes button presses to an MQTT broker (Home Assistant, Node-RED,
+openHAB, ...) as a notification transport alongside Telegram.
+
+A minimal MQTT 3.1.1 client on the standard library, built for a
+doorbell's needs rather than general use:
+
+- one persistent connection, owned by a background I/O thread;
+  notify_doorbell() only queues, so it never blocks the caller
+- QoS 1 publishes are pipelined: up to max_inflight are sent without
+  waiting for their PUBACKs, and everything queued goes out in one write
+- acknowledgements are handled in batches: every PUBACK in a read is
+  applied under one lock acquisition
+- keepalive pings; a silent broker is treated as a lost connection
+- on disconnect, unacknowledged messages go back to the front of an
+  offline buffer (bounded; the oldest are dropped when full) and are
+  resent with the DUP flag after reconnecting, with exponential backoff
+
+Messages are JSON on <topic>/<code>, e.g. doorbell/4273816:
+    {"code": 4273816, "name": "Front door", "priority": "normal", "time": 1700000000.1}
+"""
+
+import json
+import logging
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+
+from clock import SYSTEM_CLOCK
+from structured_log import fields
+from transport import Transport
+
+log = logging.getLogger('doorbell.mqtt')
+
+# Control packet types
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+CONNACK_ERRORS = {1: 'unacceptable protocol version', 2: 'client id rejected',
+                  3: 'server unavailable', 4: 'bad user name or password', 5: 'not authorized'}
+
+
+class MQTTError(Exception):
+    """Raised when the broker refuses the connection or breaks the protocol."""
+
+
+def encode_length(length):
+    """Encode a remaining-length field (1-4 bytes, 7 bits each)."""
+    encoded = bytearray()
+    while True:
+        length, digit = divmod(length, 128)
+        encoded.append(digit | 0x80 if length else digit)
+        if not length:
+            return bytes(encoded)
+
+
+def encode_string(value):
+    """Encode a UTF-8 string with its 16-bit length prefix."""
+    data = value.encode('utf-8') if isinstance(value, str) else value
+    return struct.pack('!H', len(data)) + data
+
+
+def make_packet(kind, flags, body=b''):
+    """Build a control packet from its type, flag bits and body."""
+    return bytes([kind << 4 | flags]) + encode_length(len(body)) + body
+
+
+def connect_packet(client_id, keepalive, username=None, password=None):
+    """Build a CONNECT packet (clean session; we resend unacked messages ourselves)."""
+    flags = 0x02
+    payload = encode_string(client_id)
+    if username is not None:
+        flags |= 0x80
+        payload += encode_string(username)
+        if password is not None:
+            flags |= 0x40
+            payload += encode_string(password)
+    body = encode_string('MQTT') + bytes([4, flags]) + struct.pack('!H', keepalive) + payload
+    return make_packet(CONNECT, 0, body)
+
+
+def publish_packet(topic, payload, packet_id, qos=1, dup=False, retain=False):
+    """Build a PUBLISH packet."""
+    flags = (dup << 3) | (qos << 1) | retain
+    body = encode_string(topic)
+    if qos:
+        body += struct.pack('!H', packet_id)
+    return make_packet(PUBLISH, flags, body + payload)
+
+
+class PacketReader:
+    def __init__(self):
+        """Split a byte stream into MQTT control packets."""
+        self._buffer = b''
+
+    def feed(self, data):
+        """
+        Add received bytes.
+
+        Args:
+            data (bytes): Bytes read from the socket
+
+        Returns:
+            list: Complete packets as (type, flags, body) tuples
+
+        Raises:
+            MQTTError: If a remaining-length field is malformed
+        """
+        buffer = self._buffer + data
+        packets = []
+        offset = 0
+        while len(buffer) - offset >= 2:
+            length = 0
+            multiplier = 1
+            position = offset + 1
+            while True:
+                if position >= len(buffer):
+                    # Length field itself is incomplete
+                    self._buffer = buffer[offset:]
+                    return packets
+                digit = buffer[position]
+                length += (digit & 0x7F) * multiplier
+                position += 1
+                if not digit & 0x80:
+                    break
+                multiplier *= 128
+                if multiplier > 128 ** 3:
+                    raise MQTTError("malformed remaining length")
+            end = position + length
+            if end > len(buffer):
+                break
+            header = buffer[offset]
+            packets.append((header >> 4, header & 0x0F, buffer[position:end]))
+            offset = end
+        self._buffer = buffer[offset:]
+        return packets
+
+
+class _Message:
+    __slots__ = ('topic', 'payload', 'dup')
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+        self.dup = False
+
+
+class MQTTPublisher(Transport):
+    def __init__(self, host, port=1883, topic='doorbell', client_id=None, username=None,
+                 password=None, keepalive=60, max_inflight=32, buffer_size=1000,
+                 connect_timeout=5.0, min_reconnect_delay=0.5, max_reconnect_delay=60.0,
+                 clock=None):
+        """
+        Initialize the publisher (call start() to connect).
+
+        Args:
+            host (str): Broker host name or address
+            port (int): Broker port (default: 1883)
+            topic (str): Topic prefix; presses go to <topic>/<code> (default: 'doorbell')
+            client_id (str): MQTT client id (default: doorbell-<hostname>-<pid>)
+            username (str): User name, if the broker requires one (default: None)
+            password (str): Password, if the broker requires one (default: None)
+            keepalive (int): Keepalive interval in seconds (default: 60)
+            max_inflight (int): Most QoS 1 publishes awaiting PUBACK (default: 32)
+            buffer_size (int): Most messages queued while offline; the oldest are
+                dropped beyond this (default: 1000)
+            connect_timeout (float): Seconds to wait for the broker (default: 5.0)
+            min_reconnect_delay (float): First retry delay in seconds (default: 0.5)
+            max_reconnect_delay (float): Longest retry delay in seconds (default: 60.0)
+            clock: Clock used for message timestamps (default: system clock)
+        """
+        self.host = host
+        self.port = port
+        self.topic = topic.rstrip('/')
+        self.client_id = client_id or f"doorbell-{socket.gethostname()}-{os.getpid()}"
+        self.username = username
+        self.password = password
+        self.keepalive = keepalive
+        self.max_inflight = max_inflight
+        self.buffer_size = buffer_size
+        self.connect_timeout = connect_timeout
+        self.min_reconnect_delay = min_reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.clock = clock or SYSTEM_CLOCK
+        self.connected = False
+        self.published = 0
+        self.acked = 0
+        self.dropped = 0
+        self.connections = 0
+        self._queue = deque()
+        # Packet id -> message, in send order
+        self._inflight = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stopping = threading.Event()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._thread = None
+
+    def start(self):
+        """Start the I/O thread, which connects and keeps reconnecting."""
+        self._thread = threading.Thread(target=self._run, name='mqtt', daemon=True)
+        self._thread.start()
+        return self
+
+    def publish(self, topic, payload):
+        """
+        Queue a QoS 1 message.
+
+        Args:
+            topic (str): Topic name
+            payload (bytes): Message body
+        """
+        with self._lock:
+            if len(self._queue) >= self.buffer_size:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(_Message(topic, payload))
+        self._wake()
+
+    def notify_doorbell(self, button=None):
+        """
+        Queue a press for publishing (never blocks).
+
+        Args:
+            button (Button): Button that was pressed, or None for the plain doorbell
+
+        Returns:
+            bool: Always True (the message is buffered until the broker has it)
+        """
+        code = button.code if button is not None else None
+        message = {
+            'code': code,
+            'name': button.name if button is not None else None,
+            'priority': button.priority if button is not None else 'normal',
+            'time': round(self.clock.time(), 3),
+        }
+        topic = f"{self.topic}/{code if code is not None else 'doorbell'}"
+        self.publish(topic, json.dumps(message).encode('utf-8'))
+        return True
+
+    def pending(self):
+        """
+        Get the number of messages not yet acknowledged by the broker.
+
+        Returns:
+            int: Queued plus in-flight messages
+        """
+        with self._lock:
+            return len(self._queue) + len(self._inflight)
+
+    def flush(self, timeout=None):
+        """
+        Wait until the broker has acknowledged everything queued so far.
+
+        Args:
+            timeout (float): Most seconds to wait (default: None, no limit)
+
+        Returns:
+            bool: True if nothing is pending
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while self._queue or self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+        return True
+
+    def close(self, timeout=2.0):
+        """
+        Deliver what's pending (up to timeout seconds), then disconnect.
+
+        Args:
+            timeout (float): Seconds to wait for pending messages (default: 2.0)
+        """
+        if self._thread is not None:
+            if self.connected:
+                self.flush(timeout)
+            self._stopping.set()
+            self._wake()
+            self._thread.join()
+            self._thread = None
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            # Already woken (buffer full) or closing
+            pass
+
+    def _run(self):
+        delay = self.min_reconnect_delay
+        while not self._stopping.is_set():
+            try:
+                sock = self._connect()
+            except (OSError, MQTTError) as e:
+                log.warning("⚠️ MQTT broker %s:%d unreachable: %s (retrying in %.1fs)",
+                            self.host, self.port, e, delay,
+                            extra=fields(host=self.host, port=self.port, retry_in=delay))
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            delay = self.min_reconnect_delay
+            self.connected = True
+            self.connections += 1
+            log.info("📨 MQTT connected to %s:%d", self.host, self.port,
+                     extra=fields(host=self.host, port=self.port, pending=self.pending()))
+            try:
+                self._serve(sock)
+            except (OSError, MQTTError) as e:
+                log.warning("⚠️ MQTT connection lost: %s", e, extra=fields(host=self.host))
+            finally:
+                self.connected = False
+                sock.close()
+                self._requeue_inflight()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(connect_packet(self.client_id, self.keepalive, self.username,
+                                        self.password))
+            reader = PacketReader()
+            while True:
+                data = sock.recv(4096)
+                if not data:
+                    raise MQTTError("connection closed before CONNACK")
+                packets = reader.feed(data)
+                if packets:
+                    break
+            kind, _flags, body = packets[0]
+            if kind != CONNACK or len(body) < 2:
+                raise MQTTError("expected CONNACK")
+            if body[1] != 0:
+                raise MQTTError(f"connection refused: {CONNACK_ERRORS.get(body[1], body[1])}")
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def _requeue_inflight(self):
+        """Put unacknowledged messages back in front of the queue, marked as resends."""
+        with self._lock:
+            unacked = list(self._inflight.values())
+            self._inflight.clear()
+            for message in unacked:
+                message.dup = True
+            messages = unacked + list(self._queue)
+            overflow = len(messages) - self.buffer_size
+            if overflow > 0:
+                self.dropped += overflow
+                messages = messages[overflow:]
+            self._queue = deque(messages)
+
+    def _take_packet_id(self):
+        while True:
+            self._next_id = self._next_id % 0xFFFF + 1
+            if self._next_id not in self._inflight:
+                return self._next_id
+
+    def _serve(self, sock):
+        reader = PacketReader()
+        keepalive = self.keepalive
+        last_sent = last_received = time.monotonic()
+        ping_sent = None
+
+        while not self._stopping.is_set():
+            # Pipeline everything the in-flight window allows into one write
+            packets = []
+            with self._lock:
+                while self._queue and len(self._inflight) < self.max_inflight:
+                    message = self._queue.popleft()
+                    packet_id = self._take_packet_id()
+                    self._inflight[packet_id] = message
+                    packets.append(publish_packet(message.topic, message.payload, packet_id,
+                                                  dup=message.dup))
+            now = time.monotonic()
+            if packets:
+                sock.sendall(b''.join(packets))
+                self.published += len(packets)
+                last_sent = now
+
+            if ping_sent is not None and now - ping_sent > keepalive:
+                raise MQTTError("no PINGRESP from broker")
+            if ping_sent is None and now - max(last_sent, last_received) >= keepalive / 2:
+                sock.sendall(make_packet(PINGREQ, 0))
+                ping_sent = last_sent = now
+
+            timeout = min(1.0, keepalive / 2)
+            readable, _, _ = select.select([sock, self._wake_r], [], [], timeout)
+            if self._wake_r in readable:
+                try:
+                    while self._wake_r.recv(4096):
+                        pass
+                except BlockingIOError:
+                    pass
+            if sock not in readable:
+                continue
+
+            data = sock.recv(65536)
+            if not data:
+                raise MQTTError("connection closed by broker")
+            last_received = time.monotonic()
+            acked_ids = []
+            for kind, _flags, body in reader.feed(data):
+                if kind == PUBACK and len(body) >= 2:
+                    acked_ids.append(struct.unpack_from('!H', body)[0])
+                elif kind == PINGRESP:
+                    ping_sent = None
+            if acked_ids:
+                # One lock round trip for the whole batch of acknowledgements
+                with self._changed:
+                    for packet_id in acked_ids:
+                        if self._inflight.pop(packet_id, None) is not None:
+                            self.acked += 1
+                    self._changed.notify_all()
+
+        try:
+            sock.sendall(make_packet(DISCONNECT, 0))
+        except OSError:
+            pass
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Notification Scheduler
+======================
+
+Queues button notifications and sends them in priority order from a
+background thread, so the RF loop never waits on Telegram and a critical
+alert (e.g. a panic button) never sits behind routine ones (e.g. a
+mailbox sensor) during a backlog or while Telegram is rate limiting us.
+
+Priority classes (from button_config.json):
+- critical, high, normal, low
+
+Ordering uses a heap with aging. Each notification is keyed on
+
+    enqueue_time + class_rank * class_step
+
+which is the same as ranking by class and letting waiting notifications
+climb one class every class_step seconds. A routine notification that has
+waited long enough therefore still goes out ahead of newer important ones,
+so nothing starves, while a fresh critical notification jumps every queued
+routine one. Keys never change after enqueueing, so the heap stays valid.
+"""
+
+import heapq
+import itertools
+import threading
+from collections import deque
+
+from clock import SYSTEM_CLOCK
+
+PRIORITIES = {'critical': 0, 'high': 1, 'normal': 2, 'low': 3}
+
+
+def schedule_key(button, enqueued, class_step):
+    """
+    Compute the heap key for a notification (smaller is sent first).
+
+    Args:
+        button (Button): Button that was pressed, or None for normal priority
+        enqueued (float): Monotonic time the notification was queued
+        class_step (float): Seconds of waiting worth one priority class
+
+    Returns:
+        float: enqueued + class_rank * class_step
+    """
+    rank = button.rank if button is not None else PRIORITIES['normal']
+    return enqueued + rank * class_step
+
+
+class Button:
+    def __init__(self, code, name=None, priority='normal', message=None, frames=None):
+        """
+        One configured RF button.
+
+        Args:
+            code (int): RF code the button transmits
+            name (str): Human-readable name used in notifications (default: None,
+                a plain doorbell message)
+            priority (str): One of PRIORITIES (default: 'normal')
+            message (str): Full notification text, replacing the "PRESSED!"
+                message (default: None)
+            frames (int): Repeats the remote sends per press, for link-quality
+                estimation (default: None, learned from received presses)
+
+        Raises:
+            ValueError: If priority is not a known class
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r} for button {code} "
+                             f"(expected one of {', '.join(PRIORITIES)})")
+        self.code = code
+        self.name = name
+        self.priority = priority
+        self.message = message
+        self.frames = frames
+
+    @property
+    def rank(self):
+        """Priority class as a number, 0 being the most urgent."""
+        return PRIORITIES[self.priority]
+
+    def __repr__(self):
+        return f"Button({self.code}, name={self.name!r}, priority={self.priority!r})"
+
+
+class NotificationScheduler:
+    def __init__(self, notifier, class_step=30.0, max_queue=1000, clock=None):
+        """
+        Initialize the scheduler (call start() to begin sending).
+
+        Args:
+            notifier: TelegramNotifier (or anything with notify_doorbell(button))
+            class_step (float): Seconds of waiting that lift a notification by one
+                priority class (default: 30.0; 0 gives plain FIFO order)
+            max_queue (int): Most queued notifications; when full, the one that
+                would be sent last is dropped (default: 1000)
+            clock: Clock providing monotonic() (default: system clock)
+        """
+        self.notifier = notifier
+        self.class_step = class_step
+        self.max_queue = max_queue
+        self.clock = clock or SYSTEM_CLOCK
+        self.sent = 0
+        self.dropped = 0
+        # Recent queue-to-sent latencies per class, for monitoring and benchmarks
+        self.latencies = {priority: deque(maxlen=1000) for priority in PRIORITIES}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the sender thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='notification-scheduler',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def notify_doorbell(self, button=None):
+        """
+        Queue a notification (same call as TelegramNotifier, but never blocks).
+
+        Args:
+            button (Button): Button that was pressed (default: None, normal priority)
+
+        Returns:
+            bool: True if queued, False if the queue was full and this
+                notification ranked below everything already queued
+        """
+        enqueued = self.clock.monotonic()
+        entry = (schedule_key(button, enqueued, self.class_step), next(self._sequence),
+                 enqueued, button)
+        with self._condition:
+            if len(self._heap) >= self.max_queue:
+                # Drop whichever notification would be sent last
+                worst = max(self._heap)
+                self.dropped += 1
+                if entry > worst:
+                    return False
+                self._heap.remove(worst)
+                heapq.heapify(self._heap)
+            heapq.heappush(self._heap, entry)
+            self._condition.notify()
+        return True
+
+    def pending(self):
+        """
+        Get the number of queued notifications.
+
+        Returns:
+            int: Notifications waiting to be sent
+        """
+        with self._condition:
+            return len(self._heap)
+
+    def stop(self, timeout=5.0):
+        """
+        Stop the sender thread after it finishes the notification in flight.
+
+        Args:
+            timeout (float): Seconds to wait for the thread (default: 5.0)
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._heap:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                _key, _sequence, enqueued, button = heapq.heappop(self._heap)
+            self.notifier.notify_doorbell(button)
+            priority = button.priority if button is not None else 'normal'
+            self.latencies[priority].append(self.clock.monotonic() - enqueued)
+            self.sent += 1
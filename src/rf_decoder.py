@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+RF Decoder
+==========
+
+Pure-Python port of rpi_rf's receive decoder that works on batches of edge
+timestamps instead of one GPIO callback per edge.
+
+rpi_rf decodes inside RPi.GPIO's edge callback, waking Python once per edge.
+EdgeDecoder runs the same state machine over an array of timestamps, so a
+reader can hand it many edges per wake-up (see edge_reader.py).
+
+Also includes encode_frame(), the matching transmit-side timing generator,
+used to build synthetic captures for tests and benchmarks.
+"""
+
+from collections import namedtuple
+
+from rf_event import RFEvent
+
+# Same protocol table as rpi_rf (index 0 unused so numbers match rpi_rf's rx_proto)
+Protocol = namedtuple('Protocol', ['pulselength', 'sync_high', 'sync_low',
+                                   'zero_high', 'zero_low', 'one_high', 'one_low'])
+PROTOCOLS = (None,
+             Protocol(350, 1, 31, 1, 3, 3, 1),
+             Protocol(650, 1, 10, 1, 2, 2, 1),
+             Protocol(100, 30, 71, 4, 11, 9, 6),
+             Protocol(380, 1, 6, 1, 3, 3, 1),
+             Protocol(500, 6, 14, 1, 2, 2, 1),
+             Protocol(200, 1, 10, 1, 5, 1, 1))
+
+# rpi_rf receive limits
+MAX_CHANGES = 67
+SYNC_GAP_US = 5000
+REPEAT_MATCH_US = 200
+
+
+class EdgeDecoder:
+    def __init__(self, tolerance=80, receiver=None):
+        """
+        Initialize decoder state (equivalent to one rpi_rf RFDevice receiver).
+
+        Args:
+            tolerance (int): Allowed pulse timing deviation in percent (default: 80, as rpi_rf)
+            receiver: Receiver (GPIO pin) recorded on decoded events
+        """
+        self.tolerance = tolerance
+        self.receiver = receiver
+        self._timings = [0] * (MAX_CHANGES + 1)
+        self._change_count = 0
+        self._repeat_count = 0
+        self._last_timestamp = None
+        self.edges_seen = 0
+        self.frames_decoded = 0
+
+    def feed(self, timestamps_us, events):
+        """
+        Run a batch of edge timestamps through the decoder.
+
+        Args:
+            timestamps_us: Iterable of edge times in microseconds (ints, increasing)
+            events (list): Decoded RFEvent objects are appended here
+
+        Returns:
+            int: Number of events appended
+        """
+        timings = self._timings
+        change_count = self._change_count
+        repeat_count = self._repeat_count
+        last = self._last_timestamp
+        decoded = 0
+        edges = 0
+
+        for timestamp in timestamps_us:
+            edges += 1
+            if last is None:
+                last = timestamp
+                continue
+            duration = timestamp - last
+
+            if duration > SYNC_GAP_US:
+                if abs(duration - timings[0]) < REPEAT_MATCH_US:
+                    repeat_count += 1
+                    change_count -= 1
+                    if repeat_count == 2:
+                        for pnum in range(1, len(PROTOCOLS)):
+                            event = self._waveform(pnum, change_count, timestamp)
+                            if event is not None:
+                                events.append(event)
+                                decoded += 1
+                                break
+                        repeat_count = 0
+                change_count = 0
+
+            if change_count >= MAX_CHANGES:
+                change_count = 0
+                repeat_count = 0
+            timings[change_count] = duration
+            change_count += 1
+            last = timestamp
+
+        self._change_count = change_count
+        self._repeat_count = repeat_count
+        self._last_timestamp = last
+        self.edges_seen += edges
+        self.frames_decoded += decoded
+        return decoded
+
+    def _waveform(self, pnum, change_count, timestamp):
+        """
+        Try to decode the buffered timings with one protocol.
+
+        Args:
+            pnum (int): Protocol number (index into PROTOCOLS)
+            change_count (int): Number of buffered timings
+            timestamp (int): Time of the edge that completed the frame (microseconds)
+
+        Returns:
+            RFEvent or None: Decoded frame, or None if timings don't match the protocol
+        """
+        protocol = PROTOCOLS[pnum]
+        timings = self._timings
+        code = 0
+        delay = int(timings[0] / protocol.sync_low)
+        delay_tolerance = delay * self.tolerance / 100
+
+        for i in range(1, change_count, 2):
+            if (abs(timings[i] - delay * protocol.zero_high) < delay_tolerance and
+                    abs(timings[i + 1] - delay * protocol.zero_low) < delay_tolerance):
+                code <<= 1
+            elif (abs(timings[i] - delay * protocol.one_high) < delay_tolerance and
+                    abs(timings[i + 1] - delay * protocol.one_low) < delay_tolerance):
+                code <<= 1
+                code |= 1
+            else:
+                code = 0
+
+        if change_count > 6 and code != 0:
+            return RFEvent(code, timestamp / 1_000_000, protocol=pnum, pulselength=delay,
+                           receiver=self.receiver)
+        return None
+
+    def reset(self):
+        """Drop any partially received frame."""
+        self._change_count = 0
+        self._repeat_count = 0
+        self._last_timestamp = None
+
+
+def encode_frame(code, protocol=1, bitlength=24, pulselength=None):
+    """
+    Build the edge-to-edge durations for one transmitted frame (as rpi_rf tx_code).
+
+    Args:
+        code (int): Code to transmit
+        protocol (int): Protocol number (default: 1)
+        bitlength (int): Number of bits to send (default: 24)
+        pulselength (int): Pulse length in microseconds (default: protocol's)
+
+    Returns:
+        list: Durations in microseconds between consecutive edges
+    """
+    proto = PROTOCOLS[protocol]
+    pulse = pulselength or proto.pulselength
+    durations = []
+    for bit in range(bitlength - 1, -1, -1):
+        if (code >> bit) & 1:
+            durations += [proto.one_high * pulse, proto.one_low * pulse]
+        else:
+            durations += [proto.zero_high * pulse, proto.zero_low * pulse]
+    durations += [proto.sync_high * pulse, proto.sync_low * pulse]
+    return durations
+
+
+def encode_transmission(code, start_us=0, repeats=10, protocol=1, bitlength=24,
+                        pulselength=None):
+    """
+    Build edge timestamps for a whole button press (several repeated frames).
+
+    Args:
+        code (int): Code to transmit
+        start_us (int): Time of the first edge in microseconds
+        repeats (int): Number of frames (rpi_rf transmits 10 by default)
+        protocol (int): Protocol number
+        bitlength (int): Number of bits per frame
+        pulselength (int): Pulse length in microseconds (default: protocol's)
+
+    Returns:
+        list: Edge timestamps in microseconds
+    """
+    durations = encode_frame(code, protocol, bitlength, pulselength)
+    timestamps = [start_us]
+    now = start_us
+    for _ in range(repeats):
+        for duration in durations:
+            now += duration
+            timestamps.append(now)
+    return timestamps
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+RF Event
+========
+
+Lightweight record describing one decoded RF frame.
+
+Events are what gets passed between capture and service stages (and across
+process boundaries), so they only hold plain values.
+"""
+
+
+class RFEvent:
+    __slots__ = ('code', 'timestamp', 'protocol', 'pulselength', 'receiver')
+
+    def __init__(self, code, timestamp, protocol=None, pulselength=None, receiver=None):
+        """
+        Initialize an RF event.
+
+        Args:
+            code (int): Decoded RF code
+            timestamp (float): Monotonic time the frame was decoded (seconds)
+            protocol (int): rpi_rf protocol number, if known
+            pulselength (int): Measured pulse length in microseconds, if known
+            receiver: Receiver (GPIO pin) that decoded the frame, if known
+        """
+        self.code = code
+        self.timestamp = timestamp
+        self.protocol = protocol
+        self.pulselength = pulselength
+        self.receiver = receiver
+
+    def as_tuple(self):
+        """
+        Convert the event to a plain tuple (cheap to pickle or pack).
+
+        Returns:
+            tuple: (code, timestamp, protocol, pulselength, receiver)
+        """
+        return (self.code, self.timestamp, self.protocol, self.pulselength, self.receiver)
+
+    @classmethod
+    def from_tuple(cls, values):
+        """
+        Rebuild an event from as_tuple() output.
+
+        Args:
+            values (tuple): (code, timestamp, protocol, pulselength, receiver)
+
+        Returns:
+            RFEvent: Reconstructed event
+        """
+        return cls(*values)
+
+    def __repr__(self):
+        return (f"RFEvent(code={self.code}, timestamp={self.timestamp}, "
+                f"protocol={self.protocol}, pulselength={self.pulselength}, "
+                f"receiver={self.receiver})")
@@ -7,33 +7,140 @@ Encapsulates RF device lifecycle management and code detection.
 
 This class removes global state from the doorbell system and provides
 a clean interface for RF signal monitoring.
+
+One RFMonitor can watch several GPIO pins (e.g. two antennas or two
+frequency bands). Each pin keeps its own receiver state; RPi.GPIO runs
+every pin's edge callback (where rpi_rf decodes) on its single event
+thread, and check_for_code() services the pins round-robin so a busy pin
+can't starve the others.
+
+rpi_rf (and RPi.GPIO under it) keeps only the latest decoded frame per
+pin, so frames decoded faster than they are polled overwrite each other.
+With queue_frames=True every decoded frame is queued instead, from the
+edge callback itself (used by the capture process, see capture_process.py).
+
+rpi_rf is only imported by start(), so a process that never opens a
+receiver this way (e.g. CAPTURE_MODE=chardev) doesn't load it.
 """
 
-from rpi_rf import RFDevice
+from collections import deque
+
+from rf_event import RFEvent
+
+# Most decoded frames held for check_for_event() with queue_frames=True
+FRAME_QUEUE = 256
+
 
+class _PinReceiver:
+    __slots__ = ('gpio_pin', 'device', 'last_timestamp', 'frames', 'last_code')
 
-class RFMonitor:    
     def __init__(self, gpio_pin):
         """
-        Initialize RFMonitor with GPIO pin configuration.
+        Receiver state and metrics for one GPIO pin.
         
         Args:
-            gpio_pin (int): GPIO pin number for RF receiver
+            gpio_pin (int): GPIO pin number for this receiver
         """
         self.gpio_pin = gpio_pin
         self.device = None
-        self._last_timestamp = None
+        self.last_timestamp = None
+        self.frames = 0
+        self.last_code = None
+
+
+class RFMonitor:
+    __slots__ = ('gpio_pins', 'gpio_pin', 'receivers', '_next_receiver', '_frames')
+    
+    def __init__(self, gpio_pin, queue_frames=False):
+        """
+        Initialize RFMonitor with GPIO pin configuration.
+        
+        Args:
+            gpio_pin (int or list): GPIO pin number for RF receiver,
+                or a list of pins to monitor from this one process
+            queue_frames (bool): Queue every frame as rpi_rf decodes it,
+                rather than reading only its latest one when polled
+                (default: False)
+        """
+        if isinstance(gpio_pin, (list, tuple)):
+            self.gpio_pins = list(gpio_pin)
+        else:
+            self.gpio_pins = [gpio_pin]
+        self.gpio_pin = self.gpio_pins[0]
+        self.receivers = [_PinReceiver(pin) for pin in self.gpio_pins]
+        self._next_receiver = 0
+        # (receiver, code, timestamp, protocol, pulselength), oldest first
+        self._frames = deque(maxlen=FRAME_QUEUE) if queue_frames else None
+    
+    @property
+    def device(self):
+        """RFDevice of the first pin (None until started)."""
+        return self.receivers[0].device
     
     def start(self):
         """
-        Initialize RF device and enable reception.
+        Initialize RF devices and enable reception.
         
-        Creates RFDevice instance and enables RX mode.
+        Creates an RFDevice instance per pin and enables RX mode.
         Must be called before check_for_code().
         """
-        self.device = RFDevice(self.gpio_pin)
-        self.device.enable_rx()
-        self._last_timestamp = None
+        from rpi_rf import RFDevice
+        
+        for receiver in self.receivers:
+            receiver.device = RFDevice(receiver.gpio_pin)
+            if self._frames is not None:
+                self._queue_decoded(receiver)
+            receiver.device.enable_rx()
+            receiver.last_timestamp = None
+        self._next_receiver = 0
+    
+    def _queue_decoded(self, receiver):
+        """
+        Queue every frame rpi_rf decodes on receiver's pin.
+        
+        Wraps the device's waveform decoder, which the edge callback runs
+        once per received frame and which sets rx_code and friends.
+        
+        Args:
+            receiver (_PinReceiver): Receiver whose device was just created
+        """
+        device = receiver.device
+        decode = device._rx_waveform
+        frames = self._frames
+        
+        def rx_waveform(*args):
+            decoded = decode(*args)
+            if decoded:
+                frames.append((receiver, device.rx_code, device.rx_code_timestamp,
+                               device.rx_proto, device.rx_pulselength))
+            return decoded
+        
+        device._rx_waveform = rx_waveform
+    
+    def _poll(self):
+        """
+        Find the next pin with a newly decoded frame (round-robin).
+        
+        Returns:
+            _PinReceiver or None: Receiver with a new frame, or None
+        """
+        receivers = self.receivers
+        count = len(receivers)
+        start = self._next_receiver
+        for offset in range(count):
+            index = (start + offset) % count
+            receiver = receivers[index]
+            device = receiver.device
+            if device is None:
+                continue
+            # Check if a new RF code was received
+            if device.rx_code_timestamp != receiver.last_timestamp:
+                receiver.last_timestamp = device.rx_code_timestamp
+                receiver.frames += 1
+                receiver.last_code = device.rx_code
+                self._next_receiver = (index + 1) % count
+                return receiver
+        return None
     
     def check_for_code(self):
         """
@@ -47,25 +154,76 @@ class RFMonitor:
         Returns:
             int or None: Detected RF code, or None if no new code
         """
-        if not self.device:
+        if self._frames is not None:
+            event = self.check_for_event()
+            return event.code if event is not None else None
+        receiver = self._poll()
+        if receiver is None:
             return None
+        return receiver.last_code
+    
+    def check_for_event(self):
+        """
+        Check for a newly detected RF frame, including its metadata.
         
-        # Check if a new RF code was received
-        if self.device.rx_code_timestamp != self._last_timestamp:
-            self._last_timestamp = self.device.rx_code_timestamp
-            return self.device.rx_code
+        Same detection logic as check_for_code(), but returns the full
+        frame details (including which pin heard it) for stages that
+        need more than the code.
         
-        return None
+        Returns:
+            RFEvent or None: Detected frame, or None if no new frame
+        """
+        if self._frames is not None:
+            return self._next_queued()
+        receiver = self._poll()
+        if receiver is None:
+            return None
+        
+        device = receiver.device
+        # rpi_rf timestamps are perf_counter() microseconds
+        return RFEvent(
+            receiver.last_code,
+            receiver.last_timestamp / 1_000_000,
+            protocol=device.rx_proto,
+            pulselength=device.rx_pulselength,
+            receiver=receiver.gpio_pin,
+        )
+    
+    def _next_queued(self):
+        """Pop the oldest queued frame (queue_frames=True), or None."""
+        try:
+            receiver, code, timestamp, protocol, pulselength = self._frames.popleft()
+        except IndexError:
+            return None
+        receiver.frames += 1
+        receiver.last_code = code
+        receiver.last_timestamp = timestamp
+        return RFEvent(code, timestamp / 1_000_000, protocol=protocol,
+                       pulselength=pulselength, receiver=receiver.gpio_pin)
+    
+    def metrics(self):
+        """
+        Get per-pin reception metrics.
+        
+        Returns:
+            dict: GPIO pin -> {'frames': frames decoded, 'last_code': last code seen}
+        """
+        return {
+            receiver.gpio_pin: {'frames': receiver.frames, 'last_code': receiver.last_code}
+            for receiver in self.receivers
+        }
     
     def cleanup(self):
         """
-        Clean up RF device and GPIO resources.
+        Clean up RF devices and GPIO resources.
         
         Releases GPIO pins so they can be used again.
         Safe to call multiple times.
         """
-        if self.device:
-            self.device.cleanup()
-            self.device = None
-        self._last_timestamp = None
-
+        for receiver in self.receivers:
+            if receiver.device:
+                receiver.device.cleanup()
+                receiver.device = None
+        if self._frames is not None:
+            self._frames.clear()
+            receiver.last_timestamp = None
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Notification Rules
+==================
+
+Declarative rules for what a debounced press of a configured button
+does, from the RULES list in button_config.json:
+
+    "RULES": [
+        {"NAME": "Panic always", "BUTTONS": [5592405], "ACTION": "notify"},
+        {"NAME": "Quiet hours", "FROM": "22:00", "TO": "07:00", "ACTION": "suppress"},
+        {"NAME": "Mailbox when home", "BUTTONS": [1234], "WHEN": "home", "ACTION": "suppress"},
+        {"NAME": "Weekend mornings", "DAYS": ["sat", "sun"], "FROM": "07:00", "TO": "10:00",
+         "ACTION": "priority", "PRIORITY": "low"},
+        {"NAME": "Insistent", "ACTION": "escalate", "PRESSES": 3, "WITHIN": 60}
+    ]
+
+Keys (all optional except ACTION):
+- BUTTONS: codes the rule applies to (default: every configured button)
+- FROM / TO: local time window "HH:MM"; TO before FROM wraps past midnight
+- DAYS: mon..sun the window starts on (default: every day)
+- WHEN: 'home' or 'away' presence mode (see the control socket's
+  home/away commands)
+- ACTION:
+  - notify: send as configured (use it to exempt a button from later rules)
+  - suppress: record the press but send nothing
+  - priority: send with PRIORITY instead of the button's own class
+  - escalate: when a button is pressed PRESSES times within WITHIN
+    seconds, send one urgent alert (PRIORITY, default critical), even
+    when another rule suppresses the presses
+
+For each press the first matching notify/suppress/priority rule decides;
+escalate rules are checked on their own and win when they fire.
+
+Rules are compiled once, when the config is loaded, into a decision table
+per presence mode: code -> one prebuilt Decision per time slot of the
+week. The slot width is the largest that still lands every rule boundary
+on a slot edge (hourly rules give 168 slots). Evaluating a press is two
+dict lookups and an index, returning a shared Decision, so nothing is
+allocated per event.
+"""
+
+import math
+import time
+
+from notification_scheduler import PRIORITIES, Button
+
+ACTIONS = ('notify', 'suppress', 'priority', 'escalate')
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+MODES = ('home', 'away')
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# 1970-01-01 was a Thursday; shifts epoch days so Monday is day 0
+_EPOCH_WEEKDAY = 3
+
+
+def parse_hhmm(value, key):
+    """
+    Parse an "HH:MM" time of day.
+
+    Returns:
+        int: Minutes after midnight
+
+    Raises:
+        ValueError: If the value isn't a valid time
+    """
+    hours, _, minutes = str(value).partition(':')
+    if not (hours.isdigit() and minutes.isdigit() and int(hours) < 24 and int(minutes) < 60):
+        raise ValueError(f"{key} must be HH:MM, got {value!r}")
+    return int(hours) * 60 + int(minutes)
+
+
+class Decision:
+    __slots__ = ('outcome', 'button')
+
+    def __init__(self, outcome, button):
+        """
+        What to do with a press (prebuilt, shared between slots).
+
+        Args:
+            outcome (str): 'notified', 'suppressed' or 'escalated'
+            button (Button): Button to send, or None to send nothing
+        """
+        self.outcome = outcome
+        self.button = button
+
+
+class _Compiled:
+    __slots__ = ('decision', 'escalation')
+
+    def __init__(self, decision, escalation):
+        self.decision = decision
+        self.escalation = escalation
+
+
+class _Escalation:
+    __slots__ = ('within', 'times', 'cleared', 'index', 'decision')
+
+    def __init__(self, presses, within, button):
+        self.within = within
+        # Ring of the previous presses - 1 press times
+        self.cleared = (-math.inf,) * (presses - 1)
+        self.times = list(self.cleared)
+        self.index = 0
+        self.decision = Decision('escalated', button)
+
+    def press(self, now):
+        """Record a press; True when it completes a burst (which then starts over)."""
+        times = self.times
+        index = self.index
+        # The entry being overwritten is the oldest press of the would-be burst
+        oldest = times[index]
+        times[index] = now
+        index += 1
+        self.index = 0 if index == len(times) else index
+        # (a wall clock stepped backwards never completes a burst)
+        if 0 <= now - oldest <= self.within:
+            times[:] = self.cleared
+            return True
+        return False
+
+
+class _Rule:
+    def __init__(self, entry, buttons):
+        self.name = entry.get('NAME', entry.get('ACTION'))
+        self.action = entry.get('ACTION')
+        if self.action not in ACTIONS:
+            raise ValueError(f"Rule {self.name!r}: ACTION must be one of {', '.join(ACTIONS)}")
+        codes = entry.get('BUTTONS')
+        if codes is not None:
+            unknown = [code for code in codes if code not in buttons]
+            if unknown:
+                raise ValueError(f"Rule {self.name!r}: unknown buttons {unknown}")
+        self.codes = set(codes) if codes is not None else None
+        self.when = entry.get('WHEN')
+        if self.when is not None and self.when not in MODES:
+            raise ValueError(f"Rule {self.name!r}: WHEN must be 'home' or 'away'")
+        default_priority = 'critical' if self.action == 'escalate' else None
+        self.priority = entry.get('PRIORITY', default_priority)
+        if self.action in ('priority', 'escalate') and self.priority not in PRIORITIES:
+            raise ValueError(f"Rule {self.name!r}: PRIORITY must be one of {', '.join(PRIORITIES)}")
+        if self.action == 'escalate':
+            self.presses = int(entry.get('PRESSES', 3))
+            self.within = float(entry.get('WITHIN', 60))
+            if self.presses < 2 or self.within <= 0:
+                raise ValueError(f"Rule {self.name!r}: needs PRESSES >= 2 and WITHIN > 0")
+        days = entry.get('DAYS')
+        if days is not None:
+            bad = [day for day in days if str(day).lower()[:3] not in DAYS]
+            if bad or not days:
+                raise ValueError(f"Rule {self.name!r}: DAYS must list days from {', '.join(DAYS)}")
+            days = sorted({DAYS.index(str(day).lower()[:3]) for day in days})
+        self.intervals = self._intervals(entry, days)
+
+    def _intervals(self, entry, days):
+        """Minute-of-week [start, end) intervals the rule is active in."""
+        if 'FROM' not in entry and 'TO' not in entry:
+            start, length = 0, MINUTES_PER_DAY
+        else:
+            start = parse_hhmm(entry.get('FROM', '00:00'), 'FROM')
+            end = parse_hhmm(entry.get('TO', '00:00'), 'TO')
+            length = (end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+        if days is None and length == MINUTES_PER_DAY:
+            return [(0, MINUTES_PER_WEEK)]
+        intervals = []
+        for day in (days if days is not None else range(7)):
+            first = day * MINUTES_PER_DAY + start
+            last = first + length
+            if last <= MINUTES_PER_WEEK:
+                intervals.append((first, last))
+            else:
+                # Sunday night into Monday morning
+                intervals.append((first, MINUTES_PER_WEEK))
+                intervals.append((0, last - MINUTES_PER_WEEK))
+        return intervals
+
+    def applies(self, code, mode):
+        return ((self.codes is None or code in self.codes) and
+                (self.when is None or self.when == mode))
+
+    def active(self, minute):
+        return any(first <= minute < last for first, last in self.intervals)
+
+
+class RuleSet:
+    def __init__(self, rules, buttons, away=False):
+        """
+        Compile rules into decision tables.
+
+        Args:
+            rules (list): RULES entries from button_config.json
+            buttons (dict): Configured buttons, RF code -> Button
+            away (bool): Start in away mode (default: False, home)
+
+        Raises:
+            ValueError: If a rule is invalid
+        """
+        self.rules = [_Rule(entry, buttons) for entry in rules]
+        self.away = away
+        edges = {0}
+        for rule in self.rules:
+            for first, last in rule.intervals:
+                edges.update((first, last))
+        self.slot_minutes = math.gcd(MINUTES_PER_WEEK, *edges)
+        slots = MINUTES_PER_WEEK // self.slot_minutes
+        # One Escalation per (rule, code) across modes and slots, so a burst
+        # counts wherever its presses fall
+        escalations = {}
+        self._tables = {}
+        for mode in MODES:
+            table = {}
+            for code, button in buttons.items():
+                applicable = [rule for rule in self.rules if rule.applies(code, mode)]
+                row = []
+                # Identical decisions are shared across slots
+                shared = {}
+                for slot in range(slots):
+                    minute = slot * self.slot_minutes
+                    key = self._decide(applicable, minute)
+                    decision = shared.get(key)
+                    if decision is None:
+                        decision = shared[key] = self._build(key, code, button, escalations)
+                    row.append(decision)
+                table[code] = tuple(row)
+            self._tables[mode] = table
+        self._home = self._tables['home']
+        self._away = self._tables['away']
+        self._slot = 0
+        self._slot_start = self._slot_end = -math.inf
+
+    @staticmethod
+    def _decide(applicable, minute):
+        """(base rule or None, escalate rule or None) for one slot."""
+        base = escalate = None
+        for rule in applicable:
+            if not rule.active(minute):
+                continue
+            if rule.action == 'escalate':
+                escalate = escalate or rule
+            elif base is None:
+                base = rule
+            if base is not None and escalate is not None:
+                break
+        return base, escalate
+
+    @staticmethod
+    def _build(key, code, button, escalations):
+        base, escalate = key
+        if base is None or base.action == 'notify':
+            decision = Decision('notified', button)
+        elif base.action == 'suppress':
+            decision = Decision('suppressed', None)
+        else:
+            decision = Decision('notified', Button(code, button.name, base.priority,
+                                                   message=button.message, frames=button.frames))
+        if escalate is None:
+            return _Compiled(decision, None)
+        escalation = escalations.get((id(escalate), code))
+        if escalation is None:
+            name = button.name or 'Doorbell'
+            urgent = Button(code, name, escalate.priority, message=(
+                f"🚨 {name.upper()} PRESSED {escalate.presses} TIMES "
+                f"IN {escalate.within:g}s! 🚨"))
+            escalation = escalations[(id(escalate), code)] = _Escalation(
+                escalate.presses, escalate.within, urgent)
+        return _Compiled(decision, escalation)
+
+    @property
+    def mode(self):
+        """Current presence mode, 'home' or 'away'."""
+        return 'away' if self.away else 'home'
+
+    def slot(self, now):
+        """
+        Get the time slot of the week for a wall-clock time.
+
+        The slot and the span of time it covers are cached, so most calls
+        are two comparisons; the UTC offset is re-read at least hourly to
+        follow daylight saving changes.
+
+        Args:
+            now (float): Seconds since the epoch
+
+        Returns:
+            int: Slot index (local time, Monday 00:00 is slot 0)
+        """
+        if self._slot_start <= now < self._slot_end:
+            return self._slot
+        offset = time.localtime(now).tm_gmtoff
+        slot_seconds = self.slot_minutes * 60
+        local = now + offset + _EPOCH_WEEKDAY * MINUTES_PER_DAY * 60
+        start = local - local % slot_seconds
+        self._slot = int(start // slot_seconds) % (MINUTES_PER_WEEK // self.slot_minutes)
+        self._slot_start = start - offset - _EPOCH_WEEKDAY * MINUTES_PER_DAY * 60
+        self._slot_end = min(self._slot_start + slot_seconds, now - now % 3600 + 3600)
+        return self._slot
+
+    def evaluate(self, code, now):
+        """
+        Decide what a debounced press does.
+
+        Args:
+            code (int): RF code of a configured button
+            now (float): Wall-clock time of the press
+
+        Returns:
+            Decision: Shared decision; its button (if any) should be sent
+        """
+        if self._slot_start <= now < self._slot_end:
+            slot = self._slot
+        else:
+            slot = self.slot(now)
+        compiled = (self._away if self.away else self._home)[code][slot]
+        escalation = compiled.escalation
+        if escalation is not None and escalation.press(now):
+            return escalation.decision
+        return compiled.decision
+
+    def describe(self, now):
+        """
+        Get the rules in effect right now, for the control socket.
+
+        Called from the control socket and Telegram threads, so it works
+        out the minute of the week itself instead of going through slot(),
+        whose cache evaluate() relies on.
+
+        Returns:
+            dict: Presence mode, slot width and the active rules by name
+        """
+        local = now + time.localtime(now).tm_gmtoff + _EPOCH_WEEKDAY * MINUTES_PER_DAY * 60
+        minute = int(local // 60) % MINUTES_PER_WEEK
+        minute -= minute % self.slot_minutes
+        mode = self.mode
+        return {
+            'mode': mode,
+            'slot_minutes': self.slot_minutes,
+            'active': [rule.name for rule in self.rules
+                       if (rule.when is None or rule.when == mode) and rule.active(minute)],
+        }
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Camera Snapshots
+================
+
+Finds the newest camera frame in a spool directory and streams it as a
+multipart/form-data upload for the Bot API's sendPhoto.
+
+The camera (motion, a cron'd ffmpeg, ...) writes JPEGs into the directory
+on its own; nothing here touches the camera. Files starting with '.' or
+without a .jpg/.jpeg extension are ignored, so a camera that writes to a
+temporary name and renames it when done is never caught mid-write.
+
+MultipartFile builds the request body lazily: the form fields and part
+headers are a few hundred bytes in memory, and the image is read from
+disk in small chunks as the connection takes them. Its length is known
+up front, so the request carries a Content-Length instead of chunked
+encoding.
+"""
+
+import os
+import time
+
+SNAPSHOT_EXTENSIONS = ('.jpg', '.jpeg')
+
+
+def latest_snapshot(directory, max_age=None, now=None):
+    """
+    Find the newest snapshot in a spool directory.
+
+    Args:
+        directory (str): Directory the camera writes JPEGs into
+        max_age (float): Ignore snapshots older than this many seconds
+            (default: None, any age)
+        now (float): Current wall-clock time for the age check (default: time.time())
+
+    Returns:
+        str or None: Path of the newest snapshot, or None if there is none
+        (or the directory can't be read)
+    """
+    newest = None
+    newest_mtime = None
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith('.') or not name.lower().endswith(SNAPSHOT_EXTENSIONS):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    # Rotated away while we looked
+                    continue
+                if newest_mtime is None or mtime > newest_mtime:
+                    newest, newest_mtime = entry.path, mtime
+    except OSError:
+        return None
+    if newest is not None and max_age is not None:
+        if (now if now is not None else time.time()) - newest_mtime > max_age:
+            return None
+    return newest
+
+
+class MultipartFile:
+    def __init__(self, fields, file_field, path, content_type='image/jpeg', chunk_size=64 * 1024):
+        """
+        Open a file as a streamed multipart/form-data body.
+
+        The file is opened (and its size fixed) here, so a snapshot rotated
+        away afterwards is still sent whole.
+
+        Args:
+            fields (dict): Plain form fields sent before the file
+            file_field (str): Form field name of the file (e.g. 'photo')
+            path (str): File to upload
+            content_type (str): MIME type of the file (default: image/jpeg)
+            chunk_size (int): Bytes read from disk at a time (default: 64 KiB)
+
+        Raises:
+            OSError: If the file can't be opened
+        """
+        # os.urandom rather than uuid, which would also import platform
+        boundary = os.urandom(16).hex()
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.chunk_size = chunk_size
+        parts = []
+        for name, value in fields.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                         f'{value}\r\n')
+        filename = os.path.basename(path).replace('"', '')
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+                     f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n')
+        self._head = ''.join(parts).encode('utf-8')
+        self._tail = f'\r\n--{boundary}--\r\n'.encode('ascii')
+        self._file = open(path, 'rb')
+        self.file_size = os.fstat(self._file.fileno()).st_size
+        self._file_left = self.file_size
+        self._head_sent = False
+        self._tail_sent = False
+
+    def __len__(self):
+        return len(self._head) + self.file_size + len(self._tail)
+
+    def read(self, size=-1):
+        """
+        Read the next piece of the body.
+
+        Args:
+            size (int): Most bytes wanted (default: -1, a chunk_size piece)
+
+        Returns:
+            bytes: Next piece of the body; b'' once it has all been read
+
+        Raises:
+            OSError: If the file shrank while it was being sent
+        """
+        if not self._head_sent:
+            self._head_sent = True
+            return self._head
+        if self._file_left:
+            want = self.chunk_size if size is None or size < 0 else size
+            data = self._file.read(min(want, self._file_left))
+            if not data:
+                raise OSError("snapshot was truncated while uploading")
+            self._file_left -= len(data)
+            return data
+        if not self._tail_sent:
+            self._tail_sent = True
+            self.close()
+            return self._tail
+        return b''
+
+    def __iter__(self):
+        while True:
+            data = self.read()
+            if not data:
+                return
+            yield data
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
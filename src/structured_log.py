@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Structured Logging
+==================
+
+Logging for the doorbell that never lets a slow log reader stall
+detection.
+
+systemd pipes stdout into journald; if that pipe backs up, a plain print()
+blocks whichever thread called it, including the RF loop. Here:
+
+- callers only put the record on a bounded queue (never blocks; when the
+  queue is full the record is dropped and counted)
+- a dedicated writer thread formats records and writes them out
+- formatting is deferred: %-style arguments are only rendered by the
+  writer thread, and disabled levels (e.g. debug) cost one level check
+- records carry event fields (code, protocol, latency_ms, ...) and are
+  written as logfmt, JSON or plain console lines
+- a rate limit stops the same warning from flooding the log during an
+  outage; the next record that gets through reports how many were suppressed
+
+Usage:
+    log = logging.getLogger('doorbell.telegram')
+    log.info("Notification sent", extra=fields(code=1234, latency_ms=85.2))
+"""
+
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from clock import SYSTEM_CLOCK
+
+FORMATS = ('logfmt', 'json', 'console')
+
+
+def fields(**values):
+    """
+    Attach event fields to a log call.
+
+    Args:
+        **values: Field names and values (e.g. code=1234, latency_ms=85.2)
+
+    Returns:
+        dict: Value for the logging 'extra' argument
+    """
+    return {'fields': values}
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, burst=5, interval=60.0, min_level=logging.WARNING, clock=None,
+                 max_keys=1000):
+        """
+        Let at most burst records per interval through for each message template.
+
+        Records are keyed on logger name and the unformatted message, so the
+        same warning with different arguments is still one key.
+
+        Args:
+            burst (int): Records allowed back to back (default: 5)
+            interval (float): Seconds to refill the full burst (default: 60.0)
+            min_level (int): Records below this level are never limited
+                (default: WARNING)
+            clock: Clock providing monotonic() (default: system clock)
+            max_keys (int): Most message templates tracked (default: 1000)
+        """
+        super().__init__()
+        self.burst = burst
+        self.rate = burst / interval
+        self.min_level = min_level
+        self.clock = clock or SYSTEM_CLOCK
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time, suppressed count]
+        self._buckets = {}
+        # Records are filtered on whichever thread logs them
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.min_level:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            now = self.clock.monotonic()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.pop(next(iter(self._buckets)))
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed = bucket[2]
+            bucket[2] = 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        """
+        Queue handler that drops records instead of blocking when the queue is full.
+
+        Args:
+            log_queue (queue.Queue): Bounded queue read by the writer thread
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_reported = 0
+
+    def prepare(self, record):
+        """
+        Pass the record through unformatted.
+
+        The stock QueueHandler renders the message in the calling thread;
+        the writer thread does that here. Log arguments should therefore be
+        values that won't change after the call (numbers, strings, tuples).
+        """
+        if self.dropped != self._dropped_reported:
+            record.dropped_before = self.dropped - self._dropped_reported
+            self._dropped_reported = self.dropped
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if getattr(record, 'dropped_before', None):
+                # Carry the unreported drops over to the next record
+                self._dropped_reported -= record.dropped_before
+
+
+class StructuredFormatter(logging.Formatter):
+    """Collects a record into an ordered dict of fields; subclasses render it."""
+
+    def to_dict(self, record):
+        data = {
+            'ts': f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created))}"
+                  f".{int(record.msecs):03d}",
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        data.update(getattr(record, 'fields', {}))
+        for extra in ('suppressed', 'dropped_before'):
+            if getattr(record, extra, None):
+                data[extra] = getattr(record, extra)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return data
+
+
+class JSONFormatter(StructuredFormatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        return json.dumps(self.to_dict(record), ensure_ascii=False, default=str)
+
+
+class LogfmtFormatter(StructuredFormatter):
+    """key=value pairs, quoting values that contain spaces, quotes or '='."""
+
+    def format(self, record):
+        parts = []
+        for key, value in self.to_dict(record).items():
+            value = 'null' if value is None else str(value)
+            if not value or any(char in value for char in ' "=\n\t'):
+                value = json.dumps(value, ensure_ascii=False)
+            parts.append(f"{key}={value}")
+        return ' '.join(parts)
+
+
+class ConsoleFormatter(StructuredFormatter):
+    """Plain message lines for interactive use, with any counters appended."""
+
+    def format(self, record):
+        line = record.getMessage()
+        notes = [f"{extra}={getattr(record, extra)}" for extra in ('suppressed', 'dropped_before')
+                 if getattr(record, extra, None)]
+        if notes:
+            line += f" ({', '.join(notes)})"
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+def make_formatter(fmt):
+    """
+    Get the formatter for a LOG_FORMAT value.
+
+    Args:
+        fmt (str): 'logfmt', 'json' or 'console'
+
+    Returns:
+        logging.Formatter: Matching formatter
+
+    Raises:
+        ValueError: If fmt is not a known format
+    """
+    formatters = {'logfmt': LogfmtFormatter, 'json': JSONFormatter, 'console': ConsoleFormatter}
+    if fmt not in formatters:
+        raise ValueError(f"Unknown log format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    return formatters[fmt]()
+
+
+class _WriterListener(QueueListener):
+    def stop(self, timeout=2.0):
+        """
+        Stop the writer thread, waiting at most timeout seconds for a stuck stream.
+
+        Args:
+            timeout (float): Seconds to wait to enqueue the stop marker and
+                for the thread to finish (default: 2.0)
+        """
+        try:
+            self.queue.put(self._sentinel, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+
+class AsyncLogging:
+    def __init__(self, handler, listener, logger):
+        """Handle returned by setup_logging(); call stop() on shutdown to flush."""
+        self.handler = handler
+        self.listener = listener
+        self.logger = logger
+
+    @property
+    def dropped(self):
+        """Records dropped because the writer fell behind."""
+        return self.handler.dropped
+
+    def stop(self, timeout=2.0):
+        """
+        Detach the handler, flush queued records and stop the writer thread.
+
+        Args:
+            timeout (float): Most seconds to wait for the writer (default: 2.0)
+        """
+        self.logger.removeHandler(self.handler)
+        self.listener.stop(timeout)
+
+
+def setup_logging(fmt='logfmt', level='INFO', stream=None, queue_size=10000,
+                  rate_limit=(5, 60.0), logger_name='', clock=None):
+    """
+    Route logging through a bounded queue to a writer thread.
+
+    Args:
+        fmt (str): 'logfmt', 'json' or 'console' (default: 'logfmt')
+        level (str or int): Lowest level logged (default: 'INFO')
+        stream: File object written by the writer thread (default: sys.stdout)
+        queue_size (int): Records buffered before new ones are dropped (default: 10000)
+        rate_limit (tuple): (burst, interval seconds) per warning template,
+            or None to disable (default: 5 per 60 s)
+        logger_name (str): Logger to attach to (default: the root logger)
+        clock: Clock for the rate limit (default: system clock)
+
+    Returns:
+        AsyncLogging: Handle to stop (and flush) logging on shutdown
+    """
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(make_formatter(fmt))
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    if rate_limit is not None:
+        burst, interval = rate_limit
+        handler.addFilter(RateLimitFilter(burst=burst, interval=interval, clock=clock))
+
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.addHandler(handler)
+    listener = _WriterListener(handler.queue, writer, respect_handler_level=True)
+    listener.start()
+    return AsyncLogging(handler, listener, logger)
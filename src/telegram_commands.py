@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Telegram Commands
+=================
+
+Control the doorbell from the Telegram chat it notifies:
+
+    /status          state, uptime, last code, queue, Telegram link
+    /last [N]        the N most recent RF frames (default 5)
+    /mute [30m|1h]   stop notifying, for a while or until /unmute
+    /unmute          notify again
+    /away, /home     presence mode for notification rules (see rules.py)
+    /help            this list
+
+A worker thread long-polls getUpdates on the notifier's pooled session
+(a second connection from the same pool, so it never holds up a
+notification) and applies commands to the live service state: the same
+flags the control socket changes (see control_server.py). The RF loop
+only ever reads those flags, so commands add no latency to detection.
+/mute sets the service's own muted flag rather than paused, so a mute
+running out never lifts a pause made from the control socket.
+
+Only messages from CHAT_ID are obeyed; anything else is logged and
+ignored. Commands sent while the doorbell was down are skipped when it
+starts, so a stale /mute doesn't silence it.
+"""
+
+import logging
+import re
+import threading
+
+from clock import SYSTEM_CLOCK
+from control_server import ControlServer
+from structured_log import fields
+
+log = logging.getLogger('doorbell.commands')
+
+COMMANDS = ('status', 'last', 'mute', 'unmute', 'away', 'home', 'help')
+HELP = ("/status - state, last code and queue\n"
+        "/last [N] - recent RF frames\n"
+        "/mute [30m|1h|...] - stop notifying (until /unmute without a duration)\n"
+        "/unmute - notify again\n"
+        "/away, /home - presence mode for notification rules\n"
+        "/help - this list")
+_DURATION = re.compile(r'(\d+)([smhd])')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(text):
+    """
+    Parse a duration such as '90s', '30m', '1h' or '1h30m'.
+
+    Returns:
+        float: Seconds
+
+    Raises:
+        ValueError: If the text isn't a duration
+    """
+    text = text.strip().lower()
+    parts = _DURATION.findall(text)
+    if not parts or ''.join(number + unit for number, unit in parts) != text:
+        raise ValueError(f"not a duration: {text!r} (try 30m or 1h)")
+    return float(sum(int(number) * _UNITS[unit] for number, unit in parts))
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes = rest // 60
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    return f"{minutes}m" if minutes else f"{seconds}s"
+
+
+class TelegramCommands:
+    def __init__(self, notifier, service, chat_id, breaker=None, poll_timeout=25,
+                 max_age=300, retry_delay=5.0, clock=None):
+        """
+        Initialize the command channel (call start() to begin polling).
+
+        Args:
+            notifier (TelegramNotifier): Notifier whose session, token and
+                base URL are reused; replies go through its send_text()
+            service: DoorbellService or AsyncDoorbellService to control
+            chat_id: Only this chat's commands are obeyed
+            breaker: CircuitBreaker reported by /status (default: None)
+            poll_timeout (int): Long-poll timeout in seconds (default: 25)
+            max_age (float): Skip commands older than this many seconds at
+                startup (default: 300)
+            retry_delay (float): Seconds to wait after a failed poll; doubles
+                up to a minute while failures continue (default: 5.0)
+            clock: Clock for mute timers and skipping stale commands
+                (default: system clock)
+        """
+        self.notifier = notifier
+        self.service = service
+        self.chat_id = str(chat_id)
+        self.poll_timeout = poll_timeout
+        self.max_age = max_age
+        self.retry_delay = retry_delay
+        self.clock = clock or SYSTEM_CLOCK
+        # Reuses the control socket's command handlers (without a socket)
+        self.control = ControlServer(service, None, breaker=breaker)
+        self.offset = None
+        self.muted_until = None
+        self.handled = 0
+        self.rejected = 0
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start polling from a background thread."""
+        self._thread = threading.Thread(target=self._run, name='telegram-commands', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """
+        Stop polling.
+
+        A long poll in progress is abandoned (the thread is a daemon) rather
+        than waited for.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        delay = self.retry_delay
+        skip_before = self.clock.time() - self.max_age
+        while not self._stopping.is_set():
+            try:
+                updates = self.poll()
+            except Exception as e:
+                log.warning("⚠️ Telegram command poll failed: %r (retrying in %.0fs)", e, delay,
+                            extra=fields(retry_in=delay))
+                self._stopping.wait(delay)
+                delay = min(delay * 2, 60.0)
+                continue
+            delay = self.retry_delay
+            for update in updates:
+                message = update.get('message') or {}
+                if message.get('date', skip_before) < skip_before:
+                    continue
+                self.handle_message(message)
+            self._check_mute()
+
+    def poll(self):
+        """
+        Long-poll getUpdates once.
+
+        Returns:
+            list: New updates (the offset is advanced past them)
+
+        Raises:
+            Exception: If the request failed (see TelegramNotifier._post)
+        """
+        timeout = self.poll_timeout
+        if self.muted_until is not None:
+            # Wake up in time to unmute
+            timeout = max(0, min(timeout, int(self.muted_until - self.clock.monotonic()) + 1))
+        data = {'timeout': timeout, 'allowed_updates': '["message"]'}
+        if self.offset is not None:
+            data['offset'] = self.offset
+        notifier = self.notifier
+        response = notifier.session.post(notifier.method_url('getUpdates'), data=data,
+                                         timeout=timeout + notifier.timeout)
+        response.raise_for_status()
+        updates = response.json().get('result', [])
+        if updates:
+            self.offset = updates[-1]['update_id'] + 1
+        return updates
+
+    def handle_message(self, message):
+        """
+        Authorize and run one command message, replying in the chat.
+
+        Args:
+            message (dict): Telegram message object
+
+        Returns:
+            str or None: Reply sent, or None if the message was ignored
+        """
+        text = (message.get('text') or '').strip()
+        if not text.startswith('/'):
+            return None
+        chat_id = str((message.get('chat') or {}).get('id'))
+        if chat_id != self.chat_id:
+            self.rejected += 1
+            log.warning("🚫 Ignored Telegram command from unauthorized chat %s", chat_id,
+                        extra=fields(chat_id=chat_id))
+            return None
+        command, _, argument = text[1:].partition(' ')
+        # Commands may be addressed as /status@MyDoorbellBot
+        command = command.split('@', 1)[0].lower()
+        try:
+            reply = self.run_command(command, argument.strip())
+        except ValueError as e:
+            reply = f"⚠️ {e}"
+        self.handled += 1
+        log.info("💬 Telegram command /%s", command, extra=fields(command=command))
+        self.notifier.send_text(reply)
+        return reply
+
+    def run_command(self, command, argument=''):
+        """
+        Apply one command to the service.
+
+        Args:
+            command (str): Command name without the slash
+            argument (str): Rest of the message
+
+        Returns:
+            str: Reply text
+
+        Raises:
+            ValueError: If the argument is invalid
+        """
+        if command not in COMMANDS:
+            return f"Unknown command /{command}\n\n{HELP}"
+        return getattr(self, f'_command_{command}')(argument)
+
+    def _command_help(self, argument):
+        return HELP
+
+    def _command_status(self, argument):
+        status = self.control.handle_command('status')
+        state = 'running'
+        if status['paused']:
+            state = 'paused'
+        elif status['muted']:
+            state = 'muted'
+            if self.muted_until is not None:
+                left = format_duration(max(0, self.muted_until - self.clock.monotonic()))
+                state += f" ({left} left)"
+        last = status['last_code']
+        lines = [f"🔔 Doorbell {state}",
+                 f"Uptime: {format_duration(status['uptime'] or 0)}",
+                 f"Last code: {last if last is not None else 'none yet'}" +
+                 (f" ({format_duration(status['last_seen_ago'])} ago)" if last is not None else ''),
+                 f"RF frames: {status['events_seen']}",
+                 f"Queue: {status['queue_depth']}"]
+        breaker = status.get('breaker')
+        if breaker is not None:
+            lines.append(f"Telegram: {breaker['state']}")
+        rules = status.get('rules')
+        if rules is not None:
+            lines.append(f"Presence: {rules['mode']}")
+        rf = status.get('rf')
+        if rf is not None and rf['jammed']:
+            lines.append("📡 RF jamming detected")
+        return '\n'.join(lines)
+
+    def _command_last(self, argument):
+        count = int(argument) if argument.isdigit() else 5
+        events = self.control.handle_command(f'events {min(max(count, 1), 50)}')['events']
+        if not events:
+            return "No RF frames received yet"
+        return '\n'.join(f"{event['time'][11:]} {event['code']} {event['outcome']}"
+                         for event in reversed(events))
+
+    def _command_mute(self, argument):
+        # Parsed first, so a mistyped duration leaves the service unmuted
+        seconds = parse_duration(argument) if argument else None
+        self.service.muted = True
+        if seconds is None:
+            self.muted_until = None
+            log.info("⏸️ Notifications muted from Telegram")
+            return "🔕 Muted until /unmute"
+        self.muted_until = self.clock.monotonic() + seconds
+        log.info("⏸️ Notifications muted from Telegram for %s", format_duration(seconds),
+                 extra=fields(seconds=seconds))
+        return f"🔕 Muted for {format_duration(seconds)}"
+
+    def _command_unmute(self, argument):
+        self.muted_until = None
+        self.service.muted = False
+        log.info("▶️ Notifications unmuted from Telegram")
+        if self.service.paused:
+            return "🔔 Unmuted, but still paused from the control socket"
+        return "🔔 Notifications on"
+
+    def _command_away(self, argument):
+        return self._presence('away')
+
+    def _command_home(self, argument):
+        return self._presence('home')
+
+    def _presence(self, mode):
+        reply = self.control.handle_command(mode)
+        if not reply['ok']:
+            return f"⚠️ {reply['error']}"
+        return f"🏠 Presence: {reply['mode']}"
+
+    def _check_mute(self):
+        """Unmute once a timed /mute has run out."""
+        if self.muted_until is not None and self.clock.monotonic() >= self.muted_until:
+            self.muted_until = None
+            self.service.muted = False
+            if self.service.paused:
+                log.info("▶️ Mute expired; still paused from the control socket")
+                self.notifier.send_text("🔔 Mute expired, but still paused from the control socket")
+            else:
+                log.info("▶️ Mute expired; notifications on")
+                self.notifier.send_text("🔔 Mute expired; notifications on")
@@ -4,13 +4,78 @@ Telegram Notifier
 =================
 
 Handles sending notifications to Telegram via the Telegram Bot API.
+
+Requests go through one pooled requests.Session, so repeated notifications
+reuse the same TLS connection. The low-memory profile passes a standard
+library HTTPSession instead (see http_client.py), and requests is then
+never imported. The API base URL can be overridden to point at a local
+stand-in server (see tools/fake_bot_api.py).
+
+A circuit breaker wraps the transport: during an internet outage, requests
+fail fast instead of each waiting for the full timeout.
+
+With a snapshot directory, the newest camera frame in it follows each text
+alert as a sendPhoto, streamed from disk (see snapshot.py). Photos are
+uploaded from their own thread, so a slow upload never holds up the next
+alert, and through their own breaker, so a failed upload never counts
+against the text alerts.
 """
 
-import time
-import requests
+import logging
+import threading
+from collections import deque
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from clock import SYSTEM_CLOCK
+from snapshot import MultipartFile, latest_snapshot
+from structured_log import fields
+from transport import Transport
+
+log = logging.getLogger('doorbell.telegram')
+
+DEFAULT_API_BASE_URL = "https://api.telegram.org"
+# Photos waiting for upload; only the newest frame is ever sent, so older
+# requests can go when presses come faster than uploads
+SNAPSHOT_QUEUE = 4
+
+
+def doorbell_message(button, clock):
+    """
+    Build the notification text for a button press.
+    
+    Args:
+        button (Button): Button that was pressed, or None for the plain doorbell message
+        clock: Clock used to timestamp the message
+    
+    Returns:
+        str: Message text
+    """
+    if button is not None and button.message:
+        return f"{button.message}\nTime: {clock.strftime('%H:%M:%S')}"
+    if button is not None and button.name:
+        icon = "🚨" if button.priority == 'critical' else "🔔"
+        return f"{icon} {button.name.upper()} PRESSED! {icon}\nTime: {clock.strftime('%H:%M:%S')}"
+    return f"🔔 DOORBELL PRESSED! 🔔\nTime: {clock.strftime('%H:%M:%S')}"
+
+
+def snapshot_caption(button, clock):
+    """
+    Build the caption for a snapshot sent after a press.
+    
+    Args:
+        button (Button): Button that was pressed, or None for the plain doorbell
+        clock: Clock used to timestamp the caption
+    
+    Returns:
+        str: Caption text
+    """
+    name = button.name if button is not None and button.name else 'Doorbell'
+    return f"📷 {name} - {clock.strftime('%H:%M:%S')}"
+
 
-class TelegramNotifier:    
-    def __init__(self, bot_token, chat_id, timeout=5):
+class TelegramNotifier(Transport):    
+    def __init__(self, bot_token, chat_id, timeout=5, clock=None, base_url=None, breaker=None,
+                 snapshot_dir=None, snapshot_max_age=60, photo_timeout=30, session=None):
         """
         Initialize the Telegram notifier.
         
@@ -18,29 +83,217 @@ class TelegramNotifier:
             bot_token: Telegram bot token from BotFather
             chat_id: Telegram chat ID to send notifications to
             timeout: Request timeout in seconds (default: 5)
+            clock: Clock used to timestamp messages (default: system clock)
+            base_url: Bot API base URL (default: https://api.telegram.org)
+            breaker: CircuitBreaker guarding the transport (default: a new breaker
+                with default settings)
+            snapshot_dir: Directory the camera writes JPEGs into; the newest is
+                sent after each alert (default: None, text only)
+            snapshot_max_age: Skip snapshots older than this many seconds (default: 60)
+            photo_timeout: Timeout for snapshot uploads in seconds (default: 30)
+            session: Session with a requests-style post() and a transport_errors
+                tuple, e.g. http_client.HTTPSession (default: a requests.Session)
         """
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.timeout = timeout
-        self.api_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+        self.clock = clock or SYSTEM_CLOCK
+        self.base_url = (base_url or DEFAULT_API_BASE_URL).rstrip('/')
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_max_age = snapshot_max_age
+        self.photo_timeout = photo_timeout
+        self.api_url = self.method_url('sendMessage')
+        # Pooled connection shared by every request this notifier makes
+        if session is None:
+            import requests
+            session = requests.Session()
+            self.transport_errors = (requests.ConnectionError, requests.Timeout)
+        else:
+            self.transport_errors = session.transport_errors
+        self.session = session
+        self.breaker = breaker or CircuitBreaker(clock=self.clock)
+        # Uploads fail in their own ways (large body, deleted file) and
+        # mustn't make text alerts fail fast
+        self.photo_breaker = CircuitBreaker(clock=self.clock)
+        self._snapshots = deque(maxlen=SNAPSHOT_QUEUE)
+        self._snapshot_condition = threading.Condition()
+        self._snapshot_thread = None
+        self._closing = False
     
-    def notify_doorbell(self):
+    def method_url(self, method):
+        """
+        Build the URL for a Bot API method.
+        
+        Args:
+            method (str): Bot API method name (e.g. 'sendMessage')
+        
+        Returns:
+            str: Full method URL including the bot token
+        """
+        return f"{self.base_url}/bot{self.bot_token}/{method}"
+    
+    def _post(self, method, breaker=None, **kwargs):
+        """
+        POST to a Bot API method through the circuit breaker.
+        
+        Connection errors, timeouts and 5xx responses count as transport
+        failures. Other HTTP errors (e.g. 400, 429) mean Telegram is reachable,
+        so they don't trip the breaker, but they are still raised.
+        
+        Args:
+            method (str): Bot API method name
+            breaker (CircuitBreaker): Breaker to go through (default: self.breaker)
+            **kwargs: Extra arguments for session.post() (data, headers, timeout, ...)
+        
+        Returns:
+            Response: Successful response
+        
+        Raises:
+            CircuitOpenError: If the breaker is open and the request was not attempted
+            Exception: If the request failed (requests.RequestException, or an
+                OSError or http_client.HTTPError with HTTPSession)
+        """
+        breaker = breaker or self.breaker
+        if not breaker.allow_request():
+            raise CircuitOpenError("Telegram unreachable - circuit breaker open")
+        try:
+            kwargs.setdefault('timeout', self.timeout)
+            response = self.session.post(self.method_url(method), **kwargs)
+        except self.transport_errors:
+            breaker.record_failure()
+            raise
+        except Exception:
+            # Not a transport failure; release a half-open probe slot
+            breaker.record_success()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        response.raise_for_status()  # Raise exception if HTTP error
+        return response
+    
+    def notify_doorbell(self, button=None):
         """
         Send doorbell notification to Telegram.
         
         Handles errors gracefully - logs warnings but doesn't crash the application
         if the notification fails to send.
+        
+        Args:
+            button (Button): Button that was pressed; named buttons get their own
+                message (default: None, the plain doorbell message)
+        
+        Returns:
+            bool: True if Telegram accepted the message, False otherwise
         """
+        code = button.code if button is not None else None
+        started = self.clock.monotonic()
         try:
-            message = f"🔔 DOORBELL PRESSED! 🔔\nTime: {time.strftime('%H:%M:%S')}"
-            response = requests.post(
-                self.api_url,
-                data={"chat_id": self.chat_id, "text": message},
-                timeout=self.timeout
-            )
-            response.raise_for_status()  # Raise exception if HTTP error
-            print(f"✅ Notification sent!")
+            message = doorbell_message(button, self.clock)
+            self._post('sendMessage', data={"chat_id": self.chat_id, "text": message})
+            log.info("✅ Notification sent!", extra=fields(
+                code=code, latency_ms=round((self.clock.monotonic() - started) * 1000, 1)))
+            if self.snapshot_dir:
+                self._queue_snapshot(button)
+            return True
+        except CircuitOpenError as e:
+            log.warning("⚠️ Warning: Notification skipped: %s", e, extra=fields(code=code))
+            return False
         except Exception as e:
-            print(f"⚠️ Warning: Failed to send notification: {e}")
+            log.warning("⚠️ Warning: Failed to send notification: %r", e, extra=fields(
+                code=code, latency_ms=round((self.clock.monotonic() - started) * 1000, 1)))
             # Don't crash - just log the error and continue running
+            return False
+    
+    def send_text(self, text):
+        """
+        Send a plain text message to the chat (e.g. a command reply).
+        
+        Args:
+            text (str): Message text
+        
+        Returns:
+            bool: True if Telegram accepted the message, False otherwise
+        """
+        try:
+            self._post('sendMessage', data={"chat_id": self.chat_id, "text": text})
+            return True
+        except Exception as e:
+            log.warning("⚠️ Warning: Failed to send message: %r", e)
+            return False
+    
+    def _queue_snapshot(self, button):
+        """Hand a photo to the upload thread, starting it on first use."""
+        with self._snapshot_condition:
+            if self._closing:
+                return
+            self._snapshots.append(button)
+            if self._snapshot_thread is None:
+                self._snapshot_thread = threading.Thread(target=self._run_snapshots,
+                                                         name='snapshot-sender', daemon=True)
+                self._snapshot_thread.start()
+            self._snapshot_condition.notify()
+    
+    def _run_snapshots(self):
+        while True:
+            with self._snapshot_condition:
+                while not self._closing and not self._snapshots:
+                    self._snapshot_condition.wait()
+                if not self._snapshots:
+                    return
+                button = self._snapshots.popleft()
+            self.send_snapshot(button)
+    
+    def send_snapshot(self, button=None):
+        """
+        Send the newest camera snapshot, streamed from disk.
+        
+        Goes through photo_breaker, not the text alerts' breaker. Failures are
+        logged, never raised: the text alert has already gone out.
+        
+        Args:
+            button (Button): Button that was pressed, used for the caption
+        
+        Returns:
+            bool: True if Telegram accepted the photo, False otherwise (including
+            when there is no recent snapshot)
+        """
+        code = button.code if button is not None else None
+        path = latest_snapshot(self.snapshot_dir, self.snapshot_max_age, now=self.clock.time())
+        if path is None:
+            log.info("📷 No recent snapshot in %s", self.snapshot_dir, extra=fields(code=code))
+            return False
+        started = self.clock.monotonic()
+        try:
+            body = MultipartFile({"chat_id": self.chat_id,
+                                  "caption": snapshot_caption(button, self.clock)}, 'photo', path)
+            try:
+                self._post('sendPhoto', breaker=self.photo_breaker, data=body,
+                           headers={'Content-Type': body.content_type},
+                           timeout=self.photo_timeout)
+            finally:
+                body.close()
+            log.info("📷 Snapshot sent", extra=fields(
+                code=code, bytes=body.file_size,
+                latency_ms=round((self.clock.monotonic() - started) * 1000, 1)))
+            return True
+        except Exception as e:
+            log.warning("⚠️ Warning: Failed to send snapshot: %r", e, extra=fields(code=code))
+            return False
+    
+    def close(self, timeout=5.0):
+        """
+        Finish queued photo uploads, then close pooled connections.
+        
+        Args:
+            timeout (float): Seconds to wait for the upload thread (default: 5.0)
+        """
+        with self._snapshot_condition:
+            self._closing = True
+            self._snapshot_condition.notify()
+            thread = self._snapshot_thread
+        if thread is not None:
+            thread.join(timeout)
+        self.session.close()
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Notification Transports
+=======================
+
+Interface shared by everything that can deliver a button press, so the
+service, NotificationScheduler and the aggregator don't care where
+notifications go.
+
+A transport implements:
+- notify_doorbell(button=None) -> bool: deliver (or queue) one press;
+  True if it was accepted. The asyncio runtime's transports make this a
+  coroutine instead.
+- close(): release connections
+
+Implementations:
+- TelegramNotifier / AsyncTelegramNotifier: Telegram Bot API
+- MQTTPublisher: home-automation bus (see mqtt_publisher.py)
+
+FanoutTransport and AsyncFanoutTransport send each press to several
+transports, e.g. Telegram and MQTT at once.
+"""
+
+import logging
+from collections.abc import Awaitable
+
+from structured_log import fields
+
+log = logging.getLogger('doorbell.transport')
+
+
+class Transport:
+    """Base class for notification transports."""
+
+    def notify_doorbell(self, button=None):
+        """
+        Deliver one button press.
+
+        Args:
+            button (Button): Button that was pressed, or None for the plain doorbell
+
+        Returns:
+            bool: True if the press was delivered or queued for delivery
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release connections (default: nothing to release)."""
+
+
+class FanoutTransport(Transport):
+    def __init__(self, transports):
+        """
+        Send every press to several transports, in order.
+
+        Put non-blocking transports (e.g. MQTTPublisher, which only queues)
+        before ones that wait on the network.
+
+        Args:
+            transports (list): Transports to notify
+        """
+        self.transports = list(transports)
+
+    def notify_doorbell(self, button=None):
+        """
+        Deliver one press to every transport; one failing doesn't stop the rest.
+
+        Returns:
+            bool: True if at least one transport accepted it
+        """
+        delivered = False
+        for transport in self.transports:
+            try:
+                delivered = transport.notify_doorbell(button) or delivered
+            except Exception as e:
+                log.warning("⚠️ %s failed: %s", type(transport).__name__, e,
+                            extra=fields(transport=type(transport).__name__))
+        return delivered
+
+    def close(self):
+        """Close every transport."""
+        for transport in self.transports:
+            transport.close()
+
+
+class AsyncFanoutTransport(Transport):
+    def __init__(self, transports):
+        """
+        FanoutTransport for the asyncio runtime.
+
+        Transports may be synchronous (e.g. MQTTPublisher) or have coroutine
+        notify_doorbell/close methods (e.g. AsyncTelegramNotifier).
+
+        Args:
+            transports (list): Transports to notify
+        """
+        self.transports = list(transports)
+
+    async def notify_doorbell(self, button=None):
+        """
+        Deliver one press to every transport; one failing doesn't stop the rest.
+
+        Returns:
+            bool: True if at least one transport accepted it
+        """
+        delivered = False
+        for transport in self.transports:
+            try:
+                result = transport.notify_doorbell(button)
+                if isinstance(result, Awaitable):
+                    result = await result
+                delivered = result or delivered
+            except Exception as e:
+                log.warning("⚠️ %s failed: %s", type(transport).__name__, e,
+                            extra=fields(transport=type(transport).__name__))
+        return delivered
+
+    async def close(self):
+        """Close every transport."""
+        for transport in self.transports:
+            result = transport.close()
+            if isinstance(result, Awaitable):
+                await result
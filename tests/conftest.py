@@ -0,0 +1,22 @@
+"""
+Pytest configuration: makes the flat modules in src/, benchmarks/ and tools/
+(local stand-in servers) importable the same way they import each other when
+run as scripts.
+"""
+
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'benchmarks'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'tools'))
+
+# test_rf.py is a manual hardware check that needs RPi.GPIO on a Raspberry Pi
+collect_ignore = []
+try:
+    import RPi.GPIO  # noqa: F401
+except (ImportError, RuntimeError):
+    collect_ignore.append('test_rf.py')
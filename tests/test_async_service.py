@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Async Runtime Tests
+===================
+
+Runs AsyncDoorbellService and AsyncTelegramNotifier against the local fake
+Bot API.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+
+import pytest
+
+from async_doorbell_service import AsyncDoorbellService
+from async_telegram_notifier import AsyncTelegramNotifier
+from circuit_breaker import OPEN, CircuitBreaker
+from fake_bot_api import FakeBotAPI
+from notification_scheduler import Button
+from rf_event import RFEvent
+
+
+class Config:
+    buttons = {1: Button(1, 'Panic button', 'critical'), 2: Button(2, 'Mailbox', 'low')}
+
+
+class ListMonitor:
+    def __init__(self, events):
+        self.events = list(events)
+        self.cleaned_up = False
+
+    def start(self):
+        pass
+
+    def check_for_event(self):
+        return self.events.pop(0) if self.events else None
+
+    def cleanup(self):
+        self.cleaned_up = True
+
+
+@pytest.fixture
+def api():
+    server = FakeBotAPI(seed=1).start()
+    yield server
+    server.stop()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_notifier_reuses_one_connection(api):
+    async def scenario():
+        notifier = AsyncTelegramNotifier('123:test', '42', timeout=1, base_url=api.base_url)
+        results = [await notifier.notify_doorbell(Button(1, 'Gate')) for _ in range(3)]
+        await notifier.close()
+        return results, notifier.connections_opened
+
+    results, connections = asyncio.run(scenario())
+    assert results == [True, True, True]
+    assert connections == 1
+    assert api.messages[0]['text'].startswith('🔔 GATE PRESSED!')
+
+
+def test_notifier_errors_feed_the_breaker(api):
+    api.error_rate = 1.0
+    breaker = CircuitBreaker(failure_threshold=2)
+
+    async def scenario():
+        notifier = AsyncTelegramNotifier('123:test', '42', timeout=1, base_url=api.base_url,
+                                         breaker=breaker)
+        results = [await notifier.notify_doorbell() for _ in range(3)]
+        await notifier.close()
+        return results
+
+    assert asyncio.run(scenario()) == [False, False, False]
+    assert breaker.state == OPEN
+    assert api.requests_seen == 2
+
+
+def test_service_sends_from_the_loop_and_serves_metrics(api):
+    rf_monitor = ListMonitor([RFEvent(2, 1.0), RFEvent(9, 1.1), RFEvent(1, 1.2), RFEvent(1, 1.3)])
+    notifier = AsyncTelegramNotifier('123:test', '42', timeout=1, base_url=api.base_url)
+    port = free_port()
+    service = AsyncDoorbellService(Config(), notifier, rf_monitor, debounce_time=1.0,
+                                   metrics_port=port)
+    scraped = []
+
+    async def scrape_then_stop(service):
+        while service.sent < 2:
+            await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = await reader.read()
+        writer.close()
+        scraped.append(json.loads(response.split(b'\r\n\r\n', 1)[1]))
+        service.stop()
+
+    service.add_task(scrape_then_stop)
+    service.start()
+    service.run(duration=5.0)
+
+    # The repeated panic frame was debounced; the unknown code was ignored
+    assert len(api.messages) == 2
+    assert scraped[0]['events_received'] == 4
+    assert scraped[0]['notifications_sent'] == 2
+    assert rf_monitor.cleaned_up
+
+
+def test_stop_from_another_thread(api):
+    notifier = AsyncTelegramNotifier('123:test', '42', timeout=1, base_url=api.base_url)
+    service = AsyncDoorbellService(Config(), notifier, ListMonitor([]))
+    service.start()
+    threading.Timer(0.2, service.stop).start()
+
+    service.run(duration=5.0)
+
+    assert not service.running
+    assert not service._bridge.is_alive()
+
+
+def test_notifier_does_not_resend_a_request_whose_answer_was_lost(api):
+    async def scenario():
+        notifier = AsyncTelegramNotifier('123:test', '42', timeout=1, base_url=api.base_url)
+        assert await notifier.notify_doorbell()
+        # The kept-alive connection is reset after the request reached the server
+        api.reset_rate = 1.0
+        result = await notifier.notify_doorbell()
+        await notifier.close()
+        return result
+
+    assert asyncio.run(scenario()) is False
+    assert api.requests_seen == 2
+
+
+def test_notifier_replaces_a_connection_closed_while_idle(api):
+    async def scenario():
+        notifier = AsyncTelegramNotifier('123:test', '42', timeout=1, base_url=api.base_url)
+        assert await notifier.notify_doorbell()
+        # As if the server had closed the idle connection
+        notifier._reader.feed_eof()
+        result = await notifier.notify_doorbell()
+        await notifier.close()
+        return result, notifier.connections_opened
+
+    assert asyncio.run(scenario()) == (True, 2)
+    assert api.requests_seen == 2
+
+
+def test_outbox_is_bounded_like_the_scheduler():
+    mailbox, doorbell, panic = Config.buttons[2], Button(3), Config.buttons[1]
+    service = AsyncDoorbellService(Config(), None, ListMonitor([]), max_queue=2)
+
+    async def scenario():
+        service.loop = asyncio.get_running_loop()
+        service._wakeup = asyncio.Event()
+        for button in (mailbox, doorbell, panic, mailbox):
+            service._dispatch(button)
+
+    asyncio.run(scenario())
+    assert service.pending_notifications() == 2
+    assert service.dropped == 2
+    assert sorted(entry[3].code for entry in service._outbox) == [1, 3]
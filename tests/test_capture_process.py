@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Capture Process Tests
+=====================
+
+Exercises CaptureProcessMonitor with a scripted monitor in the child process
+(no RF hardware needed).
+"""
+
+import sys
+import time
+import types
+
+import pytest
+
+from capture_process import CaptureProcessMonitor
+from rf_event import RFEvent
+from rf_monitor import RFMonitor
+
+
+class ScriptedMonitor:
+    def __init__(self, codes, fail_after=False):
+        self.codes = list(codes)
+        self.fail_after = fail_after
+
+    def start(self):
+        pass
+
+    def check_for_event(self):
+        if self.codes:
+            return RFEvent(self.codes.pop(0), time.monotonic(), protocol=1, pulselength=350)
+        if self.fail_after:
+            raise OSError("receiver unplugged")
+        return None
+
+    def cleanup(self):
+        pass
+
+
+def collect(monitor, count, timeout=5.0):
+    events = []
+    deadline = time.monotonic() + timeout
+    while len(events) < count and time.monotonic() < deadline:
+        event = monitor.check_for_event()
+        if event is None:
+            time.sleep(0.001)
+        else:
+            events.append(event)
+    return events
+
+
+def test_frames_are_forwarded_in_order_without_loss():
+    monitor = CaptureProcessMonitor(monitor_factory=ScriptedMonitor,
+                                    factory_args=([1, 2, 3, 2, 1],), poll_interval=0.0)
+    monitor.start()
+    try:
+        # Let several frames queue up before reading any of them
+        time.sleep(0.2)
+        events = collect(monitor, 5)
+    finally:
+        monitor.cleanup()
+
+    assert [event.code for event in events] == [1, 2, 3, 2, 1]
+    assert events[0].protocol == 1
+    assert events[0].pulselength == 350
+
+
+def test_dead_capture_process_is_reported():
+    monitor = CaptureProcessMonitor(monitor_factory=ScriptedMonitor,
+                                    factory_args=([9], True), poll_interval=0.0)
+    monitor.start()
+    try:
+        with pytest.raises(RuntimeError):
+            deadline = time.monotonic() + 5.0
+            while time.monotonic() < deadline:
+                monitor.check_for_code()
+                time.sleep(0.001)
+    finally:
+        monitor.cleanup()
+
+
+def test_cleanup_is_idempotent():
+    monitor = CaptureProcessMonitor(monitor_factory=ScriptedMonitor, factory_args=([],))
+    monitor.start()
+    monitor.cleanup()
+    monitor.cleanup()
+    assert monitor.check_for_code() is None
+
+
+class FakeRFDevice:
+    """Just the parts of rpi_rf.RFDevice that RFMonitor touches."""
+
+    def __init__(self, gpio):
+        self.gpio = gpio
+        self.rx_code = None
+        self.rx_code_timestamp = None
+        self.rx_proto = None
+        self.rx_pulselength = None
+
+    def enable_rx(self):
+        pass
+
+    def cleanup(self):
+        pass
+
+    def _rx_waveform(self, code, timestamp):
+        # The real one decodes edge timings; here the frame is given
+        self.rx_code, self.rx_code_timestamp = code, timestamp
+        self.rx_proto, self.rx_pulselength = 1, 350
+        return True
+
+    def receive(self, code, timestamp):
+        """What the edge callback does once a frame's repeats are in."""
+        return self._rx_waveform(code, timestamp)
+
+
+def test_queued_frames_are_not_overwritten_between_polls(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'rpi_rf', types.SimpleNamespace(RFDevice=FakeRFDevice))
+    monitor = RFMonitor(27, queue_frames=True)
+    monitor.start()
+    device = monitor.device
+    device.receive(111, 1_000_000)
+    device.receive(222, 1_004_000)
+
+    events = [monitor.check_for_event() for _ in range(3)]
+    monitor.cleanup()
+
+    assert [(event.code, event.timestamp, event.receiver) for event in events[:2]] == [
+        (111, 1.0, 27), (222, 1.004, 27)]
+    assert events[2] is None
+    assert monitor.metrics() == {27: {'frames': 2, 'last_code': 222}}
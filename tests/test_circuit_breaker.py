@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker Tests
+=====================
+"""
+
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from clock import SimulatedClock
+from fake_bot_api import FakeBotAPI
+from telegram_notifier import TelegramNotifier
+
+
+def test_breaker_opens_after_consecutive_failures():
+    clock = SimulatedClock()
+    breaker = CircuitBreaker(failure_threshold=3, base_delay=5.0, clock=clock)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+
+def test_single_half_open_probe_with_exponential_backoff():
+    clock = SimulatedClock()
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=5.0, max_delay=12.0, clock=clock)
+    seen = []
+    breaker.add_listener(lambda old, new: seen.append((old, new)))
+
+    breaker.record_failure()
+    clock.advance(5.0)
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    clock.advance(9.9)
+    assert not breaker.allow_request()
+    clock.advance(0.1)
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.status()['retry_in'] == pytest.approx(12.0)
+
+    clock.advance(12.0)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert seen[:3] == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN)]
+    assert seen[-1] == (HALF_OPEN, CLOSED)
+    assert len(breaker.transitions) == len(seen)
+
+
+@pytest.fixture
+def api():
+    server = FakeBotAPI(seed=1).start()
+    yield server
+    server.stop()
+
+
+def test_notifier_fails_fast_while_api_is_blackholed(api):
+    clock = SimulatedClock()
+    breaker = CircuitBreaker(failure_threshold=2, base_delay=30.0, clock=clock)
+    notifier = TelegramNotifier('123:test', '42', timeout=0.3, clock=clock,
+                                base_url=api.base_url, breaker=breaker)
+    api.blackhole = True
+
+    # The first failures each wait for the full timeout
+    for _ in range(2):
+        start = time.monotonic()
+        assert notifier.notify_doorbell() is False
+        assert time.monotonic() - start >= 0.3
+    assert breaker.state == OPEN
+
+    # Now presses fail fast instead of stalling the service
+    start = time.monotonic()
+    for _ in range(20):
+        assert notifier.notify_doorbell() is False
+    assert time.monotonic() - start < 0.1
+    requests_during_open = api.requests_seen
+
+    # After the backoff, one probe reaches the (recovered) API and closes the breaker
+    api.blackhole = False
+    clock.advance(30.0)
+    assert notifier.notify_doorbell() is True
+    assert breaker.state == CLOSED
+    assert len(api.messages) == 1
+    assert api.requests_seen == requests_during_open + 1
+    notifier.close()
+
+
+def test_rate_limits_do_not_trip_the_breaker(api):
+    api.rate_limit_rate = 1.0
+    breaker = CircuitBreaker(failure_threshold=1)
+    notifier = TelegramNotifier('123:test', '42', timeout=1, base_url=api.base_url, breaker=breaker)
+
+    assert notifier.notify_doorbell() is False
+    assert breaker.state == CLOSED
+    notifier.close()
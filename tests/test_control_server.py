@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Control Socket Tests
+====================
+
+Drives a running DoorbellService through its Unix control socket with the
+doorbellctl client.
+"""
+
+import threading
+import time
+
+import pytest
+
+from circuit_breaker import CircuitBreaker
+from control_server import ControlServer
+from doorbell_service import DoorbellService
+from doorbellctl import control_socket_path, main as doorbellctl, send_command
+from notification_scheduler import Button
+from rf_event import RFEvent
+
+
+class Config:
+    rules = None
+
+    def __init__(self, *codes):
+        self.buttons = {code: Button(code) for code in codes}
+
+
+class QueueMonitor:
+    """RF monitor stand-in fed from the test thread while the service runs."""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def push(self, code):
+        with self.lock:
+            self.events.append(RFEvent(code, time.monotonic(), receiver=27))
+
+    def start(self):
+        pass
+
+    def check_for_event(self):
+        with self.lock:
+            return self.events.pop(0) if self.events else None
+
+    def cleanup(self):
+        pass
+
+
+class Notifier:
+    def __init__(self):
+        self.sent = []
+
+    def notify_doorbell(self, button=None):
+        self.sent.append(button.code)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def running(tmp_path):
+    rf_monitor = QueueMonitor()
+    notifier = Notifier()
+    service = DoorbellService(Config(7), notifier, rf_monitor, debounce_time=0.0)
+    reloaded = Config(7, 8)
+    control = ControlServer(service, str(tmp_path / 'doorbell.sock'), breaker=CircuitBreaker(),
+                            reload_config=lambda: reloaded)
+    service.start()
+    control.start()
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    yield service, control, rf_monitor, notifier
+    control.stop()
+    service.stop()
+    thread.join()
+
+
+def test_status_answers_in_milliseconds(running):
+    service, control, rf_monitor, _notifier = running
+    rf_monitor.push(7)
+    wait_for(lambda: service.events_seen == 1)
+
+    start = time.monotonic()
+    status = send_command('status', control.path)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.05
+    assert status['ok'] and status['running'] and not status['paused']
+    assert status['last_code'] == 7
+    assert status['queue_depth'] == 0
+    assert status['breaker']['state'] == 'closed'
+
+
+def test_pause_resume_and_events(running):
+    service, control, rf_monitor, notifier = running
+
+    assert send_command('pause', control.path)['paused'] is True
+    rf_monitor.push(7)
+    wait_for(lambda: service.events_seen == 1)
+    assert notifier.sent == []
+
+    send_command('resume', control.path)
+    rf_monitor.push(7)
+    rf_monitor.push(99)
+    wait_for(lambda: service.events_seen == 3)
+    assert notifier.sent == [7]
+
+    events = send_command('events 2', control.path)['events']
+    assert [(event['code'], event['outcome']) for event in events] == [(7, 'notified'), (99, 'ignored')]
+    for count in ('0', '-1', 'all'):
+        assert send_command(f'events {count}', control.path)['ok'] is False
+
+
+def test_reload_takes_effect_without_restart(running):
+    service, control, rf_monitor, notifier = running
+
+    reply = send_command('reload', control.path)
+    assert reply['buttons'] == [7, 8]
+    rf_monitor.push(8)
+    wait_for(lambda: notifier.sent == [8])
+
+
+def test_reload_racing_an_event_cannot_break_the_loop():
+    notifier = Notifier()
+    service = DoorbellService(Config(7, 8), notifier, QueueMonitor(), debounce_time=0.0)
+
+    class ReloadingButtons(dict):
+        def get(self, code, default=None):
+            # The control thread drops button 8 while this frame is handled
+            service.reload_config(Config(7))
+            return super().get(code, default)
+
+    service.config.buttons = ReloadingButtons(service.config.buttons)
+    service._handle_event(RFEvent(8, 1.0))
+    assert notifier.sent == [8]
+    # The next frame sees the new table
+    service._handle_event(RFEvent(8, 2.0))
+    assert notifier.sent == [8]
+
+
+def test_client_reports_errors(running, tmp_path, monkeypatch, capsys):
+    _service, control, _rf_monitor, _notifier = running
+    monkeypatch.setenv('CONTROL_SOCKET', control.path)
+    assert doorbellctl(['status']) == 0
+    assert 'Last code:   none yet' in capsys.readouterr().out
+    assert doorbellctl(['explode']) == 1
+
+    monkeypatch.setenv('CONTROL_SOCKET', str(tmp_path / 'missing.sock'))
+    assert doorbellctl(['status']) == 2
+
+
+def test_client_finds_the_socket_set_in_env_file(tmp_path, monkeypatch):
+    env_file = tmp_path / '.env'
+    monkeypatch.delenv('CONTROL_SOCKET', raising=False)
+    env_file.write_text("BOT_TOKEN=x\nexport CONTROL_SOCKET='/run/doorbell/ctl.sock'\n")
+    assert control_socket_path(str(env_file)) == '/run/doorbell/ctl.sock'
+    env_file.write_text("CONTROL_SOCKET=off  # no socket\n")
+    assert control_socket_path(str(env_file)) is None
+    # The process environment wins, as in config.py
+    monkeypatch.setenv('CONTROL_SOCKET', str(tmp_path / 'other.sock'))
+    assert control_socket_path(str(env_file)) == str(tmp_path / 'other.sock')
+
+
+def test_async_runtime_serves_the_same_commands(tmp_path):
+    from async_doorbell_service import AsyncDoorbellService
+
+    class AsyncNotifier:
+        async def notify_doorbell(self, button=None):
+            pass
+
+    service = AsyncDoorbellService(Config(7), AsyncNotifier(), QueueMonitor())
+    control = ControlServer(service, str(tmp_path / 'doorbell.sock'))
+    service.add_task(control.serve_async)
+    replies = []
+
+    def client():
+        wait_for(lambda: (tmp_path / 'doorbell.sock').exists())
+        replies.append(send_command('pause', control.path))
+        replies.append(send_command('status', control.path))
+        service.stop()
+
+    threading.Thread(target=client).start()
+    service.start()
+    service.run(duration=5.0)
+
+    assert replies[1]['paused'] is True
+    assert not (tmp_path / 'doorbell.sock').exists()
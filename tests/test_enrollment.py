@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Enrollment Tests
+================
+
+Burst segmentation, classification and the atomic button_config.json merge
+behind button_discovery_tool.py --batch.
+"""
+
+import json
+import os
+import stat
+
+import pytest
+
+from config import DoorbellConfig
+from enrollment import BurstSegmenter, Enrollment, merge_button_config, parse_label
+from notification_scheduler import Button
+
+
+def segment(frames, end):
+    segmenter = BurstSegmenter(gap=0.5, min_frames=2)
+    bursts = [segmenter.feed(code, t) for code, t in frames]
+    bursts.append(segmenter.flush(end))
+    return [(burst.code, burst.frames) for burst in bursts if burst is not None]
+
+
+def test_repeats_of_one_press_form_one_burst():
+    press = [(111, 1.0 + i * 0.06) for i in range(8)]
+    again = [(111, 3.0 + i * 0.06) for i in range(5)]
+    assert segment(press + again, end=10.0) == [(111, 8), (111, 5)]
+
+
+def test_burst_ends_when_another_code_is_heard_and_stray_frames_are_dropped():
+    frames = [(111, 1.0), (111, 1.05), (222, 1.1), (222, 1.15), (222, 1.2),
+              (333, 5.0)]   # single stray decode
+    assert segment(frames, end=10.0) == [(111, 2), (222, 3)]
+
+
+def test_flush_waits_for_the_gap():
+    segmenter = BurstSegmenter(gap=0.5)
+    segmenter.feed(111, 1.0)
+    segmenter.feed(111, 1.1)
+    assert segmenter.flush(1.3) is None
+    assert segmenter.flush(1.7).frames == 2
+
+
+def test_classification():
+    enrollment = Enrollment({111: {'CODE': 111}}, noise_codes=[999])
+    assert enrollment.classify(111) == Enrollment.KNOWN
+    assert enrollment.classify(999) == Enrollment.NOISE
+    assert enrollment.classify(222) == Enrollment.NEW
+    enrollment.add(222, 'Gate', 'high')
+    assert enrollment.classify(222) == Enrollment.KNOWN
+    with pytest.raises(ValueError):
+        enrollment.add(333, 'Panic', 'urgent')
+
+
+def test_parse_label():
+    assert parse_label(" Front door ") == ('Front door', 'normal')
+    assert parse_label("Panic, Critical") == ('Panic', 'critical')
+
+
+def test_merge_keeps_existing_buttons_and_loads_back(tmp_path):
+    path = tmp_path / 'button_config.json'
+    path.write_text(json.dumps({"BUTTON_CODE": 111}))
+    os.chmod(path, 0o640)
+
+    merge_button_config(str(path), [Button(222, 'Gate'), Button(333, 'Panic', 'critical')],
+                        noise_codes=[999])
+
+    data = json.loads(path.read_text())
+    assert data['BUTTON_CODE'] == 111
+    assert data['BUTTONS'] == [{'CODE': 111}, {'CODE': 222, 'NAME': 'Gate'},
+                               {'CODE': 333, 'NAME': 'Panic', 'PRIORITY': 'critical'}]
+    assert data['NOISE_CODES'] == [999]
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    # No temporary files left behind
+    assert os.listdir(tmp_path) == ['button_config.json']
+
+    config = DoorbellConfig.__new__(DoorbellConfig)
+    config.project_root = str(tmp_path)
+    config._load_button_config()
+    assert sorted(config.buttons) == [111, 222, 333]
+    assert config.buttons[333].priority == 'critical'
+
+
+def test_merge_relabels_and_creates_missing_file(tmp_path):
+    path = str(tmp_path / 'button_config.json')
+    merge_button_config(path, [Button(222, 'Gate')])
+    merge_button_config(path, [Button(222, 'Side gate', 'high'), Button(444, 'Garage')])
+    with open(path) as f:
+        data = json.load(f)
+    assert data['BUTTON_CODE'] == 222
+    assert data['BUTTONS'] == [{'CODE': 222, 'NAME': 'Side gate', 'PRIORITY': 'high'},
+                               {'CODE': 444, 'NAME': 'Garage'}]
+    assert 'NOISE_CODES' not in data
+
+
+def test_failed_write_leaves_the_old_file(tmp_path, monkeypatch):
+    path = tmp_path / 'button_config.json'
+    path.write_text('{"BUTTON_CODE": 111}')
+
+    def broken_replace(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, 'replace', broken_replace)
+    with pytest.raises(OSError):
+        merge_button_config(str(path), [Button(222, 'Gate')])
+    assert path.read_text() == '{"BUTTON_CODE": 111}'
+    assert os.listdir(tmp_path) == ['button_config.json']
+
+
+def test_button_listed_as_noise_is_reported_not_dropped(tmp_path):
+    path = tmp_path / 'button_config.json'
+    path.write_text('{"BUTTONS": [{"CODE": 111}, {"CODE": 222}], "NOISE_CODES": [222]}')
+    with pytest.raises(ValueError, match='222'):
+        merge_button_config(str(path), [Button(333, 'Gate')])
+    assert json.loads(path.read_text())['BUTTONS'] == [{'CODE': 111}, {'CODE': 222}]
+    with pytest.raises(ValueError, match='111'):
+        merge_button_config(str(path.with_name('other.json')), [Button(111)], noise_codes=[111])
+
+
+def test_directory_is_synced_after_the_rename(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+
+    def recording_fsync(fd):
+        synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+        real_fsync(fd)
+    monkeypatch.setattr(os, 'fsync', recording_fsync)
+    merge_button_config(str(tmp_path / 'button_config.json'), [Button(222, 'Gate')])
+    assert len(synced) == 2 and synced[-1]
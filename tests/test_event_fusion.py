@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Event Fusion Tests
+==================
+"""
+
+from event_fusion import EventFusion
+from rf_event import RFEvent
+
+
+class ListMonitor:
+    def __init__(self, events):
+        self.events = list(events)
+
+    def start(self):
+        pass
+
+    def check_for_event(self):
+        return self.events.pop(0) if self.events else None
+
+    def cleanup(self):
+        pass
+
+
+def test_detections_from_several_receivers_become_one_event():
+    fusion = EventFusion(window=0.5)
+
+    first = fusion.observe(RFEvent(111, 10.02, protocol=1, pulselength=352), 'garage')
+    assert first is not None
+    assert fusion.observe(RFEvent(111, 10.05), 'porch') is None
+    # Late arrival with the earliest timestamp
+    assert fusion.observe(RFEvent(111, 10.01, protocol=1, pulselength=349), 'gate') is None
+
+    assert first.receivers == ['garage', 'porch', 'gate']
+    assert first.timestamp == 10.01
+    assert first.pulselength == 349
+    assert first.detections == 3
+
+
+def test_other_codes_and_later_presses_are_not_merged():
+    fusion = EventFusion(window=0.5)
+
+    assert fusion.observe(RFEvent(111, 10.0), 'a') is not None
+    assert fusion.observe(RFEvent(222, 10.1), 'b') is not None
+    assert fusion.observe(RFEvent(111, 12.0), 'b') is not None
+
+
+def test_merge_across_bucket_boundary():
+    fusion = EventFusion(window=0.5)
+
+    assert fusion.observe(RFEvent(111, 10.49), 'a') is not None
+    assert fusion.observe(RFEvent(111, 10.51), 'b') is None
+
+
+def test_memory_stays_flat_at_high_event_rates():
+    fusion = EventFusion(window=0.5)
+
+    # 1000 events per second of distinct codes for over three minutes
+    sizes = []
+    for i in range(200_000):
+        fusion.observe(RFEvent(i, i / 1000.0), 'a')
+        if i % 50_000 == 49_999:
+            sizes.append(fusion.tracked_events())
+
+    assert max(sizes) <= 2000
+    assert sizes[0] == sizes[-1]
+
+
+def test_service_notifies_once_for_a_press_heard_twice():
+    from clock import SimulatedClock
+    from doorbell_service import DoorbellService
+
+    from notification_scheduler import Button
+
+    class Config:
+        button_code = 7
+        buttons = {7: Button(7)}
+
+    class Notifier:
+        count = 0
+
+        def notify_doorbell(self, button=None):
+            self.count += 1
+
+    clock = SimulatedClock(start_time=100.0)
+    # Different pins, same press; debouncing is disabled to isolate fusion
+    rf_monitor = ListMonitor([RFEvent(7, 1.00, receiver=27), RFEvent(7, 1.01, receiver=22),
+                              RFEvent(7, 1.05, receiver=27)])
+    notifier = Notifier()
+    service = DoorbellService(Config(), notifier, rf_monitor, debounce_time=0.0,
+                              clock=clock, fusion=EventFusion(window=0.5))
+    service.start()
+    service.run(duration=1.0)
+
+    assert notifier.count == 1
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Forwarding Tests
+================
+
+Wire format, aggregator bookkeeping, and a UDP loopback run with hundreds
+of simulated nodes over a lossy link.
+"""
+
+import random
+import socket
+import time
+
+from aggregator import Aggregator
+from clock import SimulatedClock
+from doorbell_service import DoorbellService
+from event_forwarder import (ACK, DATA, EventForwarder, pack_data, pack_event, parse_ack,
+                             parse_header, sign, unpack_events, verify)
+from notification_scheduler import Button
+from rf_event import RFEvent
+
+
+class Notifier:
+    def __init__(self):
+        self.sent = []
+
+    def notify_doorbell(self, button=None):
+        self.sent.append(button)
+
+
+class LossySocket:
+    """UDP socket that drops a fraction of outgoing datagrams."""
+
+    def __init__(self, loss, seed):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.rng = random.Random(seed)
+        self.loss = loss
+
+    def sendto(self, datagram, address):
+        if self.rng.random() >= self.loss:
+            self.sock.sendto(datagram, address)
+
+    def recv(self, size):
+        return self.sock.recv(size)
+
+    def close(self):
+        self.sock.close()
+
+
+def data(first_seq, codes, oldest=0, node_id=7, epoch=1):
+    records = [pack_event(RFEvent(code, 0.0, protocol=1, pulselength=350, receiver=27),
+                          1_700_000_000.0) for code in codes]
+    return pack_data(node_id, epoch, first_seq, oldest, records)
+
+
+def ack_of(reply):
+    kind, _node_id, _epoch, body = parse_header(reply)
+    assert kind == ACK
+    return parse_ack(body)
+
+
+def test_event_records_round_trip():
+    record = pack_event(RFEvent(4273816, 0.0, protocol=1, pulselength=352), 1_700_000_000.25)
+    kind, node_id, epoch, body = parse_header(pack_data(9, 3, 100, 90, [record]))
+    assert (kind, node_id, epoch) == (DATA, 9, 3)
+    assert unpack_events(body[10:], 1) == [(4273816, 1_700_000_000.25, None, 352, 1)]
+
+
+def test_aggregator_acks_gaps_and_drops_duplicates():
+    aggregator = Aggregator(Notifier(), {})
+    assert ack_of(aggregator.handle_datagram(data(0, [1, 2]), 'node')) == (2, [])
+    # Seqs 2-4 lost, 5-6 arrive
+    assert ack_of(aggregator.handle_datagram(data(5, [6, 7]), 'node')) == (2, [(2, 3)])
+    # Retransmit fills the gap; a repeat of 5 is a duplicate
+    assert ack_of(aggregator.handle_datagram(data(2, [3, 4, 5, 6]), 'node')) == (7, [])
+    # A heartbeat reveals a lost final batch
+    assert ack_of(aggregator.handle_datagram(data(9, []), 'node')) == (7, [(7, 2)])
+    stats = aggregator.stats()
+    assert (stats['events'], stats['duplicates'], stats['invalid']) == (7, 1, 0)
+    assert aggregator.handle_datagram(b'garbage', 'node') is None
+
+
+def test_aggregator_gives_up_on_events_the_node_no_longer_has():
+    aggregator = Aggregator(Notifier(), {})
+    aggregator.handle_datagram(data(0, [1]), 'node')
+    aggregator.handle_datagram(data(10, [1]), 'node')
+    # The node's buffer now starts at 8: seqs 1-7 can't be resent
+    assert ack_of(aggregator.handle_datagram(data(11, [], oldest=8), 'node')) == (8, [(8, 2)])
+    assert aggregator.stats()['lost'] == 7
+
+
+def test_node_restart_starts_a_new_sequence():
+    aggregator = Aggregator(Notifier(), {})
+    aggregator.handle_datagram(data(0, [1, 2, 3]), 'node')
+    assert ack_of(aggregator.handle_datagram(data(0, [4], epoch=2), 'node')) == (1, [])
+    assert aggregator.stats()['duplicates'] == 0
+
+
+def test_routing_dedup_and_debounce_across_sites():
+    notifier = Notifier()
+    clock = SimulatedClock(start_time=1000.0)
+    aggregator = Aggregator(notifier, {111: Button(111, 'Gate', 'high')}, sites={1: 'Warehouse'},
+                            clock=clock)
+    # The same press heard at two sites, plus an unconfigured code
+    aggregator.handle_datagram(data(0, [111, 222], node_id=1), 'a')
+    aggregator.handle_datagram(data(0, [111], node_id=2), 'b')
+    assert [(b.code, b.name, b.priority) for b in notifier.sent] == [(111, 'Warehouse: Gate', 'high')]
+
+
+def test_service_forwards_instead_of_notifying():
+    class Config:
+        buttons = {111: Button(111)}
+
+    class Forwarder:
+        def __init__(self):
+            self.events = []
+
+        def submit(self, event):
+            self.events.append(event.code)
+
+        def pending(self):
+            return len(self.events)
+
+    forwarder = Forwarder()
+    service = DoorbellService(Config(), None, rf_monitor=None, clock=SimulatedClock(1000.0),
+                              forwarder=forwarder)
+    service._handle_event(RFEvent(111, 1.0))
+    service._handle_event(RFEvent(999, 1.1))
+    assert forwarder.events == [111, 999]
+    assert [outcome for _t, _c, _r, outcome in service.recent_events] == ['forwarded'] * 2
+    assert service.pending_notifications() == 2
+
+
+def test_hundreds_of_nodes_over_a_lossy_loopback_link():
+    nodes, events_per_node = 300, 20
+    notifier = Notifier()
+    buttons = {100 + n: Button(100 + n) for n in range(nodes)}
+    aggregator = Aggregator(notifier, buttons)
+    address = aggregator.start('127.0.0.1', 0)
+    forwarders = [EventForwarder(address, node_id, batch_size=8, flush_interval=0.0,
+                                 heartbeat_interval=0.05, retransmit_interval=0.02,
+                                 sock=LossySocket(loss=0.1, seed=node_id))
+                  for node_id in range(nodes)]
+    try:
+        started = time.perf_counter()
+        now = time.monotonic()
+        for i in range(events_per_node):
+            for node_id, forwarder in enumerate(forwarders):
+                # Each node's own button
+                forwarder.submit(RFEvent(100 + node_id, now - 60 + i * 3.0, receiver=27))
+        deadline = time.monotonic() + 20
+        while any(forwarder.pending() for forwarder in forwarders):
+            assert time.monotonic() < deadline, aggregator.stats()
+            for forwarder in forwarders:
+                forwarder.poll()
+            time.sleep(0.005)
+        elapsed = time.perf_counter() - started
+    finally:
+        aggregator.stop()
+        for forwarder in forwarders:
+            forwarder.close()
+
+    stats = aggregator.stats()
+    assert stats['nodes'] == nodes
+    assert stats['events'] == nodes * events_per_node
+    assert stats['lost'] == 0
+    assert sum(forwarder.events_resent for forwarder in forwarders) > 0
+    # Everything arrived within the debounce time: one notification per button
+    assert sorted(button.code for button in notifier.sent) == sorted(buttons)
+    print(f"\n{nodes} nodes: {stats['events'] / elapsed:.0f} events/s delivered "
+          f"with 10% loss ({stats['datagrams']} datagrams)")
+
+
+def test_any_new_epoch_restarts_the_node():
+    aggregator = Aggregator(Notifier(), {})
+    aggregator.handle_datagram(data(0, [1, 2, 3], epoch=5), 'node')
+    # Epochs are random, so a restart may well pick a smaller one
+    assert ack_of(aggregator.handle_datagram(data(0, [4], epoch=4), 'node')) == (1, [])
+    assert aggregator.stats()['events'] == 4
+
+
+def test_restarts_within_one_second_get_different_epochs():
+    clock = SimulatedClock(start_time=1000.0)
+    forwarders = [EventForwarder(('127.0.0.1', 9), 1, clock=clock,
+                                 sock=LossySocket(loss=1.0, seed=0)) for _ in range(4)]
+    for forwarder in forwarders:
+        forwarder.sock.close()
+    assert len({forwarder.epoch for forwarder in forwarders}) == 4
+
+
+def test_signed_datagrams_are_required_when_a_key_is_set():
+    key = b'shared secret'
+    aggregator = Aggregator(Notifier(), {}, key=key)
+    # Unsigned, forged and tampered datagrams are dropped without an ACK
+    assert aggregator.handle_datagram(data(0, [1]), 'node') is None
+    assert aggregator.handle_datagram(sign(data(0, [1]), b'wrong key'), 'node') is None
+    tampered = bytearray(sign(data(0, [1]), key))
+    tampered[20] ^= 1
+    assert aggregator.handle_datagram(bytes(tampered), 'node') is None
+    assert aggregator.stats()['invalid'] == 3
+
+    reply = aggregator.handle_datagram(sign(data(0, [1, 2]), key), 'node')
+    assert ack_of(verify(reply, key)) == (2, [])
+
+
+def test_signed_forwarding_over_loopback():
+    key = b'shared secret'
+    notifier = Notifier()
+    aggregator = Aggregator(notifier, {111: Button(111)}, key=key)
+    address = aggregator.start('127.0.0.1', 0)
+    forwarder = EventForwarder(address, 1, flush_interval=0.0, key=key)
+    try:
+        forwarder.submit(RFEvent(111, time.monotonic(), receiver=27))
+        deadline = time.monotonic() + 5
+        while forwarder.pending():
+            assert time.monotonic() < deadline, aggregator.stats()
+            forwarder.poll()
+            time.sleep(0.005)
+    finally:
+        aggregator.stop()
+        forwarder.close()
+    assert [button.code for button in notifier.sent] == [111]
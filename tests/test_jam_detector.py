@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Jam Detector Tests
+==================
+
+Stuck transmitters, jamming floods and bounded memory under floods of
+random codes.
+"""
+
+import random
+
+from clock import SimulatedClock
+from doorbell_service import DoorbellService
+from jam_detector import JamDetector
+from notification_scheduler import Button
+from rf_event import RFEvent
+from telegram_notifier import doorbell_message
+
+
+class Config:
+    def __init__(self, *codes):
+        self.buttons = {code: Button(code) for code in codes}
+
+
+class Notifier:
+    def __init__(self):
+        self.sent = []
+
+    def notify_doorbell(self, button=None):
+        self.sent.append(button)
+
+
+def test_stuck_transmitter_is_quarantined_but_real_presses_get_through():
+    detector = JamDetector(code_rate=5.0, sustain=10.0, quarantine_time=300.0)
+
+    # A neighbour's sensor stuck transmitting 10 frames/s for a minute
+    admitted = [detector.observe(RFEvent(999, t / 10), matched=False) for t in range(600)]
+    assert admitted[0]
+    assert not admitted[-1]
+    assert [entry[0] for entry in detector.quarantined_codes(60.0)] == [999]
+    assert not detector.jammed
+
+    # A doorbell press (a few repeats) in the middle of it
+    assert detector.observe(RFEvent(111, 60.0), matched=True)
+    assert detector.observe(RFEvent(111, 60.05), matched=True)
+
+
+def test_normal_press_repeats_are_not_quarantined():
+    detector = JamDetector(code_rate=5.0, sustain=10.0)
+    # Each press transmits ~8 repeats in half a second; one press every 2 s
+    for press in range(30):
+        for repeat in range(8):
+            assert detector.observe(RFEvent(111, press * 2.0 + repeat * 0.06), matched=True)
+    assert detector.quarantined_codes(60.0) == []
+
+
+def test_quarantine_expires_once_the_transmitter_stops():
+    detector = JamDetector(code_rate=5.0, sustain=10.0, quarantine_time=60.0)
+    for t in range(300):
+        detector.observe(RFEvent(999, t / 10), matched=False)
+    assert not detector.observe(RFEvent(999, 40.0), matched=False)
+    # Quiet for longer than the quarantine, then one ordinary frame
+    assert detector.observe(RFEvent(999, 200.0), matched=False)
+
+
+def test_jamming_sheds_unknown_codes_and_clears_with_hysteresis():
+    detector = JamDetector(jam_rate=50.0, tau=1.0)
+    rng = random.Random(1)
+    now = 0.0
+    for _ in range(2000):
+        now += 0.005   # 200 frames/s of junk
+        detector.observe(RFEvent(rng.randrange(1 << 24), now), matched=False)
+    assert detector.jammed
+    assert detector.shed > 1000
+    # Configured buttons still pass while jammed
+    assert detector.observe(RFEvent(111, now), matched=True)
+
+    # Still jammed just below the threshold, clear once well below it
+    detector.observe(RFEvent(5, now + 1.5), matched=False)
+    assert detector.jammed
+    detector.observe(RFEvent(5, now + 5.0), matched=False)
+    assert not detector.jammed
+
+
+def test_edge_flood_counts_as_jamming():
+    detector = JamDetector(edge_rate=20000.0, tau=1.0)
+    for batch in range(100):
+        detector.observe_edges(256, batch * 0.005)   # ~51k edges/s
+    assert detector.jammed
+    assert not detector.observe(RFEvent(12345, 0.5), matched=False)
+
+
+def test_memory_stays_bounded_under_random_code_flood():
+    # Below the jamming threshold, so every code is tracked until evicted
+    detector = JamDetector(max_codes=64, jam_rate=1e9)
+    rng = random.Random(2)
+    for i in range(100_000):
+        detector.observe(RFEvent(rng.randrange(1 << 24), i * 0.001), matched=False)
+    assert len(detector._codes) <= 64
+    assert not detector.jammed
+
+
+def test_service_drops_flood_and_sends_one_jam_alert():
+    clock = SimulatedClock(start_time=1000.0)
+    notifier = Notifier()
+    alert = Button(None, 'RF jamming', 'high', message="📡 RF JAMMING DETECTED!")
+    service = DoorbellService(Config(111), notifier, rf_monitor=None, clock=clock,
+                              jam_detector=JamDetector(jam_rate=50.0, tau=1.0), jam_alert=alert)
+    rng = random.Random(3)
+    for i in range(1000):
+        service._handle_event(RFEvent(rng.randrange(1 << 24), i * 0.005))
+    service._handle_event(RFEvent(111, 5.0))
+
+    assert notifier.sent[0] is alert
+    assert [button.code for button in notifier.sent[1:]] == [111]
+    # Shed frames never reach the later stages
+    assert service.events_seen < 100
+    assert service.jammed
+    assert doorbell_message(alert, clock).startswith("📡 RF JAMMING DETECTED!\nTime: ")
+
+
+class QuietMonitor:
+    def start(self):
+        pass
+
+    def check_for_event(self):
+        return None
+
+
+def test_jam_that_stops_outright_clears_from_the_service_loop():
+    clock = SimulatedClock(start_time=1000.0)
+    detector = JamDetector(jam_rate=50.0, tau=1.0)
+    service = DoorbellService(Config(111), Notifier(), QuietMonitor(), clock=clock,
+                              jam_detector=detector)
+    rng = random.Random(4)
+    for i in range(1000):
+        service._handle_event(RFEvent(rng.randrange(1 << 24), i * 0.005))
+    assert service.jammed
+
+    # No frame arrives to clear it, but status() reads the decayed rates
+    assert detector.status(20.0)['jammed'] is False
+    assert detector.jammed
+
+    clock.advance(20.0)
+    service.start()
+    service.run(duration=1.0)
+    assert not detector.jammed
+    assert not service.jammed
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Link Quality Tests
+==================
+
+Simulated presses from a healthy remote, one with a weakening signal and one
+with a sagging battery.
+"""
+
+import random
+
+from clock import SimulatedClock
+from doorbell_service import DoorbellService
+from link_quality import EWMAStats, LinkQuality
+from notification_scheduler import Button
+from rf_event import RFEvent
+
+
+def press(quality, code, start, frames, pulselength=350, receiver=27, spacing=0.05):
+    for i in range(frames):
+        quality.observe(RFEvent(code, start + i * spacing, protocol=1, pulselength=pulselength,
+                                receiver=receiver))
+
+
+def test_ewma_stats_track_mean_and_spread():
+    stats = EWMAStats(alpha=0.1)
+    rng = random.Random(1)
+    for _ in range(2000):
+        stats.add(rng.gauss(50.0, 4.0))
+    assert abs(stats.mean - 50.0) < 2.0
+    assert 2.5 < stats.std < 5.5
+
+
+def test_healthy_remote_reports_full_delivery():
+    quality = LinkQuality()
+    for n in range(10):
+        press(quality, 111, n * 10.0, frames=8)
+    quality.flush(1000.0)
+    [link] = quality.report()
+    assert link['bursts'] == 10
+    assert link['expected_frames'] == 8
+    assert link['delivery'] == 1.0
+    assert abs(link['gap_ms'] - 50.0) < 0.01
+    assert link['warnings'] == []
+
+
+def test_weakening_signal_warns_once_and_recovers():
+    changes = []
+    quality = LinkQuality({111: Button(111, frames=10)})
+    quality.add_listener(lambda code, receiver, warnings, stats: changes.append(list(warnings)))
+
+    for n in range(5):
+        press(quality, 111, n * 10.0, frames=10)
+    # Repeats start going missing
+    rng = random.Random(2)
+    for n in range(5, 15):
+        for i in range(10):
+            if i == 0 or rng.random() < 0.35:
+                quality.observe(RFEvent(111, n * 10.0 + i * 0.05, pulselength=350, receiver=27))
+    quality.flush(1000.0)
+    [link] = quality.report()
+    assert link['delivery'] < 0.6
+    assert link['gap_jitter_ms'] > 10
+    assert changes == [['weak signal']]
+
+    for n in range(100, 120):
+        press(quality, 111, n * 10.0, frames=10)
+    quality.flush(2000.0)
+    assert changes == [['weak signal'], []]
+
+
+def test_sagging_battery_shows_as_pulselength_drift():
+    quality = LinkQuality()
+    for n in range(200):
+        press(quality, 111, n * 10.0, frames=8, pulselength=350)
+    for n in range(200, 220):
+        press(quality, 111, n * 10.0, frames=8, pulselength=390)
+    quality.flush(5000.0)
+    [link] = quality.report()
+    assert link['drift'] > 0.05
+    assert link['warnings'] == ['pulselength drift']
+
+
+def test_receivers_are_tracked_separately_and_memory_is_capped():
+    quality = LinkQuality(max_links=4)
+    for n in range(5):
+        press(quality, 111, n * 10.0, frames=8, receiver=27)
+        press(quality, 111, n * 10.0, frames=3, receiver=22)
+    quality.flush(100.0)
+    links = quality.report()
+    # The remote's expected count comes from the receiver hearing it best
+    assert [(link['receiver'], link['frames_per_burst'], link['expected_frames'])
+            for link in links] == [(22, 3, 8), (27, 8, 8)]
+
+    for code in range(1000):
+        press(quality, code, 200.0 + code, frames=2)
+    assert len(quality._links) <= 4
+
+
+def test_service_feeds_every_repeat_of_configured_buttons():
+    class Config:
+        buttons = {111: Button(111)}
+
+    class Notifier:
+        def notify_doorbell(self, button=None):
+            pass
+
+    quality = LinkQuality()
+    service = DoorbellService(Config(), Notifier(), rf_monitor=None,
+                              clock=SimulatedClock(start_time=1000.0), link_quality=quality)
+    for i in range(6):
+        service._handle_event(RFEvent(111, 5.0 + i * 0.05, receiver=27))
+        service._handle_event(RFEvent(999, 5.0 + i * 0.05, receiver=27))
+    quality.flush(10.0)
+    [link] = quality.report()
+    assert (link['code'], link['frames_per_burst']) == (111, 6)
+
+
+def test_service_loop_closes_bursts_and_report_only_reads():
+    class Config:
+        buttons = {111: Button(111, frames=10)}
+
+    class QuietMonitor:
+        def start(self):
+            pass
+
+        def check_for_event(self):
+            return None
+
+    changes = []
+    clock = SimulatedClock(start_time=1000.0)
+    quality = LinkQuality(Config.buttons, min_bursts=1)
+    quality.add_listener(lambda code, receiver, warnings, stats: changes.append(list(warnings)))
+    service = DoorbellService(Config(), None, QuietMonitor(), clock=clock, link_quality=quality)
+    # One weak press: 3 of 10 repeats
+    press(quality, 111, 0.0, frames=3)
+
+    # Reading doesn't close the burst
+    assert quality.report() == []
+    assert changes == []
+
+    # The idle service loop does, and the warning fires without another press
+    service.start()
+    service.run(duration=1.0)
+    [link] = quality.report()
+    assert link['delivery'] == 0.3
+    assert changes == [['weak signal']]
+
+
+def test_reloaded_buttons_reach_link_quality_on_the_service_thread():
+    class Config:
+        rules = None
+
+        def __init__(self, frames):
+            self.buttons = {111: Button(111, frames=frames)}
+
+    old, new = Config(8), Config(10)
+    quality = LinkQuality(old.buttons)
+    service = DoorbellService(old, None, rf_monitor=None, clock=SimulatedClock(start_time=1000.0),
+                              link_quality=quality)
+    # Control socket thread: only swaps the configuration
+    service.reload_config(new)
+    assert quality.buttons is old.buttons
+    # Service thread, next idle poll
+    service._on_idle(10.0)
+    assert quality.buttons is new.buttons
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Low-Jitter Mode Tests
+=====================
+"""
+
+import gc
+import os
+import sys
+import threading
+
+import pytest
+
+from async_doorbell_service import AsyncDoorbellService
+from clock import SimulatedClock
+from doorbell_service import DoorbellService
+from edge_reader import BatchedRFMonitor, FileEdgeSource
+from low_jitter import (apply_low_jitter, freeze_startup_objects, pin_to_cpu,
+                        restore_scheduling, save_scheduling)
+from notification_scheduler import Button
+
+
+class Config:
+    button_code = 4273816
+    buttons = {4273816: Button(4273816)}
+
+
+class IdleMonitor:
+    def start(self):
+        pass
+
+    def check_for_code(self):
+        return None
+
+    def check_for_event(self):
+        return None
+
+    def cleanup(self):
+        pass
+
+
+def test_freeze_startup_objects_moves_objects_out_of_gc():
+    old_thresholds = gc.get_threshold()
+    try:
+        freeze_startup_objects(thresholds=(40000, 15, 90))
+        assert gc.get_freeze_count() > 0
+        assert gc.get_threshold() == (40000, 15, 90)
+    finally:
+        gc.unfreeze()
+        gc.set_threshold(*old_thresholds)
+
+
+def test_idle_poll_loop_does_not_allocate():
+    clock = SimulatedClock(start_time=1000.0)
+    service = DoorbellService(Config(), notifier=None, rf_monitor=IdleMonitor(), clock=clock)
+    service.start()
+    # Warm up caches, then compare allocated blocks across many polls
+    service.run(duration=1.0)
+    before = sys.getallocatedblocks()
+    service.run(duration=100.0)
+    after = sys.getallocatedblocks()
+
+    # 10,000 polls must not leave allocations behind
+    assert after - before < 10
+
+
+@pytest.mark.skipif(not hasattr(os, 'sched_setaffinity'), reason="needs sched_setaffinity")
+def test_restore_scheduling_undoes_apply_low_jitter():
+    saved = save_scheduling()
+    try:
+        apply_low_jitter()
+        assert len(os.sched_getaffinity(0)) == 1
+    finally:
+        restore_scheduling(saved)
+    assert os.sched_getaffinity(0) == saved['affinity']
+    assert os.sched_getscheduler(0) == saved['policy']
+
+
+class RecordingEdgeSource(FileEdgeSource):
+    """Notes the thread that reads edges, and its CPU affinity."""
+
+    affinity = None
+    thread = None
+
+    def read(self, size):
+        self.affinity = os.sched_getaffinity(0)
+        self.thread = threading.get_ident()
+        return super().read(size)
+
+
+@pytest.mark.skipif(not hasattr(os, 'sched_setaffinity'), reason="needs sched_setaffinity")
+@pytest.mark.parametrize('service_class', [DoorbellService, AsyncDoorbellService])
+def test_chardev_capture_thread_is_the_one_tuned(tmp_path, service_class):
+    capture = tmp_path / 'edges.bin'
+    capture.write_bytes(b'')
+    source = RecordingEdgeSource(str(capture))
+    cpu = sorted(os.sched_getaffinity(0))[-1]
+    before = os.sched_getaffinity(0)
+    tuned = []
+
+    def tune():
+        tuned.append(threading.get_ident())
+        pin_to_cpu(cpu)
+
+    service = service_class(Config(), None, BatchedRFMonitor(source), capture_setup=tune)
+    service.start()
+    # The sync loop polls on the thread that runs it; the async one on its bridge thread
+    runner = threading.Thread(target=service.run, kwargs={'duration': 0.2})
+    runner.start()
+    runner.join()
+    service.stop()
+
+    assert tuned == [source.thread]
+    assert source.affinity == {cpu}
+    assert os.sched_getaffinity(0) == before
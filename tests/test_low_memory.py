@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Low-Memory Profile Tests
+========================
+
+The Pi Zero profile (LOW_MEMORY=1): slotted hot-path classes, the stdlib
+HTTP session against the fake Bot API, .env loading without python-dotenv,
+and a steady-state RSS ceiling over hours of simulated traffic.
+"""
+
+import os
+import socket
+import sys
+
+import pytest
+
+from bench_memory import measure
+from circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from clock import SimulatedClock
+from config import DoorbellConfig
+from debouncer import Debouncer
+from doorbell_service import DoorbellService
+from event_fusion import FusedEvent
+from fake_bot_api import FakeBotAPI
+from http_client import HTTPError, HTTPSession
+from notification_scheduler import Button
+from rf_event import RFEvent
+from rf_monitor import RFMonitor
+from telegram_notifier import TelegramNotifier
+
+# Steady-state RSS of the whole process (interpreter included) after six
+# simulated hours; about 23 MB on x86-64 CPython 3.11, 30 MB with requests
+RSS_CEILING_KB = 28 * 1024
+RSS_GROWTH_KB = 256
+
+
+class Config:
+    def __init__(self):
+        self.buttons = {7: Button(7)}
+
+
+def test_profile_classes_have_no_instance_dict():
+    event = RFEvent(7, 0.0)
+    config = DoorbellConfig.__new__(DoorbellConfig)
+    for obj in (event, FusedEvent(event, 'a'), Debouncer(), RFMonitor([27, 22]),
+                DoorbellService(Config(), None, None), config):
+        assert not hasattr(obj, '__dict__'), type(obj).__name__
+
+
+@pytest.fixture
+def api():
+    server = FakeBotAPI().start()
+    yield server
+    server.stop()
+
+
+def test_http_session_keeps_the_connection_alive(api):
+    session = HTTPSession()
+    notifier = TelegramNotifier('123:test', '42', base_url=api.base_url, session=session)
+    try:
+        assert all(notifier.notify_doorbell(Button(7, 'Gate')) for _ in range(3))
+        assert notifier.send_text('hello')
+        assert session.connections_opened == 1
+        assert [message['text'] for message in api.messages][-1] == 'hello'
+        response = session.post(notifier.method_url('noSuchMethod'), data={'a': 1}, timeout=1)
+        with pytest.raises(HTTPError):
+            response.raise_for_status()
+    finally:
+        notifier.close()
+
+
+def test_http_session_failures_trip_the_breaker():
+    clock = SimulatedClock(start_time=1000.0)
+    breaker = CircuitBreaker(failure_threshold=2, clock=clock)
+    # A port nothing listens on any more
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    notifier = TelegramNotifier('123:test', '42', timeout=1, clock=clock,
+                                base_url=f'http://127.0.0.1:{port}', breaker=breaker,
+                                session=HTTPSession())
+    assert breaker.state == CLOSED
+    assert not notifier.notify_doorbell()
+    assert not notifier.notify_doorbell()
+    assert breaker.state == OPEN
+
+
+def test_env_file_is_read_without_dotenv(tmp_path, monkeypatch):
+    (tmp_path / '.env').write_text(
+        "# Telegram\n"
+        "BOT_TOKEN=123:abc # from BotFather\n"
+        "export CHAT_ID='-100 42'\n"
+        'MQTT_TOPIC="home/door # bell"\n'
+        "GPIO_DATA_PIN=17\n"
+        "not a setting\n")
+    # _read_env_file() sets variables in os.environ; keep them out of later tests
+    monkeypatch.setattr(os, 'environ', os.environ.copy())
+    for name in ('BOT_TOKEN', 'CHAT_ID', 'MQTT_TOPIC'):
+        os.environ.pop(name, None)
+    os.environ['GPIO_DATA_PIN'] = '22'
+    os.environ['LOW_MEMORY'] = '1'
+    # Importing python-dotenv now fails
+    monkeypatch.setitem(sys.modules, 'dotenv', None)
+
+    config = DoorbellConfig.__new__(DoorbellConfig)
+    config.project_root = str(tmp_path)
+    config._load_env_variables()
+    assert config.low_memory is True
+    assert config.bot_token == '123:abc'
+    assert config.chat_id == '-100 42'
+    assert config.mqtt_topic == 'home/door # bell'
+    # The process environment wins over .env, as with load_dotenv()
+    assert config.gpio_pins == [22]
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason="needs Linux /proc")
+def test_steady_state_rss_stays_under_ceiling():
+    results = measure(hours=6.0)
+
+    assert results['heavy_modules'] == []
+    assert results['breaker_state'] == CLOSED
+    assert results['messages'] == results['expected_notifications'] > 100
+    assert results['rss_end_kb'] < RSS_CEILING_KB
+    assert results['rss_growth_kb'] < RSS_GROWTH_KB
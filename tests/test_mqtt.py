@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+MQTT Transport Tests
+====================
+
+MQTTPublisher against the in-process fake broker: pipelining, batched
+acknowledgements, offline buffering across a broker restart, and fan-out
+to several transports.
+"""
+
+import json
+import time
+
+from fake_mqtt_broker import FakeMQTTBroker
+from mqtt_publisher import MQTTPublisher, PacketReader, encode_length, publish_packet
+from notification_scheduler import Button
+from transport import FanoutTransport
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def publisher_for(broker, **kwargs):
+    host, port = broker.address
+    kwargs.setdefault('min_reconnect_delay', 0.05)
+    kwargs.setdefault('max_reconnect_delay', 0.2)
+    return MQTTPublisher(host, port, **kwargs).start()
+
+
+def test_packets_survive_being_split_across_reads():
+    packets = publish_packet('doorbell/1', b'x' * 200, 7) + publish_packet('doorbell/2', b'', 8)
+    reader = PacketReader()
+    received = []
+    for i in range(len(packets)):
+        received += reader.feed(packets[i:i + 1])
+    assert [(kind, flags) for kind, flags, _body in received] == [(3, 2), (3, 2)]
+    assert encode_length(321) == b'\xc1\x02'
+
+
+def test_publishes_presses_as_json():
+    broker = FakeMQTTBroker().start()
+    publisher = publisher_for(broker, topic='home/doorbell')
+    try:
+        assert publisher.notify_doorbell(Button(4273816, 'Front door', 'high'))
+        assert publisher.notify_doorbell()
+        assert publisher.flush(timeout=5)
+    finally:
+        publisher.close()
+        broker.stop()
+    assert [m['topic'] for m in broker.messages] == ['home/doorbell/4273816', 'home/doorbell/doorbell']
+    first = json.loads(broker.messages[0]['payload'])
+    assert (first['code'], first['name'], first['priority']) == (4273816, 'Front door', 'high')
+    assert broker.messages[0]['qos'] == 1
+
+
+def test_publishes_are_pipelined_and_acks_batched():
+    broker = FakeMQTTBroker(hold_acks=True).start()
+    publisher = publisher_for(broker, max_inflight=16)
+    try:
+        wait_for(lambda: publisher.connected)
+        for code in range(40):
+            publisher.notify_doorbell(Button(code))
+        # The window fills without a single PUBACK coming back
+        wait_for(lambda: broker.max_unacked == 16)
+        assert publisher.pending() == 40
+        broker.hold_acks = False
+        assert publisher.flush(timeout=5)
+    finally:
+        publisher.close()
+        broker.stop()
+    assert len(broker.messages) == 40
+    assert publisher.acked == 40
+    # The held acknowledgements were released (and processed) as one batch
+    assert broker.ack_batches[0] == 16
+
+
+def test_messages_are_buffered_across_a_broker_restart():
+    broker = FakeMQTTBroker().start()
+    host, port = broker.address
+    publisher = publisher_for(broker)
+    restarted = None
+    try:
+        publisher.notify_doorbell(Button(1))
+        assert publisher.flush(timeout=5)
+        broker.stop()
+        wait_for(lambda: not publisher.connected)
+        for code in range(2, 12):
+            publisher.notify_doorbell(Button(code))
+        time.sleep(0.2)
+        assert publisher.pending() == 10
+        restarted = FakeMQTTBroker(host, port).start()
+        assert publisher.flush(timeout=5)
+    finally:
+        publisher.close()
+        if restarted is not None:
+            restarted.stop()
+    assert [json.loads(m['payload'])['code'] for m in restarted.messages] == list(range(2, 12))
+    assert publisher.connections == 2
+
+
+def test_unacknowledged_messages_are_resent_with_dup():
+    broker = FakeMQTTBroker(hold_acks=True).start()
+    publisher = publisher_for(broker)
+    try:
+        for code in range(5):
+            publisher.notify_doorbell(Button(code))
+        wait_for(lambda: len(broker.messages) == 5)
+        broker.disconnect_clients()
+        wait_for(lambda: len(broker.messages) == 10)
+        broker.hold_acks = False
+        assert publisher.flush(timeout=5)
+    finally:
+        publisher.close()
+        broker.stop()
+    assert [m['dup'] for m in broker.messages[5:]] == [True] * 5
+    assert publisher.dropped == 0
+
+
+def test_offline_buffer_drops_oldest_when_full():
+    # Nothing listens on this port: the publisher stays offline
+    broker = FakeMQTTBroker()
+    host, port = broker.address
+    broker.stop()
+    publisher = MQTTPublisher(host, port, buffer_size=3, min_reconnect_delay=0.05)
+    for code in range(5):
+        publisher.notify_doorbell(Button(code))
+    assert (publisher.pending(), publisher.dropped) == (3, 2)
+    assert [json.loads(m.payload)['code'] for m in publisher._queue] == [2, 3, 4]
+    publisher.close()
+
+
+def test_fanout_isolates_a_failing_transport():
+    class Failing:
+        def notify_doorbell(self, button=None):
+            raise OSError("unreachable")
+
+    class Recording:
+        def __init__(self):
+            self.sent = []
+
+        def notify_doorbell(self, button=None):
+            self.sent.append(button)
+            return True
+
+    recording = Recording()
+    fanout = FanoutTransport([Failing(), recording])
+    assert fanout.notify_doorbell(Button(1))
+    assert [b.code for b in recording.sent] == [1]
+    assert not FanoutTransport([Failing()]).notify_doorbell(Button(1))
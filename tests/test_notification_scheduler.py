@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Notification Scheduler Tests
+============================
+"""
+
+import threading
+
+import pytest
+
+from clock import SimulatedClock
+from notification_scheduler import Button, NotificationScheduler
+
+PANIC = Button(1, 'Panic button', 'critical')
+DOORBELL = Button(2, 'Doorbell')
+MAILBOX = Button(3, 'Mailbox', 'low')
+
+
+class GatedNotifier:
+    """Records sends; the first send blocks until released, building a backlog."""
+
+    def __init__(self):
+        self.sent = []
+        self.first_started = threading.Event()
+        self.release = threading.Event()
+        self.done = threading.Event()
+        self.expected = None
+
+    def notify_doorbell(self, button=None):
+        if not self.sent:
+            self.first_started.set()
+            self.release.wait(5)
+        self.sent.append(button.name)
+        if len(self.sent) == self.expected:
+            self.done.set()
+        return True
+
+
+def test_critical_preempts_queued_routine_notifications():
+    notifier = GatedNotifier()
+    notifier.expected = 6
+    scheduler = NotificationScheduler(notifier).start()
+
+    scheduler.notify_doorbell(MAILBOX)
+    assert notifier.first_started.wait(5)
+    for _ in range(3):
+        scheduler.notify_doorbell(MAILBOX)
+    scheduler.notify_doorbell(DOORBELL)
+    scheduler.notify_doorbell(PANIC)
+    notifier.release.set()
+
+    assert notifier.done.wait(5)
+    scheduler.stop()
+    # The in-flight send finishes first, then strictly by priority
+    assert notifier.sent == ['Mailbox', 'Panic button', 'Doorbell', 'Mailbox', 'Mailbox', 'Mailbox']
+    assert scheduler.sent == 6
+
+
+def test_aging_lets_long_waiting_routine_notifications_through():
+    clock = SimulatedClock()
+    scheduler = NotificationScheduler(GatedNotifier(), class_step=10.0, clock=clock)
+
+    scheduler.notify_doorbell(MAILBOX)
+    clock.advance(25.0)
+    scheduler.notify_doorbell(DOORBELL)
+    scheduler.notify_doorbell(PANIC)
+
+    order = [entry[3].name for entry in sorted(scheduler._heap)]
+    # The mailbox has waited 25 s, more than the doorbell's one-class head start
+    assert order == ['Panic button', 'Mailbox', 'Doorbell']
+
+
+def test_full_queue_drops_the_least_urgent_notification():
+    scheduler = NotificationScheduler(GatedNotifier(), max_queue=2, clock=SimulatedClock())
+
+    assert scheduler.notify_doorbell(MAILBOX)
+    assert scheduler.notify_doorbell(DOORBELL)
+    assert scheduler.notify_doorbell(PANIC)
+    assert not scheduler.notify_doorbell(MAILBOX)
+
+    assert scheduler.pending() == 2
+    assert scheduler.dropped == 2
+    assert sorted(entry[3].name for entry in scheduler._heap) == ['Doorbell', 'Panic button']
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError, match='urgent'):
+        Button(4, 'Smoke alarm', 'urgent')
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Telegram Notifier Tests
+=======================
+
+Runs TelegramNotifier against the local fake Bot API (no internet needed).
+"""
+
+import pytest
+
+from clock import SimulatedClock
+from fake_bot_api import FakeBotAPI
+from telegram_notifier import TelegramNotifier
+
+
+@pytest.fixture
+def api():
+    server = FakeBotAPI(seed=1).start()
+    yield server
+    server.stop()
+
+
+def make_notifier(api, **kwargs):
+    clock = SimulatedClock(start_time=0.0)
+    return TelegramNotifier('123:test', '42', timeout=1, clock=clock, base_url=api.base_url, **kwargs)
+
+
+def test_notification_reaches_custom_base_url(api):
+    notifier = make_notifier(api)
+
+    assert notifier.notify_doorbell() is True
+    assert len(api.messages) == 1
+    assert api.messages[0]['chat_id'] == '42'
+    assert 'DOORBELL PRESSED' in api.messages[0]['text']
+
+
+@pytest.mark.parametrize('fault', ['error_rate', 'rate_limit_rate', 'reset_rate'])
+def test_server_faults_are_reported_not_raised(api, fault):
+    setattr(api, fault, 1.0)
+    notifier = make_notifier(api)
+
+    assert notifier.notify_doorbell() is False
+    assert api.messages == []
+
+
+def test_pooled_connection_survives_a_reset(api):
+    notifier = make_notifier(api)
+    assert notifier.notify_doorbell() is True
+
+    api.outage = True
+    assert notifier.notify_doorbell() is False
+    api.outage = False
+
+    assert notifier.notify_doorbell() is True
+    assert len(api.messages) == 2
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Profiler Tests
+==============
+"""
+
+import os
+import signal
+import threading
+import time
+
+from doorbell_service import DoorbellService
+from notification_scheduler import Button
+from profiler import SamplingProfiler, StageTimers, install_signal_trigger
+from rf_event import RFEvent
+
+
+class Config:
+    buttons = {5: Button(5)}
+
+
+class FloodMonitor:
+    """Reports a frame of the configured button on every poll."""
+
+    def start(self):
+        pass
+
+    def check_for_event(self):
+        return RFEvent(5, time.monotonic())
+
+    def cleanup(self):
+        pass
+
+
+class Notifier:
+    def notify_doorbell(self, button=None):
+        pass
+
+
+def busy_loop_for_profiling(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_captures_all_threads_and_stage_timings(tmp_path):
+    service = DoorbellService(Config(), Notifier(), FloodMonitor(), debounce_time=0.0,
+                              poll_interval=0.001)
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop_for_profiling, args=(stop,), name='busy-worker')
+    worker.start()
+    service.start()
+    runner = threading.Thread(target=service.run, name='service-loop')
+    runner.start()
+
+    profiler = SamplingProfiler(rate=200, duration=0.3, output_dir=str(tmp_path), service=service)
+    assert profiler.start()
+    assert not profiler.start()
+    while profiler.running:
+        time.sleep(0.01)
+    service.running = False
+    stop.set()
+    runner.join()
+    worker.join()
+
+    assert service.stage_timers is None
+    assert profiler.samples >= 20
+    folded = open(profiler.output_path).read().splitlines()
+    assert any(line.startswith('busy-worker;') and 'busy_loop_for_profiling' in line
+               for line in folded)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in folded)
+    stages = open(profiler.output_path.replace('.folded', '.stages.txt')).read()
+    for stage in ('rf_poll', 'debounce', 'dispatch'):
+        assert stage in stages
+
+
+def test_stage_timers_accumulate():
+    timers = StageTimers()
+    timed = timers.wrap('sleep', time.sleep)
+    timed(0.002)
+    timed(0.0)
+
+    stats = timers.summary()['sleep']
+    assert stats['calls'] == 2
+    assert stats['max_us'] >= 2000
+    assert stats['total_ms'] >= 2
+
+
+def test_signal_starts_a_profile(tmp_path):
+    profiler = SamplingProfiler(rate=100, duration=0.05, output_dir=str(tmp_path))
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        install_signal_trigger(profiler)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        deadline = time.monotonic() + 2
+        while profiler.output_path is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+
+    assert profiler.output_path is not None
+    assert os.path.exists(profiler.output_path)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Notification Rules Tests
+========================
+
+Compiled rule tables: time windows, presence, escalation, validation,
+allocation-free evaluation, and the service and control socket using them.
+"""
+
+import time
+import tracemalloc
+
+import pytest
+
+from clock import SimulatedClock
+from control_server import ControlServer
+from doorbell_service import DoorbellService
+from notification_scheduler import Button
+from rf_event import RFEvent
+from rules import RuleSet
+
+PANIC, FRONT, MAILBOX = 1, 2, 3
+BUTTONS = {PANIC: Button(PANIC, 'Panic', 'critical'), FRONT: Button(FRONT, 'Front door'),
+           MAILBOX: Button(MAILBOX, 'Mailbox', 'low')}
+RULES = [
+    {'NAME': 'Panic always', 'BUTTONS': [PANIC], 'ACTION': 'notify'},
+    {'NAME': 'Quiet hours', 'FROM': '22:30', 'TO': '07:00', 'ACTION': 'suppress'},
+    {'NAME': 'Mailbox when home', 'BUTTONS': [MAILBOX], 'WHEN': 'home', 'ACTION': 'suppress'},
+    {'NAME': 'Weekend mornings', 'DAYS': ['sat', 'sun'], 'FROM': '07:00', 'TO': '10:00',
+     'ACTION': 'priority', 'PRIORITY': 'low'},
+    {'NAME': 'Insistent', 'BUTTONS': [FRONT], 'ACTION': 'escalate', 'PRESSES': 3, 'WITHIN': 60},
+]
+
+
+def at(day, hour, minute=0):
+    """Local timestamp in the week of Monday 2024-01-15 (day 0 = Monday)."""
+    return time.mktime((2024, 1, 15 + day, hour, minute, 0, 0, 0, -1))
+
+
+def outcome(rules, code, when):
+    decision = rules.evaluate(code, when)
+    return decision.outcome, decision.button.priority if decision.button else None
+
+
+def test_time_windows_and_exemptions():
+    rules = RuleSet(RULES, BUTTONS)
+    assert rules.slot_minutes == 30
+    assert outcome(rules, FRONT, at(0, 12)) == ('notified', 'normal')
+    # Quiet hours wrap past midnight, including Sunday night into Monday
+    assert outcome(rules, FRONT, at(0, 22, 30)) == ('suppressed', None)
+    assert outcome(rules, FRONT, at(6, 23, 59)) == ('suppressed', None)
+    assert outcome(rules, FRONT, at(0, 6, 59)) == ('suppressed', None)
+    assert outcome(rules, FRONT, at(0, 7)) == ('notified', 'normal')
+    # The panic button's first-match exemption beats quiet hours
+    assert outcome(rules, PANIC, at(2, 3)) == ('notified', 'critical')
+    # Weekend mornings only
+    assert outcome(rules, FRONT, at(5, 8)) == ('notified', 'low')
+    assert outcome(rules, FRONT, at(4, 8)) == ('notified', 'normal')
+
+
+def test_presence_mode_selects_rules():
+    rules = RuleSet(RULES, BUTTONS)
+    assert outcome(rules, MAILBOX, at(1, 12)) == ('suppressed', None)
+    rules.away = True
+    assert outcome(rules, MAILBOX, at(1, 12)) == ('notified', 'low')
+    assert rules.describe(at(1, 12)) == {'mode': 'away', 'slot_minutes': 30,
+                                         'active': ['Panic always', 'Insistent']}
+    # describe() runs on other threads and leaves evaluate()'s slot cache alone
+    rules.evaluate(FRONT, at(1, 12))
+    cached = (rules._slot, rules._slot_start, rules._slot_end)
+    assert rules.describe(at(6, 23))['active'] == ['Panic always', 'Quiet hours', 'Insistent']
+    assert (rules._slot, rules._slot_start, rules._slot_end) == cached
+
+
+def test_escalation_fires_through_suppression_and_resets():
+    rules = RuleSet(RULES, BUTTONS)
+    night = at(3, 2)
+    decisions = [rules.evaluate(FRONT, night + offset) for offset in (0, 20, 40, 50, 200)]
+    assert [decision.outcome for decision in decisions] == [
+        'suppressed', 'suppressed', 'escalated', 'suppressed', 'suppressed']
+    alert = decisions[2].button
+    assert alert.priority == 'critical' and 'PRESSED 3 TIMES' in alert.message
+    # Presses spread wider than the window never escalate
+    assert {rules.evaluate(FRONT, at(1, 12) + 45 * i).outcome for i in range(6)} == {'notified'}
+
+
+@pytest.mark.parametrize('entry', [
+    {'ACTION': 'mute'},
+    {'ACTION': 'suppress', 'BUTTONS': [99]},
+    {'ACTION': 'suppress', 'FROM': '25:00', 'TO': '07:00'},
+    {'ACTION': 'suppress', 'DAYS': ['someday']},
+    {'ACTION': 'suppress', 'WHEN': 'asleep'},
+    {'ACTION': 'priority'},
+    {'ACTION': 'escalate', 'PRESSES': 1},
+])
+def test_invalid_rules_are_rejected(entry):
+    with pytest.raises(ValueError):
+        RuleSet([entry], BUTTONS)
+
+
+def test_evaluation_does_not_allocate():
+    rules = RuleSet(RULES, BUTTONS)
+    presses = [(code, at(0, 0) + i * 97.0) for i in range(3000) for code in BUTTONS]
+    for code, when in presses[:100]:
+        rules.evaluate(code, when)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for code, when in presses:
+        rules.evaluate(code, when)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert after - before < 1024
+
+
+class Config:
+    def __init__(self, rules):
+        self.buttons = BUTTONS
+        self.rules = rules
+
+
+class Notifier:
+    def __init__(self):
+        self.sent = []
+
+    def notify_doorbell(self, button=None):
+        self.sent.append((button.code, button.priority))
+
+
+def test_service_applies_rules_and_control_switches_presence(tmp_path):
+    rules = RuleSet(RULES, BUTTONS)
+    clock = SimulatedClock(start_time=at(1, 23))
+    notifier = Notifier()
+    service = DoorbellService(Config(rules), notifier, rf_monitor=None, debounce_time=0.0,
+                              clock=clock, rules=rules)
+    service._handle_event(RFEvent(FRONT, 0.0))
+    service._handle_event(RFEvent(PANIC, 0.0))
+    clock.now = at(2, 12)
+    service._handle_event(RFEvent(MAILBOX, 0.0))
+    assert [outcome for _t, _c, _r, outcome in service.recent_events] == [
+        'suppressed', 'notified', 'suppressed']
+    assert notifier.sent == [(PANIC, 'critical')]
+
+    control = ControlServer(service, str(tmp_path / 'doorbell.sock'))
+    assert control.handle_command('away') == {'ok': True, 'mode': 'away'}
+    service._handle_event(RFEvent(MAILBOX, 0.0))
+    assert notifier.sent[-1] == (MAILBOX, 'low')
+    assert control.handle_command('status')['rules']['mode'] == 'away'
+
+    # Reloaded rules keep the presence mode
+    service.reload_config(Config(RuleSet(RULES, BUTTONS)))
+    assert service.rules.away is True
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Snapshot Tests
+==============
+
+Picking the newest camera frame, the streamed multipart body, and both
+notifiers sending it after the text alert to the local fake Bot API,
+without failed uploads counting against the alerts.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+import async_telegram_notifier
+from async_telegram_notifier import AsyncTelegramNotifier
+from circuit_breaker import CLOSED, OPEN
+from clock import SimulatedClock
+from fake_bot_api import FakeBotAPI
+from notification_scheduler import Button
+from snapshot import MultipartFile, latest_snapshot
+from telegram_notifier import TelegramNotifier
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def api():
+    server = FakeBotAPI(seed=1).start()
+    yield server
+    server.stop()
+
+
+def write_frame(directory, name, data, mtime):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_latest_snapshot_skips_partial_and_stale_files(tmp_path):
+    spool = str(tmp_path)
+    write_frame(spool, 'a.jpg', b'old', NOW - 30)
+    newest = write_frame(spool, 'b.JPEG', b'new', NOW - 5)
+    # Still being written under a temporary name, and not an image
+    write_frame(spool, '.c.jpg', b'partial', NOW - 1)
+    write_frame(spool, 'd.txt', b'notes', NOW)
+
+    assert latest_snapshot(spool, now=NOW) == newest
+    assert latest_snapshot(spool, max_age=2, now=NOW) is None
+    assert latest_snapshot(str(tmp_path / 'missing')) is None
+
+
+def test_multipart_body_is_streamed_in_chunks(tmp_path):
+    image = os.urandom(300_000)
+    path = write_frame(str(tmp_path), 'frame.jpg', image, NOW)
+    body = MultipartFile({'chat_id': '42'}, 'photo', path, chunk_size=16 * 1024)
+
+    pieces = list(body)
+    data = b''.join(pieces)
+    assert len(data) == len(body)
+    # The image is never held whole: every piece is at most one chunk
+    assert max(len(piece) for piece in pieces) == 16 * 1024
+    assert image in data
+    assert data.endswith(b'--\r\n')
+
+
+def test_photo_follows_the_text_alert(api, tmp_path):
+    image = os.urandom(200_000)
+    write_frame(str(tmp_path), 'frame.jpg', image, NOW - 1)
+    notifier = TelegramNotifier('123:test', '42', timeout=1, clock=SimulatedClock(NOW),
+                                base_url=api.base_url, snapshot_dir=str(tmp_path))
+
+    assert notifier.notify_doorbell(Button(1, 'Front door')) is True
+    # Uploaded from its own thread; close() waits for it
+    notifier.close()
+    assert len(api.messages) == 1 and len(api.photos) == 1
+    photo = api.photos[0]
+    assert photo['photo'] == image
+    assert (photo['chat_id'], photo['filename']) == ('42', 'frame.jpg')
+    assert photo['caption'].startswith('📷 Front door')
+    assert api.messages[0]['received_at'] < photo['received_at']
+
+
+def test_alert_is_sent_without_a_recent_snapshot(api, tmp_path):
+    write_frame(str(tmp_path), 'frame.jpg', b'jpeg', NOW - 3600)
+    notifier = TelegramNotifier('123:test', '42', timeout=1, clock=SimulatedClock(NOW),
+                                base_url=api.base_url, snapshot_dir=str(tmp_path))
+
+    assert notifier.notify_doorbell() is True
+    notifier.close()
+    assert len(api.messages) == 1
+    assert api.photos == []
+
+
+def test_failed_uploads_do_not_trip_the_alert_breaker(api, tmp_path):
+    write_frame(str(tmp_path), 'frame.jpg', b'jpeg', NOW - 1)
+    api.handle_sendPhoto = lambda headers, body: (500, {'ok': False, 'error_code': 500})
+    notifier = TelegramNotifier('123:test', '42', timeout=1, clock=SimulatedClock(NOW),
+                                base_url=api.base_url, snapshot_dir=str(tmp_path))
+
+    for _ in range(4):
+        assert notifier.notify_doorbell() is True
+    notifier.close()
+    assert len(api.messages) == 4
+    assert notifier.breaker.state == CLOSED
+    assert notifier.photo_breaker.state == OPEN
+
+
+def test_async_notifier_streams_the_photo_on_its_own_connection(api, tmp_path):
+    image = os.urandom(500_000)
+    write_frame(str(tmp_path), 'frame.jpg', image, NOW - 1)
+    notifier = AsyncTelegramNotifier('123:test', '42', timeout=1, clock=SimulatedClock(NOW),
+                                     base_url=api.base_url, snapshot_dir=str(tmp_path))
+
+    async def run():
+        try:
+            assert await notifier.notify_doorbell() is True
+            assert await notifier.notify_doorbell() is True
+        finally:
+            await notifier.close()
+
+    asyncio.run(run())
+    assert len(api.messages) == 2
+    assert [photo['photo'] == image for photo in api.photos] == [True, True]
+    assert notifier.connections_opened == 1
+    assert notifier._photos.connections_opened == 1
+
+
+def test_async_snapshot_deleted_before_upload_is_not_an_alert_failure(api, tmp_path,
+                                                                      monkeypatch):
+    write_frame(str(tmp_path), 'frame.jpg', b'jpeg', NOW - 1)
+
+    class DeletedFile(MultipartFile):
+        def __init__(self, *args):
+            raise FileNotFoundError("frame.jpg")
+
+    monkeypatch.setattr(async_telegram_notifier, 'MultipartFile', DeletedFile)
+    notifier = AsyncTelegramNotifier('123:test', '42', timeout=1, clock=SimulatedClock(NOW),
+                                     base_url=api.base_url, snapshot_dir=str(tmp_path))
+
+    async def run():
+        try:
+            for _ in range(4):
+                assert await notifier.notify_doorbell() is True
+                await asyncio.sleep(0.05)
+        finally:
+            await notifier.close()
+
+    asyncio.run(run())
+    assert len(api.messages) == 4
+    assert notifier.breaker.state == CLOSED
+    assert notifier.photo_breaker.state == OPEN
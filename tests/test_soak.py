@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Soak Harness Tests
+==================
+
+Runs a shortened soak through the full DoorbellService with a simulated clock.
+"""
+
+from clock import SimulatedClock
+from debouncer import Debouncer
+from soak_harness import check_results, run_soak
+
+
+def test_debouncer_uses_injected_clock():
+    clock = SimulatedClock(start_time=1000.0)
+    debouncer = Debouncer(debounce_time=2.0, clock=clock)
+
+    assert debouncer.should_allow()
+    clock.advance(1.0)
+    assert not debouncer.should_allow()
+    clock.advance(1.0)
+    assert debouncer.should_allow()
+
+
+def test_short_soak_passes_checks():
+    results = run_soak(days=0.05, press_interval=120.0, noise_interval=20.0, seed=1)
+
+    assert results['expected_notifications'] > 0
+    assert check_results(results) == []
+    # Simulated time must run far faster than real time
+    assert results['speedup'] > 100
+
+
+def test_recorded_traffic_is_replayed(tmp_path):
+    recording = tmp_path / "capture.txt"
+    recording.write_text("# offset code\n0.0 42\n0.04 42\n0.08 42\n5.0 7\n")
+
+    results = run_soak(days=60.0 / 86400, button_code=42, recording=str(recording),
+                       checkpoints=2)
+
+    # The 6 second recording loops ten times in one simulated minute
+    assert results['notifications'] == 10
+    assert results['expected_notifications'] is None
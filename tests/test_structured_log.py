@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Structured Logging Tests
+========================
+"""
+
+import io
+import json
+import logging
+import sys
+import threading
+import time
+
+import pytest
+
+from clock import SimulatedClock
+from structured_log import RateLimitFilter, fields, setup_logging
+
+
+class BlockedStream(io.StringIO):
+    """Stream whose writes hang until released, like a backed-up journald pipe."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(5)
+        return super().write(text)
+
+
+@pytest.fixture
+def logger_name(request):
+    return f'test.{request.node.originalname}'
+
+
+@pytest.mark.parametrize('fmt, expected', [
+    ('logfmt', 'level=info logger={name} msg="Notification sent" code=4273816 latency_ms=85.2'),
+    ('json', '"level": "info", "logger": "{name}", "msg": "Notification sent", '
+             '"code": 4273816, "latency_ms": 85.2'),
+])
+def test_records_carry_event_fields(logger_name, fmt, expected):
+    stream = io.StringIO()
+    logs = setup_logging(fmt, stream=stream, logger_name=logger_name)
+    logging.getLogger(logger_name).info("Notification %s", 'sent',
+                                        extra=fields(code=4273816, latency_ms=85.2))
+    logs.stop()
+
+    line = stream.getvalue().strip()
+    assert expected.format(name=logger_name) in line
+    if fmt == 'json':
+        assert json.loads(line)['code'] == 4273816
+
+
+def test_blocked_stream_never_blocks_the_caller(logger_name):
+    stream = BlockedStream()
+    logs = setup_logging('logfmt', stream=stream, queue_size=10, logger_name=logger_name)
+    log = logging.getLogger(logger_name)
+
+    start = time.monotonic()
+    for i in range(200):
+        log.info("frame %d", i)
+    elapsed = time.monotonic() - start
+
+    stream.release.set()
+    while not logs.handler.queue.empty():
+        time.sleep(0.01)
+    log.info("after")
+    logs.stop()
+
+    assert elapsed < 0.5
+    assert logs.dropped >= 180
+    # The first record that gets through after the backlog reports the drops
+    assert 'dropped_before=' in stream.getvalue().splitlines()[-1]
+
+
+def test_disabled_debug_is_never_formatted(logger_name):
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("debug record was formatted")
+
+    stream = io.StringIO()
+    logs = setup_logging('logfmt', level='INFO', stream=stream, logger_name=logger_name)
+    logging.getLogger(logger_name).debug("frame %s", Expensive())
+    logs.stop()
+
+    assert stream.getvalue() == ''
+
+
+def test_rate_limit_suppresses_repeated_warnings():
+    clock = SimulatedClock()
+    limit = RateLimitFilter(burst=3, interval=60.0, clock=clock)
+
+    def warn(text):
+        return logging.LogRecord('doorbell.telegram', logging.WARNING, __file__, 1,
+                                 "Failed to send notification: %s", (text,), None)
+
+    allowed = [limit.filter(warn(f"timeout {i}")) for i in range(20)]
+    assert allowed.count(True) == 3
+    # Other levels and templates are not limited
+    assert limit.filter(logging.LogRecord('doorbell', logging.INFO, __file__, 1, "sent", (), None))
+
+    clock.advance(20.0)
+    record = warn("timeout again")
+    assert limit.filter(record)
+    assert record.suppressed == 17
+
+
+def test_rate_limit_is_shared_correctly_between_threads():
+    limit = RateLimitFilter(burst=3, interval=60.0, clock=SimulatedClock(), max_keys=8)
+    errors = []
+
+    def hammer(thread):
+        try:
+            for i in range(2000):
+                # One shared template, plus enough others to keep evicting
+                for msg in ("shared", f"thread {thread} message {i % 16}"):
+                    limit.filter(logging.LogRecord('doorbell', logging.WARNING, __file__, 1,
+                                                   msg, (), None))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(thread,)) for thread in range(4)]
+    # Switch threads as often as possible, to interleave inside filter()
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert len(limit._buckets) <= 8
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Telegram Command Tests
+======================
+
+Runs the getUpdates command channel against the local fake Bot API.
+"""
+
+import time
+
+import pytest
+
+from clock import SimulatedClock
+from doorbell_service import DoorbellService
+from fake_bot_api import FakeBotAPI
+from notification_scheduler import Button
+from rf_event import RFEvent
+from rules import RuleSet
+from telegram_commands import TelegramCommands, parse_duration
+from telegram_notifier import TelegramNotifier
+
+CHAT_ID = 42
+
+
+class Config:
+    def __init__(self):
+        self.buttons = {7: Button(7, 'Front door')}
+        self.rules = RuleSet([{'ACTION': 'suppress', 'WHEN': 'home'}], self.buttons)
+
+
+@pytest.fixture
+def api():
+    server = FakeBotAPI(seed=1).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def channel(api):
+    notifier = TelegramNotifier('123:test', str(CHAT_ID), timeout=1, base_url=api.base_url)
+    config = Config()
+    service = DoorbellService(config, notifier, rf_monitor=None, debounce_time=0.0,
+                              clock=SimulatedClock(start_time=1000.0), rules=config.rules)
+    commands = TelegramCommands(notifier, service, CHAT_ID, poll_timeout=2, retry_delay=0.05)
+    commands.start()
+    yield api, service, commands, notifier
+    # Abandon the idle long poll rather than wait it out
+    commands.stop(timeout=0)
+    notifier.close()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_parse_duration():
+    assert parse_duration('90s') == 90
+    assert parse_duration('1h30m') == 5400
+    with pytest.raises(ValueError):
+        parse_duration('soon')
+
+
+def test_commands_change_live_state_and_reply(channel):
+    api, service, commands, _notifier = channel
+    service._handle_event(RFEvent(7, 0.0))
+
+    api.push_message('/mute', CHAT_ID)
+    wait_for(lambda: service.muted)
+    api.push_message('/status@DoorbellBot', CHAT_ID)
+    api.push_message('/away', CHAT_ID)
+    wait_for(lambda: commands.handled == 3)
+    assert service.rules.away is True
+    replies = [message['text'] for message in api.messages]
+    assert replies[0] == '🔕 Muted until /unmute'
+    assert 'Doorbell muted' in replies[1] and 'Last code: 7' in replies[1]
+    assert replies[2] == '🏠 Presence: away'
+
+    api.push_message('/last', CHAT_ID)
+    api.push_message('/unmute', CHAT_ID)
+    wait_for(lambda: not service.muted)
+    wait_for(lambda: len(api.messages) == 5)
+    assert api.messages[3]['text'].endswith('7 suppressed')
+    assert not service.paused
+
+
+def test_other_chats_are_ignored(channel):
+    api, service, commands, _notifier = channel
+    api.push_message('/mute', 666)
+    api.push_message('/help', CHAT_ID)
+    wait_for(lambda: commands.handled == 1)
+    assert commands.rejected == 1
+    assert not service.muted
+    assert [message['chat_id'] for message in api.messages] == [str(CHAT_ID)]
+
+
+def test_timed_mute_expires(channel):
+    api, service, commands, _notifier = channel
+    api.push_message('/mute 1s', CHAT_ID)
+    wait_for(lambda: service.muted)
+    wait_for(lambda: not service.muted, timeout=4)
+    wait_for(lambda: len(api.messages) == 2)
+    assert api.messages[1]['text'] == '🔔 Mute expired; notifications on'
+
+
+class TextNotifier:
+    def __init__(self):
+        self.texts = []
+
+    def send_text(self, text):
+        self.texts.append(text)
+
+
+def test_mute_expiry_keeps_a_later_control_socket_pause():
+    clock = SimulatedClock(start_time=1000.0)
+    notifier = TextNotifier()
+    service = DoorbellService(Config(), notifier, rf_monitor=None, debounce_time=0.0,
+                              clock=clock)
+    commands = TelegramCommands(notifier, service, CHAT_ID, clock=clock)
+    assert commands.run_command('mute', '30m') == '🔕 Muted for 30m'
+    assert 'muted (30m left)' in commands.run_command('status')
+    service._handle_event(RFEvent(7, clock.monotonic()))
+    assert service.recent_events[-1][3] == 'muted'
+
+    commands.control.handle_command('pause')
+    clock.advance(1800.0)
+    commands._check_mute()
+    assert not service.muted
+    assert service.paused
+    assert notifier.texts == ['🔔 Mute expired, but still paused from the control socket']
+
+
+def test_notifications_are_not_held_up_by_the_long_poll(channel):
+    api, _service, commands, notifier = channel
+    # Let the poller settle into an idle long poll on the shared session
+    wait_for(lambda: commands.offset is None and api.requests_seen >= 1)
+    time.sleep(0.1)
+    started = time.monotonic()
+    assert notifier.notify_doorbell(Button(7, 'Front door')) is True
+    assert time.monotonic() - started < 0.5
+
+
+def test_invalid_mute_duration_leaves_notifications_on(channel):
+    api, service, commands, _notifier = channel
+    api.push_message('/mute 1 hour', CHAT_ID)
+    wait_for(lambda: commands.handled == 1)
+    assert not service.muted
+    assert commands.muted_until is None
+    wait_for(lambda: len(api.messages) == 1)
+    assert api.messages[0]['text'].startswith('⚠️ not a duration')
+
+
+def test_commands_from_before_startup_are_skipped(api):
+    api.push_message('/mute', CHAT_ID, date=time.time() - 3600)
+    api.push_message('/help', CHAT_ID)
+    notifier = TelegramNotifier('123:test', str(CHAT_ID), timeout=1, base_url=api.base_url)
+    config = Config()
+    service = DoorbellService(config, notifier, rf_monitor=None)
+    commands = TelegramCommands(notifier, service, CHAT_ID, poll_timeout=1).start()
+    try:
+        wait_for(lambda: commands.handled == 1)
+    finally:
+        commands.stop()
+        notifier.close()
+    assert not service.muted
+    assert commands.offset == 3
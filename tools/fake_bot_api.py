@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Fake Telegram Bot API
+=====================
+
+Local stand-in for the Telegram Bot API, for tests and benchmarks that must
+not hit the real service.
+
+Faults can be configured (and changed while running):
+- latency: seconds to wait before answering each request
+- error_rate: fraction of requests answered with HTTP 500
+- rate_limit_rate: fraction of requests answered with HTTP 429 (retry_after)
+- reset_rate: fraction of connections reset without a response
+- outage: when True, every connection is reset (simulates losing the internet)
+- blackhole: when True, requests are read but never answered (simulates a
+  dead route where the client only gives up at its timeout)
+
+push_message() queues an incoming chat message for getUpdates long polls.
+
+Point TelegramNotifier at it with base_url=server.base_url.
+
+Usage (standalone):
+    python3 tools/fake_bot_api.py --port 8081 --latency 0.2 --error-rate 0.1
+"""
+
+import argparse
+import json
+import random
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _BotAPIHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API, so pooled client connections get reused
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body in one segment; avoids Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+
+    def do_POST(self):
+        api = self.server.api
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        # Path looks like /bot<token>/<method>
+        parts = self.path.strip('/').split('/')
+        method = parts[-1] if len(parts) >= 2 else ''
+
+        if api.blackhole:
+            # Hold the connection open without answering until stop()
+            api.stopping.wait()
+            self.close_connection = True
+            return
+
+        fault = api.choose_fault()
+        # During an outage connections fail straight away; otherwise add latency
+        if api.latency and not api.outage:
+            time.sleep(api.latency)
+        if fault == 'reset':
+            self._reset_connection()
+            return
+        if fault == 'error':
+            self._reply(500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'})
+            return
+        if fault == 'rate_limit':
+            self._reply(429, {'ok': False, 'error_code': 429,
+                              'description': 'Too Many Requests: retry later',
+                              'parameters': {'retry_after': api.retry_after}})
+            return
+
+        handler = getattr(api, f'handle_{method}', None)
+        if handler is None:
+            self._reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+            return
+        status, payload = handler(self.headers, body)
+        self._reply(status, payload)
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _reset_connection(self):
+        # SO_LINGER with zero timeout makes close() send a TCP RST
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        self.close_connection = True
+
+
+class FakeBotAPI:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, reset_rate=0.0, retry_after=1, seed=None):
+        """
+        Initialize the fake Bot API server (call start() to begin serving).
+
+        Args:
+            host (str): Address to bind (default: 127.0.0.1)
+            port (int): Port to bind (default: 0, pick a free port)
+            latency (float): Seconds to delay every response
+            error_rate (float): Fraction of requests answered with HTTP 500
+            rate_limit_rate (float): Fraction of requests answered with HTTP 429
+            reset_rate (float): Fraction of connections reset without a response
+            retry_after (int): retry_after seconds reported in 429 responses
+            seed (int): Random seed for reproducible fault injection
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.reset_rate = reset_rate
+        self.retry_after = retry_after
+        self.outage = False
+        self.blackhole = False
+        self.stopping = threading.Event()
+        self.messages = []
+        self.photos = []
+        self.updates = []
+        self.requests_seen = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._updates_ready = threading.Condition(self._lock)
+        self._server = ThreadingHTTPServer((host, port), _BotAPIHandler)
+        self._server.daemon_threads = True
+        self._server.api = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Base URL to pass to TelegramNotifier (e.g. http://127.0.0.1:54321)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving on a background thread."""
+        # Short poll interval so stop() returns quickly in tests
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,),
+                                        name='fake-bot-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        self.stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def choose_fault(self):
+        """
+        Pick the fault (if any) to apply to the next request.
+
+        Returns:
+            str or None: 'reset', 'error', 'rate_limit' or None
+        """
+        with self._lock:
+            self.requests_seen += 1
+            if self.outage:
+                return 'reset'
+            roll = self._random.random()
+        for fault, rate in (('reset', self.reset_rate), ('error', self.error_rate),
+                            ('rate_limit', self.rate_limit_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def handle_sendMessage(self, headers, body):
+        """
+        Record a sendMessage call.
+
+        Returns:
+            tuple: (HTTP status, JSON payload)
+        """
+        fields = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+        if 'chat_id' not in fields or 'text' not in fields:
+            return 400, {'ok': False, 'error_code': 400,
+                         'description': 'Bad Request: message text is empty'}
+        with self._lock:
+            self.messages.append({'chat_id': fields['chat_id'], 'text': fields['text'],
+                                  'received_at': time.monotonic()})
+            message_id = len(self.messages)
+        return 200, {'ok': True, 'result': {'message_id': message_id,
+                                            'chat': {'id': fields['chat_id']},
+                                            'text': fields['text']}}
+
+    def handle_sendPhoto(self, headers, body):
+        """
+        Record a sendPhoto call (multipart/form-data upload).
+
+        Returns:
+            tuple: (HTTP status, JSON payload)
+        """
+        content_type = headers.get('Content-Type', '')
+        _, _, boundary = content_type.partition('boundary=')
+        if not content_type.startswith('multipart/form-data') or not boundary:
+            return 400, {'ok': False, 'error_code': 400,
+                         'description': 'Bad Request: there is no photo in the request'}
+        fields = {}
+        filename = None
+        delimiter = b'--' + boundary.strip('"').encode('ascii')
+        for part in body.split(delimiter)[1:]:
+            if part.startswith(b'--'):
+                break
+            head, _, content = part[2:].partition(b'\r\n\r\n')
+            disposition = head.decode('utf-8').split('\r\n')[0]
+            name = disposition.split('name="', 1)[1].split('"', 1)[0]
+            if 'filename="' in disposition:
+                filename = disposition.split('filename="', 1)[1].split('"', 1)[0]
+            # Every part ends with the CRLF before the next delimiter
+            fields[name] = content[:-2]
+        if 'chat_id' not in fields or 'photo' not in fields:
+            return 400, {'ok': False, 'error_code': 400,
+                         'description': 'Bad Request: there is no photo in the request'}
+        chat_id = fields['chat_id'].decode('utf-8')
+        with self._lock:
+            self.photos.append({'chat_id': chat_id,
+                                'caption': fields.get('caption', b'').decode('utf-8'),
+                                'filename': filename, 'photo': fields['photo'],
+                                'received_at': time.monotonic()})
+            message_id = len(self.messages) + len(self.photos)
+        return 200, {'ok': True, 'result': {'message_id': message_id, 'chat': {'id': chat_id}}}
+
+    def push_message(self, text, chat_id, date=None):
+        """
+        Queue an incoming chat message, as if a user had sent it to the bot.
+
+        Args:
+            text (str): Message text
+            chat_id (int): Chat the message comes from
+            date (float): Unix time the message was sent (default: now)
+
+        Returns:
+            dict: The queued update
+        """
+        with self._updates_ready:
+            update_id = len(self.updates) + 1
+            update = {'update_id': update_id,
+                      'message': {'message_id': update_id, 'date': int(date or time.time()),
+                                  'chat': {'id': chat_id, 'type': 'private'}, 'text': text}}
+            self.updates.append(update)
+            self._updates_ready.notify_all()
+        return update
+
+    def handle_getUpdates(self, headers, body):
+        """
+        Answer a getUpdates long poll: wait up to timeout seconds for updates
+        at or after offset.
+
+        Returns:
+            tuple: (HTTP status, JSON payload)
+        """
+        fields = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+        offset = int(fields.get('offset', 0))
+        deadline = time.monotonic() + float(fields.get('timeout', 0))
+        with self._updates_ready:
+            while True:
+                pending = [update for update in self.updates if update['update_id'] >= offset]
+                remaining = deadline - time.monotonic()
+                if pending or remaining <= 0 or self.stopping.is_set():
+                    break
+                # Short waits so stop() isn't held up by a long poll
+                self._updates_ready.wait(min(remaining, 0.05))
+        return 200, {'ok': True, 'result': pending}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Telegram Bot API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds per response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of HTTP 500s")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of HTTP 429s")
+    parser.add_argument('--reset-rate', type=float, default=0.0, help="Fraction of connection resets")
+    args = parser.parse_args()
+
+    server = FakeBotAPI(args.host, args.port, latency=args.latency, error_rate=args.error_rate,
+                        rate_limit_rate=args.rate_limit_rate, reset_rate=args.reset_rate)
+    print(f"Fake Bot API listening on {server.base_url} (set TELEGRAM_API_URL to use it)")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
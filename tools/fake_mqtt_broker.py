@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Fake MQTT Broker
+================
+
+Local stand-in for an MQTT broker (Mosquitto etc.), for tests and
+benchmarks of MQTTPublisher. Speaks just enough MQTT 3.1.1: CONNECT,
+PUBLISH (QoS 0 and 1), PINGREQ and DISCONNECT.
+
+Behaviour can be configured (and changed while running):
+- hold_acks: when True, PUBACKs are held back and then sent together once
+  it is cleared (tests pipelining and batched acknowledgements)
+- refuse: CONNACK return code to answer with (0 accepts)
+- disconnect_clients(): drop every connection (simulates a broker restart
+  or network blip)
+
+Received messages are in .messages; .max_unacked is the most QoS 1
+publishes a client had outstanding at once.
+
+Usage (standalone):
+    python3 tools/fake_mqtt_broker.py --port 1883
+"""
+
+import argparse
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from mqtt_publisher import (CONNACK, CONNECT, DISCONNECT, PINGREQ, PINGRESP, PUBACK, PUBLISH,
+                            MQTTError, PacketReader, make_packet)
+
+
+class _MQTTHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        broker = self.server.broker
+        sock = self.request
+        sock.settimeout(0.02)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        broker.register(sock)
+        reader = PacketReader()
+        held = []
+        try:
+            while not broker.stopping.is_set():
+                if held and not broker.hold_acks:
+                    sock.sendall(b''.join(held))
+                    broker.acks_released(len(held))
+                    held = []
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                if not data:
+                    return
+                replies = []
+                for kind, flags, body in reader.feed(data):
+                    if kind == CONNECT:
+                        replies.append(make_packet(CONNACK, 0, bytes([0, broker.refuse])))
+                        broker.connects += 1
+                    elif kind == PUBLISH:
+                        packet_id = broker.record(flags, body)
+                        if packet_id is not None:
+                            ack = make_packet(PUBACK, 0, struct.pack('!H', packet_id))
+                            (held if broker.hold_acks else replies).append(ack)
+                            if broker.hold_acks:
+                                broker.note_unacked(len(held))
+                    elif kind == PINGREQ:
+                        replies.append(make_packet(PINGRESP, 0))
+                    elif kind == DISCONNECT:
+                        return
+                if replies:
+                    sock.sendall(b''.join(replies))
+        except (OSError, MQTTError):
+            return
+        finally:
+            broker.unregister(sock)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    # Lets a test restart the broker on the same port straight away
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class FakeMQTTBroker:
+    def __init__(self, host='127.0.0.1', port=0, hold_acks=False):
+        """
+        Initialize the fake broker (call start() to begin serving).
+
+        Args:
+            host (str): Address to bind (default: 127.0.0.1)
+            port (int): Port to bind (default: 0, pick a free port)
+            hold_acks (bool): Hold PUBACKs until hold_acks is cleared (default: False)
+        """
+        self.hold_acks = hold_acks
+        self.refuse = 0
+        self.stopping = threading.Event()
+        self.messages = []
+        self.connects = 0
+        self.max_unacked = 0
+        self.ack_batches = []
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _MQTTHandler)
+        self._server.broker = self
+        self._thread = None
+
+    @property
+    def address(self):
+        """(host, port) to pass to MQTTPublisher."""
+        return self._server.server_address[:2]
+
+    def start(self):
+        """Start serving on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,),
+                                        name='fake-mqtt-broker', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving, drop clients and close the listening socket."""
+        self.stopping.set()
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.disconnect_clients()
+        self._server.server_close()
+
+    def disconnect_clients(self):
+        """Drop every client connection without a DISCONNECT."""
+        with self._lock:
+            clients = list(self._clients)
+        for sock in clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def register(self, sock):
+        with self._lock:
+            self._clients.add(sock)
+
+    def unregister(self, sock):
+        with self._lock:
+            self._clients.discard(sock)
+
+    def record(self, flags, body):
+        """
+        Record a PUBLISH.
+
+        Returns:
+            int or None: Packet id to acknowledge (None for QoS 0)
+        """
+        qos = (flags >> 1) & 0x03
+        (topic_length,) = struct.unpack_from('!H', body)
+        topic = body[2:2 + topic_length].decode('utf-8')
+        offset = 2 + topic_length
+        packet_id = None
+        if qos:
+            (packet_id,) = struct.unpack_from('!H', body, offset)
+            offset += 2
+        with self._lock:
+            self.messages.append({'topic': topic, 'payload': body[offset:], 'qos': qos,
+                                  'dup': bool(flags & 0x08), 'received_at': time.monotonic()})
+        return packet_id
+
+    def note_unacked(self, count):
+        with self._lock:
+            self.max_unacked = max(self.max_unacked, count)
+
+    def acks_released(self, count):
+        with self._lock:
+            self.ack_batches.append(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake MQTT broker")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1883)
+    args = parser.parse_args()
+
+    broker = FakeMQTTBroker(args.host, args.port)
+    host, port = broker.address
+    print(f"Fake MQTT broker listening on {host}:{port} (set MQTT_HOST/MQTT_PORT to use it)")
+    broker.start()
+    try:
+        while True:
+            time.sleep(1)
+            if broker.messages:
+                with broker._lock:
+                    messages, broker.messages = broker.messages, []
+                for message in messages:
+                    print(f"{message['topic']}: {message['payload'].decode('utf-8', 'replace')}")
+    except KeyboardInterrupt:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()